@@ -0,0 +1,220 @@
+"""
+Per-day rollups (the AnalyticsRollup table) for the admin analytics
+endpoints, so the dashboard reads a few hundred counter rows instead of
+loading every Question and Lead into Python.
+
+Metrics, each counted on the source row's createdAt day:
+    questions             dimension = issueType
+    leads                 dimension = status
+    contractor_leads      dimension = contractorId
+    reports               dimension = ''
+    reports_paid          dimension = '' (is_paid)
+and conversions, counted on the day the lead converted (Lead.convertedAt),
+so "conversions in March" means leads converted in March, whenever they
+came in:
+    leads_converted       dimension = ''
+    contractor_converted  dimension = contractorId
+
+Kept current incrementally: mapper events on Question, Lead and
+InspectionReport turn every insert / relevant update / delete into +1/-1
+upserts on the flushing connection, so counters commit or roll back with
+the write that caused them. Bulk Core statements (query.update/delete)
+bypass mapper events — reconcile() recomputes everything from the source
+tables with GROUP BY queries and replaces the rollup rows; run it nightly
+with `python reconcile_analytics.py`. seed() does the first reconcile on
+an empty table, once across all workers.
+"""
+
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import event, func, inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, AnalyticsRollup, Question, Lead, InspectionReport
+
+
+def _question_keys(issueType):
+    return [('questions', issueType or 'unknown')]
+
+
+def _lead_keys(status, contractorId):
+    return [('leads', status or 'pending'), ('contractor_leads', contractorId or '')]
+
+
+def _conversion_keys(status, contractorId, convertedAt):
+    if status != 'converted' or convertedAt is None:
+        return []
+    return [('leads_converted', ''), ('contractor_converted', contractorId or '')]
+
+
+def _report_keys(is_paid):
+    return [('reports', ''), ('reports_paid', '')] if is_paid else [('reports', '')]
+
+
+# (model, attributes the keys depend on, key function taking them by name,
+# the timestamp attribute whose day the keys are counted on)
+TRACKED = (
+    (Question, ('issueType',), _question_keys, 'createdAt'),
+    (Lead, ('status', 'contractorId'), _lead_keys, 'createdAt'),
+    (Lead, ('status', 'contractorId', 'convertedAt'), _conversion_keys, 'convertedAt'),
+    (InspectionReport, ('is_paid',), _report_keys, 'createdAt'),
+)
+
+# Marker row seed() claims so only one process seeds an empty table
+_SEEDED = (date(1970, 1, 1), '_seeded', '')
+
+
+def _day(value):
+    if value is None:
+        return datetime.utcnow().date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def bump(connection, deltas):
+    """Apply {(day, metric, dimension): delta} as upserts on connection."""
+    rows = [{'day': d, 'metric': m, 'dimension': dim, 'total': n}
+            for (d, m, dim), n in deltas.items() if n]
+    if not rows:
+        return
+    insert = (postgresql if connection.dialect.name == 'postgresql' else sqlite).insert
+    stmt = insert(AnalyticsRollup.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['day', 'metric', 'dimension'],
+        set_={'total': AnalyticsRollup.__table__.c.total + stmt.excluded.total},
+    )
+    connection.execute(stmt, rows)
+
+
+def _old_values(state, attrs):
+    values = {}
+    for a in attrs:
+        hist = state.attrs[a].history
+        if hist.deleted:
+            values[a] = hist.deleted[0]
+        elif hist.unchanged:
+            values[a] = hist.unchanged[0]
+        else:
+            values[a] = None
+    return values
+
+
+def _listen(model, attrs, keys_fn, day_attr):
+    watched = attrs if day_attr in attrs else attrs + (day_attr,)
+
+    def keyed(values):
+        day = _day(values[day_attr])
+        return [(day, m, d) for m, d in keys_fn(**{a: values[a] for a in attrs})]
+
+    def current(target):
+        return keyed({a: getattr(target, a) for a in watched})
+
+    @event.listens_for(model, 'after_insert')
+    def _after_insert(mapper, connection, target):
+        bump(connection, Counter({k: 1 for k in current(target)}))
+
+    @event.listens_for(model, 'after_update')
+    def _after_update(mapper, connection, target):
+        state = sa_inspect(target)
+        if not any(state.attrs[a].history.has_changes() for a in watched):
+            return
+        deltas = Counter()
+        for k in keyed(_old_values(state, watched)):
+            deltas[k] -= 1
+        for k in current(target):
+            deltas[k] += 1
+        bump(connection, deltas)
+
+    @event.listens_for(model, 'after_delete')
+    def _after_delete(mapper, connection, target):
+        bump(connection, Counter({k: -1 for k in current(target)}))
+
+
+for _model, _attrs, _keys_fn, _day_attr in TRACKED:
+    _listen(_model, _attrs, _keys_fn, _day_attr)
+
+
+def compute(since=None):
+    """Rollup totals recomputed from the source tables — one GROUP BY per
+    tracker, keyed exactly like the incremental events."""
+    totals = Counter()
+    for model, attrs, keys_fn, day_attr in TRACKED:
+        stamp = getattr(model, day_attr)
+        day = func.date(stamp)
+        cols = [getattr(model, a) for a in attrs]
+        q = db.session.query(day, *cols, func.count()).group_by(day, *cols)
+        if since:
+            q = q.filter(stamp >= since)
+        for row in q.all():
+            d, values, n = _day(row[0]), row[1:-1], row[-1]
+            for m, dim in keys_fn(**dict(zip(attrs, values))):
+                totals[(d, m, dim)] += n
+    return totals
+
+
+def reconcile(since=None):
+    """Replace rollup rows (all, or from `since` on) with freshly computed
+    totals in one transaction. Returns how many counters were corrected."""
+    since_day = _day(since) if since else None
+    fresh = compute(since=datetime.combine(since_day, datetime.min.time()) if since_day else None)
+
+    table = AnalyticsRollup.__table__
+    q = db.session.query(AnalyticsRollup.day, AnalyticsRollup.metric,
+                         AnalyticsRollup.dimension, AnalyticsRollup.total).filter(
+        AnalyticsRollup.metric != _SEEDED[1])
+    if since_day:
+        q = q.filter(AnalyticsRollup.day >= since_day)
+    current = {(r.day, r.metric, r.dimension): r.total for r in q.all()}
+    drift = sum(1 for k in set(fresh) | set(current) if fresh.get(k, 0) != current.get(k, 0))
+
+    delete = table.delete().where(table.c.metric != _SEEDED[1])
+    if since_day:
+        delete = delete.where(table.c.day >= since_day)
+    db.session.execute(delete)
+    rows = [{'day': d, 'metric': m, 'dimension': dim, 'total': n}
+            for (d, m, dim), n in fresh.items() if n]
+    if rows:
+        db.session.execute(table.insert(), rows)
+    db.session.commit()
+    return drift
+
+
+def seed():
+    """
+    First-boot seed of an empty rollup table, run by the app's startup
+    migrations — which every gunicorn worker runs at once. The seed is
+    claimed by inserting the _SEEDED marker row with ON CONFLICT DO NOTHING
+    in the same transaction as the reconcile: the worker whose insert lands
+    seeds; the others insert nothing (on Postgres they wait for the winner
+    to commit first) and skip. Returns True if this process seeded.
+    """
+    d, m, dim = _SEEDED
+    connection = db.session.connection()
+    insert = (postgresql if connection.dialect.name == 'postgresql' else sqlite).insert
+    claimed = connection.execute(insert(AnalyticsRollup.__table__)
+                                 .values(day=d, metric=m, dimension=dim, total=1)
+                                 .on_conflict_do_nothing(index_elements=['day', 'metric', 'dimension']))
+    if claimed.rowcount != 1:
+        db.session.rollback()
+        return False
+    reconcile()
+    return True
+
+
+def totals(metric, start=None, end=None):
+    """{dimension: count} for one metric, optionally over [start, end) days."""
+    q = db.session.query(AnalyticsRollup.dimension, func.sum(AnalyticsRollup.total)).filter(
+        AnalyticsRollup.metric == metric)
+    if start:
+        q = q.filter(AnalyticsRollup.day >= start)
+    if end:
+        q = q.filter(AnalyticsRollup.day < end)
+    return {dim: int(n) for dim, n in q.group_by(AnalyticsRollup.dimension).all() if n}
+
+
+def total(metric, start=None, end=None):
+    return sum(totals(metric, start, end).values())
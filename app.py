@@ -1,19 +1,21 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from flask import Flask, request, jsonify, session, redirect
+from flask import Flask, request, jsonify, session, redirect, g, Response
 from flask_cors import CORS
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_bcrypt import Bcrypt
 from werkzeug.utils import secure_filename
-from models import db, User, InspectionReport, CareEvent, Conversation, Question, Contractor, Lead, Analytics, WarrantyDocument, ReportWarranty, WarrantyQuery
+from sqlalchemy import func, case, or_, and_
+from sqlalchemy.orm import load_only, joinedload, undefer
+from models import db, User, InspectionReport, CareEvent, Conversation, Question, Contractor, ContractorServiceArea, Lead, Analytics, AnalyticsRollup, WarrantyDocument, ReportWarranty, WarrantyQuery, RealtorReport, RealtorBatch, CostJob, ExportJob
+from compressed_text import CompressedText
 from utils import (
     extract_text_from_pdf,
-    fetch_report_text_from_url,
+    fetch_report_html,
+    report_text_from_html,
     generate_summary_from_report,
-    generate_structured_analysis,
-    generate_realtor_issues_report,
-    price_findings_with_ai,
+    price_findings,
     fetch_report_json,
     extract_appliance_profile,
     extract_appliance_profile_from_json,
@@ -23,6 +25,23 @@ from utils import (
     generate_punchlist,
     send_contractor_email
 )
+from partner_api import authenticate_partner, take_tokens, refund_tokens, record_usage, flush_usage
+from cost_lookup import parse_cost_range
+import partner_api
+import cost_prewarm
+import cost_jobs
+import export_jobs
+import pdf_cache
+import blog_cache
+import report_search
+import report_findings
+import analytics_rollup
+import contractor_matching
+import care_rules
+import email_queue
+import realtor_reports
+import extracted_findings
+from bulk_export import parse_day
 from warranty_utils import (
     extract_warranty_text,
     parse_warranty_coverage,
@@ -30,7 +49,9 @@ from warranty_utils import (
 )
 import uuid
 import os
+import base64
 import threading
+import atexit
 from concurrent.futures import ThreadPoolExecutor
 import stripe
 stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
@@ -113,54 +134,205 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated
 
+ADMIN_PAGE_SIZE = 100
+ADMIN_MAX_PAGE_SIZE = 500
+
+
+def _encode_cursor(created_at, row_id):
+    """
+    Opaque keyset cursor for (createdAt, id) DESC pagination. A NULL
+    createdAt is encoded explicitly ('-'), not as an empty string — an empty
+    timestamp used to make _decode_cursor fail, so a page ending on a row
+    without createdAt ended the listing with a 400.
+    """
+    raw = f"{created_at.isoformat() if created_at else '-'}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    """Inverse of _encode_cursor -> (createdAt or None, id). Raises ValueError on junk."""
+    try:
+        created, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|', 1)
+        return (None if created in ('-', '') else datetime.fromisoformat(created)), row_id
+    except Exception:
+        raise ValueError('bad cursor')
+
+
+def _newest_first(created_col, id_col):
+    """ORDER BY for keyset pages: createdAt DESC with NULLs explicitly last
+    (Postgres puts them first by default, SQLite last), then id DESC."""
+    return created_col.desc().nulls_last(), id_col.desc()
+
+
+def _after_cursor(created_col, id_col, cursor):
+    """WHERE clause for the rows after a _decode_cursor() position in
+    _newest_first order. Raises ValueError on a bad cursor."""
+    c_created, c_id = _decode_cursor(cursor)
+    if c_created is None:
+        return and_(created_col.is_(None), id_col < c_id)
+    return or_(created_col < c_created,
+               and_(created_col == c_created, id_col < c_id),
+               created_col.is_(None))
+
+
+def _page_size():
+    try:
+        return max(1, min(int(request.args.get('limit', ADMIN_PAGE_SIZE)), ADMIN_MAX_PAGE_SIZE))
+    except ValueError:
+        return ADMIN_PAGE_SIZE
+
+
+def admin_user_page(search='', match=None, cursor=None, limit=ADMIN_PAGE_SIZE):
+    """
+    One page of users with their report/paid counts, newest first, as
+    (users, next_cursor). Raises ValueError on a bad cursor.
+
+    Used to load every User and run two COUNT queries per user (2N+1).
+    Now it's one statement: the page of user ids is picked first (search +
+    keyset on (createdAt, id), both indexed — see the User indexes in
+    models.py), then LEFT JOINed to InspectionReport and aggregated with a
+    conditional SUM for paid_count — so the GROUP BY only ever touches one
+    page worth of users' reports, not the whole table.
+    benchmarks/bench_admin_users.py times it against the old loop.
+    """
+    search = (search or '').strip().lower()
+    page_q = db.session.query(User.id)
+    if search:
+        email_lower = func.lower(User.email)
+        if match == 'prefix':
+            # Range predicate rather than LIKE so the lower(email) btree is
+            # usable on SQLite and Postgres alike, whatever the collation
+            page_q = page_q.filter(email_lower >= search, email_lower < search + '\uffff')
+        else:
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            page_q = page_q.filter(email_lower.like(f'%{escaped}%', escape='\\'))
+    if cursor:
+        page_q = page_q.filter(_after_cursor(User.createdAt, User.id, cursor))
+    page = page_q.order_by(*_newest_first(User.createdAt, User.id)).limit(limit).subquery()
+
+    report_count = func.count(InspectionReport.id)
+    paid_count = func.coalesce(func.sum(case((InspectionReport.is_paid == True, 1), else_=0)), 0)  # noqa: E712
+    rows = db.session.query(User, report_count, paid_count)\
+        .join(page, page.c.id == User.id)\
+        .outerjoin(InspectionReport, InspectionReport.user_id == User.id)\
+        .group_by(User.id)\
+        .order_by(*_newest_first(User.createdAt, User.id))\
+        .all()
+
+    users = [{
+        'id': u.id,
+        'email': u.email,
+        'createdAt': u.createdAt.isoformat() if u.createdAt else None,
+        'subscription_status': u.subscription_status,
+        'has_active_subscription': u.has_active_subscription,
+        'stripe_customer_id': u.stripe_customer_id,
+        'subscription_id': u.subscription_id,
+        'report_count': int(rc),
+        'paid_count': int(pc),
+    } for u, rc, pc in rows]
+
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1][0]
+        next_cursor = _encode_cursor(last.createdAt, last.id)
+    return users, next_cursor
+
+
 @app.route('/api/admin/users', methods=['GET'])
 @login_required
 @admin_required
 def admin_users():
-    search = request.args.get('search', '').strip().lower()
-    users = User.query.order_by(User.createdAt.desc()).all()
-    result = []
-    for u in users:
-        if search and search not in u.email.lower():
-            continue
-        report_count = InspectionReport.query.filter_by(user_id=u.id).count()
-        paid_count = InspectionReport.query.filter_by(user_id=u.id, is_paid=True).count()
-        result.append({
-            'id': u.id,
-            'email': u.email,
-            'createdAt': u.createdAt.isoformat(),
-            'subscription_status': u.subscription_status,
-            'has_active_subscription': u.has_active_subscription,
-            'stripe_customer_id': u.stripe_customer_id,
-            'subscription_id': u.subscription_id,
-            'report_count': report_count,
-            'paid_count': paid_count,
-        })
-    return jsonify(result)
+    """
+    ?search= substring of the email (case-insensitive; trigram-indexed on
+    Postgres), ?match=prefix for an index-range prefix search on any DB,
+    ?limit= (default 100, max 500), ?cursor= from the previous page's
+    next_cursor. Returns {"users": [...], "next_cursor": str|null}.
+    """
+    try:
+        users, next_cursor = admin_user_page(
+            search=request.args.get('search', ''),
+            match=request.args.get('match'),
+            cursor=request.args.get('cursor'),
+            limit=_page_size(),
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    return jsonify({'users': users, 'next_cursor': next_cursor})
+
+# Summary columns filled from analysis_json by report_findings.sync_report —
+# list views read these instead of loading and parsing the blob
+_REPORT_SUMMARY_COLUMNS = ('condition', 'budgetNow', 'budget5yr', 'urgentCount', 'maintenanceCount',
+                           'categoryCount', 'currency', 'location')
+
+_ADMIN_REPORT_COLUMNS = ('id', 'address', 'customerEmail', 'customerName', 'createdAt',
+                         'is_paid', 'user_id', 'shareToken') + _REPORT_SUMMARY_COLUMNS
+
+
+def _report_summary(r):
+    return {c: getattr(r, c) for c in _REPORT_SUMMARY_COLUMNS}
+
+
+def _admin_report_row(r):
+    return {
+        'id': r.id,
+        'address': r.address,
+        'customerEmail': r.customerEmail,
+        'customerName': r.customerName,
+        'createdAt': r.createdAt.isoformat() if r.createdAt else None,
+        'is_paid': r.is_paid,
+        'user_id': r.user_id,
+        'shareToken': r.shareToken,
+        **_report_summary(r),
+    }
+
 
 @app.route('/api/admin/reports', methods=['GET'])
 @login_required
 @admin_required
 def admin_reports():
-    search = request.args.get('search', '').strip().lower()
-    reports = InspectionReport.query.order_by(InspectionReport.createdAt.desc()).limit(200).all()
-    result = []
-    for r in reports:
-        addr = (r.address or '').lower()
-        email = (r.customerEmail or '').lower()
-        if search and search not in addr and search not in email:
-            continue
-        result.append({
-            'id': r.id,
-            'address': r.address,
-            'customerEmail': r.customerEmail,
-            'customerName': r.customerName,
-            'createdAt': r.createdAt.isoformat(),
-            'is_paid': r.is_paid,
-            'user_id': r.user_id,
-            'shareToken': r.shareToken,
-        })
-    return jsonify(result)
+    """
+    Without ?search: newest reports, keyset-paginated like /api/admin/users.
+    With ?search: full-text matches over address, customer, summary,
+    findings and report text (report_search.py), best first, each with an
+    HTML-safe highlighted `snippet`. Either way: ?limit=, ?cursor= from the
+    previous page's next_cursor.
+    """
+    search = request.args.get('search', '').strip()
+    limit = _page_size()
+    cursor = request.args.get('cursor')
+    columns = load_only(*[getattr(InspectionReport, c) for c in _ADMIN_REPORT_COLUMNS])
+
+    if search:
+        # Ranked results page by number — the cursor is just the next page
+        page = int(cursor) if cursor and cursor.isdigit() else 1
+        hits, has_more = report_search.search(search, page=page, per_page=limit)
+        by_id = {r.id: r for r in InspectionReport.query.options(columns)
+                 .filter(InspectionReport.id.in_([h['report_id'] for h in hits])).all()}
+        result = [dict(_admin_report_row(by_id[h['report_id']]), snippet=h['snippet'])
+                  for h in hits if h['report_id'] in by_id]
+        return jsonify({'reports': result, 'next_cursor': str(page + 1) if has_more else None})
+
+    q = InspectionReport.query.options(columns)
+    if cursor:
+        try:
+            q = q.filter(_after_cursor(InspectionReport.createdAt, InspectionReport.id, cursor))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    reports = q.order_by(*_newest_first(InspectionReport.createdAt, InspectionReport.id)).limit(limit).all()
+    next_cursor = _encode_cursor(reports[-1].createdAt, reports[-1].id) if len(reports) == limit else None
+    return jsonify({'reports': [_admin_report_row(r) for r in reports], 'next_cursor': next_cursor})
+
+@app.route('/api/admin/email-queue', methods=['GET'])
+@login_required
+@admin_required
+def admin_email_queue():
+    """Outbound email queue depth and send latency (email_queue.stats);
+    ?window= minutes for the latency window, default 60."""
+    try:
+        window = max(1, min(int(request.args.get('window', 60)), 7 * 24 * 60))
+    except ValueError:
+        return jsonify({'error': 'Invalid window'}), 400
+    return jsonify(email_queue.stats(window))
 
 @app.route('/api/admin/mark-paid/<report_id>', methods=['POST'])
 @login_required
@@ -224,6 +396,69 @@ def admin_delete_user(user_id):
     db.session.commit()
     return jsonify({'success': True})
 
+@app.route('/api/export/reports', methods=['POST'])
+@login_required
+def export_reports():
+    """
+    Start a bulk export: analyses.ndjson + cached PDFs in one zip (see
+    bulk_export.py). JSON body: start/end YYYY-MM-DD (inclusive), user_id
+    (admins only — realtors always get their own reports), pdfs: false for
+    the NDJSON alone. The zip is built in the background (export_jobs.py) —
+    202 + job_id; poll /api/export/jobs/<id>, then download it. Same thing
+    from the shell: python export_reports.py.
+    """
+    is_admin = current_user.email in ADMIN_EMAILS
+    if not is_admin and current_user.role != 'realtor':
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    data = request.get_json(silent=True) or {}
+    try:
+        start = parse_day(data.get('start'))
+        end = parse_day(data.get('end'))
+    except (ValueError, TypeError):
+        return jsonify({'error': 'start/end must be YYYY-MM-DD'}), 400
+    if end:
+        end += timedelta(days=1)
+
+    user_id = (str(data.get('user_id') or '').strip() or None) if is_admin else current_user.id
+    if is_admin and not (start or end or user_id):
+        return jsonify({'error': 'Pick a date range or user_id'}), 400
+    include_pdfs = data.get('pdfs', True) not in (False, 0, '0')
+
+    job = export_jobs.create(current_user.id, start, end, user_id, include_pdfs)
+    export_jobs.start(app, job.id)
+    return jsonify(export_jobs.to_dict(job)), 202
+
+
+def _own_export_job(job_id):
+    job = db.session.get(ExportJob, job_id)
+    if not job or job.requestedBy != current_user.id:
+        return None
+    return job
+
+
+@app.route('/api/export/jobs/<job_id>', methods=['GET'])
+@login_required
+def export_job_status(job_id):
+    job = _own_export_job(job_id)
+    if not job:
+        return jsonify({'error': 'Export not found'}), 404
+    return jsonify(export_jobs.to_dict(job))
+
+
+@app.route('/api/export/jobs/<job_id>/download', methods=['GET'])
+@login_required
+def export_job_download(job_id):
+    job = _own_export_job(job_id)
+    if not job:
+        return jsonify({'error': 'Export not found'}), 404
+    if job.status == 'expired':
+        return jsonify({'error': 'Export expired — start a new one'}), 410
+    if job.status != 'done' or not job.path or not os.path.exists(job.path):
+        return jsonify({'error': 'Export not ready', **export_jobs.to_dict(job)}), 409
+    fname = f"lot7-export-{job.createdAt.strftime('%Y%m%d-%H%M%S')}.zip"
+    return send_file(job.path, mimetype='application/zip', as_attachment=True, download_name=fname)
+
 # Auth config
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'change-this-in-production-please')
 
@@ -274,8 +509,11 @@ MAX_CACHE_SIZE = 10
 # Keys are report_id strings, values: {'status': 'processing'|'done'|'error', 'progress': 0-100}
 JOB_STATUS = {}
 
-def run_analysis_background(app_ctx, report_id, extracted_text):
-    """Run slow AI analysis in a background thread, update DB when done."""
+def run_analysis_background(app_ctx, report_id, extracted_text, source_key, source_fingerprint):
+    """Run slow AI analysis in a background thread, update DB when done.
+    source_key / source_fingerprint identify the report in ExtractedFindings,
+    so the structured analysis can start from an earlier extraction
+    (extracted_findings.py)."""
     with app_ctx:
         try:
             JOB_STATUS[report_id] = {'status': 'processing', 'progress': 15}
@@ -286,7 +524,8 @@ def run_analysis_background(app_ctx, report_id, extracted_text):
             print(f"[BG {report_id}] Generating summary + structured analysis in parallel...")
             with ThreadPoolExecutor(max_workers=2) as pool:
                 summary_future = pool.submit(generate_summary_from_report, extracted_text)
-                analysis_future = pool.submit(generate_structured_analysis, extracted_text)
+                analysis_future = pool.submit(extracted_findings.structured_analysis, app, extracted_text,
+                                              source_key, source_fingerprint)
 
                 summary = summary_future.result().replace('\x00', '')
                 JOB_STATUS[report_id]['progress'] = 50
@@ -304,8 +543,19 @@ def run_analysis_background(app_ctx, report_id, extracted_text):
             if report:
                 report.summary = summary
                 report.analysis_json = analysis_json
+                report.contentVersion = (report.contentVersion or 0) + 1
                 db.session.commit()
 
+                # Normalized Finding rows for cross-report analytics, plus the
+                # summary columns the report lists show. Best-effort:
+                # backfill_findings.py heals any report this misses.
+                try:
+                    report_findings.sync_report(report_id, analysis_json)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[BG {report_id}] Finding sync failed (non-fatal): {e}")
+
             _address = json.loads(analysis_json).get('address', '') if analysis_json else ''
             qa_system = InspectionReportQA(extracted_text, address=_address)
             REPORT_CACHE[report_id] = qa_system
@@ -337,9 +587,12 @@ def run_analysis_background(app_ctx, report_id, extracted_text):
 
                 if report:
                     report.appliance_profile_json = json.dumps(appliance_profile)
+                    report.region = care_rules.region_code(report.location or report.address)
+                    report.applianceFlags = care_rules.appliance_flags(appliance_profile)
                     db.session.commit()
 
-                events = generate_care_events(appliance_profile)
+                events = generate_care_events(
+                    appliance_profile, location=(report.location or report.address) if report else None)
                 for ev in events:
                     due_date = (datetime.utcnow() + timedelta(days=ev.get('due_in_days', 0) or 0)).date()
                     db.session.add(CareEvent(
@@ -355,6 +608,12 @@ def run_analysis_background(app_ctx, report_id, extracted_text):
             except Exception as e:
                 print(f"[BG {report_id}] Appliance profile / care event step failed (non-fatal): {e}")
 
+            # Pre-render the downloadable PDFs for this analysis (which drops
+            # any cached from a previous one). Best-effort — GETs render on
+            # demand if this fails.
+            if report:
+                pdf_cache.prerender(report, PDF_RENDERERS)
+
         except Exception as e:
             print(f"[BG {report_id}] Background analysis error: {e}")
             JOB_STATUS[report_id] = {'status': 'error', 'progress': 0}
@@ -390,20 +649,8 @@ def get_zip_from_address(address: str) -> str:
     return match.group(0) if match else None
 
 def get_matching_contractors(issue_type: str, zip_code: str = None):
-    """Get contractors matching issue type and optionally zip code"""
-    contractors = Contractor.query.filter_by(
-        specialty=issue_type,
-        isActive=True
-    ).order_by(Contractor.rating.desc()).limit(3).all()
-    
-    if zip_code and contractors:
-        matching = []
-        for c in contractors:
-            if c.zipCodes and zip_code in c.zipCodes:
-                matching.append(c)
-        return matching if matching else contractors[:3]
-    
-    return contractors
+    """Get contractors matching issue type, ranked by distance to zip code and rating"""
+    return contractor_matching.matching_contractors(issue_type, zip_code)
 
 # ============================================================================
 # CORE ENDPOINTS
@@ -417,16 +664,14 @@ def health_check():
         'timestamp': datetime.utcnow().isoformat()
     }), 200
 
-import io
 from flask import send_file
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import LETTER
-from reportlab.lib.colors import HexColor
-from reportlab.lib.utils import simpleSplit
+from pdf_reports import render_punchlist_pdf, render_summary_pdf, RENDERERS as PDF_RENDERERS
 
 @app.route('/api/analysis/<report_id>', methods=['GET'])
 def get_analysis(report_id):
-    report = InspectionReport.query.get(report_id)
+    report = InspectionReport.query.options(
+        undefer(InspectionReport.analysis_json), undefer(InspectionReport.summary)
+    ).get(report_id)
     if not report or not report.analysis_json:
         return jsonify({"error": "No analysis available"}), 404
     analysis = json.loads(report.analysis_json)
@@ -439,6 +684,33 @@ def get_analysis(report_id):
     }
     return jsonify(analysis)
 
+# Rendered PDFs only change when the report's content does (re-analysis or
+# new customer details bump contentVersion; the header prints the report's
+# own date, not today's), so they're rendered once — right after analysis
+# in run_analysis_background — and served from disk by pdf_cache.py. ETag +
+# Last-Modified let browsers and shared links revalidate with a 304 instead
+# of re-downloading.
+def _send_cached_pdf(report, kind, render_fn, download_name):
+    path = pdf_cache.get_or_render(report, kind, render_fn)
+    try:
+        pdf_file = open(path, 'rb')
+    except FileNotFoundError:
+        # Superseded and deleted by a concurrent render of a newer version
+        pdf_file = open(pdf_cache.get_or_render(report, kind, render_fn), 'rb')
+    response = send_file(
+        pdf_file,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype='application/pdf',
+        etag=pdf_cache.etag_for(report, kind),
+        last_modified=os.fstat(pdf_file.fileno()).st_mtime,
+        max_age=0,
+        conditional=True,
+    )
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @app.route('/api/punchlist-pdf/<report_id>', methods=['GET'])
 def generate_punchlist_pdf(report_id):
     try:
@@ -446,351 +718,8 @@ def generate_punchlist_pdf(report_id):
         if not report:
             return jsonify({'error': 'Report not found'}), 404
 
-        analysis = {}
-        if report.analysis_json:
-            try:
-                analysis = json.loads(report.analysis_json)
-            except:
-                pass
-
-        TEAL       = HexColor('#14b8a6')
-        PINK       = HexColor('#d946a6')
-        AMBER      = HexColor('#f59e0b')
-        GREEN      = HexColor('#22c55e')
-        DARK_BG    = HexColor('#0f1419')
-        WHITE      = HexColor('#ffffff')
-        GRAY       = HexColor('#a1a1a1')
-        DARK_TEXT  = HexColor('#1f2937')
-        LIGHT_GRAY = HexColor('#6b7280')
-        ROW_ALT    = HexColor('#f9fafb')
-        ROW_URGENT = HexColor('#fff7ed')
-
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=LETTER)
-        w, h = LETTER
-
-        def check_page(y_pos, needed=40):
-            if y_pos < needed:
-                p.showPage()
-                p.setFillColor(DARK_BG)
-                p.rect(0, h - 36, w, 36, fill=True, stroke=False)
-                p.setFillColor(TEAL)
-                p.setFont("Helvetica-Bold", 11)
-                p.drawString(60, h - 23, "LOT7 — Punchlist (continued)")
-                return h - 55
-            return y_pos
-
-        # HEADER
-        p.setFillColor(DARK_BG)
-        p.rect(0, h - 72, w, 72, fill=True, stroke=False)
-        p.setFillColor(TEAL)
-        p.setFont("Helvetica-Bold", 22)
-        p.drawCentredString(w / 2, h - 30, "LOT7")
-        p.setFillColor(WHITE)
-        p.setFont("Helvetica", 10)
-        p.drawCentredString(w / 2, h - 46, "Contractor Punchlist — AI Generated")
-        p.setFillColor(GRAY)
-        p.setFont("Helvetica", 8)
-        p.drawCentredString(w / 2, h - 60, datetime.utcnow().strftime("%B %d, %Y"))
-        y = h - 90
-
-        # CONDITION BADGE (above property info)
-        condition = analysis.get("condition", "N/A")
-        cond_color = GREEN if condition == "Well Maintained" else (AMBER if condition == "Needs TLC" else PINK)
-        badge_width = 110
-        p.setFillColor(cond_color)
-        p.roundRect(60, y - 6, badge_width, 22, 6, fill=True, stroke=False)
-        p.setFillColor(WHITE)
-        p.setFont("Helvetica-Bold", 11)
-        p.drawCentredString(60 + badge_width / 2, y + 4, condition)
-        y -= 32
-
-        # PROPERTY INFO - aligned grid
-        label_x = 60
-        value_x = 130
-        p.setFillColor(DARK_TEXT)
-        p.setFont("Helvetica", 9)
-        p.drawString(label_x, y, "Property:")
-        p.setFont("Helvetica-Bold", 9)
-        p.drawString(value_x, y, report.address or "Unknown Address")
-        y -= 14
-        p.setFont("Helvetica", 9)
-        p.drawString(label_x, y, "Prepared for:")
-        p.setFont("Helvetica-Bold", 9)
-        p.drawString(value_x, y, report.customerName or "N/A")
-        p.setFont("Helvetica", 9)
-        p.drawString(310, y, "Phone:")
-        p.setFont("Helvetica-Bold", 9)
-        p.drawString(340, y, report.customerPhone or "N/A")
-        p.setFont("Helvetica", 9)
-        p.drawString(430, y, "Email:")
-        p.setFont("Helvetica-Bold", 9)
-        p.drawString(458, y, report.customerEmail or "N/A")
-        y -= 18
-
-        # BUDGETS
-        budget_now = analysis.get("budget_now", "N/A")
-        budget_5yr = analysis.get("budget_5yr", "N/A")
-        currency   = analysis.get("currency", "USD")
-        p.setFillColor(DARK_TEXT)
-        p.setFont("Helvetica", 9)
-        p.drawString(label_x, y, "Now - 12 months (" + currency + "):")
-        p.setFillColor(TEAL)
-        p.setFont("Helvetica-Bold", 10)
-        p.drawString(value_x + 90, y, budget_now)
-        y -= 14
-        p.setFillColor(DARK_TEXT)
-        p.setFont("Helvetica", 9)
-        p.drawString(label_x, y, "5-Year outlook (" + currency + "):")
-        p.setFillColor(TEAL)
-        p.setFont("Helvetica-Bold", 10)
-        p.drawString(value_x + 90, y, budget_5yr)
-        y -= 20
-
-        # DIVIDER
-        p.setStrokeColor(TEAL)
-        p.setLineWidth(1.5)
-        p.line(60, y, w - 60, y)
-        y -= 18
-
-        cols = [60, 230, 340, 430, 510]
-        headers = ["Issue", "Trade Required", "Est. Cost", "Timeline", "Priority"]
-
-        # URGENT ITEMS
-        urgent_items = analysis.get("urgent_items", [])
-        if urgent_items:
-            p.setFillColor(DARK_TEXT)
-            p.setFont("Helvetica-Bold", 13)
-            p.drawString(60, y, "Urgent - Action Required Now")
-            y -= 18
-            p.setFillColor(DARK_BG)
-            p.rect(55, y - 4, w - 110, 16, fill=True, stroke=False)
-            p.setFillColor(TEAL)
-            p.setFont("Helvetica-Bold", 8)
-            for i, hdr in enumerate(headers):
-                p.drawString(cols[i], y + 2, hdr)
-            y -= 18
-            for idx, item in enumerate(urgent_items):
-                y = check_page(y, 18)
-                if idx % 2 == 0:
-                    p.setFillColor(ROW_URGENT)
-                    p.rect(55, y - 4, w - 110, 16, fill=True, stroke=False)
-                p.setFillColor(DARK_TEXT)
-                p.setFont("Helvetica-Bold", 8)
-                p.drawString(cols[0], y + 2, str(item.get("name", ""))[:38])
-                p.setFont("Helvetica", 8)
-                p.setFillColor(LIGHT_GRAY)
-                p.drawString(cols[1], y + 2, str(item.get("trade", ""))[:20])
-                p.setFillColor(TEAL)
-                p.setFont("Helvetica-Bold", 8)
-                p.drawString(cols[2], y + 2, str(item.get("cost", "TBD")))
-                p.setFillColor(AMBER)
-                p.setFont("Helvetica", 8)
-                p.drawString(cols[3], y + 2, str(item.get("timeline", ""))[:18])
-                p.setFillColor(TEAL)
-                p.setFont("Helvetica-Bold", 8)
-                p.drawString(cols[4], y + 2, "High Priority")
-                y -= 16
-            y -= 10
-
-        # MAINTENANCE ITEMS
-        maint_items = analysis.get("maintenance_items", [])
-        if maint_items:
-            y = check_page(y, 60)
-            p.setFillColor(DARK_TEXT)
-            p.setFont("Helvetica-Bold", 13)
-            p.drawString(60, y, "Maintenance - Plan and Budget")
-            y -= 18
-            p.setFillColor(DARK_BG)
-            p.rect(55, y - 4, w - 110, 16, fill=True, stroke=False)
-            p.setFillColor(TEAL)
-            p.setFont("Helvetica-Bold", 8)
-            for i, hdr in enumerate(headers):
-                p.drawString(cols[i], y + 2, hdr)
-            y -= 18
-            for idx, item in enumerate(maint_items):
-                y = check_page(y, 18)
-                if idx % 2 == 0:
-                    p.setFillColor(ROW_ALT)
-                    p.rect(55, y - 4, w - 110, 16, fill=True, stroke=False)
-                p.setFillColor(DARK_TEXT)
-                p.setFont("Helvetica-Bold", 8)
-                p.drawString(cols[0], y + 2, str(item.get("name", ""))[:38])
-                p.setFont("Helvetica", 8)
-                p.setFillColor(LIGHT_GRAY)
-                p.drawString(cols[1], y + 2, str(item.get("trade", ""))[:20])
-                p.setFillColor(TEAL)
-                p.setFont("Helvetica-Bold", 8)
-                p.drawString(cols[2], y + 2, str(item.get("cost", "TBD")))
-                p.setFillColor(LIGHT_GRAY)
-                p.setFont("Helvetica", 8)
-                p.drawString(cols[3], y + 2, str(item.get("timeline", ""))[:18])
-                p.setFillColor(LIGHT_GRAY)
-                p.setFont("Helvetica-Bold", 8)
-                p.drawString(cols[4], y + 2, "PLAN")
-                y -= 16
-            y -= 10
-
-        # CHECKLIST - grouped: ATTN first, SATS second
-        checklist = analysis.get("checklist", [])
-        if checklist:
-            y = check_page(y, 60)
-
-            # Title + legend on same line
-            p.setFillColor(DARK_TEXT)
-            p.setFont("Helvetica-Bold", 13)
-            p.drawString(60, y, "Inspection Checklist")
-            # Legend - right side
-            legend_x = w - 60
-            p.setFont("Helvetica", 7)
-            p.setFillColor(LIGHT_GRAY)
-            p.drawRightString(legend_x, y + 2, "SATS = Satisfactory condition     ATTN = Needs attention or follow-up")
-            y -= 20
-
-            attn_items = [i for i in checklist if not i.get("passed", True)]
-            sats_items = [i for i in checklist if i.get("passed", True)]
-
-            # ATTN GROUP
-            if attn_items:
-                p.setFillColor(LIGHT_GRAY)
-                p.setFont("Helvetica", 7)
-                p.drawString(60, y, "▸  ITEMS REQUIRING ATTENTION")
-                y -= 12
-                for item in attn_items:
-                    y = check_page(y, 16)
-                    text = item.get("text", "")
-                    # Row background
-                    p.setFillColor(HexColor('#fffbeb'))
-                    p.rect(55, y - 4, w - 110, 16, fill=True, stroke=False)
-                    # Badge
-                    p.setFillColor(AMBER)
-                    p.roundRect(60, y - 2, 34, 13, 4, fill=True, stroke=False)
-                    p.setFillColor(WHITE)
-                    p.setFont("Helvetica-Bold", 7)
-                    p.drawCentredString(77, y + 4, "ATTN")
-                    # Text
-                    p.setFillColor(DARK_TEXT)
-                    p.setFont("Helvetica", 8.5)
-                    lines = simpleSplit(text, "Helvetica", 8.5, w - 180)
-                    p.drawString(102, y + 3, lines[0] if lines else text)
-                    y -= 15
-                y -= 6
-
-            # SATS GROUP
-            if sats_items:
-                y = check_page(y, 20)
-                p.setFillColor(LIGHT_GRAY)
-                p.setFont("Helvetica", 7)
-                p.drawString(60, y, "▸  SATISFACTORY ITEMS")
-                y -= 12
-                for item in sats_items:
-                    y = check_page(y, 16)
-                    text = item.get("text", "")
-                    # Row background
-                    p.setFillColor(HexColor('#f0fdf4'))
-                    p.rect(55, y - 4, w - 110, 16, fill=True, stroke=False)
-                    # Badge
-                    p.setFillColor(GREEN)
-                    p.roundRect(60, y - 2, 34, 13, 4, fill=True, stroke=False)
-                    p.setFillColor(WHITE)
-                    p.setFont("Helvetica-Bold", 7)
-                    p.drawCentredString(77, y + 4, "SATS")
-                    # Text
-                    p.setFillColor(DARK_TEXT)
-                    p.setFont("Helvetica", 8.5)
-                    lines = simpleSplit(text, "Helvetica", 8.5, w - 180)
-                    p.drawString(102, y + 3, lines[0] if lines else text)
-                    y -= 15
-            y -= 14
-
-        # INSPECTOR NOTES - styled card
-        if report.summary:
-            y = check_page(y, 80)
-            # Dark header bar
-            p.setFillColor(DARK_BG)
-            p.rect(55, y - 4, w - 110, 22, fill=True, stroke=False)
-            p.setFillColor(TEAL)
-            p.setFont("Helvetica-Bold", 11)
-            p.drawString(68, y + 4, "Inspector Notes")
-            y -= 18
-
-            # Paragraphs with left border
-            paragraphs = [p2.strip() for p2 in report.summary.split('\n') if p2.strip()]
-            if len(paragraphs) <= 1:
-                # If no newlines, split by sentence groups (~3 sentences each)
-                import re
-                sentences = re.split(r'(?<=[.!?])\s+', report.summary.strip())
-                paragraphs = []
-                chunk = []
-                for i, s in enumerate(sentences):
-                    chunk.append(s)
-                    if len(chunk) == 3 or i == len(sentences) - 1:
-                        paragraphs.append(' '.join(chunk))
-                        chunk = []
-
-            for para in paragraphs:
-                lines = simpleSplit(para, "Helvetica", 8, w - 145)
-                needed = len(lines) * 11 + 14
-                y = check_page(y, needed)
-                # Left border line
-                p.setStrokeColor(TEAL)
-                p.setLineWidth(1.5)
-                p.line(60, y + 2, 60, y - needed + 14)
-                p.setLineWidth(0.5)
-                # Para text
-                p.setFillColor(HexColor('#4b5563'))
-                p.setFont("Helvetica", 8)
-                for line in lines:
-                    p.drawString(72, y, line)
-                    y -= 11
-                y -= 8
-
-        # DISCLAIMER
-        y = check_page(y, 60)
-        y -= 10
-        disclaimer_text = (
-            "Important Notice — Cost Estimates Only: All figures in this report are approximations based on "
-            "regional contractor averages and are provided for budgeting guidance only. Actual costs will vary "
-            "based on contractor, scope of work, materials, and site conditions. This report does not constitute "
-            "a warranty, guarantee, or professional cost assessment. Obtain multiple licensed contractor quotes "
-            "before committing to any repair work. Lot7 is not liable for "
-            "discrepancies between estimated and actual repair costs."
-        )
-        disc_lines = simpleSplit(disclaimer_text, "Helvetica", 7.5, w - 140)
-        box_h = len(disc_lines) * 10 + 16
-        y = check_page(y, box_h + 10)
-        # Box background
-        p.setFillColor(HexColor('#f8fafc'))
-        p.rect(55, y - box_h + 8, w - 110, box_h, fill=True, stroke=False)
-        # Teal left accent
-        p.setFillColor(TEAL)
-        p.rect(55, y - box_h + 8, 3, box_h, fill=True, stroke=False)
-        # Label
-        p.setFillColor(DARK_TEXT)
-        p.setFont("Helvetica-Bold", 7.5)
-        p.drawString(66, y + 2, "⚠  Estimates & Disclaimer")
-        y -= 12
-        p.setFillColor(LIGHT_GRAY)
-        p.setFont("Helvetica", 7.5)
-        for line in disc_lines:
-            p.drawString(66, y, line)
-            y -= 10
-        y -= 10
-
-        # FOOTER
-        p.setStrokeColor(TEAL)
-        p.setLineWidth(0.5)
-        p.line(60, 35, w - 60, 35)
-        p.setFillColor(LIGHT_GRAY)
-        p.setFont("Helvetica", 7)
-        p.drawCentredString(w / 2, 23, "Generated by LOT7  |  LOT7.ai  |  For contractor use only")
-
-        p.showPage()
-        p.save()
-        buffer.seek(0)
-
         fname = (report.address or 'punchlist').replace(' ', '_').replace(',', '') + '_punchlist.pdf'
-        return send_file(buffer, as_attachment=True, download_name=fname, mimetype='application/pdf')
+        return _send_cached_pdf(report, 'punchlist', render_punchlist_pdf, fname)
 
     except Exception as e:
         print("Punchlist PDF Error: " + str(e))
@@ -804,168 +733,14 @@ def generate_pdf(report_id):
         if not report:
             return jsonify({'error': 'Report not found'}), 404
 
-        TEAL = HexColor('#14b8a6')
-        PINK = HexColor('#d946a6')
-        DARK_BG = HexColor('#0f1419')
-        WHITE = HexColor('#ffffff')
-        GRAY = HexColor('#a1a1a1')
-        DARK_TEXT = HexColor('#333333')
-        LIGHT_GRAY = HexColor('#808080')
-
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=LETTER)
-        w, h = LETTER
-        y = h
-
-        # Header bar
-        p.setFillColor(DARK_BG)
-        p.rect(0, h - 60, w, 60, fill=True, stroke=False)
-        p.setFillColor(TEAL)
-        p.setFont("Helvetica-Bold", 20)
-        p.drawCentredString(w / 2, h - 25, "LOT7")
-        p.setFillColor(GRAY)
-        p.setFont("Helvetica", 10)
-        p.drawCentredString(w / 2, h - 40, "AI-Powered Inspection Summary")
-        p.setFillColor(WHITE)
-        p.setFont("Helvetica", 8)
-        p.drawCentredString(w / 2, h - 52, datetime.utcnow().strftime("%B %d, %Y"))
-
-        y = h - 80
-
-        # Property info
-        p.setFillColor(DARK_TEXT)
-        p.setFont("Helvetica", 10)
-        p.drawString(60, y, "Property:")
-        p.setFont("Helvetica-Bold", 10)
-        p.drawString(120, y, report.address or 'N/A')
-        y -= 16
-        p.setFont("Helvetica", 10)
-        p.drawString(60, y, "Prepared for:")
-        p.setFont("Helvetica-Bold", 10)
-        p.drawString(130, y, report.customerName or 'N/A')
-        y -= 24
-
-        # Divider
-        p.setStrokeColor(TEAL)
-        p.setLineWidth(1)
-        p.line(60, y, w - 60, y)
-        y -= 24
-
-        # Condition
-        p.setFillColor(TEAL)
-        p.setFont("Helvetica-Bold", 18)
-        p.drawCentredString(w / 2, y, "Overall Condition: Good")
-        y -= 16
-        p.setFillColor(LIGHT_GRAY)
-        p.setFont("Helvetica", 10)
-        p.drawCentredString(w / 2, y, "3 Items Need Attention  |  8 Functioning Well")
-        y -= 30
-
-        # Budget
-        p.setFillColor(DARK_TEXT)
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(60, y, "Budget for Repairs")
-        y -= 18
-        p.setFont("Helvetica", 10)
-        p.setFillColor(LIGHT_GRAY)
-        p.drawString(70, y, "Now - 12 Months:")
-        p.setFillColor(TEAL)
-        p.setFont("Helvetica-Bold", 10)
-        p.drawString(170, y, "$800 - 1,200")
-        p.setFillColor(LIGHT_GRAY)
-        p.setFont("Helvetica", 10)
-        p.drawString(260, y, "(Preventive maintenance)")
-        y -= 16
-        p.setFillColor(LIGHT_GRAY)
-        p.drawString(70, y, "5 Year Outlook:")
-        p.setFillColor(TEAL)
-        p.setFont("Helvetica-Bold", 10)
-        p.drawString(170, y, "$5,000 - 8,000")
-        p.setFillColor(LIGHT_GRAY)
-        p.setFont("Helvetica", 10)
-        p.drawString(260, y, "(Long-term replacements)")
-        y -= 30
-
-        # Issues
-        p.setFillColor(DARK_TEXT)
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(60, y, "What Needs Attention")
-        y -= 20
-        issues = [
-            ("Electrical", "$50 - 300", "Handle now or cosmetic"),
-            ("Plumbing", "$500 - 800", "Handle in 12 months"),
-            ("HVAC", "Future", "Monitor, plan 5-10 years"),
-        ]
-        for name, cost, timeline in issues:
-            p.setFillColor(DARK_TEXT)
-            p.setFont("Helvetica-Bold", 10)
-            p.drawString(70, y, name)
-            p.setFillColor(TEAL)
-            p.setFont("Helvetica-Bold", 10)
-            p.drawString(170, y, cost)
-            p.setFillColor(LIGHT_GRAY)
-            p.setFont("Helvetica", 10)
-            p.drawString(280, y, timeline)
-            y -= 16
-        y -= 14
-
-        # Checklist
-        p.setFillColor(DARK_TEXT)
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(60, y, "Inspection Checklist")
-        y -= 20
-        checks = [
-            (True, "No structural damage found"),
-            (True, "Passes all Illinois code requirements"),
-            (True, "No water intrusion detected"),
-            (False, "Sewer line has scaling (preventive care)"),
-            (True, "HVAC functioning properly"),
-        ]
-        for passed, text in checks:
-            p.setFillColor(TEAL if passed else HexColor('#c89600'))
-            p.setFont("Helvetica-Bold", 9)
-            p.drawString(70, y, "SATS" if passed else "ATTN")
-            p.setFillColor(DARK_TEXT)
-            p.setFont("Helvetica", 10)
-            p.drawString(110, y, text)
-            y -= 16
-        y -= 14
-
-        # AI Summary
-        if report.summary:
-            p.setFillColor(DARK_TEXT)
-            p.setFont("Helvetica-Bold", 14)
-            p.drawString(60, y, "AI Analysis Summary")
-            y -= 16
-            p.setFillColor(LIGHT_GRAY)
-            p.setFont("Helvetica", 9)
-            lines = simpleSplit(report.summary, "Helvetica", 9, w - 120)
-            for line in lines:
-                if y < 50:
-                    p.showPage()
-                    y = h - 40
-                p.drawString(60, y, line)
-                y -= 12
-
-        # Footer
-        p.setStrokeColor(TEAL)
-        p.setLineWidth(0.5)
-        p.line(60, 40, w - 60, 40)
-        p.setFillColor(LIGHT_GRAY)
-        p.setFont("Helvetica", 7)
-        p.drawCentredString(w / 2, 28, "Generated by LOT7  |  LOT7")
-
-        p.showPage()
-        p.save()
-        buffer.seek(0)
-
         filename = (report.address or 'inspection-report').replace(' ', '_') + '.pdf'
-        return send_file(buffer, as_attachment=True, download_name=filename, mimetype='application/pdf')
+        return _send_cached_pdf(report, 'summary', render_summary_pdf, filename)
 
     except Exception as e:
         print(f"PDF Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+
 @app.route('/api/upload', methods=['POST'])
 def upload_report():
     try:
@@ -976,9 +751,14 @@ def upload_report():
             # URL path — fetch & extract text from a hosted report page (any platform)
             print(f"Fetching report from URL: {report_url}")
             try:
-                extracted_text = fetch_report_text_from_url(report_url).replace('\x00', '')
+                html = fetch_report_html(report_url)
             except Exception as e:
                 return jsonify({'error': f'Could not read report from that link: {e}'}), 400
+            extracted_text = report_text_from_html(html).replace('\x00', '')
+            # Keyed like the realtor pipeline's fetch of the same link, so
+            # either can reuse the other's extraction
+            source_key = extracted_findings.url_key(report_url)
+            source_fingerprint = extracted_findings.fingerprint(report_text_from_html(html, summary_only=True))
             if len(extracted_text.strip()) < 200:
                 return jsonify({'error': 'That link did not return readable report text. Make sure it is a public report link.'}), 400
             source_filename = (secure_filename(report_url.split('?')[0].rstrip('/').split('/')[-1]) or 'report') + '.url'
@@ -991,6 +771,8 @@ def upload_report():
             filepath = save_uploaded_file(file, app.config['UPLOAD_FOLDER'])
             print("Extracting text from PDF...")
             extracted_text = extract_text_from_pdf(filepath).replace('\x00', '')
+            source_key = extracted_findings.text_key(extracted_text)
+            source_fingerprint = extracted_findings.fingerprint(extracted_text)
             source_filename = secure_filename(file.filename)
             source_path = filepath
             source_size = os.path.getsize(filepath)
@@ -1027,7 +809,7 @@ def upload_report():
         ctx = app.app_context()
         t = threading.Thread(
             target=run_analysis_background,
-            args=(ctx, report_id, extracted_text),
+            args=(ctx, report_id, extracted_text, source_key, source_fingerprint),
             daemon=True
         )
         t.start()
@@ -1047,6 +829,13 @@ def upload_report():
 @app.route('/api/realtor-report', methods=['POST'])
 @login_required
 def generate_realtor_report():
+    """
+    Start (or reuse) a realtor issues report for a listing's report URL.
+    A finished run for the URL from the last realtor_reports.RECHECK_HOURS
+    comes back right away (200, with the result); otherwise 202 with a
+    job_id to poll at GET /api/realtor-report/<job_id>. {"rerun": true}
+    always runs a fresh analysis.
+    """
     if current_user.role != 'realtor' and current_user.email not in ADMIN_EMAILS:
         return jsonify({'error': 'Realtor access required'}), 403
 
@@ -1055,34 +844,180 @@ def generate_realtor_report():
     if not report_url:
         return jsonify({'error': 'report_url is required'}), 400
 
+    run, _ = realtor_reports.request_report(report_url, user_id=current_user.id, rerun=bool(data.get('rerun')))
+    return jsonify(realtor_reports.to_dict(run)), 200 if run.status == 'done' else 202
+
+
+@app.route('/api/realtor-report/<job_id>', methods=['GET'])
+@login_required
+def realtor_report_status(job_id):
+    if current_user.role != 'realtor' and current_user.email not in ADMIN_EMAILS:
+        return jsonify({'error': 'Realtor access required'}), 403
+    run = db.session.get(RealtorReport, job_id)
+    # Only for users the run was handed to (it may be shared with others who
+    # asked for the same listing) — 404 rather than 403 for anyone else
+    if not run or (not realtor_reports.can_view(run, current_user.id)
+                   and current_user.email not in ADMIN_EMAILS):
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(realtor_reports.to_dict(run))
+
+@app.route('/api/realtor-report/bulk', methods=['POST'])
+@login_required
+def generate_realtor_reports_bulk():
+    """
+    Realtor reports for a portfolio: {"report_urls": [...]} (up to
+    realtor_reports.BULK_MAX_URLS). Returns 202 with a batch_id; poll
+    GET /api/realtor-report/bulk/<batch_id>?since=<as_of> for the ranked
+    listings and each new listing's report as it finishes.
+    """
+    if current_user.role != 'realtor' and current_user.email not in ADMIN_EMAILS:
+        return jsonify({'error': 'Realtor access required'}), 403
+
+    data = request.get_json() or {}
+    urls = data.get('report_urls')
+    if not isinstance(urls, list):
+        return jsonify({'error': 'report_urls must be a list of report links'}), 400
     try:
-        text = fetch_report_text_from_url(report_url, include_anchors=True, summary_only=True)
-    except Exception as e:
-        return jsonify({'error': f'Could not read report from that link: {e}'}), 400
-    if len(text.strip()) < 200:
-        return jsonify({'error': 'That link did not return readable report text. Make sure it is a public report link.'}), 400
+        batch = realtor_reports.request_bulk(urls, user_id=current_user.id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(realtor_reports.batch_status(batch)), 202
+
 
+@app.route('/api/realtor-report/bulk/<batch_id>', methods=['GET'])
+@login_required
+def realtor_reports_bulk_status(batch_id):
+    batch = db.session.get(RealtorBatch, batch_id)
+    if not batch or (batch.requestedBy != current_user.id and current_user.email not in ADMIN_EMAILS):
+        return jsonify({'error': 'Batch not found'}), 404
+    since = request.args.get('since')
+    try:
+        since = datetime.fromisoformat(since) if since else None
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO timestamp (as_of from the previous response)'}), 400
+    return jsonify(realtor_reports.batch_status(batch, since))
+
+def _price_ig_items(pricing_input, currency):
+    """Price a validated IG item list. Returns (results, errors) — every
+    input item ends up in exactly one of the two, so a failed chunk costs IG
+    those rows' badges, not the whole report."""
     try:
-        result = json.loads(generate_realtor_issues_report(text, report_url=report_url))
+        priced_by_id = price_findings(pricing_input, currency=currency)
     except Exception as e:
-        return jsonify({'error': f'Analysis failed: {e}'}), 500
+        print(f"IG cost-estimate batch error: {e}")
+        priced_by_id = {}
+
+    results = []
+    errors = []
+    for entry in pricing_input:
+        p = priced_by_id.get(entry['id'])
+        if not p:
+            errors.append({'item_id': entry['id'], 'error': 'pricing_failed'})
+            continue
+        parsed = parse_cost_range(p['cost']) if p.get('cost') else None
+        if not parsed:
+            errors.append({'item_id': entry['id'], 'error': 'not_priceable'})
+            continue
+        lo, hi = parsed
+        most_likely = round((lo + hi) / 2 / 50) * 50
+        confidence = p.get('confidence') if p.get('confidence') in ('matched', 'estimated') else 'estimated'
+        results.append({
+            'item_id': entry['id'],
+            'most_likely': int(most_likely),
+            'low': int(lo),
+            'high': int(hi),
+            'currency': currency,
+            'trade': p.get('trade') or None,
+            'confidence': confidence,
+        })
+    return results, errors
+
+
+def _estimate_ig_items(pricing_input, currency, report_id=None):
+    """Answer from pre-warmed/stored prices (cost_prewarm.py) where we have
+    them; only unseen items are priced live, and those are written back so
+    the next toggle is instant. Returns (results, errors) in input order."""
+    stored = cost_prewarm.lookup_stored(pricing_input, currency)
+    unseen = [e for e in pricing_input if e['id'] not in stored]
+    live_by_id = {}
+    errors = []
+    if unseen:
+        print(f"IG cost-estimate: {len(stored)} stored, {len(unseen)} priced live.")
+        live_results, errors = _price_ig_items(unseen, currency)
+        try:
+            cost_prewarm.store_results(unseen, live_results, currency, source_report_id=report_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f"IG cost-estimate write-through failed (non-fatal): {e}")
+        live_by_id = {r['item_id']: r for r in live_results}
+    results = [stored.get(e['id']) or live_by_id[e['id']]
+               for e in pricing_input if e['id'] in stored or e['id'] in live_by_id]
+    return results, errors
+
+
+def _ig_pricing_input(items):
+    """Validate a partner item list into price_findings input — items
+    without an item_id or finding are dropped, per the spec."""
+    pricing_input = []
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        item_id = it.get('item_id')
+        finding = (it.get('finding') or '').strip()
+        if not item_id or not finding:
+            continue
+        pricing_input.append({
+            'id': str(item_id),
+            'name': finding[:60],
+            'finding': finding,
+            'section': it.get('section'),
+            'category_hint': None,
+        })
+    return pricing_input
+
+
+def partner_key_required(f):
+    """Bearer-key auth for the partner /v1 API. Resolves the key to its
+    ApiPartner (g.partner) and draws one token from its request bucket —
+    429 + Retry-After when it's empty."""
+    from functools import wraps
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        auth_header = request.headers.get('Authorization', '')
+        provided = auth_header[7:] if auth_header.startswith('Bearer ') else ''
+        partner = authenticate_partner(provided)
+        if not partner:
+            return jsonify({'error': 'Unauthorized'}), 401
+        allowed, retry_after = take_tokens(partner, requests=1)
+        if not allowed:
+            return _rate_limited(retry_after)
+        g.partner = partner
+        return f(*args, **kwargs)
+    return decorated
+
+
+def _rate_limited(retry_after):
+    response = jsonify({'error': 'Rate limit exceeded', 'retry_after': retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
 
-    return jsonify(result)
 
 @app.route('/v1/cost-estimate/batch', methods=['POST'])
+@partner_key_required
 def ig_cost_estimate_batch():
     """
     Inspectagram partnership toggle — see docs/ig-cost-estimate-api-spec.md.
     IG sends its own report's item list; we price each one using the same
     judgment-based pricing engine (price_findings_with_ai) as the realtor
     report and buyer dashboard — one cost engine across every surface.
+    Items that match a COST_TABLE category with high confidence are priced
+    locally first (price_findings); only the rest go to the AI, in chunks
+    priced concurrently. Synchronous by default, at any size. With a
+    callback_url the batch runs async instead (cost_jobs.py): 202 + job_id
+    now, results POSTed to the callback when done and pollable at
+    /v1/cost-estimate/jobs/<job_id>.
     """
-    api_key = os.getenv('IG_COST_API_KEY')
-    auth_header = request.headers.get('Authorization', '')
-    provided = auth_header[7:] if auth_header.startswith('Bearer ') else ''
-    if not api_key or not provided or provided != api_key:
-        return jsonify({'error': 'Unauthorized'}), 401
-
     data = request.get_json(silent=True) or {}
     items = data.get('items')
     if not items or not isinstance(items, list):
@@ -1092,60 +1027,79 @@ def ig_cost_estimate_batch():
     if currency not in ('USD', 'CAD'):
         currency = 'USD'
 
-    pricing_input = []
-    for it in items:
-        if not isinstance(it, dict):
-            continue
-        item_id = it.get('item_id')
-        finding = (it.get('finding') or '').strip()
-        if not item_id or not finding:
-            continue
-        pricing_input.append({
-            'id': str(item_id),
-            'name': finding[:60],
-            'finding': finding,
-            'section': it.get('section'),
-            'category_hint': None,
-        })
+    callback_url = (data.get('callback_url') or '').strip()
+    if callback_url:
+        problem = cost_jobs.check_callback_url(callback_url)
+        if problem:
+            return jsonify({'error': problem}), 400
 
+    pricing_input = _ig_pricing_input(items)
     if not pricing_input:
         return jsonify({'results': []}), 200
 
-    try:
-        priced_by_id = price_findings_with_ai(pricing_input, currency=currency)
-    except Exception as e:
-        print(f"IG cost-estimate batch error: {e}")
+    if callback_url and len(pricing_input) > cost_jobs.MAX_ASYNC_ITEMS:
+        return jsonify({'error': f'Async batches are limited to {cost_jobs.MAX_ASYNC_ITEMS} items'}), 400
+
+    allowed, retry_after = take_tokens(g.partner, items=len(pricing_input))
+    if not allowed:
+        refund_tokens(g.partner, requests=1)
+        return _rate_limited(retry_after)
+    record_usage(g.partner.id, items=len(pricing_input))
+
+    if callback_url:
+        job = cost_jobs.create(g.partner.id, data.get('report_id'), pricing_input, currency, callback_url)
+        cost_jobs.start(app, job.id, _estimate_ig_items)
+        return jsonify({'job_id': job.id, 'status': 'processing', 'item_count': len(pricing_input)}), 202
+
+    results, errors = _estimate_ig_items(pricing_input, currency, data.get('report_id'))
+    if not results and all(e['error'] == 'pricing_failed' for e in errors):
         return jsonify({'error': 'Pricing failed'}), 500
 
-    def parse_range(cost_str):
-        try:
-            lo_s, hi_s = cost_str.replace('$', '').replace(',', '').split(' - ')
-            return float(lo_s), float(hi_s)
-        except Exception:
-            return None
+    return jsonify({'results': results, 'errors': errors}), 200
 
-    results = []
-    for entry in pricing_input:
-        p = priced_by_id.get(entry['id'])
-        if not p or not p.get('cost'):
-            continue
-        parsed = parse_range(p['cost'])
-        if not parsed:
-            continue
-        lo, hi = parsed
-        most_likely = round((lo + hi) / 2 / 50) * 50
-        confidence = p.get('confidence') if p.get('confidence') in ('matched', 'estimated') else 'estimated'
-        results.append({
-            'item_id': entry['id'],
-            'most_likely': int(most_likely),
-            'low': int(lo),
-            'high': int(hi),
-            'currency': currency,
-            'trade': p.get('trade') or None,
-            'confidence': confidence,
-        })
 
-    return jsonify({'results': results}), 200
+@app.route('/v1/cost-estimate/jobs/<job_id>', methods=['GET'])
+@partner_key_required
+def ig_cost_estimate_job(job_id):
+    """Status of an async batch, with its results/errors once finished —
+    for partners whose callback didn't arrive or who'd rather poll."""
+    job = db.session.get(CostJob, job_id)
+    if not job or job.partnerId != g.partner.id:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(cost_jobs.to_dict(job))
+
+
+@app.route('/v1/cost-estimate/ingest', methods=['POST'])
+@partner_key_required
+def ig_cost_estimate_ingest():
+    """
+    Pre-warm endpoint: IG pushes a published report's items (same shape as
+    /batch) before any buyer flips the toggle. Items are queued for
+    low-priority background pricing (cost_prewarm.py) — 202 right away,
+    nothing priced inline.
+    """
+    data = request.get_json(silent=True) or {}
+    currency = (data.get('currency') or 'USD').upper()
+    if currency not in ('USD', 'CAD'):
+        currency = 'USD'
+
+    items = data.get('items')
+    if not items or not isinstance(items, list):
+        return jsonify({'error': 'items array is required'}), 400
+
+    pricing_input = _ig_pricing_input(items)
+    if not pricing_input:
+        return jsonify({'queued': 0, 'already_known': 0}), 202
+
+    allowed, retry_after = take_tokens(g.partner, items=len(pricing_input))
+    if not allowed:
+        refund_tokens(g.partner, requests=1)
+        return _rate_limited(retry_after)
+    record_usage(g.partner.id, items=len(pricing_input))
+
+    queued = cost_prewarm.enqueue(pricing_input, currency, source_report_id=data.get('report_id'))
+    cost_prewarm.wake_worker()
+    return jsonify({'queued': queued, 'already_known': len(pricing_input) - queued}), 202
 
 @app.route('/api/status/<report_id>', methods=['GET'])
 def get_upload_status(report_id):
@@ -1153,8 +1107,10 @@ def get_upload_status(report_id):
     job = JOB_STATUS.get(report_id)
     if not job:
         # Not in memory — check DB (e.g. after server restart)
-        report = InspectionReport.query.get(report_id)
-        if report and report.analysis_json:
+        analyzed = db.session.query(InspectionReport.id).filter(
+            InspectionReport.id == report_id, InspectionReport.analysis_json.isnot(None)
+        ).first()
+        if analyzed:
             return jsonify({'status': 'done', 'progress': 100})
         return jsonify({'status': 'unknown', 'progress': 0})
     return jsonify(job)
@@ -1188,9 +1144,13 @@ def ask_question(report_id):
         if report_id in REPORT_CACHE:
             qa_system = REPORT_CACHE[report_id]
         else:
-            _analysis = json.loads(report.analysis_json or '{}')
+            # Both deferred columns in one round trip
+            analysis_json, extracted_text = db.session.query(
+                InspectionReport.analysis_json, InspectionReport.extractedText
+            ).filter(InspectionReport.id == report_id).one()
+            _analysis = json.loads(analysis_json or '{}')
             _address = _analysis.get('address', '')
-            qa_system = InspectionReportQA(report.extractedText, address=_address)
+            qa_system = InspectionReportQA(extracted_text, address=_address)
             REPORT_CACHE[report_id] = qa_system
             if len(REPORT_CACHE) > MAX_CACHE_SIZE:
                 REPORT_CACHE.popitem(last=False)
@@ -1354,11 +1314,40 @@ def manage_contractor(contractor_id):
 
 @app.route('/api/admin/leads', methods=['GET'])
 def get_leads():
+    """
+    Newest leads first, contractor name and issue type joined in the same
+    query. Optional ?status= and ?contractor_id= filters, ?limit= (default
+    100, max 500), ?cursor= from the previous page's next_cursor. `total`
+    counts every lead matching the filters.
+    """
     try:
-        leads = Lead.query.all()
+        q = Lead.query
+        status = request.args.get('status')
+        contractor_id = request.args.get('contractor_id')
+        if status:
+            q = q.filter(Lead.status == status)
+        if contractor_id:
+            q = q.filter(Lead.contractorId == contractor_id)
+        total = q.with_entities(func.count(Lead.id)).scalar()
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                q = q.filter(_after_cursor(Lead.createdAt, Lead.id, cursor))
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        limit = _page_size()
+        leads = (q.options(
+                    load_only(Lead.id, Lead.reportId, Lead.status, Lead.createdAt),
+                    joinedload(Lead.contractor).load_only(Contractor.name),
+                    joinedload(Lead.question).load_only(Question.issueType),
+                 )
+                 .order_by(*_newest_first(Lead.createdAt, Lead.id))
+                 .limit(limit).all())
+        next_cursor = _encode_cursor(leads[-1].createdAt, leads[-1].id) if len(leads) == limit else None
         
         return jsonify({
-            'total': len(leads),
+            'total': total,
             'leads': [
                 {
                     'id': l.id,
@@ -1366,10 +1355,11 @@ def get_leads():
                     'contractorName': l.contractor.name,
                     'issue_type': l.question.issueType,
                     'status': l.status,
-                    'created_at': l.createdAt.isoformat()
+                    'created_at': l.createdAt.isoformat() if l.createdAt else None
                 }
                 for l in leads
-            ]
+            ],
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -1383,8 +1373,9 @@ def update_lead(lead_id):
             return jsonify({'error': 'Lead not found'}), 404
         
         data = request.get_json()
-        if 'status' in data:
+        if 'status' in data and data['status'] != lead.status:
             lead.status = data['status']
+            lead.convertedAt = datetime.utcnow() if lead.status == 'converted' else None
         if 'notes' in data:
             lead.notes = data['notes']
         
@@ -1416,9 +1407,10 @@ def create_referral_request():
             return jsonify({'error': 'Report, question, or contractor not found'}), 404
         
         # UPDATE report with customer info if provided
-        report.customerName = data.get('customer_name')
-        report.customerEmail = data.get('customer_email')
-        report.customerPhone = data.get('customer_phone')
+        customer = (data.get('customer_name'), data.get('customer_email'), data.get('customer_phone'))
+        if customer != (report.customerName, report.customerEmail, report.customerPhone):
+            report.customerName, report.customerEmail, report.customerPhone = customer
+            report.contentVersion = (report.contentVersion or 0) + 1  # shown on the PDFs
         
         # GENERATE PUNCHLIST
         print(f"Generating punchlist for {question.issueType}...")
@@ -1440,7 +1432,9 @@ def create_referral_request():
         db.session.add(lead)
         db.session.commit()
         
-        # SEND EMAIL to contractor with punchlist
+        # QUEUE EMAIL to contractor with punchlist — sent in the background
+        # (email_queue.py), so a slow or down SMTP server can't hold up or
+        # fail this request
         if contractor.email:
             try:
                 send_contractor_email(
@@ -1451,11 +1445,11 @@ def create_referral_request():
                     customer_phone=data.get('customer_phone'),
                     property_address=report.address,
                     issue_type=question.issueType,
-                    punchlist=punchlist
+                    punchlist=punchlist,
+                    idempotency_key=f"lead:{lead.id}"
                 )
-                print(f"Email sent to contractor: {contractor.email}")
             except Exception as e:
-                print(f"Warning: Failed to send email to contractor: {str(e)}")
+                print(f"Warning: Failed to queue email to contractor: {str(e)}")
         
         return jsonify({
             'success': True,
@@ -1472,17 +1466,29 @@ def create_referral_request():
 # ANALYTICS & DASHBOARD
 # ============================================================================
 
+# Counts come from the per-day AnalyticsRollup counters (analytics_rollup.py),
+# not from loading every Question/Lead — constant work however much history
+# there is. Optional ?start=/?end= (YYYY-MM-DD, end exclusive) on each;
+# conversions are counted on the day the lead converted.
+
+def _rollup_range():
+    """(start, end) days from ?start=/?end=. Raises ValueError on junk."""
+    start, end = parse_day(request.args.get('start')), parse_day(request.args.get('end'))
+    return (start.date() if start else None), (end.date() if end else None)
+
+_BAD_RANGE = {'error': 'start and end must be YYYY-MM-DD dates'}
+
 @app.route('/api/admin/analytics/questions', methods=['GET'])
 def get_question_analytics():
     try:
-        questions = Question.query.all()
-        
-        issue_type_count = {}
-        for q in questions:
-            issue_type_count[q.issueType] = issue_type_count.get(q.issueType, 0) + 1
+        start, end = _rollup_range()
+    except ValueError:
+        return jsonify(_BAD_RANGE), 400
+    try:
+        issue_type_count = analytics_rollup.totals('questions', start, end)
         
         return jsonify({
-            'total_questions': len(questions),
+            'total_questions': sum(issue_type_count.values()),
             'by_issue_type': issue_type_count
         }), 200
         
@@ -1492,12 +1498,19 @@ def get_question_analytics():
 @app.route('/api/admin/analytics/contractors', methods=['GET'])
 def get_contractor_analytics():
     try:
-        contractors = Contractor.query.all()
+        start, end = _rollup_range()
+    except ValueError:
+        return jsonify(_BAD_RANGE), 400
+    try:
+        leads_by_contractor = analytics_rollup.totals('contractor_leads', start, end)
+        converted_by_contractor = analytics_rollup.totals('contractor_converted', start, end)
+        contractors = Contractor.query.options(load_only(
+            Contractor.id, Contractor.name, Contractor.specialty, Contractor.rating)).all()
         
         contractor_stats = []
         for c in contractors:
-            lead_count = len(c.leads)
-            converted = len([l for l in c.leads if l.status == "converted"])
+            lead_count = leads_by_contractor.get(c.id, 0)
+            converted = converted_by_contractor.get(c.id, 0)
             
             contractor_stats.append({
                 'id': c.id,
@@ -1517,27 +1530,23 @@ def get_contractor_analytics():
 @app.route('/api/admin/dashboard/stats', methods=['GET'])
 def get_dashboard_stats():
     try:
-        total_reports = InspectionReport.query.count()
-        total_questions = Question.query.count()
-        total_leads = Lead.query.count()
+        start, end = _rollup_range()
+    except ValueError:
+        return jsonify(_BAD_RANGE), 400
+    try:
+        issue_type_count = analytics_rollup.totals('questions', start, end)
+        by_status = analytics_rollup.totals('leads', start, end)
+        total_reports = analytics_rollup.total('reports', start, end)
+        paid_reports = analytics_rollup.total('reports_paid', start, end)
         total_contractors = Contractor.query.count()
         
-        questions = Question.query.all()
-        leads = Lead.query.all()
-        
-        issue_type_count = {}
-        for q in questions:
-            issue_type_count[q.issueType] = issue_type_count.get(q.issueType, 0) + 1
-        
-        by_status = {}
-        for l in leads:
-            by_status[l.status] = by_status.get(l.status, 0) + 1
-        
         return jsonify({
             'total_reports': total_reports,
-            'total_questions': total_questions,
-            'total_leads': total_leads,
+            'total_questions': sum(issue_type_count.values()),
+            'total_leads': sum(by_status.values()),
             'total_contractors': total_contractors,
+            'paid_reports': paid_reports,
+            'converted_leads': analytics_rollup.total('leads_converted', start, end),
             'questions_by_issue_type': issue_type_count,
             'leads_by_status': by_status
         }), 200
@@ -1545,6 +1554,22 @@ def get_dashboard_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/analytics/findings', methods=['GET'])
+@login_required
+@admin_required
+def get_finding_analytics():
+    """
+    Cross-report finding stats from the Finding table. Optional filters:
+    ?tier=urgent|maintenance|category, ?section=Roof, ?location=Calgary
+    (prefix of the analysis location), ?currency=CAD.
+    """
+    filters = {k: request.args.get(k) or None for k in ('tier', 'section', 'location')}
+    return jsonify({
+        'top_findings': report_findings.top_findings(**filters),
+        'cost_by_category': report_findings.cost_by_category(currency=request.args.get('currency') or None,
+                                                             **filters),
+    }), 200
+
 @app.route('/api/admin/questions/recent', methods=['GET'])
 def get_recent_questions():
     try:
@@ -1802,17 +1827,46 @@ def report_access(report_id):
 @app.route('/api/my-reports', methods=['GET'])
 @login_required
 def my_reports():
-    reports = InspectionReport.query.filter_by(user_id=current_user.id)\
-        .order_by(InspectionReport.createdAt.desc()).all()
-    return jsonify([{
-        'id': r.id,
-        'address': r.address,
-        'customerName': r.customerName,
-        'createdAt': r.createdAt.isoformat(),
-        'shareToken': r.shareToken,
-        'is_paid': r.is_paid,
-        'alertsEnabled': r.alertsEnabled,
-    } for r in reports])
+    """
+    The signed-in user's reports, newest first, keyset-paginated on
+    (user_id, createdAt, id) like the admin lists: ?limit=, ?cursor= from
+    the previous page's next_cursor, ?search= to filter by address. Each row
+    carries the report's summary columns (condition, budgets, item counts)
+    so the list never touches analysis_json. `total` counts every match.
+    """
+    limit = _page_size()
+    cursor = request.args.get('cursor')
+    search = request.args.get('search', '').strip()
+    columns = ('id', 'address', 'customerName', 'createdAt', 'shareToken', 'is_paid',
+               'alertsEnabled') + _REPORT_SUMMARY_COLUMNS
+
+    q = InspectionReport.query.filter(InspectionReport.user_id == current_user.id)
+    if search:
+        escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        q = q.filter(InspectionReport.address.ilike(f'%{escaped}%', escape='\\'))
+    total = q.with_entities(func.count(InspectionReport.id)).scalar()
+    if cursor:
+        try:
+            q = q.filter(_after_cursor(InspectionReport.createdAt, InspectionReport.id, cursor))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    reports = (q.options(load_only(*[getattr(InspectionReport, c) for c in columns]))
+               .order_by(*_newest_first(InspectionReport.createdAt, InspectionReport.id)).limit(limit).all())
+    next_cursor = _encode_cursor(reports[-1].createdAt, reports[-1].id) if len(reports) == limit else None
+    return jsonify({
+        'reports': [{
+            'id': r.id,
+            'address': r.address,
+            'customerName': r.customerName,
+            'createdAt': r.createdAt.isoformat() if r.createdAt else None,
+            'shareToken': r.shareToken,
+            'is_paid': r.is_paid,
+            'alertsEnabled': r.alertsEnabled,
+            **_report_summary(r),
+        } for r in reports],
+        'next_cursor': next_cursor,
+        'total': total,
+    })
 
 
 @app.route('/api/reports/<report_id>/alerts', methods=['POST'])
@@ -1839,7 +1893,7 @@ def set_report_alerts(report_id):
 def get_home_profile(report_id):
     """Appliance profile + scheduled care events for one report — backs the
     My Home page. Owner-only, same pattern as the alerts toggle."""
-    report = InspectionReport.query.get(report_id)
+    report = InspectionReport.query.options(undefer(InspectionReport.appliance_profile_json)).get(report_id)
     if not report or report.user_id != current_user.id:
         return jsonify({'error': 'Not found'}), 404
 
@@ -1848,7 +1902,7 @@ def get_home_profile(report_id):
     except Exception:
         appliances = []
 
-    events = CareEvent.query.filter_by(reportId=report_id).order_by(CareEvent.dueDate.asc()).all()
+    events = CareEvent.query.filter_by(reportId=report_id).order_by(CareEvent.nextDueDate.asc()).all()
 
     return jsonify({
         'address': report.address,
@@ -1858,7 +1912,9 @@ def get_home_profile(report_id):
             'id': e.id,
             'appliance': e.appliance,
             'eventType': e.eventType,
-            'dueDate': e.dueDate.isoformat(),
+            # next due date (for a sent one-time event, the date it was due)
+            'dueDate': e.nextDueDate.isoformat(),
+            'recurringIntervalDays': e.recurringIntervalDays,
             'message': e.message,
             'sent': e.sent,
             'sentAt': e.sentAt.isoformat() if e.sentAt else None,
@@ -1967,24 +2023,19 @@ def internal_error(error):
 # ============================================================================
 # BLOG
 # ============================================================================
-import markdown as _md
-
-_BLOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blog')
-
-
-def _parse_frontmatter(text):
-    """Parse ---key: value--- frontmatter from a markdown string."""
-    if not text.startswith('---'):
-        return {}, text
-    parts = text.split('---', 2)
-    if len(parts) < 3:
-        return {}, text
-    meta = {}
-    for line in parts[1].strip().splitlines():
-        if ':' in line:
-            k, _, v = line.partition(':')
-            meta[k.strip()] = v.strip()
-    return meta, parts[2].strip()
+# Rendered once per change of blog/ or the templates and served from memory
+# (blog_cache.py), precompressed, with ETag / Last-Modified so crawlers'
+# revalidations are 304s.
+def _send_blog_page(page):
+    use_gzip = request.accept_encodings['gzip'] > 0
+    response = Response(page.gzipped if use_gzip else page.body, content_type=page.content_type)
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(page.etag + ('-gz' if use_gzip else ''))
+    response.last_modified = page.last_modified
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response.make_conditional(request)
 
 
 @app.route('/robots.txt')
@@ -2002,101 +2053,22 @@ def robots_txt():
 
 @app.route('/sitemap.xml')
 def sitemap_xml():
-    static_pages = [
-        ("https://lot7.ai/",      "weekly", "1.0"),
-        ("https://lot7.ai/blog",  "daily",  "0.9"),
-    ]
-    urls = ""
-    for loc, freq, pri in static_pages:
-        urls += f"""  <url>
-    <loc>{loc}</loc>
-    <changefreq>{freq}</changefreq>
-    <priority>{pri}</priority>
-  </url>\n"""
-
-    if os.path.isdir(_BLOG_DIR):
-        for fname in sorted(os.listdir(_BLOG_DIR), reverse=True):
-            if not fname.endswith('.md'):
-                continue
-            path = os.path.join(_BLOG_DIR, fname)
-            with open(path, encoding='utf-8') as f:
-                meta, _ = _parse_frontmatter(f.read())
-            slug = meta.get('slug', fname[:-3])
-            lastmod = meta.get('date', '')
-            loc = f"https://lot7.ai/blog/{slug}"
-            urls += f"""  <url>
-    <loc>{loc}</loc>
-    {"<lastmod>" + lastmod + "</lastmod>" if lastmod else ""}
-    <changefreq>monthly</changefreq>
-    <priority>0.7</priority>
-  </url>\n"""
-
-    xml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
-{urls}</urlset>"""
-    return xml, 200, {"Content-Type": "application/xml"}
+    return _send_blog_page(blog_cache.get_page('sitemap'))
 
 
 @app.route('/blog')
 def blog_index_page():
-    posts = []
-    if os.path.isdir(_BLOG_DIR):
-        for fname in sorted(os.listdir(_BLOG_DIR), reverse=True):
-            if not fname.endswith('.md'):
-                continue
-            path = os.path.join(_BLOG_DIR, fname)
-            with open(path, encoding='utf-8') as f:
-                meta, body = _parse_frontmatter(f.read())
-            slug = meta.get('slug', fname[:-3])
-            words = body.split()
-            excerpt = meta.get('excerpt', ' '.join(words[:28]) + ('…' if len(words) > 28 else ''))
-            posts.append({
-                'slug': slug,
-                'title': meta.get('title', slug.replace('-', ' ').title()),
-                'date': meta.get('date', ''),
-                'excerpt': excerpt,
-            })
-    with open('blog_index_template.html', encoding='utf-8') as f:
-        tpl = f.read()
-    if posts:
-        cards = ''.join(
-            f'<a href="/blog/{p["slug"]}" class="post-card">'
-            f'<div class="post-date">{p["date"]}</div>'
-            f'<h2>{p["title"]}</h2>'
-            f'<p>{p["excerpt"]}</p>'
-            f'<span class="read-more">Read more →</span>'
-            f'</a>'
-            for p in posts
-        )
-    else:
-        cards = '<p class="no-posts">No posts yet — check back soon.</p>'
-    return tpl.replace('{{POSTS}}', cards)
+    return _send_blog_page(blog_cache.get_page('index'))
 
 
 @app.route('/blog/<slug>')
 def blog_post_page(slug):
     # Sanitise slug — letters, digits, hyphens only
     slug = re.sub(r'[^a-z0-9-]', '', slug.lower())
-    path = os.path.join(_BLOG_DIR, f'{slug}.md')
-    if not os.path.isfile(path):
+    page = blog_cache.get_page(('post', slug))
+    if page is None:
         return 'Post not found', 404
-    with open(path, encoding='utf-8') as f:
-        meta, body = _parse_frontmatter(f.read())
-    # Strip leading H1 from body — the template already renders the title as a heading
-    body_no_h1 = re.sub(r'^#\s+.+\n?', '', body, count=1, flags=re.MULTILINE).lstrip()
-    html_body = _md.markdown(body_no_h1, extensions=['tables', 'fenced_code'])
-    with open('blog_post_template.html', encoding='utf-8') as f:
-        tpl = f.read()
-    schema = meta.get('schema', '').strip()
-    schema_block = f'<script type="application/ld+json">{schema}</script>' if schema else ''
-    return (tpl
-            .replace('{{META_TITLE}}', meta.get('meta_title', meta.get('title', 'Lot7.ai')))
-            .replace('{{META_DESCRIPTION}}', meta.get('meta_description', ''))
-            .replace('{{SLUG}}', slug)
-            .replace('{{TITLE}}', meta.get('title', ''))
-            .replace('{{DATE}}', meta.get('date', ''))
-            .replace('{{CONTENT}}', html_body)
-            .replace('{{SCHEMA}}', schema_block))
+    return _send_blog_page(page)
 
 
 # ============================================================================
@@ -2150,7 +2122,290 @@ with app.app_context():
             print("Migration: added alertsEnabled column to InspectionReport")
     except Exception as e:
         print(f"Migration note: {e}")
+    # Safe migration: add dispatchKey column to existing CareEvent table if absent
+    try:
+        inspector = sa_inspect(db.engine)
+        cols = [c['name'] for c in inspector.get_columns('CareEvent')]
+        if 'dispatchKey' not in cols:
+            with db.engine.connect() as conn:
+                conn.execute(text('ALTER TABLE "CareEvent" ADD COLUMN "dispatchKey" VARCHAR(64)'))
+                conn.commit()
+            print("Migration: added dispatchKey column to CareEvent")
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Safe migration: CareEvent.claimedAt, so a dispatcher run can release
+    # claims left by a dead run. Claims already in place count from now.
+    try:
+        inspector = sa_inspect(db.engine)
+        cols = [c['name'] for c in inspector.get_columns('CareEvent')]
+        if 'claimedAt' not in cols:
+            with db.engine.connect() as conn:
+                conn.execute(text('ALTER TABLE "CareEvent" ADD COLUMN "claimedAt" TIMESTAMP'))
+                conn.execute(text('UPDATE "CareEvent" SET "claimedAt" = CURRENT_TIMESTAMP '
+                                  'WHERE "dispatchKey" IS NOT NULL'))
+                conn.commit()
+            print("Migration: added claimedAt column to CareEvent")
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Safe migration: CompressedText columns hold bytes (compressed_text.py).
+    # On Postgres, TEXT columns from before the switch become bytea — a
+    # table rewrite under lock, once — and STORAGE EXTERNAL, so TOAST stores
+    # the zlib output as is instead of trying to pglz it again. SQLite keeps
+    # its declared types; old TEXT values there are read as they are.
+    if db.engine.dialect.name == 'postgresql':
+        try:
+            with db.engine.connect() as conn:
+                for table in db.metadata.sorted_tables:
+                    for col in table.columns:
+                        if not isinstance(col.type, CompressedText):
+                            continue
+                        data_type = conn.execute(text(
+                            'SELECT data_type FROM information_schema.columns '
+                            'WHERE table_name = :t AND column_name = :c'), {'t': table.name, 'c': col.name}).scalar()
+                        if data_type != 'text':
+                            continue
+                        conn.execute(text(f'ALTER TABLE "{table.name}" ALTER COLUMN "{col.name}" '
+                                          f'TYPE bytea USING convert_to("{col.name}", \'UTF8\')'))
+                        conn.execute(text(f'ALTER TABLE "{table.name}" ALTER COLUMN "{col.name}" '
+                                          f'SET STORAGE EXTERNAL'))
+                        conn.commit()
+                        print(f"Migration: {table.name}.{col.name} is now bytea")
+        except Exception as e:
+            print(f"Migration note (compressed columns): {e}")
+    # Safe migration: CareEvent.alertType (weather events; older ones are
+    # matched by their message in weather_care_events._alert_type_of)
+    try:
+        inspector = sa_inspect(db.engine)
+        cols = [c['name'] for c in inspector.get_columns('CareEvent')]
+        if 'alertType' not in cols:
+            with db.engine.connect() as conn:
+                conn.execute(text('ALTER TABLE "CareEvent" ADD COLUMN "alertType" VARCHAR(30)'))
+                conn.commit()
+            print("Migration: added alertType column to CareEvent")
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Safe migration: CostEstimate.nextAttemptAt (pre-warm retry backoff).
+    # Rows already queued are due now.
+    try:
+        inspector = sa_inspect(db.engine)
+        cols = [c['name'] for c in inspector.get_columns('CostEstimate')]
+        if 'nextAttemptAt' not in cols:
+            with db.engine.connect() as conn:
+                conn.execute(text('ALTER TABLE "CostEstimate" ADD COLUMN "nextAttemptAt" TIMESTAMP'))
+                conn.execute(text('UPDATE "CostEstimate" SET "nextAttemptAt" = CURRENT_TIMESTAMP'))
+                conn.commit()
+            print("Migration: added nextAttemptAt column to CostEstimate")
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Safe migration: CareEvent.nextDueDate (recurring events advance it in
+    # place instead of inserting a new row per send) and the partial index
+    # the dispatcher scans. Existing rows start at their dueDate; old
+    # one-row-per-send chains are folded up by python compact_care_events.py
+    try:
+        inspector = sa_inspect(db.engine)
+        cols = [c['name'] for c in inspector.get_columns('CareEvent')]
+        with db.engine.connect() as conn:
+            if 'nextDueDate' not in cols:
+                conn.execute(text('ALTER TABLE "CareEvent" ADD COLUMN "nextDueDate" DATE'))
+                conn.execute(text('UPDATE "CareEvent" SET "nextDueDate" = "dueDate" WHERE "nextDueDate" IS NULL'))
+                print("Migration: added nextDueDate column to CareEvent")
+            unsent = 'sent = false' if db.engine.dialect.name == 'postgresql' else 'sent = 0'
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS "ix_CareEvent_unsent_nextDueDate" '
+                              f'ON "CareEvent" ("nextDueDate") WHERE {unsent}'))
+            # superseded by it (and the planner would sometimes pick them)
+            conn.execute(text('DROP INDEX IF EXISTS "ix_CareEvent_sent"'))
+            conn.execute(text('DROP INDEX IF EXISTS "ix_CareEvent_dueDate"'))
+            conn.commit()
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Safe migration: InspectionReport.contentVersion, the PDF cache key
+    try:
+        inspector = sa_inspect(db.engine)
+        cols = [c['name'] for c in inspector.get_columns('InspectionReport')]
+        if 'contentVersion' not in cols:
+            with db.engine.connect() as conn:
+                conn.execute(text('ALTER TABLE "InspectionReport" ADD COLUMN "contentVersion" INTEGER NOT NULL DEFAULT 0'))
+                conn.commit()
+            print("Migration: added contentVersion column to InspectionReport")
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Safe migration: list-view summary columns on InspectionReport (filled
+    # for existing reports by python backfill_findings.py)
+    try:
+        inspector = sa_inspect(db.engine)
+        cols = [c['name'] for c in inspector.get_columns('InspectionReport')]
+        with db.engine.connect() as conn:
+            for name, ddl in (
+                ('condition', 'VARCHAR(100)'),
+                ('budgetNow', 'INTEGER'),
+                ('budget5yr', 'INTEGER'),
+                ('urgentCount', 'INTEGER'),
+                ('maintenanceCount', 'INTEGER'),
+                ('categoryCount', 'INTEGER'),
+                ('currency', 'VARCHAR(3)'),
+                ('location', 'VARCHAR(255)'),
+            ):
+                if name not in cols:
+                    conn.execute(text(f'ALTER TABLE "InspectionReport" ADD COLUMN "{name}" {ddl}'))
+                    print(f"Migration: added {name} column to InspectionReport")
+            conn.commit()
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Safe migration: weather-scan keys (region, applianceFlags) and the
+    # indexes the weather job uses. Existing reports get their keys from
+    # python weather_care_events.py --backfill
+    try:
+        inspector = sa_inspect(db.engine)
+        cols = [c['name'] for c in inspector.get_columns('InspectionReport')]
+        with db.engine.connect() as conn:
+            for name, ddl in (('region', 'VARCHAR(8)'), ('applianceFlags', 'INTEGER')):
+                if name not in cols:
+                    conn.execute(text(f'ALTER TABLE "InspectionReport" ADD COLUMN "{name}" {ddl}'))
+                    print(f"Migration: added {name} column to InspectionReport")
+            enabled = '"alertsEnabled" = true' if db.engine.dialect.name == 'postgresql' else '"alertsEnabled" = 1'
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS "ix_InspectionReport_alerts_region" '
+                              f'ON "InspectionReport" (region, "applianceFlags", id) WHERE {enabled}'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_CareEvent_eventType_dueDate" '
+                              'ON "CareEvent" ("eventType", "dueDate")'))
+            conn.commit()
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Full-text report search (FTS5 on SQLite, tsvector + GIN on Postgres).
+    # Reports created before this existed: python rebuild_search_index.py
+    try:
+        report_search.setup(db.engine)
+    except Exception as e:
+        print(f"Migration note (report search): {e}")
+    # Safe migration: admin user/report list indexes on existing databases
+    # (create_all only adds them to new tables)
+    try:
+        with db.engine.connect() as conn:
+            conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_User_email_lower" ON "User" (lower(email))'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_User_createdAt_id" ON "User" ("createdAt", id)'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_InspectionReport_user_paid" ON "InspectionReport" (user_id, is_paid)'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_InspectionReport_createdAt_id" ON "InspectionReport" ("createdAt", id)'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_InspectionReport_user_createdAt_id" ON "InspectionReport" (user_id, "createdAt", id)'))
+            conn.commit()
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Safe migration: foreign-key and lead-list indexes on existing databases
+    # (every child-table lookup by reportId was a full scan)
+    try:
+        with db.engine.connect() as conn:
+            for name, table, cols in (
+                ('ix_Lead_reportId', 'Lead', '"reportId"'),
+                ('ix_Lead_questionId', 'Lead', '"questionId"'),
+                ('ix_Lead_createdAt_id', 'Lead', '"createdAt", id'),
+                ('ix_Lead_contractor_createdAt_id', 'Lead', '"contractorId", "createdAt", id'),
+                ('ix_Lead_status_createdAt_id', 'Lead', 'status, "createdAt", id'),
+                ('ix_Question_reportId', 'Question', '"reportId"'),
+                ('ix_Conversation_reportId', 'Conversation', '"reportId"'),
+                ('ix_ReportWarranty_reportId', 'ReportWarranty', '"reportId"'),
+                ('ix_WarrantyQuery_reportId', 'WarrantyQuery', '"reportId"'),
+            ):
+                conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({cols})'))
+            conn.commit()
+    except Exception as e:
+        print(f"Migration note: {e}")
+    # Contractor service areas: build from Contractor.zipCodes the first time
+    # (kept in sync on every contractor save after that)
+    try:
+        if (not db.session.query(ContractorServiceArea.contractorId).first()
+                and Contractor.query.filter(Contractor.zipCodes.isnot(None), Contractor.zipCodes != '').first()):
+            print(f"Migration: built {contractor_matching.rebuild()} contractor service area row(s)")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Migration note (contractor service areas): {e}")
+    # Safe migration: Lead.convertedAt. Leads already converted are dated by
+    # their last update — the closest record there is of when it happened.
+    # Their conversion counters move to that day with the reconcile below.
+    try:
+        inspector = sa_inspect(db.engine)
+        cols = [c['name'] for c in inspector.get_columns('Lead')]
+        if 'convertedAt' not in cols:
+            with db.engine.connect() as conn:
+                conn.execute(text('ALTER TABLE "Lead" ADD COLUMN "convertedAt" TIMESTAMP'))
+                conn.execute(text('UPDATE "Lead" SET "convertedAt" = COALESCE("updatedAt", "createdAt") '
+                                  "WHERE status = 'converted'"))
+                conn.commit()
+            print("Migration: added convertedAt column to Lead")
+            analytics_rollup.reconcile()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Migration note (Lead.convertedAt): {e}")
+    # Analytics rollups: seed from history the first time (later drift is
+    # fixed by the nightly python reconcile_analytics.py)
+    try:
+        if not db.session.query(AnalyticsRollup.day).first():
+            if analytics_rollup.seed():
+                print("Migration: seeded AnalyticsRollup from existing rows")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Migration note (analytics rollup): {e}")
+    # Partner API: the legacy IG_COST_API_KEY row used to store the key's
+    # hash, which kept it valid after the env var was rotated
+    try:
+        if partner_api.migrate_legacy_partner():
+            print("Migration: re-keyed the legacy Inspectagram API partner row")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Migration note (legacy API key): {e}")
+    # Postgres only: trigram index so the admin email substring search
+    # (LIKE '%term%') is indexed too
+    if db.engine.dialect.name == 'postgresql':
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+                conn.execute(text('CREATE INDEX IF NOT EXISTS "ix_User_email_trgm" ON "User" USING gin (lower(email) gin_trgm_ops)'))
+                conn.commit()
+        except Exception as e:
+            print(f"Migration note (pg_trgm): {e}")
+        # The keyset listings order createdAt DESC NULLS LAST (_newest_first);
+        # a backward scan of the plain (createdAt, id) btree gives NULLs first
+        # on Postgres, so they get matching indexes (SQLite's backward scan
+        # already puts NULLs last)
+        try:
+            with db.engine.connect() as conn:
+                for name, table, prefix in (
+                        ('ix_User_newest', 'User', ''),
+                        ('ix_InspectionReport_newest', 'InspectionReport', ''),
+                        ('ix_InspectionReport_user_newest', 'InspectionReport', 'user_id, '),
+                        ('ix_Lead_newest', 'Lead', ''),
+                        ('ix_Lead_contractor_newest', 'Lead', '"contractorId", '),
+                        ('ix_Lead_status_newest', 'Lead', 'status, ')):
+                    conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+                                      f'({prefix}"createdAt" DESC NULLS LAST, id DESC)'))
+                conn.commit()
+        except Exception as e:
+            print(f"Migration note (keyset indexes): {e}")
     print("Database tables verified/created")
 
+def start_workers(app):
+    """
+    Start this process's background workers: the async cost-job and export
+    resume sweeps, the pre-warm drainer and the outbound email sender. Called once
+    per serving process as it boots — by gunicorn's post_worker_init hook
+    (gunicorn.conf.py) and by `python app.py` — so work left over from
+    before a deploy or crash is picked up. Never on import: one-off scripts
+    and tests that import the app start no threads.
+    BACKGROUND_WORKERS=0 keeps a web process from starting them.
+    """
+    if os.getenv('BACKGROUND_WORKERS', '1') == '0':
+        print("Background workers off (BACKGROUND_WORKERS=0)")
+        return
+    cost_jobs.start_resumer(app, _estimate_ig_items)
+    export_jobs.start_resumer(app)
+    cost_prewarm.start_worker(app)
+    email_queue.start_worker(app)
+
+
+def _flush_usage_on_exit():
+    with app.app_context():
+        flush_usage()
+
+
+atexit.register(_flush_usage_on_exit)
+
 if __name__ == '__main__':
+    start_workers(app)
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Fill the Finding table and InspectionReport's summary columns
+(report_findings.py) from analysis_json for reports analyzed before they
+existed, in batches. New analyses write both automatically — this is only
+needed once after deploying, or with --all after changing how findings are
+parsed.
+
+Usage:
+    python backfill_findings.py            # reports missing Finding rows or summary columns
+    python backfill_findings.py --all      # rebuild every report's rows
+    python backfill_findings.py --batch=500
+"""
+
+import sys
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import app
+import report_findings
+
+
+def main():
+    batch = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--batch=')), 200)
+    with app.app_context():
+        reports, findings = report_findings.backfill(batch_size=batch, only_missing='--all' not in sys.argv)
+    print(f"Done — {findings} finding(s) from {reports} report(s).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+/api/admin/users at scale: the old 2N+1 loop (load every User, two COUNTs
+each) against admin_user_page() (one grouped, keyset-paginated query).
+
+Seeds its own database — 50k users / 500k reports by default — so point it
+at a scratch DB, never production. Re-runs reuse the seeded data unless
+--reseed is passed. The old path is timed on a sample of users and
+extrapolated (the full loop is 100k queries).
+
+Usage:
+    python benchmarks/bench_admin_users.py
+    python benchmarks/bench_admin_users.py --users=50000 --reports=500000 --db=sqlite:////tmp/lot7_bench_admin.db
+    python benchmarks/bench_admin_users.py --db=postgresql://... --reseed
+"""
+
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+def _opt(name, default):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+DB_URL = _opt('db', 'sqlite:////tmp/lot7_bench_admin.db')
+os.environ['DATABASE_URL'] = DB_URL
+
+from app import app, admin_user_page  # noqa: E402
+from models import db, User, InspectionReport  # noqa: E402
+
+DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'remax.com', 'kw.com', 'icloud.com']
+
+
+def seed(n_users, n_reports, chunk=10000):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    print(f"Seeding {n_users:,} users / {n_reports:,} reports...")
+    t0 = time.perf_counter()
+    user_ids = []
+    rows = []
+    for i in range(n_users):
+        uid = str(uuid.uuid4())
+        user_ids.append(uid)
+        rows.append({
+            'id': uid, 'email': f"user{i}.{rng.randint(1000, 9999)}@{rng.choice(DOMAINS)}",
+            'password_hash': 'x', 'subscription_status': rng.choice(['inactive'] * 4 + ['active']),
+            'role': 'buyer', 'createdAt': now - timedelta(minutes=n_users - i),
+        })
+        if len(rows) >= chunk:
+            db.session.execute(User.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(User.__table__.insert(), rows)
+    db.session.commit()
+
+    rows = []
+    for i in range(n_reports):
+        rows.append({
+            'id': str(uuid.uuid4()), 'address': f"{i} Bench St",
+            'user_id': rng.choice(user_ids) if rng.random() < 0.9 else None,
+            'is_paid': rng.random() < 0.3, 'alertsEnabled': True, 'isShared': True,
+            'shareToken': uuid.uuid4().hex, 'createdAt': now, 'updatedAt': now,
+        })
+        if len(rows) >= chunk:
+            db.session.execute(InspectionReport.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(InspectionReport.__table__.insert(), rows)
+    db.session.commit()
+    print(f"  seeded in {time.perf_counter() - t0:.1f}s")
+
+
+def old_admin_users(users):
+    """The pre-change loop body, run over the given users."""
+    result = []
+    for u in users:
+        report_count = InspectionReport.query.filter_by(user_id=u.id).count()
+        paid_count = InspectionReport.query.filter_by(user_id=u.id, is_paid=True).count()
+        result.append((u.id, report_count, paid_count))
+    return result
+
+
+def timed(label, fn, repeat=5):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    ms = (time.perf_counter() - t0) / repeat * 1000
+    print(f"{label:<44} {ms:9.1f} ms")
+    return out
+
+
+def main():
+    n_users = int(_opt('users', 50000))
+    n_reports = int(_opt('reports', 500000))
+    sample = int(_opt('old-sample', 500))
+
+    with app.app_context():
+        if '--reseed' in sys.argv:
+            InspectionReport.query.delete()
+            User.query.delete()
+            db.session.commit()
+        if User.query.count() < n_users:
+            seed(n_users - User.query.count(), n_reports)
+        total_users = User.query.count()
+        print(f"DB: {DB_URL}  ({total_users:,} users, {InspectionReport.query.count():,} reports)\n")
+
+        t0 = time.perf_counter()
+        all_users = User.query.order_by(User.createdAt.desc()).all()
+        load_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        old_admin_users(all_users[:sample])
+        per_user_ms = (time.perf_counter() - t0) * 1000 / sample
+        print(f"{'old: load all users':<44} {load_ms:9.1f} ms")
+        print(f"{'old: 2 COUNTs/user (sampled ' + str(sample) + ')':<44} {per_user_ms:9.3f} ms/user")
+        print(f"{'old: full page, extrapolated':<44} {load_ms + per_user_ms * total_users:9.1f} ms"
+              f"  ({2 * total_users + 1:,} queries)\n")
+
+        users, cursor = timed('new: first page (100)', lambda: admin_user_page())
+        for _ in range(50):
+            _, cursor = admin_user_page(cursor=cursor)
+        timed('new: page 51 via cursor', lambda: admin_user_page(cursor=cursor))
+        timed('new: substring search "remax"', lambda: admin_user_page(search='remax'))
+        timed('new: prefix search "user4999" (match=prefix)', lambda: admin_user_page(search='user4999', match='prefix'))
+
+        # Same counts as the old loop for the first page
+        expected = {uid: (rc, pc) for uid, rc, pc in old_admin_users([User.query.get(u['id']) for u in users])}
+        mismatched = [u['id'] for u in users if expected[u['id']] != (u['report_count'], u['paid_count'])]
+        print(f"\nCounts agree with the old loop on page 1: {'yes' if not mismatched else f'NO ({len(mismatched)})'}")
+
+
+if __name__ == '__main__':
+    main()
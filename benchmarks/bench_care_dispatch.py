@@ -0,0 +1,185 @@
+"""
+The care-reminder dispatcher (send_care_reminders.py) against a local SMTP
+stub: 100k due CareEvents, batched digests over reused connections vs. the
+old loop (lazy-load report and user per event, connect + login + send +
+quit per event, one commit at the end).
+
+The stub speaks just enough ESMTP for smtplib (EHLO, AUTH PLAIN, MAIL, RCPT,
+DATA, QUIT; no TLS) and sleeps --connect-ms per connection to stand in for
+the TCP + STARTTLS + login round trips to a real provider, and --send-ms per
+message. The old loop is timed on an --old-sample of events and
+extrapolated; the new dispatcher then sends everything that's left.
+
+Usage:
+    python benchmarks/bench_care_dispatch.py
+    python benchmarks/bench_care_dispatch.py --events=20000 --connect-ms=150 --send-ms=10
+"""
+
+import contextlib
+import io
+import os
+import random
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+def _opt(name, default):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+DB_PATH = '/tmp/lot7_bench_care_dispatch.db'
+if os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['PDF_CACHE_DIR'] = tempfile.mkdtemp(prefix='lot7_bench_pdf_')
+os.environ.update(MAIL_USERNAME='bench', MAIL_PASSWORD='bench', MAIL_USE_TLS='false',
+                  MAIL_DEFAULT_SENDER='reminders@lot7.ai')
+
+CONNECT_S = float(_opt('connect-ms', 60)) / 1000
+SEND_S = float(_opt('send-ms', 5)) / 1000
+stats = {'connections': 0, 'messages': 0}
+_stats_lock = threading.Lock()
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        time.sleep(CONNECT_S)
+        with _stats_lock:
+            stats['connections'] += 1
+        self.wfile.write(b'220 stub ESMTP\r\n')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line[:4].upper()
+            if cmd == b'EHLO':
+                self.wfile.write(b'250-stub\r\n250-AUTH PLAIN LOGIN\r\n250 OK\r\n')
+            elif cmd == b'AUTH':
+                self.wfile.write(b'235 OK\r\n')
+            elif cmd == b'DATA':
+                self.wfile.write(b'354 go ahead\r\n')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                time.sleep(SEND_S)
+                with _stats_lock:
+                    stats['messages'] += 1
+                self.wfile.write(b'250 queued\r\n')
+            elif cmd == b'QUIT':
+                self.wfile.write(b'221 bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+smtp_stub = StubSMTPServer(('127.0.0.1', 0), StubSMTPHandler)
+threading.Thread(target=smtp_stub.serve_forever, daemon=True).start()
+os.environ.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=str(smtp_stub.server_address[1]))
+
+from app import app  # noqa: E402
+from models import db, User, InspectionReport, CareEvent  # noqa: E402
+import send_care_reminders  # noqa: E402
+from utils import build_care_event_email, open_smtp_connection  # noqa: E402
+
+APPLIANCES = ['Furnace', 'Water heater', 'AC condenser', 'Roof', 'Sump pump', 'Smoke detectors', 'Dryer vent']
+
+
+def seed(n_events, today):
+    """~4 events per home; a few realtors own many homes, most buyers one."""
+    rng = random.Random(42)
+    n_reports = max(1, n_events // 4)
+    users = [{'id': str(uuid.uuid4()), 'email': f'user{i}@example.com', 'password_hash': 'x', 'role': 'buyer',
+              'createdAt': datetime.utcnow()} for i in range(int(n_reports * 0.8))]
+    reports, events = [], []
+    for i in range(n_reports):
+        owner = users[rng.randrange(50)] if rng.random() < 0.2 else users[i % len(users)]
+        reports.append({'id': str(uuid.uuid4()), 'address': f'{i} Elm St, Chicago, IL', 'user_id': owner['id'],
+                        'customerEmail': None, 'alertsEnabled': rng.random() > 0.05, 'is_paid': True,
+                        'isShared': True, 'shareToken': f's{i}', 'createdAt': datetime.utcnow()})
+    for i in range(n_events):
+        appliance = APPLIANCES[i % len(APPLIANCES)]
+        events.append({'id': str(uuid.uuid4()), 'reportId': reports[i % n_reports]['id'], 'appliance': appliance,
+                       'eventType': 'age_based', 'dueDate': today - timedelta(days=rng.randrange(3)),
+                       'recurringIntervalDays': rng.choice([None, 365, 180]), 'sent': False,
+                       'message': f'Your {appliance.lower()} is due for its service — book a technician this month.',
+                       'createdAt': datetime.utcnow()})
+    for table, rows in ((User.__table__, users), (InspectionReport.__table__, reports), (CareEvent.__table__, events)):
+        for i in range(0, len(rows), 5000):
+            db.session.execute(table.insert(), rows[i:i + 5000])
+    db.session.commit()
+
+
+def old_dispatch(today, sample):
+    """The previous send_care_reminders.main loop, on `sample` due events.
+    Returns how many it sent."""
+    due = CareEvent.query.filter(CareEvent.dueDate <= today, CareEvent.sent == False).limit(sample).all()  # noqa: E712
+    sent = 0
+    for event in due:
+        report = event.report
+        recipient = (report.user.email if report.user_id and report.user else None) or report.customerEmail
+        if not report.alertsEnabled or not recipient:
+            continue
+        # what send_care_event_email did before it went through the queue
+        server = open_smtp_connection()
+        server.send_message(build_care_event_email(recipient, event.appliance, event.message))
+        server.quit()
+        event.sent = True
+        event.sentAt = datetime.utcnow()
+        sent += 1
+        if event.recurringIntervalDays:
+            db.session.add(CareEvent(reportId=event.reportId, appliance=event.appliance, eventType=event.eventType,
+                                     dueDate=today + timedelta(days=event.recurringIntervalDays),
+                                     recurringIntervalDays=event.recurringIntervalDays, message=event.message,
+                                     sent=False))
+    db.session.commit()
+    return sent
+
+
+def main():
+    n_events = int(_opt('events', 100000))
+    sample = int(_opt('old-sample', 300))
+    today = date.today()
+
+    with app.app_context():
+        t0 = time.perf_counter()
+        seed(n_events, today)
+        print(f"Seeded {n_events} due events in {time.perf_counter() - t0:.1f}s; "
+              f"stub: {CONNECT_S * 1000:.0f} ms/connection, {SEND_S * 1000:.0f} ms/message\n")
+
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # the old loop prints per email
+            old_n = old_dispatch(today, sample)
+        old_s = time.perf_counter() - t0
+        old_conns = stats['connections']
+
+    stats.update(connections=0, messages=0)
+    t0 = time.perf_counter()
+    send_care_reminders.main(as_of=today)
+    new_s = time.perf_counter() - t0
+
+    with app.app_context():
+        new_n = CareEvent.query.filter(CareEvent.sentAt.isnot(None)).count() - old_n
+        unsent = CareEvent.query.filter(CareEvent.nextDueDate <= today, CareEvent.sent.is_(False)).count()
+    per_old = old_s / old_n
+    print(f"\nold loop:  {old_n} events in {old_s:.2f}s ({per_old * 1000:.1f} ms/event, {old_conns} connections)"
+          f" -> ~{per_old * n_events / 60:.1f} min for {n_events}")
+    print(f"new:       {new_n} events in {new_s:.2f}s ({new_s / max(new_n, 1) * 1000:.2f} ms/event), "
+          f"{stats['messages']} digests over {stats['connections']} connections; {unsent} left unsent (muted homes)")
+    smtp_stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
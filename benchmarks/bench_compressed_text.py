@@ -0,0 +1,111 @@
+"""
+CompressedText (compressed_text.py) vs plain Text: stored size, and write
+and read latency through SQLAlchemy.
+
+The report-text sample is built from the repo's own inspection prose (blog
+posts + the Illinois SOP) shuffled sentence by sentence with measurements
+sprinkled in; pass --file= with a real extracted report for a truer ratio.
+analysis_json is shaped like Pass 2 output. Uses a throwaway SQLite file
+with its own two tables — nothing touches the app database.
+
+Usage:
+    python benchmarks/bench_compressed_text.py
+    python benchmarks/bench_compressed_text.py --rows=500 --text-kb=300 --file=/path/report.txt
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, create_engine, func, select  # noqa: E402
+
+from compressed_text import CompressedText  # noqa: E402
+
+
+def _opt(name, default):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+def report_text(rng, kb, source=None):
+    if source:
+        text = Path(source).read_text(encoding='utf-8', errors='ignore')
+        return (text * (kb * 1024 // max(len(text), 1) + 1))[:kb * 1024]
+    corpus = ' '.join(p.read_text(encoding='utf-8') for p in sorted((REPO_DIR / 'blog').glob('*.md')))
+    corpus += ' ' + ' '.join(re.findall(r'"([^"]{20,})"', (REPO_DIR / 'illinois_sop.json').read_text()))
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', corpus) if len(s.strip()) > 20]
+    out, size = [], 0
+    while size < kb * 1024:
+        s = rng.choice(sentences)
+        if rng.random() < 0.3:
+            s += f" Measured {rng.randint(1, 99)}.{rng.randint(0, 9)} at location {rng.randint(1, 40)}."
+        out.append(s)
+        size += len(s) + 1
+    return ' '.join(out)
+
+
+def analysis_json(rng):
+    items = lambda n, kind: [{
+        'name': f'{kind} finding {i}', 'cost': f'${rng.randint(1, 20) * 100:,} - ${rng.randint(21, 60) * 100:,}',
+        'cost_note': 'Scope based on the inspector note; obtain licensed contractor quotes.',
+        'trade': rng.choice(['Roofer', 'Electrician', 'Plumber', 'HVAC Technician', 'Handyman']),
+        'timeline': rng.choice(['Immediate', '1-3 years', '3-5 years']),
+        'diy_eligible': rng.random() < 0.2, 'category_key': None, 'cost_source': 'ai_contextual',
+    } for i in range(n)]
+    return json.dumps({'condition': 'Needs TLC', 'currency': 'USD', 'location': 'Chicago, IL',
+                       'urgent_items': items(12, 'Urgent'), 'maintenance_items': items(40, 'Maintenance'),
+                       'category_items': items(60, 'Category'),
+                       'checklist': [{'passed': i % 4 != 0, 'text': f'Checklist item {i}'} for i in range(40)]})
+
+
+def bench(label, values, rows):
+    path = '/tmp/lot7_bench_compress.db'
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f'sqlite:///{path}')
+    meta = MetaData()
+    plain = Table('plain', meta, Column('id', Integer, primary_key=True), Column('body', Text))
+    packed = Table('packed', meta, Column('id', Integer, primary_key=True), Column('body', CompressedText))
+    meta.create_all(engine)
+
+    results = {}
+    for table in (plain, packed):
+        with engine.begin() as conn:
+            t0 = time.perf_counter()
+            for i in range(rows):
+                conn.execute(table.insert(), {'id': i, 'body': values[i % len(values)]})
+            write_ms = (time.perf_counter() - t0) / rows * 1000
+        with engine.connect() as conn:
+            t0 = time.perf_counter()
+            for i in range(rows):
+                conn.execute(select(table.c.body).where(table.c.id == i)).scalar()
+            read_ms = (time.perf_counter() - t0) / rows * 1000
+            stored = conn.execute(select(func.sum(func.length(table.c.body)))).scalar()
+        results[table.name] = (stored, write_ms, read_ms)
+    engine.dispose()
+    os.remove(path)
+
+    (p_size, p_w, p_r), (c_size, c_w, c_r) = results['plain'], results['packed']
+    print(f"{label:<16} {p_size / rows / 1024:9.1f} KB {c_size / rows / 1024:9.1f} KB {p_size / c_size:6.1f}x"
+          f"   write {p_w:6.2f} -> {c_w:6.2f} ms   read {p_r:6.2f} -> {c_r:6.2f} ms")
+
+
+def main():
+    rng = random.Random(5)
+    rows = int(_opt('rows', 200))
+    kb = int(_opt('text-kb', 200))
+    source = _opt('file', None)
+    print(f"{rows} rows each; per-row size plain / compressed, ratio, latency plain -> compressed\n")
+    bench('extractedText', [report_text(rng, kb, source) for _ in range(5)], rows)
+    bench('analysis_json', [analysis_json(rng) for _ in range(5)], rows)
+    bench('summary', [report_text(rng, 6) for _ in range(5)], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Accuracy + latency benchmark for the local cost fast path (cost_matcher.py)
+against prices the AI already produced and stored.
+
+Ground truth is every priced item in InspectionReport.analysis_json (the
+buyer pipeline's Pass 2 output — name, cost, trade, category_key), or a JSON
+fixture of the same shape. For each item the matcher runs exactly as it
+would in production; we report how many it would have priced locally, and
+for those, how close the table price is to what the AI said.
+
+Usage:
+    python benchmarks/bench_cost_matcher.py                       # all reports in DATABASE_URL
+    python benchmarks/bench_cost_matcher.py --limit=200           # most recent 200 reports
+    python benchmarks/bench_cost_matcher.py --fixture=items.json  # [{name, finding, section, cost, currency, category_key}]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from cost_lookup import get_cost  # noqa: E402
+from cost_matcher import CostMatcher  # noqa: E402
+
+
+def parse_range(cost_str):
+    try:
+        lo_s, hi_s = cost_str.replace('$', '').replace(',', '').split(' - ')
+        return float(lo_s), float(hi_s)
+    except Exception:
+        return None
+
+
+def load_items_from_db(limit=None):
+    from app import app
+    from models import InspectionReport
+
+    items = []
+    with app.app_context():
+        q = InspectionReport.query.filter(InspectionReport.analysis_json.isnot(None))\
+            .order_by(InspectionReport.createdAt.desc())
+        if limit:
+            q = q.limit(limit)
+        for r in q.all():
+            try:
+                analysis = json.loads(r.analysis_json)
+            except Exception:
+                continue
+            currency = analysis.get('currency', 'USD')
+            for bucket in ('urgent_items', 'maintenance_items', 'category_items'):
+                for it in analysis.get(bucket, []):
+                    items.append({
+                        'name': it.get('name'),
+                        'finding': it.get('finding') or it.get('cost_note'),
+                        'section': it.get('section') or it.get('category'),
+                        'cost': it.get('cost'),
+                        'currency': currency,
+                        'category_key': it.get('category_key'),
+                    })
+    return items
+
+
+def main(fixture=None, limit=None):
+    if fixture:
+        with open(fixture, encoding='utf-8') as f:
+            items = json.load(f)
+    else:
+        items = load_items_from_db(limit)
+
+    items = [i for i in items if i.get('cost') and parse_range(i['cost'])]
+    if not items:
+        print("No stored AI-priced items found — nothing to benchmark.")
+        return
+
+    t0 = time.perf_counter()
+    matcher = CostMatcher()
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    matches = matcher.match(items)
+    batch_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    for it in items[:500]:
+        matcher.match([it])
+    single_us = (time.perf_counter() - t0) / min(len(items), 500) * 1e6
+
+    local = overlap = within_25 = key_agree = key_known = 0
+    for it, m in zip(items, matches):
+        if not m['confident']:
+            continue
+        local += 1
+        entry = get_cost(m['category_key'], it.get('currency', 'USD'))
+        ai_lo, ai_hi = parse_range(it['cost'])
+        if entry['low'] <= ai_hi and ai_lo <= entry['high']:
+            overlap += 1
+        ai_mid = (ai_lo + ai_hi) / 2
+        local_mid = (entry['low'] + entry['high']) / 2
+        if ai_mid and abs(local_mid - ai_mid) / ai_mid <= 0.25:
+            within_25 += 1
+        if it.get('category_key'):
+            key_known += 1
+            key_agree += it['category_key'] == m['category_key']
+
+    n = len(items)
+    pct = lambda a, b: f"{a / b * 100:5.1f}%" if b else "  n/a"
+    print(f"Items benchmarked:          {n}")
+    print(f"Index build:                {build_ms:.1f} ms ({len(matcher.keys)} categories, {len(matcher.vocab)} terms)")
+    print(f"Batch match:                {batch_ms:.1f} ms total, {batch_ms / n * 1000:.1f} µs/item")
+    print(f"Single-item match:          {single_us:.1f} µs/item")
+    print(f"Priced locally (coverage):  {local} {pct(local, n)}  — {n - local} would go to AI")
+    print(f"  range overlaps AI range:  {pct(overlap, local)}")
+    print(f"  midpoint within 25% of AI:{pct(within_25, local)}")
+    print(f"  category_key agrees w/ AI:{pct(key_agree, key_known)} (of {key_known} with an AI key)")
+
+
+if __name__ == '__main__':
+    fixture_arg = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--fixture=')), None)
+    limit_arg = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--limit=')), None)
+    main(fixture=fixture_arg, limit=limit_arg)
@@ -0,0 +1,217 @@
+"""
+Contractor lead emails through the outbound queue (email_queue.py) vs. the
+old inline send, against a local SMTP stub:
+
+1. request-path latency — send_contractor_email() as the referral request
+   sees it: old = connect + login + send + quit inline, new = enqueue. Also
+   with the stub turned slow (--slow-ms per connection), where the old path
+   stalls the request and the queue doesn't notice.
+2. delivery — time for the background sender's pooled connections to
+   deliver everything queued in (1), and how many connections that took.
+3. a flaky server — the stub answers every --fail-every'th message with a
+   421 and drops the connection on every --drop-every'th; everything must
+   still arrive exactly once, via reconnects and backoff retries.
+4. idempotency — the same lead queued twice is one row.
+
+The stub speaks just enough ESMTP for smtplib (EHLO, AUTH, MAIL, RCPT,
+DATA, QUIT; no TLS) and sleeps --connect-ms per connection to stand in for
+TCP + STARTTLS + login to a real provider, and --send-ms per message.
+
+Usage:
+    python benchmarks/bench_email_queue.py
+    python benchmarks/bench_email_queue.py --emails=1000 --pool=4 --connect-ms=150
+"""
+
+import contextlib
+import io
+import os
+import re
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+def _opt(name, default):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+DB_PATH = '/tmp/lot7_bench_email_queue.db'
+if os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['PDF_CACHE_DIR'] = tempfile.mkdtemp(prefix='lot7_bench_pdf_')
+os.environ.update(MAIL_USERNAME='bench', MAIL_PASSWORD='bench', MAIL_USE_TLS='false',
+                  MAIL_DEFAULT_SENDER='leads@lot7.ai', EMAIL_BACKOFF_SECONDS='0.2',
+                  EMAIL_POOL_SIZE=_opt('pool', '4'))
+
+stub = {'connect_s': float(_opt('connect-ms', 150)) / 1000, 'send_s': float(_opt('send-ms', 5)) / 1000,
+        'fail_every': 0, 'drop_every': 0, 'connections': 0, 'data': 0, 'delivered': []}
+_stub_lock = threading.Lock()
+_TO_RE = re.compile(rb'^To: (.+?)\r?$', re.M)
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        time.sleep(stub['connect_s'])
+        with _stub_lock:
+            stub['connections'] += 1
+        self.wfile.write(b'220 stub ESMTP\r\n')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line[:4].upper()
+            if cmd == b'EHLO':
+                self.wfile.write(b'250-stub\r\n250-AUTH PLAIN LOGIN\r\n250 OK\r\n')
+            elif cmd == b'AUTH':
+                self.wfile.write(b'235 OK\r\n')
+            elif cmd == b'DATA':
+                self.wfile.write(b'354 go ahead\r\n')
+                data = b''
+                while (line := self.rfile.readline()) not in (b'.\r\n', b''):
+                    data += line
+                time.sleep(stub['send_s'])
+                with _stub_lock:
+                    stub['data'] += 1
+                    n = stub['data']
+                if stub['drop_every'] and n % stub['drop_every'] == 0:
+                    return  # hang up without answering
+                if stub['fail_every'] and n % stub['fail_every'] == 0:
+                    self.wfile.write(b'421 try again later\r\n')
+                    continue
+                with _stub_lock:
+                    stub['delivered'].append(_TO_RE.search(data).group(1).decode())
+                self.wfile.write(b'250 queued\r\n')
+            elif cmd == b'QUIT':
+                self.wfile.write(b'221 bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+smtp_stub = StubSMTPServer(('127.0.0.1', 0), StubSMTPHandler)
+threading.Thread(target=smtp_stub.serve_forever, daemon=True).start()
+os.environ.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=str(smtp_stub.server_address[1]))
+
+from app import app  # noqa: E402
+from models import db, OutboundEmail  # noqa: E402
+import email_queue  # noqa: E402
+from utils import send_contractor_email, open_smtp_connection  # noqa: E402
+
+PUNCHLIST = '\n'.join(f'{i}. Replace cracked GFCI receptacle at location {i}; verify bonding.' for i in range(1, 15))
+
+
+def lead(i, prefix):
+    return dict(contractor_email=f'{prefix}{i}@contractors.example.com', contractor_name=f'Contractor {i}',
+                customer_name='Pat Buyer', customer_email='pat@example.com', customer_phone='555-0100',
+                property_address=f'{i} Elm St, Chicago, IL', issue_type='electrical', punchlist=PUNCHLIST)
+
+
+def old_send(**kw):
+    """What send_contractor_email did inline before: a connection per email."""
+    from email.mime.text import MIMEText
+    msg = MIMEText(kw['punchlist'])
+    msg['From'], msg['To'], msg['Subject'] = 'leads@lot7.ai', kw['contractor_email'], 'New lead'
+    server = open_smtp_connection()
+    server.send_message(msg)
+    server.quit()
+
+
+def wait_drained(timeout=300):
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        with app.app_context():
+            if email_queue.stats()['depth'] == 0:
+                return time.perf_counter() - t0
+        time.sleep(0.05)
+    raise RuntimeError('queue did not drain')
+
+
+def timed(fn, n, prefix):
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):  # one log line per email
+        for i in range(n):
+            t0 = time.perf_counter()
+            fn(**lead(i, prefix))
+            times.append(time.perf_counter() - t0)
+    return times
+
+
+def fmt(times):
+    times = sorted(times)
+    return f"p50 {statistics.median(times) * 1000:7.1f} ms, p95 {times[int(len(times) * 0.95)] * 1000:7.1f} ms"
+
+
+def main():
+    n = int(_opt('emails', 500))
+    slow_s = float(_opt('slow-ms', 2000)) / 1000
+    n_old = min(n, int(_opt('old-sample', 50)))
+
+    print(f"stub: {stub['connect_s'] * 1000:.0f} ms/connection, {stub['send_s'] * 1000:.0f} ms/message; "
+          f"sender pool: {email_queue.EMAIL_POOL_SIZE} connection(s)\n")
+    print("1. request path")
+    old = timed(old_send, n_old, 'old')
+    print(f"   old inline send  ({n_old:4d}):  {fmt(old)}")
+    stub['connections'] = 0
+    t_start = time.perf_counter()
+    with app.app_context():
+        new = timed(send_contractor_email, n, 'q')
+    print(f"   enqueue          ({n:4d}):  {fmt(new)}")
+
+    wait_drained()
+    print(f"\n2. delivery: {n} queued emails delivered {time.perf_counter() - t_start:.2f}s after the first "
+          f"enqueue, over {stub['connections']} connection(s) "
+          f"(old: ~{statistics.mean(old) * n:.1f}s and {n} connections)")
+
+    stub['connect_s'] = slow_s
+    slow_old = timed(old_send, 3, 'slow')
+    with app.app_context():
+        slow_new = timed(send_contractor_email, 50, 'slowq')
+    print(f"\n   slow server ({slow_s * 1000:.0f} ms/connection):")
+    print(f"   old inline send  (   3):  {fmt(slow_old)}")
+    print(f"   enqueue          (  50):  {fmt(slow_new)}")
+    wait_drained()
+    stub['connect_s'] = float(_opt('connect-ms', 150)) / 1000
+
+    print("\n3. flaky server")
+    stub.update(fail_every=int(_opt('fail-every', 10)), drop_every=int(_opt('drop-every', 25)),
+                connections=0, delivered=[])
+    t0 = time.perf_counter()
+    with app.app_context():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(200):
+                send_contractor_email(**lead(i, 'flaky'))
+            wait_drained()
+    got = stub['delivered']
+    dupes = len(got) - len(set(got))
+    print(f"   200 emails, every {stub['fail_every']}th answered 421 and every {stub['drop_every']}th dropped: "
+          f"{len(set(got))} delivered, {dupes} duplicate(s), {time.perf_counter() - t0:.2f}s, "
+          f"{stub['connections']} connection(s)")
+    stub.update(fail_every=0, drop_every=0)
+
+    print("\n4. idempotency")
+    with app.app_context():
+        with contextlib.redirect_stdout(io.StringIO()):
+            a = send_contractor_email(**lead(0, 'idem'), idempotency_key='lead:bench-1')
+            b = send_contractor_email(**lead(0, 'idem'), idempotency_key='lead:bench-1')
+        rows = OutboundEmail.query.filter_by(idempotencyKey='lead:bench-1').count()
+        print(f"   same lead queued twice -> same id: {a == b}, {rows} row(s)")
+        wait_drained()
+        print(f"\nemail_queue.stats(): {email_queue.stats()}")
+    smtp_stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
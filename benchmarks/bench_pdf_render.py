@@ -0,0 +1,106 @@
+"""
+Rendering throughput for every PDF type — pages/sec and ms/document.
+
+Renders the summary and punchlist (pdf_reports.py) from a synthetic report
+sized like a heavy real one, and the damage assessment
+(generate_damage_report.render_damage_report) from its fallback analysis,
+with no DB or AI calls. Run it before/after touching pdf_layout.py or a
+report's layout.
+
+Usage:
+    python benchmarks/bench_pdf_render.py                  # 50 renders of each
+    python benchmarks/bench_pdf_render.py --runs=200 --items=60
+"""
+
+import io
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from pdf_reports import render_punchlist_pdf, render_summary_pdf  # noqa: E402
+
+_PAGE_RE = re.compile(rb'/Type /Page\b')
+
+
+def synthetic_report(n_items):
+    item = lambda i, kind: {
+        'name': f'{kind} item {i} — loose flashing at chimney',
+        'trade': 'Roofer', 'cost': '$400 - $900', 'timeline': 'Within 12 months',
+    }
+    analysis = {
+        'condition': 'Needs TLC', 'currency': 'USD',
+        'budget_now': '$4,200 - $7,800', 'budget_5yr': '$12,000 - $21,000',
+        'urgent_items': [item(i, 'Urgent') for i in range(n_items // 3)],
+        'maintenance_items': [item(i, 'Maintenance') for i in range(n_items)],
+        'checklist': [{'text': f'Checklist line {i}: GFCI protection present at kitchen counters',
+                       'passed': i % 4 != 0} for i in range(n_items)],
+    }
+    summary = ' '.join(
+        f'Sentence {i} of the inspector summary describes a finding and what the buyer should do about it.'
+        for i in range(40)
+    )
+    return SimpleNamespace(
+        id='bench', address='123 Benchmark Ave, Springfield, IL 62701', customerName='Pat Buyer',
+        customerPhone='555-0100', customerEmail='pat@example.com', summary=summary,
+        analysis_json=json.dumps(analysis),
+    )
+
+
+def damage_renderer():
+    try:
+        from generate_damage_report import render_damage_report, LOCATION_DATA
+    except ImportError as e:
+        print(f"Damage report skipped ({e})")
+        return None
+    loc = LOCATION_DATA['basement']
+    analysis = {
+        'mold_risk_percentage': loc['baseline_mold_risk'],
+        'claim_approval_percentage': loc['baseline_claim_approval'],
+        'damage_severity': 'moderate', 'estimated_square_footage': 96, 'moisture_saturation': 'wet',
+        'affected_materials': ['Drywall', 'Insulation', 'Paint/Finish'],
+        'visible_issues': ['Water staining', 'Paint damage and bubbling', 'Dark spots (potential mold)'],
+        'hidden_damage_risk': 'Cavity above may be wet beyond visible area',
+        'recommended_immediate_action': 'Stop water source and maximize ventilation',
+        'structural_risk': 'low',
+    }
+
+    def render(_report):
+        buf = io.BytesIO()
+        render_damage_report(buf, analysis, loc, 'Burst supply line', 'BENCH01')
+        return buf.getvalue()
+    return render
+
+
+def bench(name, render_fn, report, runs):
+    render_fn(report)  # warm-up: font metrics, style caches
+    t0 = time.perf_counter()
+    pages = 0
+    size = 0
+    for _ in range(runs):
+        pdf = render_fn(report)
+        pages += len(_PAGE_RE.findall(pdf))
+        size = len(pdf)
+    elapsed = time.perf_counter() - t0
+    print(f"{name:<10} {runs:>5} docs  {pages // runs:>3} pages/doc  "
+          f"{elapsed / runs * 1000:8.1f} ms/doc  {pages / elapsed:8.1f} pages/sec  {size / 1024:6.1f} KB")
+
+
+def main(runs=50, n_items=40):
+    report = synthetic_report(n_items)
+    bench('summary', render_summary_pdf, report, runs)
+    bench('punchlist', render_punchlist_pdf, report, runs)
+    damage = damage_renderer()
+    if damage:
+        bench('damage', damage, report, runs)
+
+
+if __name__ == '__main__':
+    runs_arg = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--runs=')), 50)
+    items_arg = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--items=')), 40)
+    main(runs=runs_arg, n_items=items_arg)
@@ -0,0 +1,95 @@
+"""
+Fetching a realtor portfolio's reports: one report per /api/realtor-report
+request, as before bulk mode (a fresh urllib connection each, one after
+another), vs. realtor_reports' bulk fetch (BULK_FETCH_WORKERS threads
+over one keep-alive requests.Session).
+
+Only the fetch stage — the model passes can't run here, and in bulk mode
+they're bounded by REALTOR_AI_CONCURRENCY anyway. The report host is a
+local HTTP stub that sleeps --connect-ms on each new connection (standing
+in for TCP + TLS to the report platform) and --serve-ms per page.
+
+Usage:
+    python benchmarks/bench_realtor_bulk.py
+    python benchmarks/bench_realtor_bulk.py --listings=300 --connect-ms=120
+"""
+
+import http.server
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+def _opt(name, default):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+from utils import fetch_report_text_from_url  # noqa: E402
+import realtor_reports  # noqa: E402
+
+CONNECT_S = float(_opt('connect-ms', 120)) / 1000
+SERVE_S = float(_opt('serve-ms', 80)) / 1000
+PAGE = ('<html><head><title>Report</title></head><body><div class="page full cover">123 Elm St</div>'
+        + ''.join(f'<div class="page full summary" id="page-{i}"><p>[immediate attention icon] '
+                  f'Finding {i}: shingles lifting at the north slope; recommend a roofer evaluate.</p></div>'
+                  for i in range(40))
+        + '<div class="page full detail">' + 'Detail text. ' * 4000 + '</div></body></html>').encode()
+stats = {'connections': 0}
+_lock = threading.Lock()
+
+
+class ReportHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def setup(self):
+        time.sleep(CONNECT_S)
+        with _lock:
+            stats['connections'] += 1
+        super().setup()
+
+    def do_GET(self):
+        time.sleep(SERVE_S)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    n = int(_opt('listings', 100))
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ReportHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f'http://127.0.0.1:{server.server_address[1]}/v3/reports/{i}' for i in range(n)]
+    print(f"{n} listings, stub host: {CONNECT_S * 1000:.0f} ms/connection, {SERVE_S * 1000:.0f} ms/page\n")
+
+    t0 = time.perf_counter()
+    old = [fetch_report_text_from_url(u, include_anchors=True, summary_only=True) for u in urls]
+    old_s = time.perf_counter() - t0
+    print(f"one request per listing:  {old_s:6.2f}s, {stats['connections']} connection(s)")
+
+    stats['connections'] = 0
+    session = realtor_reports._bulk_session()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=realtor_reports.BULK_FETCH_WORKERS) as pool:
+        new = list(pool.map(lambda u: fetch_report_text_from_url(u, include_anchors=True, summary_only=True,
+                                                                 session=session), urls))
+    new_s = time.perf_counter() - t0
+    session.close()
+    print(f"bulk ({realtor_reports.BULK_FETCH_WORKERS} workers, pooled):  {new_s:6.2f}s, "
+          f"{stats['connections']} connection(s)  ({old_s / new_s:.1f}x)")
+    assert new == old, 'session fetch returned different text'
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Per-endpoint queries and result bytes with InspectionReport's big text
+columns deferred (models.py) vs. the old load-everything behaviour.
+
+Seeds a scratch database with one heavy report (~400 KB extractedText, as
+a long real inspection produces), calls each endpoint through the Flask
+test client, and for every SQL statement the request issued re-runs it on
+a raw connection to total the bytes the database handed back. The
+"eager" column forces the old behaviour by undeferring the four columns on
+every ORM query that loads InspectionReport entities — it doesn't undo
+endpoint rewrites (e.g. /api/status now asks for a column, not the row).
+
+Usage:
+    python benchmarks/bench_report_columns.py
+    python benchmarks/bench_report_columns.py --text-kb=1000 --runs=50
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+def _opt(name, default):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+DB_PATH = '/tmp/lot7_bench_columns.db'
+if os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['PDF_CACHE_DIR'] = tempfile.mkdtemp(prefix='lot7_bench_pdf_')
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import Session, undefer  # noqa: E402
+
+from app import app, ADMIN_EMAILS  # noqa: E402
+from models import db, User, InspectionReport  # noqa: E402
+
+HEAVY = (InspectionReport.extractedText, InspectionReport.summary,
+         InspectionReport.analysis_json, InspectionReport.appliance_profile_json)
+
+_eager = False
+_statements = []
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _force_eager(state):
+    if not (_eager and state.is_select):
+        return
+    # Only queries loading whole InspectionReport entities take the option
+    if any(d.get('type') is InspectionReport and d.get('expr') is InspectionReport
+           for d in state.statement.column_descriptions):
+        state.statement = state.statement.options(*[undefer(c) for c in HEAVY])
+
+
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    _statements.append((statement, parameters))
+
+
+def _result_bytes(statement, parameters):
+    if not statement.lstrip().upper().startswith('SELECT'):
+        return 0
+    raw = db.engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(statement, parameters)
+        return sum(len(v) if isinstance(v, (str, bytes)) else 8
+                   for row in cur.fetchall() for v in row if v is not None)
+    finally:
+        raw.close()
+
+
+def seed(text_kb):
+    owner = User(email='owner@example.com', password_hash='x', role='buyer')
+    admin = User(email=next(iter(ADMIN_EMAILS)), password_hash='x', role='buyer')
+    db.session.add_all([owner, admin])
+    db.session.flush()
+    analysis = {
+        'condition': 'Needs TLC', 'currency': 'USD', 'location': 'Chicago, IL',
+        'urgent_items': [{'name': f'Urgent item {i}', 'cost': '$400 - $900', 'trade': 'Roofer',
+                          'cost_note': 'Loose flashing at chimney — reseal and re-nail. ' * 4} for i in range(40)],
+        'maintenance_items': [{'name': f'Maintenance item {i}', 'cost': '$150 - $300', 'trade': 'Handyman',
+                               'cost_note': 'Caulk and repaint trim. ' * 4} for i in range(120)],
+    }
+    report = InspectionReport(
+        address='123 Benchmark Ave, Chicago, IL 60614', customerName='Pat Buyer', customerEmail='pat@example.com',
+        extractedText=('The inspector observed the furnace and attic insulation. ' * 20 + '\n') * (text_kb * 1024 // 1140),
+        summary='Sentence of the inspector summary describing a finding. ' * 150,
+        analysis_json=json.dumps(analysis),
+        appliance_profile_json=json.dumps([{'appliance': 'Furnace', 'manufactured_year': 2009, 'status': 'aging'}] * 30),
+        user_id=owner.id, is_paid=True, shareToken='bench-token',
+    )
+    db.session.add(report)
+    db.session.commit()
+    return report.id, owner.id, admin.id
+
+
+def main():
+    global _eager
+    text_kb = int(_opt('text-kb', 400))
+    runs = int(_opt('runs', 20))
+
+    with app.app_context():
+        report_id, owner_id, admin_id = seed(text_kb)
+    client = app.test_client()
+
+    def as_user(user_id):
+        with client.session_transaction() as sess:
+            sess['_user_id'] = user_id
+            sess['_fresh'] = True
+
+    endpoints = [
+        ('report-access', owner_id, 'get', f'/api/report-access/{report_id}', None),
+        ('alerts toggle', owner_id, 'post', f'/api/reports/{report_id}/alerts', {'enabled': True}),
+        ('admin mark-paid', admin_id, 'post', f'/api/admin/mark-paid/{report_id}', None),
+        ('share link', None, 'get', '/report/bench-token', None),
+        ('status (restart)', None, 'get', f'/api/status/{report_id}', None),
+        ('punchlist pdf (cached)', None, 'get', f'/api/punchlist-pdf/{report_id}', None),
+        ('analysis', None, 'get', f'/api/analysis/{report_id}', None),
+        ('home profile', owner_id, 'get', f'/api/home-profile/{report_id}', None),
+    ]
+    client.get(f'/api/punchlist-pdf/{report_id}')  # fill the PDF cache
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _capture)
+
+    print(f"Report: {text_kb} KB extractedText; {runs} runs per endpoint\n")
+    print(f"{'endpoint':<24} {'queries':>8} {'KB read':>10} {'ms':>8}   {'eager q':>8} {'eager KB':>10} {'eager ms':>9}")
+    for label, user_id, method, path, body in endpoints:
+        results = []
+        for eager in (False, True):
+            _eager = eager
+            if user_id:
+                as_user(user_id)
+            else:
+                with client.session_transaction() as sess:
+                    sess.clear()
+            _statements.clear()
+            getattr(client, method)(path, json=body)
+            captured = list(_statements)
+            with app.app_context():
+                nbytes = sum(_result_bytes(s, p) for s, p in captured)
+            t0 = time.perf_counter()
+            for _ in range(runs):
+                getattr(client, method)(path, json=body)
+            ms = (time.perf_counter() - t0) / runs * 1000
+            results.append((len(captured), nbytes / 1024, ms))
+        (q, kb, ms), (eq, ekb, ems) = results
+        print(f"{label:<24} {q:>8} {kb:>10.1f} {ms:>8.2f}   {eq:>8} {ekb:>10.1f} {ems:>9.2f}")
+    _eager = False
+
+
+if __name__ == '__main__':
+    main()
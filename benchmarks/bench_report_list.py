@@ -0,0 +1,143 @@
+"""
+/api/my-reports for a realtor with thousands of reports: the paginated,
+load_only list served from InspectionReport's summary columns vs. what the
+same facts cost without them — every report row loaded and its
+analysis_json parsed for condition, budgets and item counts.
+
+Seeds a scratch SQLite database (one user, --reports analyzed reports with
+Pass 2-shaped analysis_json), fills the summary columns with
+report_findings.backfill(), then times the first page, a deep page and a
+full walk of every page through the Flask test client.
+
+Usage:
+    python benchmarks/bench_report_list.py
+    python benchmarks/bench_report_list.py --reports=5000 --runs=20 --limit=50
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+def _opt(name, default):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+DB_PATH = '/tmp/lot7_bench_report_list.db'
+if os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['PDF_CACHE_DIR'] = tempfile.mkdtemp(prefix='lot7_bench_pdf_')
+
+from sqlalchemy.orm import undefer  # noqa: E402
+
+from app import app  # noqa: E402
+from models import db, User, InspectionReport  # noqa: E402
+import report_findings  # noqa: E402
+
+
+def analysis(rng):
+    items = lambda n, kind: [{
+        'name': f'{kind} finding {i}', 'cost': f'${rng.randint(1, 20) * 100:,} - ${rng.randint(21, 60) * 100:,}',
+        'cost_note': 'Scope based on the inspector note; obtain licensed contractor quotes.',
+        'trade': rng.choice(['Roofer', 'Electrician', 'Plumber', 'HVAC Technician', 'Handyman']),
+    } for i in range(n)]
+    return json.dumps({
+        'condition': rng.choice(['Good', 'Needs TLC', 'Fair']), 'currency': 'USD', 'location': 'Chicago, IL',
+        'budget_now': f'~${rng.randint(5, 80) * 100:,}', 'budget_5yr': f'~${rng.randint(80, 400) * 100:,}',
+        'urgent_items': items(rng.randint(0, 12), 'Urgent'),
+        'maintenance_items': items(rng.randint(10, 40), 'Maintenance'),
+        'category_items': items(rng.randint(20, 60), 'Category'),
+    })
+
+
+def seed(n_reports):
+    rng = random.Random(41)
+    realtor = User(email='realtor@example.com', password_hash='x', role='realtor')
+    db.session.add(realtor)
+    db.session.flush()
+    start = datetime(2025, 1, 1)
+    for i in range(n_reports):
+        db.session.add(InspectionReport(
+            address=f'{100 + i} Benchmark Ave, Chicago, IL 60614', customerName=f'Buyer {i}',
+            extractedText='The inspector observed the furnace and attic insulation. ' * 200,
+            analysis_json=analysis(rng), user_id=realtor.id, is_paid=True, shareToken=f'bench-{i}',
+            createdAt=start + timedelta(hours=i),
+        ))
+        if i % 500 == 499:
+            db.session.commit()
+    db.session.commit()
+    report_findings.backfill(batch_size=500)
+    return realtor.id
+
+
+def old_list(user_id):
+    """The facts the list wants, the way they had to be computed before."""
+    out = []
+    for r in (InspectionReport.query.options(undefer(InspectionReport.analysis_json))
+              .filter_by(user_id=user_id).order_by(InspectionReport.createdAt.desc()).all()):
+        a = json.loads(r.analysis_json)
+        out.append({'id': r.id, 'condition': a.get('condition'), 'budget_now': a.get('budget_now'),
+                    'urgent': len(a.get('urgent_items') or []), 'maintenance': len(a.get('maintenance_items') or [])})
+    return out
+
+
+def main():
+    n_reports = int(_opt('reports', 2000))
+    runs = int(_opt('runs', 10))
+    limit = int(_opt('limit', 100))
+
+    with app.app_context():
+        t0 = time.perf_counter()
+        user_id = seed(n_reports)
+        print(f"Seeded {n_reports} reports in {time.perf_counter() - t0:.1f}s\n")
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = user_id
+        sess['_fresh'] = True
+
+    def timed(fn):
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            result = fn()
+        return (time.perf_counter() - t0) / runs * 1000, result
+
+    first_ms, first = timed(lambda: client.get(f'/api/my-reports?limit={limit}').get_json())
+    cursor = first['next_cursor']
+    deep = None
+    for _ in range(n_reports // limit // 2):
+        deep = cursor
+        cursor = client.get(f'/api/my-reports?limit={limit}&cursor={cursor}').get_json()['next_cursor']
+    deep_ms, _ = timed(lambda: client.get(f'/api/my-reports?limit={limit}&cursor={deep}').get_json())
+
+    def walk():
+        rows, cursor = [], None
+        while True:
+            page = client.get(f'/api/my-reports?limit={limit}' + (f'&cursor={cursor}' if cursor else '')).get_json()
+            rows += page['reports']
+            cursor = page['next_cursor']
+            if not cursor:
+                return rows
+    walk_ms, rows = timed(walk)
+    with app.app_context():
+        old_ms, old = timed(lambda: old_list(user_id))
+
+    assert len(rows) == len(old) == n_reports
+    assert rows[0]['urgentCount'] == old[0]['urgent'] and rows[0]['condition'] == old[0]['condition']
+    print(f"{'first page (' + str(limit) + ' rows)':<34} {first_ms:9.2f} ms")
+    print(f"{'middle page':<34} {deep_ms:9.2f} ms")
+    print(f"{'all ' + str(n_reports) + ' via pages':<34} {walk_ms:9.2f} ms")
+    print(f"{'old: load + json.loads every row':<34} {old_ms:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
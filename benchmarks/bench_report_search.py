@@ -0,0 +1,116 @@
+"""
+Admin full-text report search (report_search.py) at scale.
+
+Seeds a scratch database with synthetic reports (Core inserts, so the
+per-row index listeners don't run), builds the index with
+report_search.rebuild() — timing indexing throughput — then times ranked,
+snippeted searches for rare, common and multi-term queries, first page and
+deep pages. Never point it at production.
+
+Usage:
+    python benchmarks/bench_report_search.py                         # 1,000,000 reports, SQLite scratch DB
+    python benchmarks/bench_report_search.py --reports=200000
+    python benchmarks/bench_report_search.py --db=postgresql://... --reseed
+"""
+
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+def _opt(name, default):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+DB_URL = _opt('db', 'sqlite:////tmp/lot7_bench_search.db')
+os.environ['DATABASE_URL'] = DB_URL
+
+from app import app  # noqa: E402
+import report_search  # noqa: E402
+from models import db, InspectionReport, ReportSearch  # noqa: E402
+
+STREETS = ['Maple', 'Oak', 'Cedar', 'Elm', 'Birch', 'Pine', 'Willow', 'Aspen', 'Spruce', 'Lakeview']
+CITIES = ['Calgary', 'Edmonton', 'Chicago', 'Naperville', 'Evanston', 'Toronto', 'Denver']
+FIRST = ['Jo', 'Sam', 'Alex', 'Pat', 'Chris', 'Morgan', 'Taylor', 'Jordan']
+LAST = ['Smith', 'Nguyen', 'Garcia', 'Patel', 'Brown', 'Kowalski', 'Okafor', 'Haddad']
+FINDINGS = ['Cracked heat exchanger', 'Missing GFCI protection', 'Worn roof shingles', 'Double-tapped breaker',
+            'Negative grading at foundation', 'Active leak under sink', 'Rusted water heater',
+            'Efflorescence on basement wall', 'Loose handrail', 'Missing downspout extension']
+WORDS = ('inspector observed the furnace panel attic insulation sump pump flashing chimney crown '
+         'gutters siding deck joist beam moisture staining evaluate repair replace monitor').split()
+
+
+def seed(n, chunk=5000):
+    rng = random.Random(11)
+    now = datetime.utcnow()
+    print(f"Seeding {n:,} reports...")
+    t0 = time.perf_counter()
+    rows = []
+    for i in range(n):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        findings = rng.sample(FINDINGS, 3)
+        rows.append({
+            'id': str(uuid.uuid4()),
+            'address': f"{rng.randint(1, 9999)} {rng.choice(STREETS)} St, {rng.choice(CITIES)}",
+            'customerName': f"{first} {last}", 'customerEmail': f"{first}.{last}{i}@example.com".lower(),
+            'summary': ' '.join(rng.choices(WORDS, k=40)),
+            'extractedText': ' '.join(rng.choices(WORDS, k=120)) + ' ' + ' '.join(findings),
+            'analysis_json': '{"urgent_items": [%s]}' % ', '.join('{"name": "%s"}' % f for f in findings),
+            'is_paid': False, 'alertsEnabled': True, 'isShared': True, 'shareToken': uuid.uuid4().hex,
+            'createdAt': now, 'updatedAt': now,
+        })
+        if len(rows) >= chunk:
+            db.session.execute(InspectionReport.__table__.insert(), rows)
+            db.session.commit()
+            rows = []
+    if rows:
+        db.session.execute(InspectionReport.__table__.insert(), rows)
+        db.session.commit()
+    print(f"  seeded in {time.perf_counter() - t0:.1f}s")
+
+
+def timed(label, fn, repeat=10):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        hits, _ = fn()
+    ms = (time.perf_counter() - t0) / repeat * 1000
+    print(f"{label:<48} {ms:8.2f} ms  ({len(hits)} hits)")
+
+
+def main():
+    n = int(_opt('reports', 1000000))
+    with app.app_context():
+        if '--reseed' in sys.argv:
+            ReportSearch.query.delete()
+            InspectionReport.query.delete()
+            db.session.commit()
+        have = InspectionReport.query.count()
+        if have < n:
+            seed(n - have)
+
+        missing = InspectionReport.query.count() - ReportSearch.query.count()
+        if missing:
+            t0 = time.perf_counter()
+            report_search.rebuild(batch_size=2000)
+            elapsed = time.perf_counter() - t0
+            print(f"Indexed {missing:,} reports in {elapsed:.1f}s ({missing / elapsed:,.0f} reports/sec)")
+        print(f"\nDB: {DB_URL}  ({InspectionReport.query.count():,} reports)\n")
+
+        timed('rare: customer email "kowalski1234"', lambda: report_search.search('kowalski1234'))
+        timed('medium: "lakeview calgary"', lambda: report_search.search('lakeview calgary'))
+        timed('common: "heat exchanger"', lambda: report_search.search('heat exchanger'))
+        timed('common prefix: "furn"', lambda: report_search.search('furn'))
+        timed('common, page 20: "heat exchanger"', lambda: report_search.search('heat exchanger', page=20))
+        timed('no match: "zzzqqq"', lambda: report_search.search('zzzqqq'))
+
+
+if __name__ == '__main__':
+    main()
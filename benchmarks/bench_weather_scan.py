@@ -0,0 +1,163 @@
+"""
+The weather-triggered care-event job (weather_care_events.py) over a
+million homes: the NumPy region/appliance-bit scan vs. the same rules run
+as a per-home Python loop, then a full run() — feed fetched from a local
+HTTP stub, homes loaded, scanned, matches bulk-inserted — and a second
+run() on the same feed, which should insert nothing.
+
+Seeds a scratch SQLite database with --homes reports spread over 20
+states / provinces (region and applianceFlags filled as the analysis step
+does), and a feed of freeze / heat / rain alerts over several of them.
+
+Usage:
+    python benchmarks/bench_weather_scan.py
+    python benchmarks/bench_weather_scan.py --homes=200000
+"""
+
+import contextlib
+import http.server
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+
+def _opt(name, default):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+DB_PATH = '/tmp/lot7_bench_weather_scan.db'
+if os.path.exists(DB_PATH):
+    os.remove(DB_PATH)
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['PDF_CACHE_DIR'] = tempfile.mkdtemp(prefix='lot7_bench_pdf_')
+
+from app import app  # noqa: E402
+from models import db, InspectionReport, CareEvent  # noqa: E402
+from care_rules import APPLIANCE_BITS  # noqa: E402
+import weather_care_events  # noqa: E402
+from weather_care_events import WEATHER_RULES, load_homes, scan  # noqa: E402
+
+REGIONS = ['IL', 'WI', 'MN', 'MI', 'OH', 'IN', 'IA', 'MO', 'TX', 'AZ',
+           'FL', 'GA', 'NC', 'VA', 'NY', 'PA', 'CO', 'WA', 'ON', 'AB']
+BITS = list(APPLIANCE_BITS.values())
+
+
+def seed(n_homes):
+    rng = random.Random(45)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(n_homes):
+        region = rng.choice(REGIONS)
+        flags = 0
+        for _ in range(rng.randint(0, 6)):
+            flags |= rng.choice(BITS)
+        rows.append({'id': str(uuid.uuid4()), 'address': f'{i} Main St, Springfield, {region}', 'region': region,
+                     'applianceFlags': flags, 'alertsEnabled': rng.random() > 0.05, 'is_paid': True,
+                     'isShared': True, 'shareToken': f's{i}', 'createdAt': now, 'updatedAt': now})
+        if len(rows) == 20000:
+            db.session.execute(InspectionReport.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(InspectionReport.__table__.insert(), rows)
+    db.session.commit()
+
+
+def feed(today):
+    alerts = [{'region': r, 'type': 'hard_freeze', 'start': today.isoformat(),
+               'end': (today + timedelta(days=2)).isoformat(), 'headline': 'Lows near 5°F tonight and tomorrow night'}
+              for r in ('IL', 'WI', 'MN', 'MI', 'IA', 'ON', 'AB')]
+    alerts += [{'region': r, 'type': 'heat_wave', 'start': (today + timedelta(days=1)).isoformat(),
+                'end': (today + timedelta(days=5)).isoformat()} for r in ('TX', 'AZ', 'FL')]
+    alerts += [{'region': r, 'type': 'heavy_rain', 'start': today.isoformat()} for r in ('OH', 'IN', 'PA', 'IL')]
+    alerts += [{'region': 'NY', 'type': 'heavy_rain', 'start': (today + timedelta(days=6)).isoformat()}]  # too far out
+    return json.dumps({'alerts': alerts}).encode()
+
+
+def python_loop(alerts, ids, region_names, flags):
+    """Same rules, one home at a time."""
+    hits = 0
+    for home in range(len(ids)):
+        region, home_flags = region_names[home], flags[home]
+        for alert in alerts:
+            if alert['region'] != region:
+                continue
+            for bits, _, _ in WEATHER_RULES[alert['type']][1]:
+                if home_flags & bits:
+                    hits += 1
+    return hits
+
+
+def main():
+    n_homes = int(_opt('homes', 1000000))
+    today = date.today()
+    body = feed(today)
+
+    class FeedHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    stub = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    feed_url = f'http://127.0.0.1:{stub.server_address[1]}/alerts.json'
+
+    with app.app_context():
+        t0 = time.perf_counter()
+        seed(n_homes)
+        print(f"Seeded {n_homes} homes in {time.perf_counter() - t0:.1f}s\n")
+
+        alerts = [a for a in weather_care_events.load_feed(feed_url)
+                  if a['start'] - timedelta(days=weather_care_events.WEATHER_LEAD_DAYS) <= today]
+        t0 = time.perf_counter()
+        ids, codes, names, flags = load_homes({a['region'] for a in alerts})
+        load_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        hits = scan(alerts, codes, names, flags)
+        scan_s = time.perf_counter() - t0
+        n_hits = sum(len(h[3]) for h in hits)
+
+        region_names, flag_list = names[codes].tolist(), flags.tolist()
+        t0 = time.perf_counter()
+        loop_hits = python_loop(alerts, ids, region_names, flag_list)
+        loop_s = time.perf_counter() - t0
+        assert loop_hits == n_hits, (loop_hits, n_hits)
+
+        print(f"load (id, region, flags): {len(ids)} homes in {load_s:.2f}s")
+        print(f"NumPy scan:   {n_hits} hits in {scan_s * 1000:.1f} ms")
+        print(f"Python loop:  {loop_hits} hits in {loop_s * 1000:.0f} ms ({loop_s / scan_s:.0f}x)\n")
+        db.session.rollback()
+
+        t0 = time.perf_counter()
+        n_alerts, created = weather_care_events.run(feed_url, today)
+        run_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, again = weather_care_events.run(feed_url, today)
+        again_s = time.perf_counter() - t0
+        stored = CareEvent.query.filter_by(eventType='weather_triggered').count()
+
+    stub.shutdown()
+    print(f"\nrun():        {n_alerts} alerts -> {created} events inserted in {run_s:.2f}s (feed + load + scan + insert)")
+    print(f"re-run:       {again} new events in {again_s:.2f}s; {stored} weather events stored")
+
+
+if __name__ == '__main__':
+    main()
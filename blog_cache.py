@@ -0,0 +1,211 @@
+"""
+In-process cache of the rendered blog: /blog, /blog/<slug> and
+/sitemap.xml.
+
+Those routes used to list blog/, read and parse every post's frontmatter,
+re-read the page template and run markdown on every request, and crawlers
+hit them hard. Now the whole blog is rendered once into Page objects —
+the HTML/XML bytes, a gzipped copy, an ETag and a Last-Modified — and the
+routes just serve them, answering conditional requests with a 304.
+
+Invalidation is by mtime: at most every BLOG_RECHECK_SECONDS a request
+stats blog/*.md and the two templates (one scandir, no file reads), and
+any added, removed or edited file (different name, mtime or size) means a
+rebuild. Each gunicorn worker keeps its own copy; a rebuild is a few
+milliseconds per post.
+
+Rendering is unchanged from the old routes, byte for byte.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+import markdown
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BLOG_DIR = os.path.join(BASE_DIR, 'blog')
+INDEX_TEMPLATE = os.path.join(BASE_DIR, 'blog_index_template.html')
+POST_TEMPLATE = os.path.join(BASE_DIR, 'blog_post_template.html')
+BLOG_RECHECK_SECONDS = float(os.getenv('BLOG_RECHECK_SECONDS', 2))
+SITE_URL = 'https://lot7.ai'
+
+
+@dataclass
+class Page:
+    body: bytes
+    gzipped: bytes
+    etag: str
+    last_modified: float  # unix time
+    content_type: str
+
+
+_lock = threading.Lock()
+_state = {'signature': None, 'checked': 0.0, 'pages': {}}
+
+
+def parse_frontmatter(text):
+    """Parse ---key: value--- frontmatter from a markdown string."""
+    if not text.startswith('---'):
+        return {}, text
+    parts = text.split('---', 2)
+    if len(parts) < 3:
+        return {}, text
+    meta = {}
+    for line in parts[1].strip().splitlines():
+        if ':' in line:
+            k, _, v = line.partition(':')
+            meta[k.strip()] = v.strip()
+    return meta, parts[2].strip()
+
+
+def _page(text, mtime, content_type):
+    body = text.encode('utf-8')
+    return Page(body=body, gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+                etag=hashlib.sha256(body).hexdigest()[:32], last_modified=mtime, content_type=content_type)
+
+
+def _signature():
+    """(name, mtime_ns, size) of every post and template — what a rebuild
+    depends on."""
+    entries = []
+    if os.path.isdir(BLOG_DIR):
+        with os.scandir(BLOG_DIR) as it:
+            for entry in it:
+                if entry.name.endswith('.md'):
+                    st = entry.stat()
+                    entries.append((entry.name, st.st_mtime_ns, st.st_size))
+    for path in (INDEX_TEMPLATE, POST_TEMPLATE):
+        st = os.stat(path)
+        entries.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(sorted(entries))
+
+
+def _render_sitemap(posts):
+    static_pages = [
+        (f"{SITE_URL}/",      "weekly", "1.0"),
+        (f"{SITE_URL}/blog",  "daily",  "0.9"),
+    ]
+    urls = ""
+    for loc, freq, pri in static_pages:
+        urls += f"""  <url>
+    <loc>{loc}</loc>
+    <changefreq>{freq}</changefreq>
+    <priority>{pri}</priority>
+  </url>\n"""
+    for post in posts:
+        lastmod = post['meta'].get('date', '')
+        loc = f"{SITE_URL}/blog/{post['slug']}"
+        urls += f"""  <url>
+    <loc>{loc}</loc>
+    {"<lastmod>" + lastmod + "</lastmod>" if lastmod else ""}
+    <changefreq>monthly</changefreq>
+    <priority>0.7</priority>
+  </url>\n"""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{urls}</urlset>"""
+
+
+def _render_index(posts, tpl):
+    cards_data = []
+    for post in posts:
+        meta, slug = post['meta'], post['slug']
+        words = post['body'].split()
+        excerpt = meta.get('excerpt', ' '.join(words[:28]) + ('…' if len(words) > 28 else ''))
+        cards_data.append({
+            'slug': slug,
+            'title': meta.get('title', slug.replace('-', ' ').title()),
+            'date': meta.get('date', ''),
+            'excerpt': excerpt,
+        })
+    if cards_data:
+        cards = ''.join(
+            f'<a href="/blog/{p["slug"]}" class="post-card">'
+            f'<div class="post-date">{p["date"]}</div>'
+            f'<h2>{p["title"]}</h2>'
+            f'<p>{p["excerpt"]}</p>'
+            f'<span class="read-more">Read more →</span>'
+            f'</a>'
+            for p in cards_data
+        )
+    else:
+        cards = '<p class="no-posts">No posts yet — check back soon.</p>'
+    return tpl.replace('{{POSTS}}', cards)
+
+
+def _render_post(post, tpl):
+    meta, body = post['meta'], post['body']
+    # Strip leading H1 from body — the template already renders the title as a heading
+    body_no_h1 = re.sub(r'^#\s+.+\n?', '', body, count=1, flags=re.MULTILINE).lstrip()
+    html_body = markdown.markdown(body_no_h1, extensions=['tables', 'fenced_code'])
+    schema = meta.get('schema', '').strip()
+    schema_block = f'<script type="application/ld+json">{schema}</script>' if schema else ''
+    return (tpl
+            .replace('{{META_TITLE}}', meta.get('meta_title', meta.get('title', 'Lot7.ai')))
+            .replace('{{META_DESCRIPTION}}', meta.get('meta_description', ''))
+            .replace('{{SLUG}}', post['file_slug'])
+            .replace('{{TITLE}}', meta.get('title', ''))
+            .replace('{{DATE}}', meta.get('date', ''))
+            .replace('{{CONTENT}}', html_body)
+            .replace('{{SCHEMA}}', schema_block))
+
+
+def _build():
+    """Every page, rendered. Posts newest file name first, as the old
+    routes listed them."""
+    posts = []
+    if os.path.isdir(BLOG_DIR):
+        for fname in sorted(os.listdir(BLOG_DIR), reverse=True):
+            if not fname.endswith('.md'):
+                continue
+            path = os.path.join(BLOG_DIR, fname)
+            with open(path, encoding='utf-8') as f:
+                meta, body = parse_frontmatter(f.read())
+            posts.append({'meta': meta, 'body': body, 'file_slug': fname[:-3],
+                          'slug': meta.get('slug', fname[:-3]), 'mtime': os.path.getmtime(path)})
+    with open(INDEX_TEMPLATE, encoding='utf-8') as f:
+        index_tpl = f.read()
+    with open(POST_TEMPLATE, encoding='utf-8') as f:
+        post_tpl = f.read()
+
+    newest = max([p['mtime'] for p in posts] + [os.path.getmtime(INDEX_TEMPLATE)])
+    pages = {
+        'sitemap': _page(_render_sitemap(posts), max([p['mtime'] for p in posts], default=newest),
+                         'application/xml'),
+        'index': _page(_render_index(posts, index_tpl), newest, 'text/html; charset=utf-8'),
+    }
+    template_mtime = os.path.getmtime(POST_TEMPLATE)
+    for post in posts:
+        # /blog/<slug> is looked up by file name (the old route opened
+        # blog/<slug>.md)
+        pages[('post', post['file_slug'])] = _page(_render_post(post, post_tpl),
+                                                   max(post['mtime'], template_mtime), 'text/html; charset=utf-8')
+    return pages
+
+
+def _refresh():
+    now = time.monotonic()
+    if _state['signature'] is not None and now - _state['checked'] < BLOG_RECHECK_SECONDS:
+        return
+    with _lock:
+        if _state['signature'] is not None and now - _state['checked'] < BLOG_RECHECK_SECONDS:
+            return
+        signature = _signature()
+        if signature != _state['signature']:
+            t0 = time.perf_counter()
+            _state['pages'] = _build()
+            _state['signature'] = signature
+            print(f"[BLOG] Rendered {len(_state['pages']) - 2} post(s), index and sitemap "
+                  f"in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        _state['checked'] = time.monotonic()
+
+
+def get_page(key):
+    """The cached Page for 'index', 'sitemap' or ('post', slug), or None."""
+    _refresh()
+    return _state['pages'].get(key)
@@ -0,0 +1,42 @@
+"""
+Regenerate zip_centroids.csv (used by contractor_matching.py for distance
+ranking) from a Census ZCTA Gazetteer file — tab-separated with GEOID,
+INTPTLAT and INTPTLONG columns, e.g. 2020_Gaz_zcta_national.txt from
+https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html
+
+Usage:
+    python build_zip_centroids.py 2020_Gaz_zcta_national.txt
+    python build_zip_centroids.py 2020_Gaz_zcta_national.txt --prefix=60,61,62   # Illinois only
+"""
+
+import csv
+import sys
+
+from contractor_matching import CENTROIDS_PATH
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    prefix_arg = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--prefix=')), '')
+    prefixes = tuple(p.strip() for p in prefix_arg.split(',') if p.strip())
+
+    count = 0
+    with open(args[0], newline='', encoding='utf-8') as src, open(CENTROIDS_PATH, 'w', newline='') as out:
+        reader = csv.DictReader(src, delimiter='\t')
+        reader.fieldnames = [f.strip() for f in reader.fieldnames]
+        writer = csv.writer(out)
+        writer.writerow(['zip', 'lat', 'lng'])
+        for row in reader:
+            zip_code = row['GEOID'].strip()
+            if prefixes and not zip_code.startswith(prefixes):
+                continue
+            writer.writerow([zip_code, round(float(row['INTPTLAT']), 4), round(float(row['INTPTLONG']), 4)])
+            count += 1
+    print(f"Wrote {count} ZIP centroid(s) to {CENTROIDS_PATH}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Bulk export: one zip with every selected report's analysis (as a single
+analyses.ndjson) and its cached PDFs — for audits and CRM imports, instead
+of an /api/analysis + /api/generate-pdf round trip per report. The zip is
+produced as a stream of chunks; export_jobs.py writes it to a file in the
+background for /api/export/reports, export_reports.py from the shell.
+
+Memory stays flat however many reports are selected:
+- reports are read in keyset-paginated batches of EXPORT_BATCH, heavy
+  columns (extractedText, appliance profile) never loaded;
+- the zip is written to a buffer that the generator drains after every
+  entry/chunk — zipfile streams to a non-seekable writer using data
+  descriptors, so nothing has to be held back for a central-directory
+  rewrite;
+- PDFs are copied from the pdf_cache.py disk cache in EXPORT_CHUNK pieces.
+
+PDFs that aren't cached yet (reports analyzed before the cache existed,
+or whose cached files were cleared) are rendered a batch at a time by up to
+EXPORT_RENDER_WORKERS pdf_render_worker.py processes, so a big export
+doesn't pin a web worker's CPU doing ReportLab in-process. Those are plain
+subprocesses running a PDF-only script — not a multiprocessing pool, whose
+spawned children would re-import app.py and boot the whole app.
+"""
+
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import load_only
+
+import pdf_cache
+from models import InspectionReport
+from pdf_reports import RENDERERS
+
+EXPORT_BATCH = 50
+EXPORT_CHUNK = 64 * 1024
+EXPORT_RENDER_WORKERS = int(os.getenv('EXPORT_RENDER_WORKERS', '2'))
+EXPORT_RENDER_TIMEOUT = 600  # seconds, per worker process (a batch's worth of PDFs)
+_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdf_render_worker.py')
+
+# Everything a PDF renderer or the NDJSON line reads — and nothing else
+_EXPORT_COLUMNS = (
+    'id', 'address', 'customerName', 'customerEmail', 'customerPhone', 'summary',
+    'analysis_json', 'user_id', 'is_paid', 'contentVersion', 'createdAt', 'inspectionDate',
+)
+_RENDER_FIELDS = ('id', 'address', 'customerName', 'customerEmail', 'customerPhone',
+                  'summary', 'analysis_json', 'contentVersion', 'inspectionDate')
+
+def _render_fields(r):
+    """The report attributes a render job carries, JSON-ready (dates as ISO
+    strings; pdf_reports parses them back)."""
+    fields = {f: getattr(r, f) for f in _RENDER_FIELDS}
+    if isinstance(fields['inspectionDate'], datetime):
+        fields['inspectionDate'] = fields['inspectionDate'].isoformat()
+    return fields
+
+
+def _render_in_worker(jobs):
+    """Run one pdf_render_worker.py process over jobs; its paths, in order
+    (None for a failed render)."""
+    proc = subprocess.run([sys.executable, _WORKER_SCRIPT], input=json.dumps({'jobs': jobs}),
+                          capture_output=True, text=True, timeout=EXPORT_RENDER_TIMEOUT)
+    if proc.returncode != 0:
+        raise RuntimeError(f"render worker exited {proc.returncode}: {proc.stderr.strip()[-500:]}")
+    out = json.loads(proc.stdout)
+    for job, error in zip(jobs, out['errors']):
+        if error:
+            print(f"Bulk export: PDF render failed for {job['fields']['id']} ({job['kind']}): {error}")
+    return out['paths']
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable buffer the zip is streamed into."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._buf += b
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+def iter_reports(start=None, end=None, user_id=None):
+    """Selected reports, oldest first, in keyset batches of EXPORT_BATCH."""
+    q = InspectionReport.query.options(
+        load_only(*[getattr(InspectionReport, c) for c in _EXPORT_COLUMNS])
+    )
+    if start:
+        q = q.filter(InspectionReport.createdAt >= start)
+    if end:
+        q = q.filter(InspectionReport.createdAt < end)
+    if user_id:
+        q = q.filter(InspectionReport.user_id == user_id)
+    q = q.order_by(InspectionReport.createdAt.asc(), InspectionReport.id.asc())
+
+    last = None
+    while True:
+        page = q
+        if last is not None:
+            page = page.filter(or_(
+                InspectionReport.createdAt > last.createdAt,
+                and_(InspectionReport.createdAt == last.createdAt, InspectionReport.id > last.id),
+            ))
+        batch = page.limit(EXPORT_BATCH).all()
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def _ndjson_line(r):
+    try:
+        analysis = json.loads(r.analysis_json) if r.analysis_json else None
+    except Exception:
+        analysis = None
+    return json.dumps({
+        'id': r.id,
+        'address': r.address,
+        'customer_name': r.customerName,
+        'customer_email': r.customerEmail,
+        'user_id': r.user_id,
+        'is_paid': r.is_paid,
+        'created_at': r.createdAt.isoformat() if r.createdAt else None,
+        'summary': r.summary,
+        'analysis': analysis,
+    }) + '\n'
+
+
+def _pdf_name(r, kind):
+    base = re.sub(r'[^A-Za-z0-9]+', '_', r.address or 'report').strip('_')[:60] or 'report'
+    return f"pdfs/{base}_{r.id[:8]}_{kind}.pdf"
+
+
+def _ensure_pdfs(batch, kinds):
+    """Cached PDF paths for a batch: {(report_id, kind): path}. Missing ones
+    are split across EXPORT_RENDER_WORKERS render processes; a failed
+    render is left out."""
+    paths, missing = {}, []
+    for r in batch:
+        for kind in kinds:
+            path = pdf_cache.cache_path(r, kind)
+            if os.path.exists(path):
+                paths[(r.id, kind)] = path
+            else:
+                missing.append({'kind': kind, 'fields': _render_fields(r)})
+    if not missing:
+        return paths
+
+    n = max(1, min(EXPORT_RENDER_WORKERS, len(missing)))
+    slices = [missing[i::n] for i in range(n)]
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        futures = [(jobs, pool.submit(_render_in_worker, jobs)) for jobs in slices]
+        for jobs, fut in futures:
+            try:
+                rendered = fut.result()
+            except Exception as e:
+                print(f"Bulk export: {len(jobs)} PDF render(s) failed: {e}")
+                continue
+            for job, path in zip(jobs, rendered):
+                if path:
+                    paths[(job['fields']['id'], job['kind'])] = path
+    return paths
+
+
+def stream_export_zip(start=None, end=None, user_id=None, kinds=None, include_pdfs=True):
+    """
+    Generator of zip bytes: analyses.ndjson first (one line per report),
+    then pdfs/<address>_<id>_<kind>.pdf for each report. Must run inside an
+    app context.
+    """
+    kinds = [k for k in (kinds or RENDERERS) if k in RENDERERS]
+    sink = _ZipSink()
+    zf = zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+    count = 0
+
+    with zf.open('analyses.ndjson', mode='w', force_zip64=True) as entry:
+        for batch in iter_reports(start, end, user_id):
+            for r in batch:
+                entry.write(_ndjson_line(r).encode('utf-8'))
+                count += 1
+            yield sink.drain()
+    yield sink.drain()
+
+    if include_pdfs and kinds:
+        for batch in iter_reports(start, end, user_id):
+            paths = _ensure_pdfs(batch, kinds)
+            for r in batch:
+                for kind in kinds:
+                    path = paths.get((r.id, kind))
+                    if not path:
+                        continue
+                    # PDFs are already compressed — store them as-is
+                    info = zipfile.ZipInfo(_pdf_name(r, kind), date_time=datetime.utcnow().timetuple()[:6])
+                    info.compress_type = zipfile.ZIP_STORED
+                    with open(path, 'rb') as src, zf.open(info, mode='w', force_zip64=True) as entry:
+                        while True:
+                            chunk = src.read(EXPORT_CHUNK)
+                            if not chunk:
+                                break
+                            entry.write(chunk)
+                            yield sink.drain()
+                    yield sink.drain()
+
+    zf.close()
+    yield sink.drain()
+    print(f"Bulk export: wrote {count} report(s).")
+
+
+def parse_day(value):
+    """YYYY-MM-DD -> datetime, or None for blank. Raises ValueError on junk."""
+    value = (value or '').strip()
+    return datetime.strptime(value, '%Y-%m-%d') if value else None
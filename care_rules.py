@@ -0,0 +1,188 @@
+"""
+Care-event rules: which appliances in a home's profile get a maintenance
+nudge, when, and how often — decided locally from a lifespan / service
+interval table and the home's climate, instead of an AI call per report.
+
+generate_care_events() (utils.py) calls care_events() below. Output is the
+same shape the AI version returned, so the caller and the dispatcher are
+unchanged:
+
+    [{"appliance", "event_type", "due_in_days", "recurring_interval_days", "message"}]
+
+Rules, per captured appliance (known manufacture year):
+  - serviceable and at least service_from years old -> recurring service
+    nudge every service_days; seasonal ones (AC, furnace, sump pump) are
+    due at the start of the home's climate window for that season, or now
+    if we're inside it
+  - at least EOL_FRACTION of its typical lifespan -> one-time "budget for
+    a replacement" nudge, due now — alongside the service nudge if there
+    is one, so an old furnace isn't told about its age only when the next
+    heating season comes round
+  - otherwise nothing (a young appliance doesn't need a nudge)
+
+Messages come from templates — same wording every time, no model call.
+Compare against stored AI output with benchmarks/bench_care_rules.py.
+"""
+
+import datetime as dt
+import re
+from functools import lru_cache
+
+# Share of typical lifespan at which an appliance gets an end-of-life nudge
+EOL_FRACTION = 0.85
+
+# (pattern, label, lifespan_years, service_from_years, service_days, season, service_action)
+# First match wins, so more specific patterns go first (tankless before water
+# heater, dishwasher before washer, microwave before range). service_from
+# None = nothing to service, end-of-life nudge only.
+# Lifespans: InterNACHI "Estimated Life Expectancy" chart / NAHB, rounded.
+CARE_RULES = [
+    (r'tankless|on[- ]demand', 'tankless water heater', 20, 5, 365, None,
+     'have it descaled and the inlet filter cleaned'),
+    (r'water heater|hot water|\bwh\b', 'water heater', 12, 6, 365, None,
+     'flush the tank and test the pressure-relief valve'),
+    (r'heat pump', 'heat pump', 15, 5, 365, 'cooling',
+     'schedule a heat pump tune-up'),
+    (r'furnace|forced air|\bfau\b|air handler', 'furnace', 20, 10, 365, 'heating',
+     'schedule a furnace tune-up and safety check'),
+    (r'boiler', 'boiler', 25, 10, 365, 'heating',
+     'schedule a boiler service'),
+    (r'\ba/?c\b|air condition|condens(er|ing unit)', 'air conditioner', 15, 8, 365, 'cooling',
+     'schedule an AC tune-up'),
+    (r'sump', 'sump pump', 10, 3, 365, 'spring_rain',
+     'test it (pour a bucket of water into the pit) and check the discharge line'),
+    (r'softener', 'water softener', 15, 8, 365, None,
+     'have it serviced and the resin checked'),
+    (r'dryer', 'dryer', 13, 3, 365, None,
+     'have the dryer vent cleaned out'),
+    (r'dish ?washer', 'dishwasher', 10, None, None, None, None),
+    (r'wash(er|ing machine)', 'washer', 11, None, None, None, None),
+    (r'refrigerator|fridge|freezer', 'refrigerator', 13, None, None, None, None),
+    (r'microwave', 'microwave', 9, None, None, None, None),
+    (r'\brange\b|oven|cooktop|stove', 'range', 15, None, None, None, None),
+    (r'dispos(al|er)', 'garbage disposal', 12, None, None, None, None),
+    (r'garage door|opener', 'garage door opener', 12, None, None, None, None),
+]
+_COMPILED = [(re.compile(rule[0], re.I),) + rule[1:] for rule in CARE_RULES]
+
+# One bit per CARE_RULES label, OR-ed into InspectionReport.applianceFlags so
+# the weather scan (weather_care_events.py) can ask "which homes have a sump
+# pump" of a million homes as one NumPy AND instead of parsing each profile
+APPLIANCE_BITS = {rule[1]: 1 << i for i, rule in enumerate(CARE_RULES)}
+
+# Climate zone by US state / Canadian province code; anything else is 'mixed'
+COLD_REGIONS = {
+    'AK', 'CO', 'CT', 'IA', 'ID', 'IL', 'IN', 'MA', 'ME', 'MI', 'MN', 'MT', 'ND', 'NE', 'NH', 'NY',
+    'OH', 'PA', 'RI', 'SD', 'UT', 'VT', 'WI', 'WY',
+    'AB', 'BC', 'MB', 'NB', 'NL', 'NS', 'NT', 'NU', 'ON', 'PE', 'QC', 'SK', 'YT',
+}
+HOT_REGIONS = {'AL', 'AZ', 'FL', 'GA', 'HI', 'LA', 'MS', 'NV', 'SC', 'TX'}
+
+# season -> zone -> ((start month, day), (end month, day))
+SEASON_WINDOWS = {
+    'cooling': {'cold': ((4, 15), (6, 1)), 'mixed': ((3, 15), (5, 15)), 'hot': ((2, 15), (4, 15))},
+    'heating': {'cold': ((9, 1), (10, 15)), 'mixed': ((9, 15), (11, 1)), 'hot': ((10, 15), (12, 1))},
+    'spring_rain': {'cold': ((3, 15), (4, 30)), 'mixed': ((3, 1), (4, 15)), 'hot': ((2, 1), (3, 15))},
+}
+SEASON_PHRASES = {
+    'cooling': 'before the cooling season',
+    'heating': 'before the heating season',
+    'spring_rain': 'before the spring rains',
+}
+
+_REGION_RE = re.compile(r',\s*([A-Za-z]{2})\b(?:\s+[\dA-Za-z]{3}\s?[\dA-Za-z]{3}|\s+\d{5}(?:-\d{4})?)?\s*$')
+
+
+def region_code(location):
+    """Two-letter state / province code from a "City, ST" / full address string, or None."""
+    m = _REGION_RE.search((location or '').strip())
+    return m.group(1).upper() if m else None
+
+
+def climate_zone(location):
+    """'cold' | 'mixed' | 'hot' from a "City, ST" / full address string."""
+    region = region_code(location)
+    if region in COLD_REGIONS:
+        return 'cold'
+    if region in HOT_REGIONS:
+        return 'hot'
+    return 'mixed'
+
+
+@lru_cache(maxsize=4096)
+def match_rule(appliance):
+    """The CARE_RULES entry (minus its pattern) for an appliance name, or None."""
+    for rule in _COMPILED:
+        if rule[0].search(appliance or ''):
+            return rule[1:]
+    return None
+
+
+def appliance_flags(appliance_profile):
+    """APPLIANCE_BITS of every appliance in a profile, whatever its status —
+    a furnace with an unreadable data plate is still a furnace."""
+    flags = 0
+    for a in appliance_profile or []:
+        rule = match_rule(a.get('appliance'))
+        if rule is not None:
+            flags |= APPLIANCE_BITS[rule[0]]
+    return flags
+
+
+def days_until_window(today, season, zone):
+    """0 inside the season's window, else days until it next opens."""
+    (sm, sd), (em, ed) = SEASON_WINDOWS[season][zone]
+    start, end = dt.date(today.year, sm, sd), dt.date(today.year, em, ed)
+    if start <= today <= end:
+        return 0
+    if today > end:
+        start = dt.date(today.year + 1, sm, sd)
+    return (start - today).days
+
+
+def care_events(appliance_profile, current_date=None, location=None):
+    """See module docstring. location is the report's "City, ST" or address."""
+    today = current_date or dt.date.today()
+    zone = climate_zone(location)
+    events = []
+    seen = set()
+    for a in appliance_profile or []:
+        year = a.get('manufactured_year')
+        if a.get('status') != 'captured' or not year:
+            continue
+        try:
+            age = today.year - int(year)
+        except (TypeError, ValueError):
+            continue
+        rule = match_rule(a.get('appliance'))
+        if rule is None or age < 0:
+            continue
+        label, lifespan, service_from, service_days, season, action = rule
+        if (label, int(year)) in seen:
+            continue
+        seen.add((label, int(year)))
+        near_eol = age >= EOL_FRACTION * lifespan
+        age_text = f"about {age} year{'s' if age != 1 else ''} old" if age else 'less than a year old'
+
+        if service_from is not None and age >= service_from:
+            timing = f"now, {SEASON_PHRASES[season]}," if season else "this year"
+            events.append({
+                'appliance': a.get('appliance'),
+                'event_type': 'seasonal' if season else 'age_based',
+                'due_in_days': days_until_window(today, season, zone) if season else 0,
+                'recurring_interval_days': service_days,
+                'message': (f"Your {label} is {age_text} — {action} {timing} to keep it running efficiently "
+                            f"and catch small problems before they turn into expensive ones."),
+            })
+        if near_eol:
+            where = 'past' if age >= lifespan else 'approaching'
+            events.append({
+                'appliance': a.get('appliance'),
+                'event_type': 'age_based',
+                'due_in_days': 0,
+                'recurring_interval_days': None,
+                'message': (f"Your {label} is {age_text} — {where} the typical {lifespan}-year life for one. "
+                            f"It's worth starting to budget for a replacement now, so a failure doesn't "
+                            f"catch you off guard."),
+            })
+    return events
@@ -0,0 +1,88 @@
+"""
+Fold the CareEvent rows the old dispatcher piled up — one new row per send
+of a recurring reminder — into the current model: one row per recurring
+reminder with an advancing nextDueDate, sends logged in CareEventSend.
+
+Per report, rows with the same appliance, event type, interval and
+message are one reminder's chain (the old dispatcher copied the message
+forward, so two reminders for one appliance with different messages are
+two chains). The newest unsent row is kept — it holds the live
+nextDueDate — or, if every row was sent, the newest row; every other sent
+row becomes a CareEventSend entry on it and is deleted. Unsent rows are
+never deleted: a second unsent row in a chain is left as it is rather than
+risk dropping a reminder that hasn't gone out.
+Reports are processed in keyset batches, one commit each, so the run can
+be stopped and resumed. Run once after deploying.
+
+Usage:
+    python compact_care_events.py
+    python compact_care_events.py --dry-run       # counts only
+    python compact_care_events.py --batch=500     # reports per commit
+"""
+
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import app
+from models import db, CareEvent, CareEventSend
+
+
+def compact(batch_size=200, dry_run=False):
+    """Returns (chains folded, rows removed)."""
+    last_report = ''
+    chains = removed = 0
+    while True:
+        report_ids = [r for (r,) in db.session.query(CareEvent.reportId).distinct()
+                      .filter(CareEvent.reportId > last_report, CareEvent.recurringIntervalDays.isnot(None))
+                      .order_by(CareEvent.reportId).limit(batch_size)]
+        if not report_ids:
+            break
+        last_report = report_ids[-1]
+        rows = (db.session.query(CareEvent.id, CareEvent.reportId, CareEvent.appliance, CareEvent.eventType,
+                                 CareEvent.recurringIntervalDays, CareEvent.message, CareEvent.dueDate,
+                                 CareEvent.sent, CareEvent.sentAt, CareEvent.createdAt)
+                .filter(CareEvent.reportId.in_(report_ids), CareEvent.recurringIntervalDays.isnot(None))
+                .all())
+        by_chain = {}
+        for r in rows:
+            by_chain.setdefault((r.reportId, r.appliance, r.eventType, r.recurringIntervalDays, r.message),
+                                []).append(r)
+
+        log, drop = [], []
+        for chain in by_chain.values():
+            if len(chain) < 2:
+                continue
+            chain.sort(key=lambda r: (r.dueDate, r.createdAt or datetime.min))
+            keep = next((r for r in reversed(chain) if not r.sent), chain[-1])
+            folded = [r for r in chain if r.sent and r.id != keep.id]
+            if not folded:
+                continue
+            log += [{'careEventId': keep.id, 'dueDate': r.dueDate, 'sentAt': r.sentAt or datetime.utcnow()}
+                    for r in folded]
+            drop += [r.id for r in folded]
+            chains += 1
+
+        removed += len(drop)
+        if not dry_run:
+            if log:
+                db.session.execute(CareEventSend.__table__.insert(), log)
+            if drop:
+                CareEvent.query.filter(CareEvent.id.in_(drop)).delete(synchronize_session=False)
+            db.session.commit()
+        print(f"  through report {last_report}: {chains} chain(s), {removed} row(s) folded")
+    return chains, removed
+
+
+def main():
+    batch = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--batch=')), 200)
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        chains, removed = compact(batch, dry_run)
+    print(f"Done — {chains} recurring chain(s), {removed} row(s) {'would be ' if dry_run else ''}folded into CareEventSend.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Convert existing rows of the CompressedText columns (compressed_text.py)
+to the current compressed format — plain text and the old base64 form
+alike — in small keyset batches with a pause between them, while the app
+keeps serving. Readers handle every format, so there is no cut-over moment
+and the run can be stopped and resumed at any point.
+
+Rows are rewritten with plain SQL (no ORM events: updatedAt, the search
+index and the PDF cache are untouched), and each UPDATE only applies if the
+value is still the one that was read, so a concurrent edit is never
+overwritten — that row is simply left for the next run.
+
+Usage:
+    python compress_columns.py                      # all columns, 200 rows/batch
+    python compress_columns.py --batch=500 --sleep=0.5
+    python compress_columns.py --dry-run            # sizes only, no writes
+    python compress_columns.py --decompress         # back to plain utf-8 (before a rollback)
+"""
+
+import sys
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import text
+
+from app import app
+from models import db
+from compressed_text import CompressedText, compress, decompress, is_compressed
+
+# (table, column) pairs declared as CompressedText in models.py
+COLUMNS = [(t.name, c.name) for t in db.metadata.sorted_tables for c in t.columns
+           if isinstance(c.type, CompressedText)]
+
+
+def _stored(value):
+    """A raw column value as bound back in the WHERE clause: bytes (bytea
+    comes back as memoryview), or str for a SQLite row still held as TEXT."""
+    return value if isinstance(value, str) else bytes(value)
+
+
+def convert_column(table, column, batch_size=200, pause=0.2, dry_run=False, reverse=False):
+    """Returns (rows rewritten, bytes before, bytes after)."""
+    last_id = ''
+    rewritten = before = after = 0
+    while True:
+        rows = db.session.execute(text(
+            f'SELECT id, "{column}" FROM "{table}" WHERE id > :last AND "{column}" IS NOT NULL '
+            f'ORDER BY id LIMIT :n'
+        ), {'last': last_id, 'n': batch_size}).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        for row_id, stored in rows:
+            stored = _stored(stored)
+            if is_compressed(stored) != reverse:
+                continue
+            text_value = decompress(stored)
+            new = text_value.encode('utf-8') if reverse else compress(text_value)
+            if new == stored:
+                continue
+            before += len(stored.encode('utf-8') if isinstance(stored, str) else stored)
+            after += len(new)
+            if dry_run:
+                continue
+            result = db.session.execute(text(
+                f'UPDATE "{table}" SET "{column}" = :new WHERE id = :id AND "{column}" = :old'
+            ), {'new': new, 'id': row_id, 'old': stored})
+            rewritten += result.rowcount
+        db.session.commit()
+        print(f"  {table}.{column}: through {last_id} — {rewritten} rewritten")
+        if pause:
+            time.sleep(pause)
+    return rewritten, before, after
+
+
+def main():
+    batch = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--batch=')), 200)
+    pause = next((float(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--sleep=')), 0.2)
+    dry_run = '--dry-run' in sys.argv
+    reverse = '--decompress' in sys.argv
+    with app.app_context():
+        for table, column in COLUMNS:
+            n, before, after = convert_column(table, column, batch, pause, dry_run, reverse)
+            ratio = f"{before / after:.1f}x" if after else "-"
+            print(f"{table}.{column}: {n} row(s) rewritten, {before:,} -> {after:,} bytes ({ratio})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+CompressedText: a binary column type that zlib-compresses text on write and
+decompresses on read, transparently to the ORM — report text compresses
+4-8x, and on Postgres storage and I/O are the bill.
+
+The compressed form is stored as raw bytes — MARKER + zlib(utf-8) — in a
+bytea / BLOB column, not base64 in a TEXT column (base64 gives a third of
+the saving back). Values under MIN_COMPRESS_CHARS, or that wouldn't get
+smaller, are stored as their plain utf-8 bytes. On Postgres the columns are
+converted from TEXT to bytea by the safe migration in app.py and set to
+STORAGE EXTERNAL, so TOAST doesn't spend CPU trying to pglz-compress what
+zlib already compressed.
+
+Reads accept every earlier form, so nothing has to be rewritten at once:
+plain utf-8, the old base64 text form (LEGACY_MARKER, "z1"), and — on
+SQLite, where the declared type doesn't change what's stored — values
+still held as TEXT from before the switch. `python compress_columns.py`
+rewrites old rows into the current form a batch at a time. The marker
+carries a codec version ("z2") so a different codec can be added without
+rewriting old rows.
+
+Anything that reads these columns in SQL (LIKE, ts_headline, ...) sees
+bytes — read them through the ORM instead.
+"""
+
+import base64
+import zlib
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+MARKER = b'\x1ez2:'
+LEGACY_MARKER = b'\x1ez1:'   # base64 in a TEXT column, before the switch to bytes
+MIN_COMPRESS_CHARS = 512
+ZLIB_LEVEL = 6
+
+
+def compress(value):
+    """str -> the bytes stored for it."""
+    if value is None:
+        return None
+    raw = value.encode('utf-8')
+    # Plain text that happens to start with a marker is always encoded, so
+    # decoding never has to guess
+    marked = raw.startswith((MARKER, LEGACY_MARKER))
+    if len(value) < MIN_COMPRESS_CHARS and not marked:
+        return raw
+    packed = MARKER + zlib.compress(raw, ZLIB_LEVEL)
+    if len(packed) >= len(raw) and not marked:
+        return raw
+    return packed
+
+
+def decompress(value):
+    """Stored value (bytes, memoryview, or legacy str) -> str."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    value = bytes(value)
+    if value.startswith(MARKER):
+        return zlib.decompress(value[len(MARKER):]).decode('utf-8')
+    if value.startswith(LEGACY_MARKER):
+        return zlib.decompress(base64.b64decode(value[len(LEGACY_MARKER):])).decode('utf-8')
+    return value.decode('utf-8')
+
+
+def is_compressed(value):
+    """Whether a stored value is already in the current compressed form."""
+    return value is not None and not isinstance(value, str) and bytes(value).startswith(MARKER)
+
+
+class CompressedText(TypeDecorator):
+    """Text, stored compressed in a binary column (see module docstring)."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress(value)
+
+    def result_processor(self, dialect, coltype):
+        # Not process_result_value: LargeBinary's own result processor would
+        # choke on the TEXT values SQLite rows can still hold
+        return decompress
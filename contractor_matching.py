@@ -0,0 +1,189 @@
+"""
+Contractor referrals for a Q&A answer: who does this kind of work near the
+report's ZIP, best first.
+
+Service areas live in ContractorServiceArea (contractor, ZIP, specialty),
+rebuilt from the free-text Contractor.zipCodes by mapper events whenever a
+contractor is inserted or its ZIPs/specialty change — ZIPs are parsed as
+whole 5-digit tokens, so "6060" no longer matches "60601".
+
+Ranking: every active contractor of the specialty serving a ZIP within
+MATCH_RADIUS_KM of the report's ZIP is a candidate (one indexed
+(specialty, zip) lookup), scored by distance — ZIP centroid to ZIP centroid,
+from the bundled zip_centroids.csv — blended with rating. A report ZIP
+with no centroid matches exact-ZIP service areas only; no candidates at
+all falls back to the top-rated contractors of the specialty, as before.
+
+Ranked contractor ids are cached per (issue_type, zip) for MATCH_CACHE_TTL
+seconds and the whole cache is dropped whenever a contractor is saved (in
+this worker; other workers pick the edit up when their entries expire).
+
+zip_centroids.csv (zip,lat,lng) currently covers the Chicagoland launch
+market; regenerate it nationwide from the Census ZCTA Gazetteer with
+`python build_zip_centroids.py 2020_Gaz_zcta_national.txt`.
+"""
+
+import csv
+import math
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import event, func, inspect as sa_inspect
+
+from models import db, Contractor, ContractorServiceArea
+
+MATCH_RADIUS_KM = float(os.getenv('CONTRACTOR_MATCH_RADIUS_KM', '40'))
+MATCH_CACHE_TTL = 600
+MATCH_CACHE_MAX = 5000
+MATCH_LIMIT = 3
+# Score = DISTANCE_WEIGHT * closeness (1 at the same ZIP, 0 at the radius)
+#       + RATING_WEIGHT * rating / 5
+DISTANCE_WEIGHT = 0.6
+RATING_WEIGHT = 0.4
+
+CENTROIDS_PATH = Path(__file__).parent / 'zip_centroids.csv'
+
+_ZIP_RE = re.compile(r'(?<!\d)\d{5}(?!\d)')
+_KM_PER_DEG_LAT = 111.2
+
+_centroids = None
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def parse_zips(zip_codes):
+    """Whole 5-digit ZIPs in a free-text zipCodes value, deduplicated."""
+    return sorted(set(_ZIP_RE.findall(zip_codes or '')))
+
+
+def centroids():
+    """{zip: (lat, lng)} from zip_centroids.csv, loaded once."""
+    global _centroids
+    if _centroids is None:
+        data = {}
+        try:
+            with open(CENTROIDS_PATH, newline='') as f:
+                for row in csv.DictReader(f):
+                    data[row['zip']] = (float(row['lat']), float(row['lng']))
+        except FileNotFoundError:
+            print(f"Contractor matching: {CENTROIDS_PATH} missing — exact-ZIP matching only")
+        _centroids = data
+    return _centroids
+
+
+def _distance_km(a, b):
+    lat1, lng1 = map(math.radians, a)
+    lat2, lng2 = map(math.radians, b)
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 6371.0 * 2 * math.asin(math.sqrt(h))
+
+
+def nearby_zips(zip_code, radius_km=MATCH_RADIUS_KM):
+    """{zip: km} for every known ZIP within radius_km of zip_code (itself at 0)."""
+    origin = centroids().get(zip_code)
+    if origin is None:
+        return {zip_code: 0.0}
+    max_dlat = radius_km / _KM_PER_DEG_LAT
+    near = {zip_code: 0.0}
+    for z, point in centroids().items():
+        # cheap latitude band check before the haversine
+        if abs(point[0] - origin[0]) > max_dlat or z == zip_code:
+            continue
+        km = _distance_km(origin, point)
+        if km <= radius_km:
+            near[z] = km
+    return near
+
+
+def sync_service_areas(connection, contractor_id, specialty, zip_codes):
+    """Replace one contractor's ContractorServiceArea rows."""
+    table = ContractorServiceArea.__table__
+    connection.execute(table.delete().where(table.c.contractorId == contractor_id))
+    rows = [{'contractorId': contractor_id, 'zip': z, 'specialty': (specialty or '').strip().lower()}
+            for z in parse_zips(zip_codes)]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+def invalidate():
+    with _cache_lock:
+        _cache.clear()
+
+
+@event.listens_for(Contractor, 'after_insert')
+def _after_insert(mapper, connection, target):
+    sync_service_areas(connection, target.id, target.specialty, target.zipCodes)
+    invalidate()
+
+
+@event.listens_for(Contractor, 'after_update')
+def _after_update(mapper, connection, target):
+    state = sa_inspect(target)
+    if state.attrs.zipCodes.history.has_changes() or state.attrs.specialty.history.has_changes():
+        sync_service_areas(connection, target.id, target.specialty, target.zipCodes)
+    # name/rating/isActive edits change the ranking or what's shown too
+    invalidate()
+
+
+@event.listens_for(Contractor, 'after_delete')
+def _after_delete(mapper, connection, target):
+    invalidate()
+
+
+def rebuild():
+    """Rebuild every contractor's service areas from zipCodes. Needs an app
+    context. Returns how many ZIP rows were written."""
+    conn = db.session.connection()
+    for c_id, specialty, zip_codes in db.session.query(Contractor.id, Contractor.specialty, Contractor.zipCodes):
+        sync_service_areas(conn, c_id, specialty, zip_codes)
+    db.session.commit()
+    invalidate()
+    return db.session.query(func.count()).select_from(ContractorServiceArea).scalar()
+
+
+def _rank(issue_type, zip_code, limit):
+    specialty = (issue_type or '').strip().lower()
+    if zip_code:
+        near = nearby_zips(zip_code)
+        rows = (db.session.query(ContractorServiceArea.contractorId, ContractorServiceArea.zip, Contractor.rating)
+                .join(Contractor, Contractor.id == ContractorServiceArea.contractorId)
+                .filter(ContractorServiceArea.specialty == specialty,
+                        ContractorServiceArea.zip.in_(list(near)),
+                        Contractor.isActive.is_(True))
+                .all())
+        best = {}
+        for c_id, z, rating in rows:
+            closeness = 1.0 - min(near[z], MATCH_RADIUS_KM) / MATCH_RADIUS_KM
+            score = DISTANCE_WEIGHT * closeness + RATING_WEIGHT * (rating or 0.0) / 5.0
+            best[c_id] = max(best.get(c_id, 0.0), score)
+        if best:
+            return [c_id for c_id, _ in sorted(best.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]]
+
+    rows = (db.session.query(Contractor.id)
+            .filter(func.lower(Contractor.specialty) == specialty, Contractor.isActive.is_(True))
+            .order_by(Contractor.rating.desc()).limit(limit).all())
+    return [r[0] for r in rows]
+
+
+def matching_contractors(issue_type, zip_code=None, limit=MATCH_LIMIT):
+    """Best Contractor rows for issue_type near zip_code, best first."""
+    key = (issue_type, zip_code, limit)
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit and hit[0] > now:
+        ids = hit[1]
+    else:
+        ids = _rank(issue_type, zip_code, limit)
+        with _cache_lock:
+            if len(_cache) >= MATCH_CACHE_MAX:
+                _cache.clear()
+            _cache[key] = (now + MATCH_CACHE_TTL, ids)
+    if not ids:
+        return []
+    by_id = {c.id: c for c in Contractor.query.filter(Contractor.id.in_(ids)).all()}
+    return [by_id[i] for i in ids if i in by_id]
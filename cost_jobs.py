@@ -0,0 +1,289 @@
+"""
+Async mode for /v1/cost-estimate/batch (a callback_url in the request).
+
+Each async batch is a CostJob row: the validated items go in at request
+time, a background thread claims the row, prices it with the same
+_estimate_ig_items the sync path uses, stores the results and then POSTs
+them to the partner's callback. Because the job lives in the DB:
+
+- the partner can poll GET /v1/cost-estimate/jobs/<id> (to_dict) instead of
+  relying on the callback alone;
+- a job whose process died mid-pricing (deploy, crash, worker timeout) is
+  picked up again by the resume sweep every worker runs from startup
+  (start_resumer) — queued rows nobody claimed, rows stuck in 'pricing' for
+  STALE_MINUTES, and finished jobs whose callback never went out.
+
+Claims are a conditional UPDATE on status (+ claimToken), so two gunicorn
+workers resuming at once never price the same job twice.
+
+The callback URL is partner-supplied and the server POSTs to it, so it is
+checked (check_callback_url) when the job is created and again before every
+delivery attempt: https only, and the host must resolve to public
+addresses — no loopback, private, link-local (cloud metadata) or reserved
+ranges. The delivery then connects to exactly the addresses that check
+returned (_PinnedHTTPSConnection) instead of resolving the name again, so
+a short-TTL name can't pass with a public address and then rebind to an
+internal one. Redirects are not followed.
+"""
+
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import json
+import os
+import socket
+import ssl
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from models import db, CostJob
+
+# Largest async batch; the sync path has no limit of its own (it is priced
+# in concurrent chunks either way)
+MAX_ASYNC_ITEMS = 1000
+# A job in 'pricing' not updated for this long died with its process. A
+# MAX_ASYNC_ITEMS batch is 40 chunks, 4 at a time — well under this.
+STALE_MINUTES = 30
+# A queued job its own thread hasn't claimed after this long is resumed
+QUEUED_GRACE_SECONDS = 60
+RESUME_INTERVAL_SECONDS = 300
+CALLBACK_ATTEMPTS = 3
+
+
+def _public_addresses(url):
+    """(addresses, None) — every address the URL's host resolves to, all of
+    them public — or (None, the reason the server may not POST there)."""
+    parsed = urlparse(url or '')
+    if parsed.scheme != 'https' or not parsed.hostname:
+        return None, 'callback_url must be an https URL'
+    try:
+        infos = socket.getaddrinfo(parsed.hostname, parsed.port or 443, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        return None, 'callback_url host does not resolve'
+    addresses = []
+    for info in infos:
+        ip = ipaddress.ip_address(info[4][0].split('%')[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            return None, 'callback_url must resolve to a public address'
+        if str(ip) not in addresses:
+            addresses.append(str(ip))
+    return addresses, None
+
+
+def check_callback_url(url):
+    """None if the server may POST to this URL, else the reason it may not."""
+    return _public_addresses(url)[1]
+
+
+def create(partner_id, report_id, pricing_input, currency, callback_url):
+    job = CostJob(partnerId=partner_id, reportId=(str(report_id)[:100] if report_id else None),
+                  currency=currency, itemCount=len(pricing_input), items=json.dumps(pricing_input),
+                  callbackUrl=callback_url)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def start(app, job_id, estimate):
+    """Price the job in a background thread. estimate is
+    app._estimate_ig_items: (pricing_input, currency, report_id) ->
+    (results, errors)."""
+    threading.Thread(target=run, args=(app, job_id, estimate), daemon=True).start()
+
+
+def _claim(job_id):
+    token = str(uuid.uuid4())
+    now = datetime.utcnow()
+    claimed = (db.session.query(CostJob)
+               .filter(CostJob.id == job_id,
+                       db.or_(CostJob.status == 'queued',
+                              db.and_(CostJob.status == 'pricing',
+                                      CostJob.updatedAt < now - timedelta(minutes=STALE_MINUTES))))
+               .update({'status': 'pricing', 'claimToken': token, 'updatedAt': now},
+                       synchronize_session=False))
+    db.session.commit()
+    return token if claimed == 1 else None
+
+
+def run(app, job_id, estimate):
+    with app.app_context():
+        token = _claim(job_id)
+        if not token:
+            return
+        job = db.session.get(CostJob, job_id)
+        pricing_input = json.loads(job.items)
+        try:
+            results, errors = estimate(pricing_input, job.currency, job.reportId)
+            status = 'done'
+        except Exception as e:
+            db.session.rollback()
+            print(f"[COST JOB {job_id}] Pricing error: {e}")
+            results, errors = [], [{'item_id': i['id'], 'error': 'pricing_failed'} for i in pricing_input]
+            status = 'error'
+        finished = (db.session.query(CostJob)
+                    .filter(CostJob.id == job_id, CostJob.claimToken == token)
+                    .update({'status': status, 'result': json.dumps({'results': results, 'errors': errors}),
+                             'callbackStatus': 'sending',
+                             'completedAt': datetime.utcnow(), 'updatedAt': datetime.utcnow()},
+                            synchronize_session=False))
+        db.session.commit()
+        if finished != 1:
+            print(f"[COST JOB {job_id}] Claim lost (job resumed elsewhere) — dropping this run's results")
+            return
+        print(f"[COST JOB {job_id}] {status}: {len(results)} priced, {len(errors)} error(s)")
+        deliver(job_id)
+
+
+def deliver(job_id):
+    """POST a finished job to its callback and record the outcome. Needs an
+    app context."""
+    job = db.session.get(CostJob, job_id)
+    payload = {'job_id': job.id, 'report_id': job.reportId, 'status': job.status, **json.loads(job.result)}
+    delivered = _post_callback(job.callbackUrl, payload)
+    (db.session.query(CostJob).filter_by(id=job_id)
+     .update({'callbackStatus': 'delivered' if delivered else 'failed', 'updatedAt': datetime.utcnow()},
+             synchronize_session=False))
+    db.session.commit()
+
+
+class _PinnedHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS to a hostname over a socket to addresses already vetted by
+    _public_addresses, so the name is never resolved again between the
+    check and the connect. The certificate is still verified against the
+    hostname, and SNI and the Host header carry it."""
+
+    def __init__(self, host, port, addresses, timeout):
+        self._ssl_context = ssl.create_default_context()
+        super().__init__(host, port, timeout=timeout, context=self._ssl_context)
+        self._addresses = addresses
+
+    def connect(self):
+        error = None
+        for address in self._addresses:
+            try:
+                sock = socket.create_connection((address, self.port), self.timeout)
+                break
+            except OSError as e:
+                error = e
+        else:
+            raise error or OSError('no address to connect to')
+        self.sock = self._ssl_context.wrap_socket(sock, server_hostname=self.host)
+
+
+def _post_pinned(callback_url, addresses, body, headers):
+    """POST body to the URL at one of addresses; returns the HTTP status.
+    http.client follows no redirects."""
+    parsed = urlparse(callback_url)
+    path = (parsed.path or '/') + (f'?{parsed.query}' if parsed.query else '')
+    conn = _PinnedHTTPSConnection(parsed.hostname, parsed.port or 443, addresses, timeout=20)
+    try:
+        conn.request('POST', path, body=body, headers=headers)
+        return conn.getresponse().status
+    finally:
+        conn.close()
+
+
+def _post_callback(callback_url, payload, attempts=CALLBACK_ATTEMPTS):
+    """POST a finished async batch to the partner's callback URL, signed with
+    HMAC-SHA256 over the body when IG_CALLBACK_SECRET is set. Retries with
+    backoff; gives up (logged) rather than raising — there's no request left
+    to fail."""
+    body = json.dumps(payload).encode('utf-8')
+    headers = {'Content-Type': 'application/json', 'User-Agent': 'Lot7CostApi/1.0'}
+    secret = os.getenv('IG_CALLBACK_SECRET')
+    if secret:
+        sig = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        headers['X-Lot7-Signature'] = f'sha256={sig}'
+    for attempt in range(attempts):
+        # Resolved and checked every attempt (the host's DNS may have
+        # changed since the job was accepted), and the POST goes to the
+        # addresses this check returned
+        addresses, problem = _public_addresses(callback_url)
+        if problem:
+            print(f"[COST JOB {payload['job_id']}] Callback not sent: {problem}")
+            return False
+        try:
+            status = _post_pinned(callback_url, addresses, body, headers)
+            if 200 <= status < 300:
+                print(f"[COST JOB {payload['job_id']}] Callback delivered ({status}).")
+                return True
+            print(f"[COST JOB {payload['job_id']}] Callback attempt {attempt + 1} failed: HTTP {status}")
+        except Exception as e:
+            print(f"[COST JOB {payload['job_id']}] Callback attempt {attempt + 1} failed: {e}")
+        time.sleep(2 ** attempt)
+    return False
+
+
+def resume(app, estimate):
+    """
+    Pick up async jobs left behind by a dead process: run the unclaimed or
+    stale ones and send callbacks that never went out. Every step is
+    claim-guarded, so all workers can sweep at once.
+    """
+    with app.app_context():
+        now = datetime.utcnow()
+        stale = now - timedelta(minutes=STALE_MINUTES)
+        job_ids = [r.id for r in db.session.query(CostJob.id).filter(db.or_(
+            db.and_(CostJob.status == 'queued', CostJob.createdAt < now - timedelta(seconds=QUEUED_GRACE_SECONDS)),
+            db.and_(CostJob.status == 'pricing', CostJob.updatedAt < stale))).all()]
+        # Finished but the callback never went out (or its sender died).
+        # Claimed by moving callbackStatus to 'sending', so only one worker
+        # sends it.
+        undelivered_filter = db.or_(
+            db.and_(CostJob.callbackStatus == 'pending',
+                    CostJob.updatedAt < now - timedelta(seconds=QUEUED_GRACE_SECONDS)),
+            db.and_(CostJob.callbackStatus == 'sending', CostJob.updatedAt < stale))
+        undelivered = [r.id for r in db.session.query(CostJob.id).filter(
+            CostJob.status.in_(('done', 'error')), undelivered_filter).all()]
+        db.session.commit()
+    if job_ids or undelivered:
+        print(f"[COST JOB] Resuming {len(job_ids)} unfinished job(s), {len(undelivered)} undelivered callback(s)")
+    for job_id in job_ids:
+        run(app, job_id, estimate)
+    with app.app_context():
+        for job_id in undelivered:
+            claimed = (db.session.query(CostJob)
+                       .filter(CostJob.id == job_id, undelivered_filter)
+                       .update({'callbackStatus': 'sending', 'updatedAt': datetime.utcnow()},
+                               synchronize_session=False))
+            db.session.commit()
+            if claimed == 1:
+                deliver(job_id)
+
+
+def start_resumer(app, estimate):
+    """Sweep for abandoned jobs now and every RESUME_INTERVAL_SECONDS, in a
+    daemon thread. Called once per process at app startup."""
+    def loop():
+        while True:
+            try:
+                resume(app, estimate)
+            except Exception as e:
+                print(f"[COST JOB] Resume sweep failed: {e}")
+            time.sleep(RESUME_INTERVAL_SECONDS)
+    threading.Thread(target=loop, daemon=True).start()
+
+
+def to_dict(job):
+    """API shape of a job for the polling endpoint; results once finished."""
+    status = job.status
+    if status == 'pricing' and job.updatedAt < datetime.utcnow() - timedelta(minutes=STALE_MINUTES):
+        status = 'queued'  # its process died; resume() will run it again
+    data = {
+        'job_id': job.id,
+        'report_id': job.reportId,
+        'status': 'processing' if status in ('queued', 'pricing') else status,
+        'item_count': job.itemCount,
+        'created_at': job.createdAt.isoformat() if job.createdAt else None,
+        'completed_at': job.completedAt.isoformat() if job.completedAt else None,
+        'callback_status': job.callbackStatus,
+    }
+    if job.status in ('done', 'error'):
+        data.update(json.loads(job.result))
+    return data
@@ -549,6 +549,15 @@ def format_cost_range(low, high, currency="USD"):
     return f"{symbol}{low:,} - {symbol}{high:,}"
 
 
+def parse_cost_range(cost_str):
+    """Inverse of format_cost_range: '$1,500 - $3,000' -> (1500.0, 3000.0), or None."""
+    try:
+        lo_s, hi_s = cost_str.replace("$", "").replace(",", "").split(" - ")
+        return float(lo_s), float(hi_s)
+    except Exception:
+        return None
+
+
 def get_all_categories():
     """Return list of all category keys — used in AI prompt."""
     return list(COST_TABLE.keys())
@@ -0,0 +1,287 @@
+# =============================================================================
+# LOT7 LOCAL COST MATCHER — fast path in front of price_findings_with_ai
+# BM25 over COST_TABLE's display/note text, scored in NumPy, with
+# section-to-trade compatibility rules and confidence gating. Only findings
+# that land clearly on one table category get priced here; everything
+# ambiguous still goes to the judgment-based pricing pass in utils.py.
+# =============================================================================
+
+import os
+import re
+
+import numpy as np
+
+from cost_lookup import COST_TABLE, get_cost, format_cost_range
+
+# Gating thresholds. A local price is only trusted when ALL three hold —
+# otherwise the item is handed to price_findings_with_ai untouched. These are
+# deliberately conservative: the whole reason the blind category_key lookup
+# was dropped (see generate_realtor_issues_report's Pass 2 note) was
+# coincidental wording overlap, so a false "matched" costs more than an
+# extra AI item does.
+MIN_COVERAGE = 0.6   # share of the category's own display text the finding covers (idf-weighted)
+MIN_MARGIN = 1.35    # best category score / runner-up score
+MIN_SCORE = 4.0      # raw BM25 floor — stops a single generic word from winning
+
+# Kill switch: COST_FAST_PATH=0 sends every item to the AI pass, as before.
+FAST_PATH_ENABLED = os.getenv('COST_FAST_PATH', '1') != '0'
+
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has',
+    'have', 'in', 'is', 'it', 'its', 'not', 'of', 'on', 'or', 'per', 'should',
+    'that', 'the', 'this', 'to', 'was', 'were', 'with', 'recommend',
+    'recommended', 'noted', 'observed', 'evaluate', 'evaluation', 'further',
+    'qualified', 'contractor', 'licensed', 'professional', 'includes',
+}
+
+# Report section -> category-key prefixes a finding in that section may be
+# priced against. Stops a Garage finding pricing off a Roof category just
+# because the wording overlaps. Sections not listed here (or missing) put no
+# restriction on the match — the coverage/margin gates still apply.
+SECTION_PREFIXES = {
+    'roof':       {'ROOF', 'CHIMNEY', 'ATTIC', 'INSUL'},
+    'exterior':   {'EXT', 'SIDING', 'DECK', 'WIN', 'DOOR', 'DRIVEWAY', 'ROOF', 'FOUND', 'CHIMNEY', 'ELEC', 'PLUMB'},
+    'garage':     {'GARAGE', 'DOOR', 'DRIVEWAY', 'FOUND', 'ELEC', 'INT', 'EXT'},
+    'attic':      {'ATTIC', 'INSUL', 'ROOF', 'HVAC', 'MOLD', 'ELEC', 'ASBESTOS'},
+    'interior':   {'INT', 'WIN', 'DOOR', 'ELEC', 'MOLD', 'ASBESTOS', 'WATER', 'APPL', 'INSUL', 'HVAC', 'PLUMB'},
+    'kitchen':    {'APPL', 'PLUMB', 'ELEC', 'INT'},
+    'laundry':    {'LAUNDRY', 'APPL', 'PLUMB', 'ELEC'},
+    'bathroom':   {'BATH', 'PLUMB', 'ELEC', 'MOLD', 'INT', 'HVAC'},
+    'mechanical': {'HVAC', 'PLUMB', 'ELEC', 'RADON', 'APPL', 'CHIMNEY'},
+    'structure':  {'FOUND', 'STRUCT', 'WATER', 'MOLD', 'RADON', 'INSUL'},
+    'foundation': {'FOUND', 'STRUCT', 'WATER'},
+    'basement':   {'FOUND', 'STRUCT', 'WATER', 'MOLD', 'RADON', 'INSUL', 'PLUMB', 'ELEC', 'HVAC'},
+    'electrical': {'ELEC'},
+    'plumbing':   {'PLUMB', 'BATH', 'WATER'},
+    'sewer':      {'PLUMB'},
+    'hvac':       {'HVAC', 'APPL', 'CHIMNEY'},
+    'heating':    {'HVAC', 'CHIMNEY'},
+    'cooling':    {'HVAC'},
+}
+
+# Repair vs. replace wording. BM25 alone can't tell "shingles damaged,
+# recommend repair" from "full roof replacement" — both are mostly about
+# shingles — and pricing a localized fix as the whole-system job is exactly
+# the error price_findings_with_ai's prompt guards against. A finding worded
+# as a repair is never scored against a replace-only category (and the other
+# way round); one that says both ("repair or replace as needed") is only
+# priced locally off a category that also covers both, or neither.
+_REPAIR_RE = re.compile(r'\b(repair\w*|patch\w*|re-?seal\w*|seal(s|ed|ing)?|caulk\w*|re-?secur\w*|secure|'
+                        r'reattach\w*|tighten\w*|adjust\w*|spot|locali[sz]ed|isolated|minor|fix\w*)\b')
+_REPLACE_RE = re.compile(r'\b(replac\w*|full|entire|rebuild\w*|end of (its |their )?(useful |service )?life|'
+                         r'(past|beyond) (its |their )?(useful |service |expected )?(life|lifespan))\b')
+
+# Local prices follow the AI path's range rule: high is capped at 3x low.
+MAX_RANGE_RATIO = 3
+
+
+def _tokenize(text):
+    """Lowercase word tokens with stopwords dropped and plurals folded."""
+    tokens = []
+    for t in re.findall(r'[a-z0-9]+', (text or '').lower()):
+        if t in _STOPWORDS or len(t) < 2:
+            continue
+        if t.endswith('ies') and len(t) > 4:
+            t = t[:-3] + 'y'
+        elif t.endswith('s') and not t.endswith('ss') and len(t) > 3:
+            t = t[:-1]
+        tokens.append(t)
+    return tokens
+
+
+def _category_tokens(key, entry):
+    """Document text for one category. display is repeated so it outweighs
+    the note, which often mentions out-of-scope work ("full replacement
+    $5,000–$15,000") that shouldn't pull matches toward the category."""
+    key_words = ' '.join(key.split('_')[1:])
+    return (_tokenize(entry['display']) * 2 + _tokenize(key_words)
+            + _tokenize(entry.get('note', '')))
+
+
+def scope(text):
+    """'repair', 'replace', 'both' or None — what kind of work the wording asks for."""
+    t = (text or '').lower()
+    repair, replace = bool(_REPAIR_RE.search(t)), bool(_REPLACE_RE.search(t))
+    if repair and replace:
+        return 'both'
+    return 'repair' if repair else 'replace' if replace else None
+
+
+def section_prefixes(section):
+    """Allowed category-key prefixes for a report section, or None for no restriction."""
+    s = (section or '').lower()
+    for name, prefixes in SECTION_PREFIXES.items():
+        if name in s:
+            return prefixes
+    return None
+
+
+class CostMatcher:
+    """In-memory BM25 index over COST_TABLE. Built once per process (~150
+    categories, a few hundred terms) and scored as one matrix product per
+    batch of findings."""
+
+    def __init__(self, table=None, k1=1.2, b=0.75):
+        table = table if table is not None else COST_TABLE
+        self.keys = list(table.keys())
+        self.prefixes = np.array([k.split('_')[0] for k in self.keys])
+        self.scopes = np.array([scope(table[k]['display']) or '' for k in self.keys])
+        docs = [_category_tokens(k, table[k]) for k in self.keys]
+
+        self.vocab = {}
+        for d in docs:
+            for t in d:
+                self.vocab.setdefault(t, len(self.vocab))
+
+        tf = np.zeros((len(docs), len(self.vocab)), dtype=np.float32)
+        for i, d in enumerate(docs):
+            for t in d:
+                tf[i, self.vocab[t]] += 1
+
+        n_docs = len(docs)
+        doc_len = tf.sum(axis=1)
+        df = (tf > 0).sum(axis=0)
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1.0 - b + b * doc_len / doc_len.mean())
+        # Per-(category, term) BM25 contribution — a query's score is just
+        # the sum of these over its terms, i.e. Q @ W.T for a batch.
+        self.weights = (idf * tf * (k1 + 1.0) / (tf + norm[:, None])).astype(np.float32)
+
+        # Score of each category's own display text against itself — the
+        # ceiling a finding can reach on that category, used to turn raw
+        # BM25 into a 0..1 coverage figure.
+        display_q = self._query_matrix([table[k]['display'] + ' ' + ' '.join(k.split('_')[1:]) for k in self.keys])
+        self.self_scores = np.maximum((display_q * self.weights).sum(axis=1), 1e-6)
+
+        self._section_masks = {}
+
+    def _query_matrix(self, texts):
+        q = np.zeros((len(texts), len(self.vocab)), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for t in _tokenize(text):
+                j = self.vocab.get(t)
+                if j is not None:
+                    q[i, j] = 1.0
+        return q
+
+    def _section_mask(self, section):
+        prefixes = section_prefixes(section)
+        if prefixes is None:
+            return None
+        key = frozenset(prefixes)
+        mask = self._section_masks.get(key)
+        if mask is None:
+            mask = np.isin(self.prefixes, list(prefixes))
+            self._section_masks[key] = mask
+        return mask
+
+    def match(self, items):
+        """
+        Best category per item, with its gating stats.
+
+        items: [{"name": str|None, "finding": str, "section": str|None,
+                 "category_hint": str|None}]
+        Returns one entry per item, in order:
+            {"category_key": str|None, "score": float, "coverage": float,
+             "margin": float, "confident": bool}
+        """
+        if not items:
+            return []
+
+        texts = [f"{i.get('name') or ''} {i.get('finding') or ''}" for i in items]
+        scores = self._query_matrix(texts) @ self.weights.T
+
+        finding_scopes = []
+        for row, item in enumerate(items):
+            mask = self._section_mask(item.get('section'))
+            if mask is not None:
+                scores[row, ~mask] = 0.0
+            finding_scope = scope(texts[row])
+            finding_scopes.append(finding_scope)
+            if finding_scope == 'repair':
+                scores[row, self.scopes == 'replace'] = 0.0
+            elif finding_scope == 'replace':
+                scores[row, self.scopes == 'repair'] = 0.0
+
+        order = np.argsort(-scores, axis=1)[:, :2]
+        rows = np.arange(len(items))
+        best = scores[rows, order[:, 0]]
+        runner_up = scores[rows, order[:, 1]] if scores.shape[1] > 1 else np.zeros(len(items))
+        coverage = best / self.self_scores[order[:, 0]]
+        margin = np.where(runner_up > 0, best / np.maximum(runner_up, 1e-6), np.inf)
+        confident = (best >= MIN_SCORE) & (coverage >= MIN_COVERAGE) & (margin >= MIN_MARGIN)
+        # "repair or replace" wording: only a category that is itself
+        # repair-or-replace (or says neither) can be trusted on scope
+        ambiguous = np.array([finding_scopes[row] == 'both'
+                              and self.scopes[order[row, 0]] in ('repair', 'replace')
+                              for row in range(len(items))])
+        confident &= ~ambiguous
+
+        results = []
+        for row in range(len(items)):
+            results.append({
+                'category_key': self.keys[order[row, 0]] if best[row] > 0 else None,
+                'score': float(best[row]),
+                'coverage': float(coverage[row]),
+                'margin': float(margin[row]),
+                'confident': bool(confident[row]),
+            })
+        return results
+
+
+_MATCHER = None
+
+
+def get_matcher():
+    """Process-wide matcher, built on first use."""
+    global _MATCHER
+    if _MATCHER is None:
+        _MATCHER = CostMatcher()
+    return _MATCHER
+
+
+def cost_note(entry, capped=False):
+    """One-sentence cost_note for a table price, in the AI pass's register:
+    what the range covers, and why it is wide when it is (see the WIDE RANGE
+    RULE in price_findings_with_ai)."""
+    note = f"Typical cost for {entry['display'][0].lower()}{entry['display'][1:]}"
+    if entry['note']:
+        note += f" — {entry['note'][0].lower()}{entry['note'][1:].rstrip('.')}"
+    if capped:
+        note += "; larger scope than the documented finding would cost more"
+    elif entry['high'] > entry['low'] * 2:
+        note += "; the range is wide because final cost depends on extent found on site"
+    return note + "."
+
+
+def price_locally(items, currency="USD"):
+    """
+    Split a pricing batch into what the table can price on its own and what
+    still needs judgment.
+
+    items: same shape price_findings_with_ai takes.
+    Returns (priced_by_id, remaining_items) — priced_by_id entries use the
+    same {"cost", "trade", "cost_note", "confidence"} shape the AI pass
+    returns, so callers merge the two without caring which path priced what.
+    """
+    if not items or not FAST_PATH_ENABLED:
+        return {}, list(items or [])
+
+    priced_by_id = {}
+    remaining = []
+    for item, m in zip(items, get_matcher().match(items)):
+        if not m['confident']:
+            remaining.append(item)
+            continue
+        entry = get_cost(m['category_key'], currency)
+        low, high = entry['low'], min(entry['high'], entry['low'] * MAX_RANGE_RATIO)
+        priced_by_id[str(item['id'])] = {
+            "id": str(item['id']),
+            "cost": format_cost_range(low, high, currency),
+            "trade": entry['trade'],
+            "cost_note": cost_note(entry, capped=high < entry['high']),
+            "confidence": "matched",
+            "category_key": m['category_key'],
+            "cost_source": "lookup_table",
+        }
+    return priced_by_id, remaining
@@ -0,0 +1,271 @@
+"""
+Pre-warmed cost estimates for the Inspectagram "Show Cost Estimates" toggle.
+
+IG pushes a published report's items to /v1/cost-estimate/ingest ahead of
+time. They land in CostEstimate as
+'pending' rows and a low-priority background worker prices them one chunk
+at a time — never more than one AI call in flight from this queue, so it
+doesn't compete with live requests. /v1/cost-estimate/batch then answers
+from stored prices and only prices unseen items live (writing those back
+too).
+
+Rows are claimed with a per-batch claimToken (UPDATE ... WHERE status =
+'pending'), so several gunicorn workers can each run a drainer without
+pricing the same row twice. Claims older than STALE_CLAIM_MINUTES (a worker
+died mid-chunk) go back to pending. A chunk whose pricing call fails goes
+back to pending with exponential backoff (nextAttemptAt), so an API outage
+doesn't burn through PREWARM_MAX_ATTEMPTS in seconds; rows that do give up
+('failed') are queued again the next time a partner ingests them. Each web
+process starts its drainer at boot (start_worker, from app.start_workers),
+so rows left pending by a restart don't wait for the next ingest; an ingest
+only nudges it.
+
+Stored prices are trusted for ESTIMATE_TTL_DAYS: older ones are ignored by
+lookup_stored (the item is priced live and written back) and re-queued by
+enqueue, so prices track the cost table and regional rates instead of
+staying frozen at their first estimate.
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from cost_lookup import parse_cost_range
+from models import db, CostEstimate
+
+PREWARM_CHUNK = 25
+PREWARM_PAUSE_SECONDS = 2      # breather between chunks — this queue is low priority
+PREWARM_IDLE_SECONDS = 300     # how often an idle worker re-checks for leftover rows
+PREWARM_MAX_ATTEMPTS = 6
+PREWARM_BACKOFF_SECONDS = 60   # first retry of a failed chunk; doubles each time
+PREWARM_BACKOFF_MAX_SECONDS = 3600
+STALE_CLAIM_MINUTES = 10
+ESTIMATE_TTL_DAYS = 90
+
+_worker_started = False
+_worker_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def finding_hash(finding, section, currency):
+    """Content key for a finding: whitespace/case-normalized text + section + currency."""
+    norm = re.sub(r'\s+', ' ', (finding or '').strip().lower())
+    sec = (section or '').strip().lower()
+    return hashlib.sha256(f"{currency.upper()}|{sec}|{norm}".encode('utf-8')).hexdigest()
+
+
+def _result_for(row, item_id):
+    return {
+        'item_id': item_id,
+        'most_likely': row.mostLikely,
+        'low': row.low,
+        'high': row.high,
+        'currency': row.currency,
+        'trade': row.trade or None,
+        'confidence': row.confidence or 'estimated',
+    }
+
+
+def _expiry_cutoff():
+    return datetime.utcnow() - timedelta(days=ESTIMATE_TTL_DAYS)
+
+
+def lookup_stored(pricing_input, currency):
+    """Stored results for any items priced within ESTIMATE_TTL_DAYS. Returns
+    {item_id: result}."""
+    keyed = [(finding_hash(e['finding'], e.get('section'), currency), e['id']) for e in pricing_input]
+    if not keyed:
+        return {}
+    rows = {r.findingHash: r for r in CostEstimate.query.filter(
+        CostEstimate.findingHash.in_({h for h, _ in keyed}),
+        CostEstimate.status == 'done',
+        CostEstimate.updatedAt >= _expiry_cutoff(),
+    ).all()}
+    return {item_id: _result_for(rows[h], item_id) for h, item_id in keyed if h in rows}
+
+
+def enqueue(pricing_input, currency, source_report_id=None):
+    """Add unseen findings as pending rows, and put expired prices and
+    findings that failed for good back in the queue. Returns how many were
+    queued."""
+    by_hash = {}
+    for e in pricing_input:
+        by_hash.setdefault(finding_hash(e['finding'], e.get('section'), currency), e)
+    if not by_hash:
+        return 0
+
+    existing = {h for (h,) in db.session.query(CostEstimate.findingHash)
+                .filter(CostEstimate.findingHash.in_(list(by_hash.keys()))).all()}
+    added = db.session.execute(
+        update(CostEstimate)
+        .where(CostEstimate.findingHash.in_(list(existing)),
+               or_(CostEstimate.status == 'failed',
+                   and_(CostEstimate.status == 'done', CostEstimate.updatedAt < _expiry_cutoff())))
+        .values(status='pending', attempts=0, nextAttemptAt=datetime.utcnow(), updatedAt=datetime.utcnow())
+    ).rowcount if existing else 0
+    for h, e in by_hash.items():
+        if h in existing:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(CostEstimate(
+                    findingHash=h, finding=e['finding'], section=e.get('section'),
+                    currency=currency, status='pending', sourceReportId=source_report_id,
+                ))
+            added += 1
+        except IntegrityError:
+            pass  # queued concurrently by another request
+    db.session.commit()
+    return added
+
+
+def store_results(pricing_input, results, currency, source_report_id=None):
+    """Write-through for live-priced items so the next toggle is instant."""
+    by_id = {r['item_id']: r for r in results}
+    for e in pricing_input:
+        r = by_id.get(e['id'])
+        if not r:
+            continue
+        h = finding_hash(e['finding'], e.get('section'), currency)
+        values = dict(low=r['low'], high=r['high'], mostLikely=r['most_likely'],
+                      trade=r.get('trade'), confidence=r.get('confidence'), status='done')
+        if db.session.execute(update(CostEstimate).where(CostEstimate.findingHash == h)
+                              .values(updatedAt=datetime.utcnow(), **values)).rowcount:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(CostEstimate(findingHash=h, finding=e['finding'], section=e.get('section'),
+                                            currency=currency, sourceReportId=source_report_id, **values))
+        except IntegrityError:
+            pass
+    db.session.commit()
+
+
+def _release_stale_claims():
+    cutoff = datetime.utcnow() - timedelta(minutes=STALE_CLAIM_MINUTES)
+    db.session.execute(
+        update(CostEstimate)
+        .where(CostEstimate.status == 'pricing', CostEstimate.updatedAt < cutoff)
+        .values(status='pending', claimToken=None)
+    )
+    db.session.commit()
+
+
+def _claim_chunk():
+    ids = [i for (i,) in db.session.query(CostEstimate.id)
+           .filter(CostEstimate.status == 'pending', CostEstimate.nextAttemptAt <= datetime.utcnow())
+           .order_by(CostEstimate.createdAt.asc()).limit(PREWARM_CHUNK).all()]
+    if not ids:
+        return []
+    token = str(uuid.uuid4())
+    db.session.execute(
+        update(CostEstimate)
+        .where(CostEstimate.id.in_(ids), CostEstimate.status == 'pending')
+        .values(status='pricing', claimToken=token, updatedAt=datetime.utcnow())
+    )
+    db.session.commit()
+    return CostEstimate.query.filter_by(claimToken=token).all()
+
+
+def _price_chunk(rows):
+    from utils import price_findings
+
+    by_currency = {}
+    for row in rows:
+        by_currency.setdefault(row.currency, []).append(row)
+
+    for currency, group in by_currency.items():
+        try:
+            priced_by_id = price_findings(
+                [{'id': r.id, 'name': r.finding[:60], 'finding': r.finding,
+                  'section': r.section, 'category_hint': None} for r in group],
+                currency=currency,
+            )
+        except Exception as e:
+            print(f"[PREWARM] Pricing chunk failed: {e}")
+            priced_by_id = {}
+
+        for row in group:
+            p = priced_by_id.get(row.id)
+            parsed = parse_cost_range(p['cost']) if p and p.get('cost') else None
+            row.claimToken = None
+            if parsed:
+                lo, hi = parsed
+                row.low, row.high = int(lo), int(hi)
+                row.mostLikely = int(round((lo + hi) / 2 / 50) * 50)
+                row.trade = p.get('trade') or None
+                row.confidence = p.get('confidence') if p.get('confidence') in ('matched', 'estimated') else 'estimated'
+                row.status = 'done'
+            else:
+                row.attempts += 1
+                row.status = 'failed' if row.attempts >= PREWARM_MAX_ATTEMPTS else 'pending'
+                row.nextAttemptAt = datetime.utcnow() + _backoff(row.attempts)
+    db.session.commit()
+
+
+def _backoff(attempts):
+    delay = min(PREWARM_BACKOFF_SECONDS * 2 ** (attempts - 1), PREWARM_BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _seconds_until_next_retry():
+    due = (db.session.query(func.min(CostEstimate.nextAttemptAt))
+           .filter(CostEstimate.status == 'pending').scalar())
+    if due is None:
+        return PREWARM_IDLE_SECONDS
+    return min(max((due - datetime.utcnow()).total_seconds(), 1), PREWARM_IDLE_SECONDS)
+
+
+def drain_pending():
+    """Price every pending row that is due, one chunk at a time. Needs an
+    app context."""
+    _release_stale_claims()
+    total = 0
+    while True:
+        rows = _claim_chunk()
+        if not rows:
+            break
+        _price_chunk(rows)
+        total += len(rows)
+        time.sleep(PREWARM_PAUSE_SECONDS)
+    if total:
+        print(f"[PREWARM] Priced {total} queued finding(s).")
+    return total
+
+
+def _worker_loop(app):
+    while True:
+        _wake.clear()
+        wait = PREWARM_IDLE_SECONDS
+        try:
+            with app.app_context():
+                drain_pending()
+                wait = _seconds_until_next_retry()
+        except Exception as e:
+            print(f"[PREWARM] Worker error: {e}")
+        _wake.wait(timeout=wait)
+
+
+def start_worker(app):
+    """Start this process's pre-warm worker (once). Called by
+    app.start_workers."""
+    global _worker_started
+    with _worker_lock:
+        if not _worker_started:
+            threading.Thread(target=_worker_loop, args=(app,), daemon=True).start()
+            _worker_started = True
+    _wake.set()
+
+
+def wake_worker():
+    """Nudge this process's pre-warm worker, if it runs one; otherwise a
+    no-op — the queued rows are drained by a web process's worker."""
+    if _worker_started:
+        _wake.set()
@@ -0,0 +1,347 @@
+"""
+Outbound email queue: callers build a message and enqueue() it — one
+INSERT, no SMTP — and a background sender in each web process hands
+queued mail to SMTP over a small pool of authenticated connections.
+A slow or down mail server therefore never stalls or breaks the request
+that sent the email; the message just waits in OutboundEmail.
+
+- Idempotency: every message has an idempotencyKey (unique). Enqueuing the
+  same key again returns the existing row instead of queuing a second copy,
+  so a retried request or double submit sends one email — unless that row
+  failed for good, in which case it is queued again (fresh attempts, the
+  new message), so a retry after an outage isn't silently dropped.
+- Sending: rows are claimed a chunk at a time with a claimToken (UPDATE ...
+  WHERE status = 'pending', like cost_prewarm.py), so every gunicorn worker
+  can run a sender without two of them sending the same row. The chunk is
+  sent by EMAIL_POOL_SIZE threads sharing SMTPPool's connections; a
+  connection is reused until it goes idle for EMAIL_CONN_MAX_IDLE_SECONDS.
+- Retries: a dropped connection is retried once on a fresh one right away.
+  Otherwise a temporary failure (4xx, can't connect) puts the row back to
+  pending with exponential backoff, up to EMAIL_MAX_ATTEMPTS; a permanent
+  one (5xx, recipient refused) marks it failed. A claim older than
+  STALE_CLAIM_MINUTES (process died mid-send) goes back to pending, so
+  delivery is at-least-once.
+- Startup: every web process starts its sender at boot (start_worker, from
+  app.start_workers), so mail queued before a restart — and claims a dead
+  process left behind — is picked up without waiting for new traffic.
+  enqueue() only nudges a sender this process already runs: a one-off
+  script (or a web process with BACKGROUND_WORKERS=0) commits the row and
+  leaves it to the web processes, rather than starting a sender that could
+  claim a row and exit with the script.
+- Metrics: stats() — queue depth by status, oldest waiting message, and
+  enqueue-to-sent latency over a recent window — served at
+  /api/admin/email-queue.
+"""
+
+import hashlib
+import os
+import random
+import smtplib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, OutboundEmail
+
+EMAIL_POOL_SIZE = int(os.getenv('EMAIL_POOL_SIZE', 2))            # SMTP connections / sender threads per process
+EMAIL_CHUNK = 50
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 8))
+EMAIL_BACKOFF_SECONDS = float(os.getenv('EMAIL_BACKOFF_SECONDS', 30))   # first retry; doubles each time
+EMAIL_BACKOFF_MAX_SECONDS = 3600
+EMAIL_CONN_MAX_IDLE_SECONDS = 120   # providers drop idle sessions after a few minutes
+EMAIL_IDLE_SECONDS = 60             # how often an idle sender re-checks for due retries
+EMAIL_RETENTION_DAYS = 30           # sent rows (and their idempotency keys) kept this long
+STALE_CLAIM_MINUTES = 10
+
+_worker_started = False
+_worker_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def content_key(kind, *parts):
+    """Idempotency key from what makes a message the same message."""
+    digest = hashlib.sha256('\x1f'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return f"{kind}:{digest}"
+
+
+def enqueue(msg, kind, idempotency_key):
+    """
+    Queue a built email.message for the background sender and wake it (if
+    this process runs one — see start_worker).
+    Returns the OutboundEmail id — the existing one if idempotency_key has
+    been queued before (re-queued if it had failed). Needs an app context;
+    commits the session.
+    """
+    existing = db.session.query(OutboundEmail.id).filter_by(idempotencyKey=idempotency_key).scalar()
+    if existing:
+        # Only a permanently failed row is re-queued; pending, sending and
+        # sent ones are the same message already on its way
+        requeued = db.session.execute(
+            update(OutboundEmail)
+            .where(OutboundEmail.id == existing, OutboundEmail.status == 'failed')
+            .values(status='pending', attempts=0, claimToken=None, nextAttemptAt=datetime.utcnow(),
+                    kind=kind, sender=msg['From'], recipient=msg['To'], message=msg.as_string(),
+                    updatedAt=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        if requeued:
+            wake_worker()
+        return existing
+    row = OutboundEmail(idempotencyKey=idempotency_key, kind=kind, sender=msg['From'], recipient=msg['To'],
+                        message=msg.as_string())
+    try:
+        with db.session.begin_nested():
+            db.session.add(row)
+        email_id = row.id
+    except IntegrityError:
+        # queued concurrently by another request
+        email_id = db.session.query(OutboundEmail.id).filter_by(idempotencyKey=idempotency_key).scalar()
+    db.session.commit()
+    wake_worker()
+    return email_id
+
+
+class SMTPPool:
+    """Up to `size` authenticated SMTP connections shared by the sender
+    threads. acquire() hands out an idle one (or opens a new one), release()
+    puts it back — or closes it, if it broke."""
+
+    def __init__(self, size, max_idle=EMAIL_CONN_MAX_IDLE_SECONDS):
+        self.max_idle = max_idle
+        self._idle = []  # (connection, last used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        from utils import open_smtp_connection
+
+        self._slots.acquire()
+        with self._lock:
+            while self._idle:
+                conn, used = self._idle.pop()
+                if time.monotonic() - used < self.max_idle:
+                    return conn
+                _close(conn)
+        try:
+            return open_smtp_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        if broken:
+            _close(conn)
+        else:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            _close(conn, quit=True)
+
+
+def _close(conn, quit=False):
+    try:
+        conn.quit() if quit else conn.close()
+    except Exception:
+        pass
+
+
+_pool = SMTPPool(EMAIL_POOL_SIZE)
+
+
+def _send(row):
+    """Hand one claimed row to SMTP. Returns None when sent, else
+    (error, permanent)."""
+    for attempt in (1, 2):
+        try:
+            conn = _pool.acquire()
+        except Exception as e:
+            return e, False  # can't connect / log in right now
+        try:
+            conn.sendmail(row.sender, [row.recipient], row.message.encode('utf-8'))
+        except smtplib.SMTPRecipientsRefused as e:
+            _pool.release(conn)
+            return e, True
+        except smtplib.SMTPResponseException as e:
+            # the server answered; the connection itself is fine
+            _pool.release(conn)
+            return e, e.smtp_code >= 500
+        except Exception as e:
+            _pool.release(conn, broken=True)
+            if attempt == 2 or not isinstance(e, OSError):
+                return e, False
+            continue  # dropped connection — once more on a fresh one
+        _pool.release(conn)
+        return None
+
+
+def _backoff(attempts):
+    delay = min(EMAIL_BACKOFF_SECONDS * 2 ** (attempts - 1), EMAIL_BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _release_stale_claims():
+    cutoff = datetime.utcnow() - timedelta(minutes=STALE_CLAIM_MINUTES)
+    db.session.execute(
+        update(OutboundEmail)
+        .where(OutboundEmail.status == 'sending', OutboundEmail.updatedAt < cutoff)
+        .values(status='pending', claimToken=None)
+    )
+    db.session.commit()
+
+
+def _claim_chunk():
+    now = datetime.utcnow()
+    ids = [i for (i,) in db.session.query(OutboundEmail.id)
+           .filter(OutboundEmail.status == 'pending', OutboundEmail.nextAttemptAt <= now)
+           .order_by(OutboundEmail.nextAttemptAt).limit(EMAIL_CHUNK).all()]
+    if not ids:
+        return []
+    token = str(uuid.uuid4())
+    db.session.execute(
+        update(OutboundEmail)
+        .where(OutboundEmail.id.in_(ids), OutboundEmail.status == 'pending')
+        .values(status='sending', claimToken=token, updatedAt=now)
+    )
+    db.session.commit()
+    return db.session.execute(
+        select(OutboundEmail.id, OutboundEmail.sender, OutboundEmail.recipient, OutboundEmail.message,
+               OutboundEmail.attempts)
+        .where(OutboundEmail.id.in_(ids), OutboundEmail.claimToken == token)).all()
+
+
+def _record(rows, results):
+    now = datetime.utcnow()
+    sent = [row.id for row, result in zip(rows, results) if result is None]
+    if sent:
+        db.session.execute(
+            update(OutboundEmail).where(OutboundEmail.id.in_(sent))
+            .values(status='sent', sentAt=now, claimToken=None, lastError=None, attempts=OutboundEmail.attempts + 1)
+        )
+    for row, result in zip(rows, results):
+        if result is None:
+            continue
+        error, permanent = result
+        attempts = row.attempts + 1
+        give_up = permanent or attempts >= EMAIL_MAX_ATTEMPTS
+        print(f"[EMAIL] {'Gave up on' if give_up else 'Will retry'} {row.recipient} "
+              f"(attempt {attempts}): {error}")
+        db.session.execute(
+            update(OutboundEmail).where(OutboundEmail.id == row.id)
+            .values(status='failed' if give_up else 'pending', attempts=attempts, claimToken=None,
+                    lastError=str(error)[:500], nextAttemptAt=now + _backoff(attempts))
+        )
+    db.session.commit()
+    return len(sent)
+
+
+def drain_due(executor=None):
+    """Send everything that's due, a chunk at a time. Needs an app context.
+    Returns how many were sent."""
+    _release_stale_claims()
+    total = 0
+    own = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=EMAIL_POOL_SIZE)
+    try:
+        while True:
+            rows = _claim_chunk()
+            if not rows:
+                break
+            total += _record(rows, list(executor.map(_send, rows)))
+    finally:
+        if own:
+            executor.shutdown()
+    if total:
+        print(f"[EMAIL] Sent {total} queued email(s).")
+    return total
+
+
+def _prune_sent():
+    cutoff = datetime.utcnow() - timedelta(days=EMAIL_RETENTION_DAYS)
+    OutboundEmail.query.filter(OutboundEmail.sentAt < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def _seconds_until_next_retry():
+    due = (db.session.query(func.min(OutboundEmail.nextAttemptAt))
+           .filter(OutboundEmail.status == 'pending').scalar())
+    if due is None:
+        return EMAIL_IDLE_SECONDS
+    return min(max((due - datetime.utcnow()).total_seconds(), 0.05), EMAIL_IDLE_SECONDS)
+
+
+def _worker_loop(app):
+    executor = ThreadPoolExecutor(max_workers=EMAIL_POOL_SIZE)
+    last_prune = 0
+    while True:
+        _wake.clear()
+        wait = EMAIL_IDLE_SECONDS
+        try:
+            with app.app_context():
+                drain_due(executor)
+                if time.monotonic() - last_prune > 3600:
+                    _prune_sent()
+                    last_prune = time.monotonic()
+                wait = _seconds_until_next_retry()
+        except Exception as e:
+            print(f"[EMAIL] Worker error: {e}")
+        if not _wake.wait(timeout=wait) and wait >= EMAIL_IDLE_SECONDS:
+            # a whole idle period with nothing to send — don't hold SMTP sessions open
+            _pool.close_idle()
+
+
+def start_worker(app):
+    """Start this process's sender (once). Called by app.start_workers."""
+    global _worker_started
+    with _worker_lock:
+        if not _worker_started:
+            threading.Thread(target=_worker_loop, args=(app,), daemon=True).start()
+            _worker_started = True
+    _wake.set()
+
+
+def wake_worker():
+    """Nudge this process's sender, if it runs one; otherwise a no-op — the
+    committed row is picked up by a web process's sender."""
+    if _worker_started:
+        _wake.set()
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def stats(window_minutes=60):
+    """Queue depth and send latency. Needs an app context."""
+    now = datetime.utcnow()
+    by_status = dict(db.session.query(OutboundEmail.status, func.count(OutboundEmail.id))
+                     .group_by(OutboundEmail.status).all())
+    oldest = (db.session.query(func.min(OutboundEmail.createdAt))
+              .filter(OutboundEmail.status.in_(('pending', 'sending'))).scalar())
+    due_now = (db.session.query(func.count(OutboundEmail.id))
+               .filter(OutboundEmail.status == 'pending', OutboundEmail.nextAttemptAt <= now).scalar())
+    latencies = sorted((sent - created).total_seconds() for sent, created in
+                       db.session.query(OutboundEmail.sentAt, OutboundEmail.createdAt)
+                       .filter(OutboundEmail.sentAt >= now - timedelta(minutes=window_minutes)).all())
+    return {
+        'depth': by_status.get('pending', 0) + by_status.get('sending', 0),
+        'by_status': {s: by_status.get(s, 0) for s in ('pending', 'sending', 'sent', 'failed')},
+        'due_now': due_now,
+        'oldest_waiting_seconds': round((now - oldest).total_seconds(), 1) if oldest else None,
+        'window_minutes': window_minutes,
+        'sent_in_window': len(latencies),
+        'latency_seconds': {
+            'p50': round(_percentile(latencies, 0.5), 2),
+            'p95': round(_percentile(latencies, 0.95), 2),
+            'max': round(latencies[-1], 2),
+        } if latencies else None,
+    }
@@ -0,0 +1,196 @@
+"""
+Background bulk exports for /api/export/reports.
+
+An export can run to thousands of reports and, for PDFs that aren't cached
+yet, minutes of rendering — far past gunicorn's worker timeout, which would
+kill a request streaming it mid-zip and leave the client a truncated file.
+So the request only records an ExportJob row and returns its id; a
+background thread claims the row, writes bulk_export.stream_export_zip to a
+file under EXPORT_DIR, and marks it done. The user polls
+GET /api/export/jobs/<id> and downloads the finished zip from
+GET /api/export/jobs/<id>/download.
+
+Like cost_jobs.py, the job lives in the DB:
+
+- claims are a conditional UPDATE on status (+ claimToken), so a job is
+  only ever built by one thread;
+- the building thread touches updatedAt every HEARTBEAT_SECONDS, so a job
+  whose process died (deploy, crash) is told apart from a merely long one
+  and picked up again by the resume sweep (start_resumer) after
+  STALE_MINUTES;
+- finished zips are deleted EXPORT_KEEP_HOURS after they were built, and
+  the job marked 'expired'.
+
+The zip is written to a temp name and os.replace()d into place, so a
+download never sees a half-written file. EXPORT_DIR must be shared by the
+processes serving downloads (one host's gunicorn workers — the same
+assumption pdf_cache.py makes).
+"""
+
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from bulk_export import stream_export_zip
+from models import db, ExportJob
+
+EXPORT_DIR = os.getenv('EXPORT_DIR', 'exports')
+EXPORT_KEEP_HOURS = int(os.getenv('EXPORT_KEEP_HOURS', '24'))
+HEARTBEAT_SECONDS = 60
+# A 'building' job not touched for this long died with its process
+STALE_MINUTES = 10
+# A queued job its own thread hasn't claimed after this long is resumed
+QUEUED_GRACE_SECONDS = 60
+RESUME_INTERVAL_SECONDS = 300
+
+
+def create(requested_by, start, end, user_id, include_pdfs):
+    job = ExportJob(requestedBy=requested_by, startDay=start, endDay=end, userId=user_id,
+                    includePdfs=include_pdfs)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def start(app, job_id):
+    """Build the export in a background thread."""
+    threading.Thread(target=run, args=(app, job_id), daemon=True).start()
+
+
+def _claim(job_id):
+    token = str(uuid.uuid4())
+    now = datetime.utcnow()
+    claimed = (db.session.query(ExportJob)
+               .filter(ExportJob.id == job_id,
+                       db.or_(ExportJob.status == 'queued',
+                              db.and_(ExportJob.status == 'building',
+                                      ExportJob.updatedAt < now - timedelta(minutes=STALE_MINUTES))))
+               .update({'status': 'building', 'claimToken': token, 'updatedAt': now},
+                       synchronize_session=False))
+    db.session.commit()
+    return token if claimed == 1 else None
+
+
+def _update_claimed(job_id, token, values):
+    """Update the job if this run still holds its claim; whether it did."""
+    updated = (db.session.query(ExportJob)
+               .filter(ExportJob.id == job_id, ExportJob.claimToken == token)
+               .update({**values, 'updatedAt': datetime.utcnow()}, synchronize_session=False))
+    db.session.commit()
+    return updated == 1
+
+
+class _ClaimLost(Exception):
+    pass
+
+
+def run(app, job_id):
+    with app.app_context():
+        token = _claim(job_id)
+        if not token:
+            return
+        job = db.session.get(ExportJob, job_id)
+        selection = (job.startDay, job.endDay, job.userId)
+        include_pdfs = job.includePdfs
+
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        path = os.path.join(EXPORT_DIR, f"{job_id}.zip")
+        fd, tmp_path = tempfile.mkstemp(dir=EXPORT_DIR, suffix='.tmp')
+        try:
+            last_beat = time.monotonic()
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in stream_export_zip(*selection, include_pdfs=include_pdfs):
+                    out.write(chunk)
+                    if time.monotonic() - last_beat >= HEARTBEAT_SECONDS:
+                        if not _update_claimed(job_id, token, {}):
+                            raise _ClaimLost()
+                        last_beat = time.monotonic()
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except _ClaimLost:
+            os.remove(tmp_path)
+            print(f"[EXPORT {job_id}] Claim lost (job resumed elsewhere) — dropping this build")
+            return
+        except Exception as e:
+            db.session.rollback()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"[EXPORT {job_id}] Failed: {e}")
+            _update_claimed(job_id, token, {'status': 'error', 'error': str(e)[:500],
+                                            'completedAt': datetime.utcnow()})
+            return
+
+        if _update_claimed(job_id, token, {'status': 'done', 'path': path, 'sizeBytes': size,
+                                           'completedAt': datetime.utcnow()}):
+            print(f"[EXPORT {job_id}] Done: {size / 1024 / 1024:.1f} MB")
+        else:
+            # Another run took the job over; its file is the one kept
+            print(f"[EXPORT {job_id}] Claim lost (job resumed elsewhere) — dropping this build")
+
+
+def resume(app):
+    """
+    Build exports left behind by a dead process, and delete finished zips
+    older than EXPORT_KEEP_HOURS. Claim-guarded, so all workers can sweep
+    at once.
+    """
+    with app.app_context():
+        now = datetime.utcnow()
+        job_ids = [r.id for r in db.session.query(ExportJob.id).filter(db.or_(
+            db.and_(ExportJob.status == 'queued',
+                    ExportJob.createdAt < now - timedelta(seconds=QUEUED_GRACE_SECONDS)),
+            db.and_(ExportJob.status == 'building',
+                    ExportJob.updatedAt < now - timedelta(minutes=STALE_MINUTES)))).all()]
+
+        expired = (db.session.query(ExportJob.id, ExportJob.path)
+                   .filter(ExportJob.status == 'done',
+                           ExportJob.completedAt < now - timedelta(hours=EXPORT_KEEP_HOURS)).all())
+        for job_id, path in expired:
+            claimed = (db.session.query(ExportJob)
+                       .filter(ExportJob.id == job_id, ExportJob.status == 'done')
+                       .update({'status': 'expired', 'path': None, 'updatedAt': now},
+                               synchronize_session=False))
+            db.session.commit()
+            if claimed == 1 and path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        db.session.commit()
+    if job_ids or expired:
+        print(f"[EXPORT] Resuming {len(job_ids)} unfinished export(s), expired {len(expired)}")
+    for job_id in job_ids:
+        run(app, job_id)
+
+
+def start_resumer(app):
+    """Sweep for abandoned and expired exports now and every
+    RESUME_INTERVAL_SECONDS, in a daemon thread. Called once per process
+    at startup (app.start_workers)."""
+    def loop():
+        while True:
+            try:
+                resume(app)
+            except Exception as e:
+                print(f"[EXPORT] Resume sweep failed: {e}")
+            time.sleep(RESUME_INTERVAL_SECONDS)
+    threading.Thread(target=loop, daemon=True).start()
+
+
+def to_dict(job):
+    """API shape of a job for the polling endpoint."""
+    status = job.status
+    if status == 'building' and job.updatedAt < datetime.utcnow() - timedelta(minutes=STALE_MINUTES):
+        status = 'queued'  # its process died; resume() will build it again
+    return {
+        'job_id': job.id,
+        'status': 'processing' if status in ('queued', 'building') else status,
+        'size_bytes': job.sizeBytes,
+        'error': job.error,
+        'created_at': job.createdAt.isoformat() if job.createdAt else None,
+        'completed_at': job.completedAt.isoformat() if job.completedAt else None,
+        'download_url': f'/api/export/jobs/{job.id}/download' if status == 'done' else None,
+    }
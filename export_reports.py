@@ -0,0 +1,44 @@
+"""
+Bulk-export reports to a zip file: analyses.ndjson + cached PDFs, same
+format as the /api/export/reports background jobs (see bulk_export.py).
+
+Usage:
+    python export_reports.py --start=2026-01-01 --end=2026-03-31 [--out=export.zip]
+    python export_reports.py --user=<user_id> [--out=export.zip]
+    python export_reports.py --start=2026-01-01 --no-pdfs
+"""
+
+import sys
+from datetime import timedelta
+
+
+def _opt(name, default=None):
+    return next((a.split('=', 1)[1] for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+def main():
+    start_arg, end_arg, user_id = _opt('start'), _opt('end'), _opt('user')
+    if not (start_arg or end_arg or user_id):
+        print(__doc__)
+        return
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from app import app
+    from bulk_export import stream_export_zip, parse_day
+
+    start, end = parse_day(start_arg), parse_day(end_arg)
+    if end:
+        end += timedelta(days=1)
+    out_path = _opt('out', 'lot7-export.zip')
+
+    written = 0
+    with app.app_context(), open(out_path, 'wb') as out:
+        for chunk in stream_export_zip(start, end, user_id, include_pdfs='--no-pdfs' not in sys.argv):
+            out.write(chunk)
+            written += len(chunk)
+    print(f"Wrote {out_path} ({written / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""
+Shared extraction between the realtor and buyer pipelines.
+
+Both pipelines start with a model pass that reads the inspector's flagged
+issues out of the report's Summary section: the realtor's issues-only
+Pass 1 (generate_realtor_issues_report) and the buyer's full Pass 1
+(generate_structured_analysis), which also reads out the non-flagged
+observations, the checklist and the location. When a realtor analyzes a
+listing and the buyer later uploads the same report link — or the other
+way round — the second pipeline used to read everything again. Now
+each pass's output goes into ExtractedFindings in one neutral form and the
+other pipeline starts from it:
+
+- realtor after buyer: the stored issues stand in for realtor Pass 1, so
+  only pricing runs. The buyer pass has no deep-link anchors; each issue's
+  anchor is found locally by locating its finding text in the realtor's
+  anchored text (locate_anchors). category_key is left empty — pricing
+  treats it as an optional hint.
+- buyer after realtor: off by default — buyer Pass 1 runs in full and
+  stores its own read of the issues. The realtor pass reads issues for a
+  one-line list, not with the buyer pass's care, and until a comparison
+  shows the narrowed buyer report is as good, it shouldn't inherit them.
+  BUYER_REUSE_REALTOR_ISSUES=1 turns on the narrowed Pass 1 (known_issues:
+  the model no longer writes out the flagged issues; Pass 2 as before).
+- buyer after buyer (the same link or PDF uploaded again): Pass 1 is
+  skipped and only Pass 2 runs — only when the stored issues were read
+  by a buyer pass too.
+
+Sources are keyed by the normalized report URL ('url:…'), or for PDF
+uploads by the hash of their extracted text ('text:…'), so a PDF upload and
+a link to the same report don't share a row. The fingerprint — a hash of
+the Summary-section text with anchors and whitespace removed, the same for
+both pipelines' fetches of one page — detects an edited report, whose
+stored findings are then replaced rather than reused.
+"""
+
+import hashlib
+import json
+import os
+import re
+from urllib.parse import urldefrag
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, ExtractedFindings
+
+_ANCHOR_RE = re.compile(r'\[ANCHOR:([^\]]*)\]')
+_SPACE_RE = re.compile(r'\s+')
+# Characters of a finding's text looked up in the report to place its anchor
+_LOCATE_CHARS = 60
+# Let buyer Pass 1 start from issues the realtor pass read (see above)
+BUYER_REUSE_REALTOR_ISSUES = os.getenv('BUYER_REUSE_REALTOR_ISSUES', '0') == '1'
+
+
+def normalize_url(url):
+    """The report URL without whitespace or #fragment (deep-link anchors
+    point into the same report)."""
+    return urldefrag((url or '').strip())[0]
+
+
+def url_hash(url):
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+
+def url_key(url):
+    return f'url:{url_hash(url)}'
+
+
+def text_key(text):
+    return f'text:{hashlib.sha256(text.encode("utf-8")).hexdigest()}'
+
+
+def fingerprint(summary_text):
+    """Hash of Summary-section text (report_text_from_html with
+    summary_only=True), ignoring [ANCHOR:…] markers and whitespace."""
+    flat = _SPACE_RE.sub(' ', _ANCHOR_RE.sub(' ', summary_text)).strip()
+    return hashlib.sha256(flat.encode('utf-8')).hexdigest()
+
+
+def lookup(app, source_key, source_fingerprint):
+    """(issues, extras, issues_from, address, currency) stored for this source
+    with a matching fingerprint, or None. issues / extras are None when that
+    part hasn't been extracted."""
+    with app.app_context():
+        row = ExtractedFindings.query.filter_by(sourceKey=source_key).first()
+        if not row or row.fingerprint != source_fingerprint:
+            return None
+        return (json.loads(row.issues) if row.issues else None,
+                json.loads(row.extras) if row.extras else None,
+                row.issuesFrom, row.address, row.currency)
+
+
+def record(app, source_key, source_fingerprint, issues=None, issues_from=None, extras=None,
+           address=None, currency=None):
+    """Store what a pass extracted. Parts already stored for the same
+    fingerprint are kept (first extraction wins) — except that a buyer
+    pass's issues replace a realtor pass's, being the fuller read; a new
+    fingerprint replaces the row's contents."""
+    values = {'issues': json.dumps(issues) if issues is not None else None,
+              'issuesFrom': issues_from if issues is not None else None,
+              'extras': json.dumps(extras) if extras is not None else None,
+              'address': (address or '')[:255] or None, 'currency': (currency or '')[:3] or None}
+    with app.app_context():
+        row = ExtractedFindings.query.filter_by(sourceKey=source_key).first()
+        if row is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(ExtractedFindings(sourceKey=source_key, fingerprint=source_fingerprint,
+                                                     **values))
+                db.session.commit()
+                return
+            except IntegrityError:
+                # recorded concurrently by the other pipeline — merge into it
+                row = ExtractedFindings.query.filter_by(sourceKey=source_key).first()
+        if row.fingerprint != source_fingerprint:
+            row.fingerprint = source_fingerprint
+            for name, value in values.items():
+                setattr(row, name, value)
+        else:
+            if values['issues'] is not None and (
+                    row.issues is None or (issues_from == 'buyer' and row.issuesFrom != 'buyer')):
+                row.issues, row.issuesFrom = values['issues'], values['issuesFrom']
+            for name in ('extras', 'address', 'currency'):
+                if values[name] is not None and getattr(row, name) is None:
+                    setattr(row, name, values[name])
+        db.session.commit()
+
+
+# --- realtor pipeline --------------------------------------------------------
+
+def issues_from_realtor(pass1):
+    return ([_issue('urgent', i) for i in pass1.get('urgent_items') or []]
+            + [_issue('attention', i) for i in pass1.get('attention_items') or []])
+
+
+def _issue(tier, item):
+    return {'tier': tier, 'name': item.get('name'), 'finding': item.get('finding'),
+            'section': item.get('section'), 'severity_label': item.get('inspector_severity_label'),
+            'category_key': item.get('category_key'), 'anchor': item.get('anchor')}
+
+
+def locate_anchors(report_text, issues):
+    """Fill in missing anchors: the nearest [ANCHOR:…] before the start of
+    each issue's finding text in the realtor's anchored report text. Issues
+    whose text can't be found verbatim keep anchor None (no deep link)."""
+    flat = _SPACE_RE.sub(' ', report_text)
+    for issue in issues:
+        if issue.get('anchor'):
+            continue
+        needle = _SPACE_RE.sub(' ', issue.get('finding') or '').strip()[:_LOCATE_CHARS]
+        pos = flat.find(needle) if len(needle) >= 15 else -1
+        anchors = list(_ANCHOR_RE.finditer(flat, 0, pos)) if pos != -1 else []
+        issue['anchor'] = anchors[-1].group(1).strip() if anchors else None
+    return issues
+
+
+def realtor_pass1(issues, address, currency):
+    """The stored issues as generate_realtor_issues_report's Pass 1 result."""
+    def item(i):
+        return {'name': i['name'], 'finding': i['finding'], 'section': i['section'],
+                'category_key': i.get('category_key'), 'anchor': i.get('anchor')}
+    return {'currency': currency or 'USD', 'address': address or 'Address not found',
+            'urgent_items': [item(i) for i in issues if i['tier'] == 'urgent'],
+            'attention_items': [item(i) for i in issues if i['tier'] == 'attention']}
+
+
+def realtor_analysis(app, report_text, report_url, pricing_memo=None, reuse=True):
+    """generate_realtor_issues_report for text fetched with
+    include_anchors=True, summary_only=True, starting from stored issues when
+    there are any (and reuse is on) and storing its own Pass 1 otherwise.
+    Returns the parsed result."""
+    from utils import generate_realtor_issues_report
+
+    key, fp = url_key(report_url), fingerprint(report_text)
+    stored = lookup(app, key, fp) if reuse else None
+    issues = None
+    if stored and stored[0] is not None:
+        stored_issues, _, issues_from, address, currency = stored
+        issues = realtor_pass1(locate_anchors(report_text, stored_issues), address, currency)
+        print(f"[FINDINGS] Reusing {len(stored_issues)} issue(s) from the {issues_from} pass — "
+              f"skipping realtor Pass 1")
+
+    def store(pass1):
+        record(app, key, fp, issues=issues_from_realtor(pass1), issues_from='realtor',
+               address=pass1.get('address'), currency=pass1.get('currency'))
+
+    return json.loads(generate_realtor_issues_report(report_text, report_url=report_url, pricing_memo=pricing_memo,
+                                                     issues=issues, on_pass1=store))
+
+
+# --- buyer pipeline ----------------------------------------------------------
+
+_EXTRA_FIELDS = ('severity_system_found', 'severity_system_description', 'location', 'condition_label',
+                 'category_items', 'checklist')
+
+
+def _buyer_item(issue):
+    return {'name': issue['name'], 'finding': issue['finding'], 'section': issue['section'],
+            'inspector_severity_label': issue.get('severity_label')
+            or ('Immediate Attention' if issue['tier'] == 'urgent' else 'Attention')}
+
+
+def buyer_known_issues(issues):
+    """Stored issues in buyer Pass 1's shape."""
+    return {'urgent_items': [_buyer_item(i) for i in issues if i['tier'] == 'urgent'],
+            'maintenance_items': [_buyer_item(i) for i in issues if i['tier'] == 'attention']}
+
+
+def structured_analysis(app, extracted_text, source_key, source_fingerprint):
+    """generate_structured_analysis, skipping or narrowing Pass 1 with what's
+    stored for this source and storing what Pass 1 reads. Returns the
+    analysis JSON string."""
+    from utils import generate_structured_analysis
+
+    stored = lookup(app, source_key, source_fingerprint)
+    issues, extras = (stored[0], stored[1]) if stored else (None, None)
+    if issues is not None and stored[2] != 'buyer' and not BUYER_REUSE_REALTOR_ISSUES:
+        print(f"[FINDINGS] Stored issues are from the {stored[2]} pass — running buyer Pass 1 in full")
+        issues = None
+    pass1 = known = None
+    if issues is not None and extras is not None:
+        pass1 = dict(extras, address=stored[3], currency=stored[4], **buyer_known_issues(issues))
+        print("[FINDINGS] Full extraction already stored — skipping Pass 1")
+    elif issues is not None:
+        known = buyer_known_issues(issues)
+        print(f"[FINDINGS] Reusing {len(issues)} flagged issue(s) from the {stored[2]} pass — narrowed Pass 1")
+
+    def store(findings):
+        record(app, source_key, source_fingerprint,
+               issues=None if known else (
+                   [_issue('urgent', i) for i in findings.get('urgent_items') or []]
+                   + [_issue('attention', i) for i in findings.get('maintenance_items') or []]),
+               issues_from=None if known else 'buyer',
+               extras={f: findings.get(f) for f in _EXTRA_FIELDS},
+               address=findings.get('address'), currency=findings.get('currency'))
+
+    return generate_structured_analysis(extracted_text, pass1_findings=pass1, known_issues=known, on_pass1=store)
@@ -1,5 +1,4 @@
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
@@ -14,6 +13,8 @@ import base64
 import qrcode
 from io import BytesIO
 
+from pdf_layout import STYLES, TEAL, RED, EMERALD, AMBER
+
 LOCATION_DATA = {
     'kitchen': {'display_name': 'Kitchen', 'baseline_mold_risk': 70, 'baseline_claim_approval': 85, 'likely_causes': ['Plumbing leak under sink', 'Faucet leak', 'Dishwasher malfunction'], 'contractors': ['Plumber', 'Water damage restoration specialist'], 'insurance_note': 'Kitchen water damage typically COVERED'},
     'bathroom': {'display_name': 'Bathroom', 'baseline_mold_risk': 75, 'baseline_claim_approval': 82, 'likely_causes': ['Plumbing leak', 'Toilet overflow', 'Shower/tub leak'], 'contractors': ['Plumber', 'Water damage restoration specialist'], 'insurance_note': 'Bathroom water damage typically COVERED'},
@@ -106,27 +107,34 @@ def generate_complete_report(photo_path, output_path, location='kitchen', water_
             'structural_risk': 'low'
         }
     
+    render_damage_report(output_path, analysis, loc_data, water_source, report_id, photo_path)
+    return output_path, analysis
+
+
+def render_damage_report(output_path, analysis, loc_data, water_source='', report_id='', photo_path=None):
+    """Lay out the two-page damage assessment for an analysis dict. Split out
+    of generate_complete_report so rendering can run (and be benchmarked)
+    without the AI call. Styles and colors are the prebuilt ones from
+    pdf_layout.py."""
     doc = SimpleDocTemplate(output_path, pagesize=letter, rightMargin=0.35*inch, leftMargin=0.35*inch, topMargin=0.35*inch, bottomMargin=0.35*inch)
     elements = []
-    styles = getSampleStyleSheet()
-    
-    primary = colors.HexColor('#14b8a6')
-    red = colors.HexColor('#ef4444')
-    green = colors.HexColor('#10b981')
-    yellow = colors.HexColor('#f59e0b')
-    
-    header_style = ParagraphStyle('Header', parent=styles['Normal'], fontSize=9, textColor=colors.black, spaceAfter=1, leading=10)
-    compact = ParagraphStyle('Compact', parent=styles['Normal'], fontSize=7, spaceAfter=1.5, leading=8.5, textColor=colors.black)
-    tiny = ParagraphStyle('Tiny', parent=styles['Normal'], fontSize=6.5, spaceAfter=1, leading=7.5, textColor=colors.HexColor('#666666'))
-    section_red = ParagraphStyle('SectionRed', parent=styles['Normal'], fontSize=8.5, textColor=red, spaceBefore=3, spaceAfter=2, fontName='Helvetica-Bold')
-    section_teal = ParagraphStyle('SectionTeal', parent=styles['Normal'], fontSize=8.5, textColor=primary, spaceBefore=3, spaceAfter=2, fontName='Helvetica-Bold')
-    
+
+    red = RED
+    green = EMERALD
+    yellow = AMBER
+
+    header_style = STYLES['header']
+    compact = STYLES['compact']
+    tiny = STYLES['tiny']
+    section_red = STYLES['section_red']
+    section_teal = STYLES['section_teal']
+
     # PAGE 1: VISUAL IMPACT
     elements.append(Paragraph(f"<b>DAMAGE ASSESSMENT | {report_id}</b>", header_style))
     elements.append(Paragraph(f"{datetime.now().strftime('%B %d, %Y')} | {loc_data['display_name']}", compact))
     elements.append(Spacer(1, 0.06*inch))
     
-    photo_img = Image(photo_path, width=2.8*inch, height=2.1*inch) if os.path.exists(photo_path) else None
+    photo_img = Image(photo_path, width=2.8*inch, height=2.1*inch) if photo_path and os.path.exists(photo_path) else None
     
     gauges_drawing = Drawing(3.5*inch, 2.3*inch)
     mold_color = red if analysis['mold_risk_percentage'] > 75 else yellow if analysis['mold_risk_percentage'] > 50 else green
@@ -190,7 +198,7 @@ def generate_complete_report(photo_path, output_path, location='kitchen', water_
     elements.append(Paragraph(timeline_detail, tiny))
     elements.append(Spacer(1, 0.05*inch))
     
-    elements.append(Paragraph("<b color='#f59e0b'>COST IMPACT OF DELAY</b>", ParagraphStyle('SectionYellow', parent=styles['Normal'], fontSize=8.5, textColor=yellow, spaceBefore=3, spaceAfter=2, fontName='Helvetica-Bold')))
+    elements.append(Paragraph("<b color='#f59e0b'>COST IMPACT OF DELAY</b>", STYLES['section_yellow']))
     
     cost_drawing = Drawing(6.6*inch, 1.2*inch)
     costs = [2500, 4000, 6500, 15000]
@@ -215,7 +223,7 @@ def generate_complete_report(photo_path, output_path, location='kitchen', water_
     
     # PAGE 2: ACTION & DETAILS
     
-    elements.append(Paragraph("<b color='#10b981'>✓ DO THIS NOW</b>", ParagraphStyle('DoStyle', parent=styles['Normal'], fontSize=8.5, textColor=green, spaceBefore=3, spaceAfter=2, fontName='Helvetica-Bold')))
+    elements.append(Paragraph("<b color='#10b981'>✓ DO THIS NOW</b>", STYLES['section_green']))
     do_text = """✓ Turn off electricity | ✓ Open windows/doors | ✓ Run fans<br/>
     ✓ Take photos/video | ✓ Call insurance TODAY"""
     elements.append(Paragraph(do_text, compact))
@@ -243,7 +251,7 @@ def generate_complete_report(photo_path, output_path, location='kitchen', water_
     elements.append(Paragraph(insurance_text, compact))
     elements.append(Spacer(1, 0.06*inch))
     
-    elements.append(Paragraph("<b color='#f59e0b'>ACTION PLAN (24-72 Hours)</b>", ParagraphStyle('ActionStyle', parent=styles['Normal'], fontSize=8.5, textColor=yellow, spaceBefore=3, spaceAfter=2, fontName='Helvetica-Bold')))
+    elements.append(Paragraph("<b color='#f59e0b'>ACTION PLAN (24-72 Hours)</b>", STYLES['section_yellow']))
     action_text = f"""<b>NOW:</b> {analysis['recommended_immediate_action']}<br/>
     <b>TODAY (6h):</b> Call insurance. File claim.<br/>
     <b>TODAY (12h):</b> Contact water damage company.<br/>
@@ -270,7 +278,7 @@ def generate_complete_report(photo_path, output_path, location='kitchen', water_
     elements.append(Paragraph(footer, compact))
     
     doc.build(elements)
-    return output_path, analysis
+    return output_path
 
 if __name__ == '__main__':
     photo_path = '/mnt/user-data/uploads/1769656987829_image.png'
@@ -0,0 +1,12 @@
+"""
+gunicorn settings for the web process (Procfile: gunicorn -c gunicorn.conf.py
+app:app).
+"""
+
+
+def post_worker_init(worker):
+    """Start the background workers (app.start_workers) in each worker once
+    it has loaded the app — after the fork, so the threads run in the
+    process that serves requests."""
+    from app import app, start_workers
+    start_workers(app)
@@ -0,0 +1,82 @@
+"""
+Issue and manage partner API keys for the /v1 cost-estimate API.
+
+Keys are stored hashed (see partner_api.py) — the raw key is printed ONCE by
+`create` and can't be shown again. Lost keys get revoked and re-issued.
+
+Usage:
+    python manage_api_keys.py create "Inspectagram" [--rpm=30] [--ipm=3000]
+    python manage_api_keys.py list
+    python manage_api_keys.py limits <partner_id> [--rpm=N] [--ipm=N]
+    python manage_api_keys.py revoke <partner_id>
+    python manage_api_keys.py usage [--days=30]
+"""
+
+import sys
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import app, db
+from models import ApiPartner, ApiUsage
+from partner_api import create_partner
+
+
+def _opt(name, default=None):
+    return next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith(f'--{name}=')), default)
+
+
+def main(args):
+    if not args:
+        print(__doc__)
+        return
+
+    cmd = args[0]
+    with app.app_context():
+        if cmd == 'create' and len(args) >= 2:
+            partner, raw_key = create_partner(args[1], _opt('rpm', 30), _opt('ipm', 3000))
+            print(f"Created partner {partner.name} ({partner.id})")
+            print(f"  Limits: {partner.requestsPerMinute} req/min, {partner.itemsPerMinute} items/min")
+            print(f"  API key (shown once, store it now): {raw_key}")
+
+        elif cmd == 'list':
+            for p in ApiPartner.query.order_by(ApiPartner.createdAt.asc()).all():
+                status = 'active' if p.isActive else 'revoked'
+                print(f"{p.id}  {p.name:<24} {p.keyPrefix}…  {p.requestsPerMinute} req/min  "
+                      f"{p.itemsPerMinute} items/min  {status}")
+
+        elif cmd == 'limits' and len(args) >= 2:
+            partner = ApiPartner.query.get(args[1])
+            if not partner:
+                print(f"No partner {args[1]}")
+                return
+            partner.requestsPerMinute = _opt('rpm', partner.requestsPerMinute)
+            partner.itemsPerMinute = _opt('ipm', partner.itemsPerMinute)
+            db.session.commit()
+            print(f"{partner.name}: {partner.requestsPerMinute} req/min, {partner.itemsPerMinute} items/min")
+
+        elif cmd == 'revoke' and len(args) >= 2:
+            partner = ApiPartner.query.get(args[1])
+            if not partner:
+                print(f"No partner {args[1]}")
+                return
+            partner.isActive = False
+            db.session.commit()
+            print(f"Revoked key for {partner.name} ({partner.keyPrefix}…)")
+
+        elif cmd == 'usage':
+            since = date.today() - timedelta(days=_opt('days', 30))
+            names = {p.id: p.name for p in ApiPartner.query.all()}
+            rows = ApiUsage.query.filter(ApiUsage.day >= since)\
+                .order_by(ApiUsage.day.desc(), ApiUsage.partnerId).all()
+            for u in rows:
+                print(f"{u.day.isoformat()}  {names.get(u.partnerId, u.partnerId):<24} "
+                      f"{u.requestCount:>7} requests  {u.itemCount:>9} items")
+
+        else:
+            print(__doc__)
+
+
+if __name__ == '__main__':
+    main([a for a in sys.argv[1:] if not a.startswith('--')])
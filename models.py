@@ -3,6 +3,11 @@ from flask_login import UserMixin
 from datetime import datetime
 import uuid
 
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+
+from compressed_text import CompressedText
+
 db = SQLAlchemy()
 
 
@@ -23,6 +28,14 @@ class User(UserMixin, db.Model):
 
     reports = db.relationship('InspectionReport', backref='user', lazy=True)
 
+    __table_args__ = (
+        # Admin user list: case-insensitive email prefix search (range scan)
+        # and newest-first keyset pagination. Substring search on Postgres
+        # uses a pg_trgm index created by the migration in app.py.
+        db.Index('ix_User_email_lower', db.func.lower(email)),
+        db.Index('ix_User_createdAt_id', 'createdAt', 'id'),
+    )
+
     @property
     def has_active_subscription(self):
         return self.subscription_status in ('active', 'trialing')
@@ -42,12 +55,34 @@ class InspectionReport(db.Model):
     originalFilename = db.Column(db.String(255))
     filePath = db.Column(db.String(500))
     fileSize = db.Column(db.Integer)
-    extractedText = db.Column(db.Text)
-    summary = db.Column(db.Text)
-    analysis_json = db.Column(db.Text, nullable=True)
+    # The four big text columns are deferred: loading a report (access checks,
+    # the Stripe webhook, alert toggles, care-event joins) doesn't pull
+    # hundreds of KB of report text. Each loads on first access, or up front
+    # with .options(undefer(...)) where an endpoint knows it needs it.
+    # ...and compressed at rest (compressed_text.py); the ORM sees plain text
+    extractedText = deferred(db.Column(CompressedText))
+    summary = deferred(db.Column(CompressedText))
+    analysis_json = deferred(db.Column(CompressedText, nullable=True))
     # JSON list of {appliance, manufactured_year, status} from extract_appliance_profile()
     # (utils.py) — the data foundation for the home-assistant "living profile".
-    appliance_profile_json = db.Column(db.Text, nullable=True)
+    appliance_profile_json = deferred(db.Column(db.Text, nullable=True))
+    # Compact list-view facts copied out of analysis_json when the analysis
+    # is written (report_findings.summary_columns), so report lists never
+    # load or parse the blob. NULL until the report has been analyzed.
+    condition = db.Column(db.String(100))
+    budgetNow = db.Column(db.Integer)
+    budget5yr = db.Column(db.Integer)
+    urgentCount = db.Column(db.Integer)
+    maintenanceCount = db.Column(db.Integer)
+    categoryCount = db.Column(db.Integer)
+    currency = db.Column(db.String(3))
+    location = db.Column(db.String(255))
+    # Weather-scan keys, set with appliance_profile_json: the home's state /
+    # province code (care_rules.region_code) and a bitmask of the appliance
+    # types it has (care_rules.APPLIANCE_BITS). NULL until then — existing
+    # reports: python weather_care_events.py --backfill
+    region = db.Column(db.String(8))
+    applianceFlags = db.Column(db.Integer)
     # Per-report mute switch for care-event reminders — a buyer with multiple
     # inspections (e.g. homes they didn't end up buying) mutes the ones that
     # aren't their actual home. Default True: alerts auto-start after initial
@@ -57,6 +92,10 @@ class InspectionReport(db.Model):
     is_paid = db.Column(db.Boolean, default=False)
     shareToken = db.Column(db.String(100), unique=True)
     isShared = db.Column(db.Boolean, default=True)
+    # Bumped by writes that change what the report's PDFs show (analysis,
+    # customer details) — the pdf_cache.py key. updatedAt also moves on
+    # unrelated writes (mark-paid, alerts toggle), so it can't be the key.
+    contentVersion = db.Column(db.Integer, default=0, nullable=False)
     createdAt = db.Column(db.DateTime, default=datetime.utcnow)
     updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -66,6 +105,20 @@ class InspectionReport(db.Model):
     reportWarranties = db.relationship('ReportWarranty', backref='report', lazy=True, cascade='all, delete-orphan')
     warrantyQueries = db.relationship('WarrantyQuery', backref='report', lazy=True, cascade='all, delete-orphan')
     careEvents = db.relationship('CareEvent', backref='report', lazy=True, cascade='all, delete-orphan')
+    findings = db.relationship('Finding', backref='report', lazy=True, cascade='all, delete-orphan')
+
+    __table_args__ = (
+        # Per-user report/paid counts (admin user list) straight from the index
+        db.Index('ix_InspectionReport_user_paid', 'user_id', 'is_paid'),
+        # Newest-first keyset pagination of the admin report list
+        db.Index('ix_InspectionReport_createdAt_id', 'createdAt', 'id'),
+        # ...and of one user's reports (/api/my-reports)
+        db.Index('ix_InspectionReport_user_createdAt_id', 'user_id', 'createdAt', 'id'),
+        # The weather scan's home list (alert-enabled homes in the feed's
+        # regions), answered from the index alone
+        db.Index('ix_InspectionReport_alerts_region', 'region', 'applianceFlags', 'id',
+                 sqlite_where=db.text('"alertsEnabled" = 1'), postgresql_where=db.text('"alertsEnabled" = true')),
+    )
 
 
 class CareEvent(db.Model):
@@ -73,28 +126,79 @@ class CareEvent(db.Model):
     A scheduled home-maintenance nudge — the home-assistant trigger engine.
     message is fully composed at creation time (by generate_care_events() in
     utils.py) so the daily dispatcher does zero AI work: just a plain query
-    on due_date/sent, a send, and a reschedule if recurring.
+    on nextDueDate/sent, a send, and a reschedule if recurring.
+
+    A recurring event is ONE row for its whole life: each send advances
+    nextDueDate by recurringIntervalDays and appends a CareEventSend row.
+    A one-time event flips sent=True instead. So the unsent set (what the
+    partial index covers) stays one row per live reminder.
     """
     __tablename__ = 'CareEvent'
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False, index=True)
     appliance = db.Column(db.String(100), nullable=False)
-    # age_based | seasonal | time_based | weather_triggered
+    # age_based | seasonal | time_based | weather_triggered (weather_care_events.py)
     eventType = db.Column(db.String(30), nullable=False)
-    dueDate = db.Column(db.Date, nullable=False, index=True)
+    # weather_triggered only: the alert's type (weather_care_events.WEATHER_RULES
+    # key) — part of the key that stops a re-run raising the same event twice
+    alertType = db.Column(db.String(30), nullable=True)
+    # When the event was first scheduled for
+    dueDate = db.Column(db.Date, nullable=False)
+    # When it's next due — what the dispatcher schedules on. Starts at
+    # dueDate unless given explicitly.
+    nextDueDate = db.Column(db.Date, nullable=False,
+                            default=lambda ctx: ctx.get_current_parameters()['dueDate'])
     recurringIntervalDays = db.Column(db.Integer, nullable=True)
     message = db.Column(db.Text, nullable=False)
-    sent = db.Column(db.Boolean, default=False, nullable=False, index=True)
+    # True once a one-time event has gone out (recurring events never are)
+    sent = db.Column(db.Boolean, default=False, nullable=False)
+    # Most recent send
     sentAt = db.Column(db.DateTime, nullable=True)
+    # Set (to the dispatch run's id) and committed before the reminder is
+    # handed to SMTP, cleared again if the send fails or once a recurring
+    # event is rescheduled. A row with a key but sent=False was in flight
+    # when a run died — it may or may not have gone out. Later runs leave it
+    # alone until the claim is CARE_CLAIM_TIMEOUT_MINUTES old (claimedAt),
+    # then put it back in the queue (python send_care_reminders.py
+    # --release-stale does that at once).
+    dispatchKey = db.Column(db.String(64), nullable=True)
+    claimedAt = db.Column(db.DateTime, nullable=True)
     createdAt = db.Column(db.DateTime, default=datetime.utcnow)
 
+    sends = db.relationship('CareEventSend', backref='careEvent', lazy=True, cascade='all, delete-orphan',
+                            passive_deletes=True)
+
+    __table_args__ = (
+        # The dispatcher's daily scan: unsent events by due date, and nothing
+        # else — already-sent one-time events stay out of the index entirely
+        db.Index('ix_CareEvent_unsent_nextDueDate', 'nextDueDate',
+                 sqlite_where=db.text('sent = 0'), postgresql_where=db.text('sent = false')),
+        # Weather alerts already raised for a date (weather_care_events.py
+        # dedupe) — leads with eventType so the dispatcher never picks it
+        db.Index('ix_CareEvent_eventType_dueDate', 'eventType', 'dueDate'),
+    )
+
+
+class CareEventSend(db.Model):
+    """One reminder that went out: the send history of a CareEvent, kept
+    out of the CareEvent table so recurring events don't add a row there
+    per send."""
+    __tablename__ = 'CareEventSend'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    careEventId = db.Column(db.String(36), db.ForeignKey('CareEvent.id', ondelete='CASCADE'),
+                            nullable=False, index=True)
+    # The nextDueDate this send satisfied
+    dueDate = db.Column(db.Date, nullable=False)
+    sentAt = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
 
 class Conversation(db.Model):
     __tablename__ = 'Conversation'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False)
+    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False, index=True)
     customerQuestion = db.Column(db.Text)
     aiResponse = db.Column(db.Text)
     createdAt = db.Column(db.DateTime, default=datetime.utcnow)
@@ -103,7 +207,7 @@ class Question(db.Model):
     __tablename__ = 'Question'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False)
+    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False, index=True)
     question = db.Column(db.Text, nullable=False)
     issueType = db.Column(db.String(50))
     answer = db.Column(db.Text)
@@ -134,21 +238,51 @@ class Contractor(db.Model):
     updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     leads = db.relationship('Lead', backref='contractor', lazy=True, cascade='all, delete-orphan')
+    serviceAreas = db.relationship('ContractorServiceArea', backref='contractor', lazy=True, cascade='all, delete-orphan')
+
+class ContractorServiceArea(db.Model):
+    """
+    One ZIP a contractor serves — the normalized form of the free-text
+    Contractor.zipCodes, rebuilt from it by contractor_matching.py whenever a
+    contractor is saved. specialty is copied from the contractor (lowercased)
+    so "who does roofing near 60614" is one (specialty, zip) index range.
+    """
+    __tablename__ = 'ContractorServiceArea'
+
+    contractorId = db.Column(db.String(36), db.ForeignKey('Contractor.id', ondelete='CASCADE'), primary_key=True)
+    zip = db.Column(db.String(5), primary_key=True)
+    specialty = db.Column(db.String(255), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_ContractorServiceArea_specialty_zip', 'specialty', 'zip'),
+    )
 
 class Lead(db.Model):
     __tablename__ = 'Lead'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False)
-    questionId = db.Column(db.String(36), db.ForeignKey('Question.id'), nullable=False)
+    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False, index=True)
+    questionId = db.Column(db.String(36), db.ForeignKey('Question.id'), nullable=False, index=True)
     contractorId = db.Column(db.String(36), db.ForeignKey('Contractor.id'), nullable=False)
     status = db.Column(db.String(50), default='pending')
     notes = db.Column(db.Text)
     createdAt = db.Column(db.DateTime, default=datetime.utcnow)
     updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # When status last became 'converted' (NULL otherwise) — the day the
+    # conversion analytics count it on
+    convertedAt = db.Column(db.DateTime)
     
     question = db.relationship('Question', backref='leads')
 
+    __table_args__ = (
+        # Admin lead list: newest first, optionally filtered by contractor or
+        # status, keyset-paginated on (createdAt, id). The contractor index
+        # also serves the contractorId FK.
+        db.Index('ix_Lead_createdAt_id', 'createdAt', 'id'),
+        db.Index('ix_Lead_contractor_createdAt_id', 'contractorId', 'createdAt', 'id'),
+        db.Index('ix_Lead_status_createdAt_id', 'status', 'createdAt', 'id'),
+    )
+
 class Analytics(db.Model):
     __tablename__ = 'Analytics'
     
@@ -159,6 +293,30 @@ class Analytics(db.Model):
     leadCount = db.Column(db.Integer, default=0)
     createdAt = db.Column(db.DateTime, default=datetime.utcnow)
 
+class AnalyticsRollup(db.Model):
+    """
+    Per-day counters behind the admin analytics endpoints — one row per
+    (day, metric, dimension), e.g. (2026-03-02, 'questions', 'Roof') or
+    (2026-03-02, 'contractor_leads', <contractor id>). Maintained
+    incrementally by mapper events in analytics_rollup.py on every
+    Question / Lead / InspectionReport write, and recomputed from the source
+    tables by `python reconcile_analytics.py`. `day` is the source row's
+    createdAt date — except for the conversion metrics, which count on the
+    lead's convertedAt date.
+    """
+    __tablename__ = 'AnalyticsRollup'
+
+    day = db.Column(db.Date, primary_key=True)
+    metric = db.Column(db.String(40), primary_key=True)
+    dimension = db.Column(db.String(100), primary_key=True, default='')
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Dashboard totals: SUM(total) GROUP BY dimension for one metric
+        db.Index('ix_AnalyticsRollup_metric_dimension', 'metric', 'dimension'),
+    )
+
+
 class WarrantyDocument(db.Model):
     __tablename__ = 'WarrantyDocument'
     
@@ -169,7 +327,7 @@ class WarrantyDocument(db.Model):
     filePath = db.Column(db.String(500))
     originalFilename = db.Column(db.String(255))
     fileSize = db.Column(db.Integer)
-    extractedText = db.Column(db.Text)
+    extractedText = db.Column(CompressedText)
     coverageRules = db.Column(db.Text)
     isActive = db.Column(db.Boolean, default=True)
     createdAt = db.Column(db.DateTime, default=datetime.utcnow)
@@ -182,7 +340,7 @@ class ReportWarranty(db.Model):
     __tablename__ = 'ReportWarranty'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False)
+    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False, index=True)
     warrantyId = db.Column(db.String(36), db.ForeignKey('WarrantyDocument.id'), nullable=False)
     certificateNumber = db.Column(db.String(255))
     warrantyStartDate = db.Column(db.DateTime)
@@ -194,7 +352,7 @@ class WarrantyQuery(db.Model):
     __tablename__ = 'WarrantyQuery'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False)
+    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id'), nullable=False, index=True)
     warrantyId = db.Column(db.String(36), db.ForeignKey('WarrantyDocument.id'), nullable=False)
     customerQuestion = db.Column(db.Text)
     inspectionFinding = db.Column(db.Text)
@@ -227,8 +385,370 @@ class DamageAssessmentReport(db.Model):
     hiddenDamageRisk = db.Column(db.Text)
     recommendedAction = db.Column(db.Text)
     structuralRisk = db.Column(db.String(50))
-    analysisData = db.Column(db.Text)
+    analysisData = db.Column(CompressedText)
     shareToken = db.Column(db.String(100), unique=True)
     isShared = db.Column(db.Boolean, default=True)
     createdAt = db.Column(db.DateTime, default=datetime.utcnow)
-    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ApiPartner(db.Model):
+    """
+    A partner integration (Inspectagram first) calling the /v1 cost-estimate
+    API. Only a SHA-256 of the key is stored — the raw key is shown once at
+    creation (manage_api_keys.py) and can't be recovered. Limits are per
+    minute and enforced as token buckets in ApiRateBucket (partner_api.py).
+    """
+    __tablename__ = 'ApiPartner'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = db.Column(db.String(255), nullable=False)
+    keyHash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    # First few characters of the raw key, for telling keys apart in the admin/CLI
+    keyPrefix = db.Column(db.String(12))
+    requestsPerMinute = db.Column(db.Integer, default=30, nullable=False)
+    itemsPerMinute = db.Column(db.Integer, default=3000, nullable=False)
+    isActive = db.Column(db.Boolean, default=True, nullable=False)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ApiRateBucket(db.Model):
+    """
+    Token-bucket state for one partner + limit kind ('requests' | 'items').
+    Lives in the DB, not process memory, so every gunicorn worker draws from
+    the same bucket. updatedAt is epoch seconds (float) so refill math is
+    plain arithmetic on every backend; version is the compare-and-swap guard
+    for concurrent updates.
+    """
+    __tablename__ = 'ApiRateBucket'
+
+    partnerId = db.Column(db.String(36), db.ForeignKey('ApiPartner.id'), primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updatedAt = db.Column(db.Float, nullable=False)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+
+class ApiUsage(db.Model):
+    """Per-partner, per-day usage counters — incremented in batches from each
+    worker's in-memory tally (partner_api.record_usage), not per request."""
+    __tablename__ = 'ApiUsage'
+
+    partnerId = db.Column(db.String(36), db.ForeignKey('ApiPartner.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    requestCount = db.Column(db.Integer, default=0, nullable=False)
+    itemCount = db.Column(db.Integer, default=0, nullable=False)
+
+
+class CostEstimate(db.Model):
+    """
+    Stored price for one partner finding, keyed by a hash of its normalized
+    text + section + currency rather than the partner's item_id (which isn't
+    guaranteed stable across renders). Filled ahead of time by the pre-warm
+    queue (cost_prewarm.py) and written through by live batch pricing, so the
+    "Show Cost Estimates" toggle is answered from here whenever possible.
+    """
+    __tablename__ = 'CostEstimate'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    findingHash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    finding = db.Column(db.Text, nullable=False)
+    section = db.Column(db.String(100))
+    currency = db.Column(db.String(3), nullable=False, default='USD')
+    # pending | pricing | done | failed
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+    claimToken = db.Column(db.String(36), index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    # Not picked up before this — a failed chunk backs off (cost_prewarm._backoff)
+    nextAttemptAt = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    low = db.Column(db.Integer)
+    high = db.Column(db.Integer)
+    mostLikely = db.Column(db.Integer)
+    trade = db.Column(db.String(255))
+    confidence = db.Column(db.String(20))
+    # Partner's own report id the finding was first seen on — informational only
+    sourceReportId = db.Column(db.String(100))
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CostJob(db.Model):
+    """
+    One async /v1/cost-estimate/batch request (callback_url given): the
+    validated items, the results once priced, and whether the callback got
+    through. Kept in the DB so a job survives a restart (cost_jobs.resume)
+    and the partner can poll /v1/cost-estimate/jobs/<id> instead of relying
+    on the callback alone.
+    """
+    __tablename__ = 'CostJob'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    partnerId = db.Column(db.String(36), db.ForeignKey('ApiPartner.id'), nullable=False, index=True)
+    # Partner's own report id, echoed back in the callback
+    reportId = db.Column(db.String(100))
+    currency = db.Column(db.String(3), nullable=False, default='USD')
+    itemCount = db.Column(db.Integer, nullable=False)
+    # price_findings input, as validated by the endpoint (JSON)
+    items = deferred(db.Column(CompressedText, nullable=False))
+    callbackUrl = db.Column(db.Text, nullable=False)
+    # queued | pricing | done | error
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    claimToken = db.Column(db.String(36))
+    # {"results": [...], "errors": [...]} once done (JSON)
+    result = deferred(db.Column(CompressedText))
+    # pending | sending | delivered | failed
+    callbackStatus = db.Column(db.String(20), nullable=False, default='pending')
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+    completedAt = db.Column(db.DateTime)
+    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # resume(): unfinished jobs and undelivered callbacks
+        db.Index('ix_CostJob_status_updatedAt', 'status', 'updatedAt'),
+    )
+
+
+class ExportJob(db.Model):
+    """
+    One bulk export (/api/export/reports): the selection, and the zip on
+    disk once a background thread has built it (export_jobs.py). The user
+    polls /api/export/jobs/<id> and downloads the file when it's done —
+    building a big export can take far longer than a web request may.
+    """
+    __tablename__ = 'ExportJob'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    requestedBy = db.Column(db.String(36), db.ForeignKey('User.id', ondelete='SET NULL'), nullable=True, index=True)
+    # The selection, as bulk_export.stream_export_zip takes it (end exclusive)
+    startDay = db.Column(db.DateTime)
+    endDay = db.Column(db.DateTime)
+    userId = db.Column(db.String(36))
+    includePdfs = db.Column(db.Boolean, default=True, nullable=False)
+    # queued | building | done | error | expired
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    claimToken = db.Column(db.String(36))
+    # Zip under EXPORT_DIR, once done
+    path = db.Column(db.Text)
+    sizeBytes = db.Column(db.BigInteger)
+    error = db.Column(db.Text)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+    completedAt = db.Column(db.DateTime)
+    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # resume(): unfinished jobs and expired files
+        db.Index('ix_ExportJob_status_updatedAt', 'status', 'updatedAt'),
+    )
+
+
+class OutboundEmail(db.Model):
+    """
+    One email on the outbound queue (email_queue.py): the fully built
+    message, kept until a background sender has handed it to SMTP. Callers
+    (contractor lead emails, one-off care reminders) enqueue and return
+    right away instead of waiting on an SMTP login. idempotencyKey makes a
+    retried request or double submit a no-op instead of a second email.
+    """
+    __tablename__ = 'OutboundEmail'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    idempotencyKey = db.Column(db.String(128), unique=True, nullable=False)
+    # contractor_lead | care_event
+    kind = db.Column(db.String(30), nullable=False)
+    sender = db.Column(db.String(255))
+    recipient = db.Column(db.String(255), nullable=False)
+    # RFC 822 text, as built — the sender doesn't rebuild anything
+    message = db.Column(db.Text, nullable=False)
+    # pending | sending | sent | failed
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    # Not picked up before this (retry backoff)
+    nextAttemptAt = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimToken = db.Column(db.String(36))
+    lastError = db.Column(db.Text)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+    sentAt = db.Column(db.DateTime)
+    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # The sender's claim query: pending rows whose retry time has come
+        db.Index('ix_OutboundEmail_status_nextAttemptAt', 'status', 'nextAttemptAt'),
+        # Send-latency stats over a recent window, and pruning old sent rows
+        db.Index('ix_OutboundEmail_sentAt', 'sentAt'),
+    )
+
+
+class RealtorReport(db.Model):
+    """
+    One realtor issues-report run (/api/realtor-report): the job the page
+    polls while it runs, and the cached result afterwards. Looked up by a
+    hash of the report URL and of the text fetched from it
+    (realtor_reports.py), so re-opening or re-sharing a listing comes back
+    from here and an edited report (new text) gets analyzed again.
+    """
+    __tablename__ = 'RealtorReport'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    reportUrl = db.Column(db.Text, nullable=False)
+    urlHash = db.Column(db.String(64), nullable=False)
+    # sha256 of the fetched report text; NULL until fetched
+    contentHash = db.Column(db.String(64))
+    # fetching | analyzing | done | error
+    status = db.Column(db.String(20), nullable=False, default='fetching')
+    # generate_realtor_issues_report's JSON, once done
+    result = deferred(db.Column(CompressedText))
+    error = db.Column(db.Text)
+    # Earlier run with the same URL + text this result was copied from
+    # (no model calls), if any
+    cachedFromId = db.Column(db.String(36))
+    requestedBy = db.Column(db.String(36), db.ForeignKey('User.id', ondelete='SET NULL'), nullable=True)
+    # Listing facts copied out of result, for lists and ranking
+    address = db.Column(db.String(255))
+    currency = db.Column(db.String(3))
+    urgentCount = db.Column(db.Integer)
+    attentionCount = db.Column(db.Integer)
+    costLow = db.Column(db.Integer)
+    costHigh = db.Column(db.Integer)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+    completedAt = db.Column(db.DateTime)
+    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Latest run for a URL (cache hit / in-flight job), and a finished
+        # run with the same text
+        db.Index('ix_RealtorReport_url_createdAt', 'urlHash', 'createdAt'),
+        db.Index('ix_RealtorReport_url_content', 'urlHash', 'contentHash'),
+    )
+
+
+class RealtorReportAccess(db.Model):
+    """
+    Users a RealtorReport run has been handed to. A run is shared — a
+    cached or in-flight run for a URL answers everyone who asks for it — so
+    requestedBy alone can't say who may poll it; every user request_report
+    returns the run to gets a row here.
+    """
+    __tablename__ = 'RealtorReportAccess'
+
+    runId = db.Column(db.String(36), db.ForeignKey('RealtorReport.id', ondelete='CASCADE'), primary_key=True)
+    userId = db.Column(db.String(36), db.ForeignKey('User.id', ondelete='CASCADE'), primary_key=True)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class RealtorAiSlot(db.Model):
+    """
+    One of REALTOR_AI_CONCURRENCY leases on the realtor model passes,
+    shared by every gunicorn worker (realtor_reports._ai_slot). holder is
+    the token of the analysis using it; a lease past leaseUntil belonged to
+    a process that died and is free to take.
+    """
+    __tablename__ = 'RealtorAiSlot'
+
+    slot = db.Column(db.Integer, primary_key=True)
+    holder = db.Column(db.String(36))
+    leaseUntil = db.Column(db.DateTime)
+
+
+class RealtorBatch(db.Model):
+    """
+    A bulk realtor request (/api/realtor-report/bulk): the RealtorReport
+    runs answering each of its URLs, in the order submitted. A run can
+    belong to several batches — a URL analyzed recently is answered by the
+    existing run rather than a new one.
+    """
+    __tablename__ = 'RealtorBatch'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    requestedBy = db.Column(db.String(36), db.ForeignKey('User.id', ondelete='SET NULL'), nullable=True)
+    # JSON list of RealtorReport ids
+    runIds = db.Column(db.Text, nullable=False)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ExtractedFindings(db.Model):
+    """
+    What the model passes read out of one source report, stored in a
+    pipeline-neutral form so the realtor pipeline
+    (generate_realtor_issues_report) and the buyer pipeline
+    (generate_structured_analysis) can reuse each other's extraction
+    (extracted_findings.py). One row per source: a report URL, or the text
+    of an uploaded PDF.
+    """
+    __tablename__ = 'ExtractedFindings'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # 'url:<sha256 of normalized URL>' or 'text:<sha256 of extracted text>'
+    sourceKey = db.Column(db.String(80), unique=True, nullable=False)
+    # sha256 of the report's Summary-section text (anchors and whitespace
+    # normalized away); a different value means the report changed and
+    # everything below is replaced
+    fingerprint = db.Column(db.String(64), nullable=False)
+    address = db.Column(db.String(255))
+    currency = db.Column(db.String(3))
+    # JSON list of the inspector's flagged issues:
+    # [{tier: urgent|attention, name, finding, section, severity_label,
+    #   category_key, anchor}] — category_key/anchor only from the realtor pass
+    issues = db.Column(CompressedText)
+    # realtor | buyer — the pass that produced issues
+    issuesFrom = db.Column(db.String(10))
+    # JSON: the rest of the buyer extraction (location, severity system,
+    # condition_label, category_items, checklist); NULL until a buyer pass ran
+    extras = db.Column(CompressedText)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+    updatedAt = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ReportSearch(db.Model):
+    """
+    Full-text search document for one InspectionReport (report_search.py).
+    The integer id is the FTS rowid on SQLite (ReportSearchFts virtual
+    table); on Postgres `document` holds the weighted tsvector, GIN-indexed
+    by the migration in app.py. findings is the finding names pulled out of
+    analysis_json, kept here so snippets can highlight them.
+    """
+    __tablename__ = 'ReportSearch'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id', ondelete='CASCADE'),
+                         unique=True, nullable=False, index=True)
+    findings = db.Column(db.Text)
+    document = db.Column(db.Text().with_variant(TSVECTOR(), 'postgresql'))
+
+
+class Finding(db.Model):
+    """
+    One finding from a report's analysis_json, normalized for cross-report
+    queries ("average roof cost in Calgary", "most common urgent finding")
+    without loading and json.loads-ing every report. Written by
+    report_findings.sync_report() when analysis finishes; analysis_json is
+    still the source of truth and this table is rebuilt from it
+    (python backfill_findings.py).
+    """
+    __tablename__ = 'Finding'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    reportId = db.Column(db.String(36), db.ForeignKey('InspectionReport.id', ondelete='CASCADE'),
+                         nullable=False, index=True)
+    # urgent | maintenance | category — which analysis_json bucket it came from
+    tier = db.Column(db.String(20), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    name = db.Column(db.String(255), nullable=False)
+    # Report section (Roof, Electrical, ...) — category_items' "category"
+    section = db.Column(db.String(100))
+    # COST_TABLE key assigned in Pass 2 (cost_lookup.py), when it matched one
+    categoryKey = db.Column(db.String(100))
+    trade = db.Column(db.String(255))
+    # Parsed from the "$1,500 - $3,000" cost string; NULL when TBD/unpriced
+    costLow = db.Column(db.Integer)
+    costHigh = db.Column(db.Integer)
+    currency = db.Column(db.String(3), nullable=False, default='USD')
+    # Analysis "location" ("Calgary, AB") — for regional cost questions
+    location = db.Column(db.String(255))
+    diyEligible = db.Column(db.Boolean, nullable=False, default=False)
+    createdAt = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_Finding_categoryKey_currency', 'categoryKey', 'currency'),
+        db.Index('ix_Finding_section_location', 'section', 'location'),
+        db.Index('ix_Finding_tier_name', 'tier', 'name'),
+    )
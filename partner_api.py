@@ -0,0 +1,263 @@
+"""
+Partner API keys, rate limiting and usage metering for the /v1 cost-estimate
+API (see docs/ig-cost-estimate-api-spec.md).
+
+- Keys: one ApiPartner row per partner, storing only a SHA-256 of the key.
+  API keys are random 256-bit tokens, so a fast hash is enough — there's
+  nothing to brute-force the way there is with a password.
+- Legacy key: the original shared IG_COST_API_KEY is accepted only while it
+  equals the env value. Its ApiPartner row (LEGACY_KEY_HASH) stores a
+  sentinel instead of the key's hash, so rotating or removing the env var
+  revokes the old key immediately.
+- Rate limits: token buckets (requests/min and items/min per key) kept in
+  ApiRateBucket, so all gunicorn workers share one bucket per key. Updates
+  are compare-and-swap on a version column — portable across SQLite and
+  Postgres, no row locks or Redis needed. A request refused on its item
+  bucket gets its request token back (refund_tokens).
+- Usage: each worker tallies requests/items in memory and adds them to
+  ApiUsage in one batched UPDATE every USAGE_FLUSH_SECONDS (or sooner if the
+  tally gets large), instead of a write per request.
+"""
+
+import hashlib
+import hmac
+import math
+import os
+import secrets
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, ApiPartner, ApiRateBucket, ApiUsage
+
+USAGE_FLUSH_SECONDS = 30
+USAGE_FLUSH_MAX_PENDING = 200
+_CAS_RETRIES = 5
+# keyHash of the ApiPartner row standing for IG_COST_API_KEY. Never a
+# SHA-256 hex digest, so no raw key's hash lookup can land on it.
+LEGACY_KEY_HASH = 'env:IG_COST_API_KEY'
+
+_usage_lock = threading.Lock()
+_pending_usage = {}  # (partner_id, day) -> [requests, items]
+_pending_count = 0
+_last_flush = time.monotonic()
+
+
+def hash_api_key(raw_key):
+    return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+
+def generate_api_key():
+    return 'lot7_' + secrets.token_urlsafe(32)
+
+
+def create_partner(name, requests_per_minute=30, items_per_minute=3000):
+    """Create a partner and return (partner, raw_key). The raw key is not
+    stored anywhere — hand it over now or issue a new one."""
+    raw_key = generate_api_key()
+    partner = ApiPartner(
+        name=name,
+        keyHash=hash_api_key(raw_key),
+        keyPrefix=raw_key[:10],
+        requestsPerMinute=requests_per_minute,
+        itemsPerMinute=items_per_minute,
+    )
+    db.session.add(partner)
+    db.session.commit()
+    return partner, raw_key
+
+
+def authenticate_partner(raw_key):
+    """
+    Resolve a bearer key to its active ApiPartner, or None.
+
+    The original single shared key (IG_COST_API_KEY in .env) still works
+    while it is set: it resolves to the "Inspectagram" row keyed by
+    LEGACY_KEY_HASH (created the first time it's seen), so IG's existing
+    integration picks up per-key limits and metering without a key rotation.
+    The env value is compared on every request — nothing about the key
+    itself is stored, so changing or unsetting the env var revokes it.
+    """
+    if not raw_key:
+        return None
+    partner = ApiPartner.query.filter_by(keyHash=hash_api_key(raw_key)).first()
+    if partner:
+        return partner if partner.isActive else None
+
+    legacy_key = os.getenv('IG_COST_API_KEY')
+    if not legacy_key or not hmac.compare_digest(raw_key.encode('utf-8'), legacy_key.encode('utf-8')):
+        return None
+    partner = ApiPartner.query.filter_by(keyHash=LEGACY_KEY_HASH).first()
+    if partner is None:
+        try:
+            partner = ApiPartner(name='Inspectagram', keyHash=LEGACY_KEY_HASH, keyPrefix=raw_key[:10])
+            db.session.add(partner)
+            db.session.commit()
+        except IntegrityError:
+            # Another worker registered it first
+            db.session.rollback()
+            partner = ApiPartner.query.filter_by(keyHash=LEGACY_KEY_HASH).first()
+    return partner if partner and partner.isActive else None
+
+
+def migrate_legacy_partner():
+    """
+    Rows the first version of authenticate_partner registered for
+    IG_COST_API_KEY stored that key's hash, so they kept accepting it after
+    the env var changed. Re-key such a row to LEGACY_KEY_HASH (or revoke it
+    if that row already exists). They are told apart from keys issued by
+    create_partner, which all start with 'lot7_'. Returns the number fixed.
+    """
+    fixed = 0
+    rows = (ApiPartner.query.filter(ApiPartner.name == 'Inspectagram', ApiPartner.keyHash != LEGACY_KEY_HASH)
+            .order_by(ApiPartner.createdAt.asc()).all())
+    has_legacy = ApiPartner.query.filter_by(keyHash=LEGACY_KEY_HASH).first() is not None
+    for row in rows:
+        if (row.keyPrefix or '').startswith('lot7_'):
+            continue
+        if has_legacy:
+            row.isActive = False
+        else:
+            row.keyHash = LEGACY_KEY_HASH
+            has_legacy = True
+        fixed += 1
+    db.session.commit()
+    return fixed
+
+
+def _take(partner, kind, cost, now):
+    limit = partner.requestsPerMinute if kind == 'requests' else partner.itemsPerMinute
+    capacity = float(limit)
+    rate = limit / 60.0
+    # A single batch bigger than a full minute's budget can still go through
+    # once the bucket is full — it just drains it.
+    cost = min(float(cost), capacity)
+
+    for _ in range(_CAS_RETRIES):
+        bucket = ApiRateBucket.query.get((partner.id, kind))
+        if bucket is None:
+            try:
+                db.session.add(ApiRateBucket(partnerId=partner.id, kind=kind, tokens=capacity,
+                                             updatedAt=now, version=0))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+            continue
+
+        available = min(capacity, bucket.tokens + max(0.0, now - bucket.updatedAt) * rate)
+        if available < cost:
+            db.session.rollback()
+            return False, (cost - available) / rate
+
+        result = db.session.execute(
+            update(ApiRateBucket)
+            .where(ApiRateBucket.partnerId == partner.id,
+                   ApiRateBucket.kind == kind,
+                   ApiRateBucket.version == bucket.version)
+            .values(tokens=available - cost, updatedAt=now, version=bucket.version + 1)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return True, 0.0
+        # Lost the race to another worker — re-read and try again
+
+    return False, 1.0
+
+
+def take_tokens(partner, requests=0, items=0):
+    """
+    Draw from the partner's request and/or item buckets.
+    Returns (allowed, retry_after_seconds) — retry_after is a whole number
+    of seconds, ready for a Retry-After header.
+    """
+    now = time.time()
+    taken = []
+    for kind, cost in (('requests', requests), ('items', items)):
+        if cost <= 0:
+            continue
+        allowed, wait = _take(partner, kind, cost, now)
+        if not allowed:
+            for kind_taken, cost_taken in taken:
+                _give(partner, kind_taken, cost_taken)
+            return False, max(1, math.ceil(wait))
+        taken.append((kind, cost))
+    return True, 0
+
+
+def refund_tokens(partner, requests=0, items=0):
+    """Put tokens back — for a request whose own token was drawn (by
+    partner_key_required) but that was then refused on its item bucket."""
+    for kind, amount in (('requests', requests), ('items', items)):
+        if amount > 0:
+            _give(partner, kind, amount)
+
+
+def _give(partner, kind, amount):
+    limit = partner.requestsPerMinute if kind == 'requests' else partner.itemsPerMinute
+    for _ in range(_CAS_RETRIES):
+        bucket = ApiRateBucket.query.get((partner.id, kind))
+        if bucket is None:
+            return
+        result = db.session.execute(
+            update(ApiRateBucket)
+            .where(ApiRateBucket.partnerId == partner.id,
+                   ApiRateBucket.kind == kind,
+                   ApiRateBucket.version == bucket.version)
+            .values(tokens=min(float(limit), bucket.tokens + amount), version=bucket.version + 1)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return
+
+
+def record_usage(partner_id, items=0):
+    """Count one request (and its items) against today's ApiUsage row.
+    Buffered in memory and flushed in batches — see flush_usage()."""
+    global _pending_count
+    key = (partner_id, date.today())
+    with _usage_lock:
+        tally = _pending_usage.setdefault(key, [0, 0])
+        tally[0] += 1
+        tally[1] += items
+        _pending_count += 1
+        due = (_pending_count >= USAGE_FLUSH_MAX_PENDING
+               or time.monotonic() - _last_flush >= USAGE_FLUSH_SECONDS)
+    if due:
+        flush_usage()
+
+
+def flush_usage():
+    """Write buffered usage to ApiUsage as relative increments, so workers
+    flushing concurrently never overwrite each other's counts. Must run
+    inside an app context."""
+    global _pending_usage, _pending_count, _last_flush
+    with _usage_lock:
+        batch = _pending_usage
+        _pending_usage = {}
+        _pending_count = 0
+        _last_flush = time.monotonic()
+    if not batch:
+        return
+
+    try:
+        for (partner_id, day), (req_count, item_count) in batch.items():
+            stmt = (
+                update(ApiUsage)
+                .where(ApiUsage.partnerId == partner_id, ApiUsage.day == day)
+                .values(requestCount=ApiUsage.requestCount + req_count,
+                        itemCount=ApiUsage.itemCount + item_count)
+            )
+            if db.session.execute(stmt).rowcount == 0:
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(ApiUsage(partnerId=partner_id, day=day,
+                                                requestCount=req_count, itemCount=item_count))
+                except IntegrityError:
+                    db.session.execute(stmt)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"API usage flush failed ({len(batch)} row(s) dropped): {e}")
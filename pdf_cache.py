@@ -0,0 +1,99 @@
+"""
+On-disk cache of the rendered buyer PDFs (/api/generate-pdf summary and
+/api/punchlist-pdf punchlist).
+
+Both PDFs depend only on what the report says — the analysis, the summary,
+the address, the customer details and the report's own date (printed in
+the header; see pdf_reports._header_date). Writes that change any of those
+bump InspectionReport.contentVersion (analysis in run_analysis_background,
+customer details in the quote request); unrelated writes (mark-paid, the
+alerts toggle, the Stripe webhook, care-profile updates) don't. So files
+are keyed by report id + kind + contentVersion alone: a stale file can
+never be served, because changed content simply names a different file,
+and a file stays valid until the report changes — not just until midnight.
+run_analysis_background renders both right after analysis (prerender), so
+downloads are a plain send_file from disk instead of a full ReportLab
+redraw per GET.
+
+Every render deletes the files it supersedes — the same report and kind
+with an older version, or named by the old date-stamped scheme — so the
+cache holds at most one file per report and kind (plus, briefly, whatever a concurrent render is writing).
+
+Files are written to a temp name and os.replace()d into place, so a
+gunicorn worker never serves a half-written PDF even if two of them render
+the same report at once.
+"""
+
+import glob
+import os
+import re
+import tempfile
+
+PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', 'pdf_cache')
+
+_NAME_RE = re.compile(r'_v(\d+)\.pdf$')
+
+
+def _version(report):
+    """contentVersion — what a cached file is valid for."""
+    return report.contentVersion or 0
+
+
+def cache_path(report, kind):
+    return os.path.join(PDF_CACHE_DIR, f"{report.id}_{kind}_v{_version(report)}.pdf")
+
+
+def etag_for(report, kind):
+    return f"{report.id}-{kind}-v{_version(report)}"
+
+
+def get_or_render(report, kind, render_fn):
+    """Path to the cached PDF for this report version, rendering it first if
+    it isn't on disk yet (and deleting the ones it supersedes).
+    render_fn(report) -> PDF bytes."""
+    path = cache_path(report, kind)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    pdf_bytes = render_fn(report)
+    fd, tmp_path = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _drop_superseded(report.id, kind, _version(report))
+    return path
+
+
+def _drop_superseded(report_id, kind, version):
+    """Delete this report's cached files of this kind older than version. A
+    newer file (written by a render that saw a later version) is left
+    alone. Files named by an older scheme (the _v<version>_<date>.pdf ones
+    from when the header printed the download date) don't match _NAME_RE
+    and are all superseded."""
+    for path in glob.glob(os.path.join(PDF_CACHE_DIR, f"{report_id}_{kind}_*.pdf")):
+        m = _NAME_RE.search(path)
+        if m and int(m.group(1)) >= version:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def prerender(report, renderers):
+    """Render every PDF kind for the report's current version (each render
+    drops the kind's older files). renderers: {kind: render_fn}.
+    Best-effort per kind."""
+    fresh = []
+    for kind, render_fn in renderers.items():
+        try:
+            fresh.append(get_or_render(report, kind, render_fn))
+        except Exception as e:
+            print(f"PDF pre-render failed for {report.id} ({kind}): {e}")
+    return fresh
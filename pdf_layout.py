@@ -0,0 +1,247 @@
+"""
+Shared ReportLab building blocks for every Lot7 PDF — summary, punchlist
+(pdf_reports.py) and the damage assessment (generate_damage_report.py).
+
+Everything here is built once at import: the brand palette, the platypus
+ParagraphStyles, and a memoized line-wrapper (wrapping the same disclaimer
+and checklist strings on every render was a measurable share of render
+time). Canvas-drawn reports use PageFlow, which owns the y-cursor,
+pagination, the continuation band on new pages and the footer on every
+page — a new PDF is a list of PageFlow calls, not another hand-positioned
+canvas function.
+"""
+
+from functools import lru_cache
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.utils import simpleSplit
+
+# ---------------------------------------------------------------------------
+# Palette
+# ---------------------------------------------------------------------------
+TEAL       = HexColor('#14b8a6')
+PINK       = HexColor('#d946a6')
+AMBER      = HexColor('#f59e0b')
+GREEN      = HexColor('#22c55e')
+EMERALD    = HexColor('#10b981')
+RED        = HexColor('#ef4444')
+DARK_BG    = HexColor('#0f1419')
+WHITE      = HexColor('#ffffff')
+GRAY       = HexColor('#a1a1a1')
+DARK_TEXT  = HexColor('#1f2937')
+BODY_TEXT  = HexColor('#4b5563')
+LIGHT_GRAY = HexColor('#6b7280')
+ROW_ALT    = HexColor('#f9fafb')
+ROW_URGENT = HexColor('#fff7ed')
+ROW_ATTN   = HexColor('#fffbeb')
+ROW_SATS   = HexColor('#f0fdf4')
+NOTE_BG    = HexColor('#f8fafc')
+
+FONT = 'Helvetica'
+FONT_BOLD = 'Helvetica-Bold'
+
+# ---------------------------------------------------------------------------
+# Platypus styles (damage report). getSampleStyleSheet() builds ~20 styles
+# per call — once per process is enough.
+# ---------------------------------------------------------------------------
+_base = getSampleStyleSheet()['Normal']
+
+
+def _section(name, color):
+    return ParagraphStyle(name, parent=_base, fontSize=8.5, textColor=color,
+                          spaceBefore=3, spaceAfter=2, fontName=FONT_BOLD)
+
+
+STYLES = {
+    'header':         ParagraphStyle('Header', parent=_base, fontSize=9, textColor=HexColor('#000000'), spaceAfter=1, leading=10),
+    'compact':        ParagraphStyle('Compact', parent=_base, fontSize=7, spaceAfter=1.5, leading=8.5, textColor=HexColor('#000000')),
+    'tiny':           ParagraphStyle('Tiny', parent=_base, fontSize=6.5, spaceAfter=1, leading=7.5, textColor=HexColor('#666666')),
+    'section_red':    _section('SectionRed', RED),
+    'section_teal':   _section('SectionTeal', TEAL),
+    'section_yellow': _section('SectionYellow', AMBER),
+    'section_green':  _section('SectionGreen', EMERALD),
+}
+
+
+@lru_cache(maxsize=4096)
+def _wrap(text, font, size, width):
+    return tuple(simpleSplit(text, font, size, width))
+
+
+def wrap(text, font=FONT, size=9, width=400):
+    """simpleSplit, memoized — returns a tuple of lines."""
+    return _wrap(text or '', font, size, width)
+
+
+# ---------------------------------------------------------------------------
+# Canvas flow layout
+# ---------------------------------------------------------------------------
+class PageFlow:
+    """
+    A y-cursor over a canvas that paginates itself.
+
+    ensure(height) starts a new page (with the continuation band) when the
+    next block won't fit above the footer; finish() stamps the footer on the
+    last page and saves. Callers draw at flow.y and move it down with
+    advance() — everything else (page size, margins, band, footer) lives
+    here.
+    """
+
+    def __init__(self, canv, continued_title, footer_text,
+                 pagesize=LETTER, margin=60, bottom=48):
+        self.c = canv
+        self.w, self.h = pagesize
+        self.margin = margin
+        self.bottom = bottom
+        self.continued_title = continued_title
+        self.footer_text = footer_text
+        self.y = self.h
+
+    @property
+    def left(self):
+        return self.margin
+
+    @property
+    def right(self):
+        return self.w - self.margin
+
+    @property
+    def width(self):
+        return self.w - 2 * self.margin
+
+    # -- page furniture ----------------------------------------------------
+    def header(self, title, subtitle, date_line, height=72, subtitle_color=WHITE, date_color=GRAY):
+        """Full-width dark brand band at the top of page one."""
+        c, w, h = self.c, self.w, self.h
+        c.setFillColor(DARK_BG)
+        c.rect(0, h - height, w, height, fill=True, stroke=False)
+        c.setFillColor(TEAL)
+        c.setFont(FONT_BOLD, 22 if height >= 72 else 20)
+        c.drawCentredString(w / 2, h - 30 if height >= 72 else h - 25, title)
+        c.setFillColor(subtitle_color)
+        c.setFont(FONT, 10)
+        c.drawCentredString(w / 2, h - 46 if height >= 72 else h - 40, subtitle)
+        c.setFillColor(date_color)
+        c.setFont(FONT, 8)
+        c.drawCentredString(w / 2, h - 60 if height >= 72 else h - 52, date_line)
+        self.y = h - height - 18
+
+    def _continuation_band(self):
+        c, w, h = self.c, self.w, self.h
+        c.setFillColor(DARK_BG)
+        c.rect(0, h - 36, w, 36, fill=True, stroke=False)
+        c.setFillColor(TEAL)
+        c.setFont(FONT_BOLD, 11)
+        c.drawString(self.margin, h - 23, self.continued_title)
+        self.y = h - 55
+
+    def _footer(self):
+        c = self.c
+        c.setStrokeColor(TEAL)
+        c.setLineWidth(0.5)
+        c.line(self.left, 35, self.right, 35)
+        c.setFillColor(LIGHT_GRAY)
+        c.setFont(FONT, 7)
+        c.drawCentredString(self.w / 2, 23, self.footer_text)
+
+    def new_page(self):
+        self._footer()
+        self.c.showPage()
+        self._continuation_band()
+
+    def ensure(self, height):
+        """Break to a new page unless `height` points fit above the footer."""
+        if self.y - height < self.bottom:
+            self.new_page()
+
+    def finish(self):
+        """Footer on the last page, then save the document."""
+        self._footer()
+        self.c.showPage()
+        self.c.save()
+
+    # -- primitives --------------------------------------------------------
+    def advance(self, dy):
+        self.y -= dy
+
+    def text(self, x, s, font=FONT, size=9, color=DARK_TEXT, align='left', y=None):
+        c = self.c
+        c.setFillColor(color)
+        c.setFont(font, size)
+        y = self.y if y is None else y
+        if align == 'center':
+            c.drawCentredString(x, y, s)
+        elif align == 'right':
+            c.drawRightString(x, y, s)
+        else:
+            c.drawString(x, y, s)
+
+    def rule(self, color=TEAL, width=1.5):
+        self.c.setStrokeColor(color)
+        self.c.setLineWidth(width)
+        self.c.line(self.left, self.y, self.right, self.y)
+
+    def band(self, height, color, x=None, width=None, dy=-4):
+        """Filled full-width row background, offset from the baseline by dy."""
+        self.c.setFillColor(color)
+        x = self.left - 5 if x is None else x
+        width = self.width + 10 if width is None else width
+        self.c.rect(x, self.y + dy, width, height, fill=True, stroke=False)
+
+    def badge(self, x, label, color, width=34, height=13, size=7, dy=-2, radius=4):
+        c = self.c
+        c.setFillColor(color)
+        c.roundRect(x, self.y + dy, width, height, radius, fill=True, stroke=False)
+        c.setFillColor(WHITE)
+        c.setFont(FONT_BOLD, size)
+        c.drawCentredString(x + width / 2, self.y + dy + height / 2 - 0.5, label)
+
+    def label_value(self, x_label, label, x_value, value, size=9,
+                    label_color=DARK_TEXT, value_color=DARK_TEXT, value_size=None):
+        self.text(x_label, label, FONT, size, label_color)
+        self.text(x_value, value, FONT_BOLD, value_size or size, value_color)
+
+    def paragraph(self, s, x=None, width=None, font=FONT, size=9, leading=12, color=BODY_TEXT):
+        """Wrapped text that may run across pages, one line at a time."""
+        x = self.left if x is None else x
+        width = self.width if width is None else width
+        for line in wrap(s, font, size, width):
+            self.ensure(leading)
+            self.text(x, line, font, size, color)
+            self.advance(leading)
+
+    def table(self, columns, headers, rows, row_fill=None, row_height=16):
+        """
+        Dark header row then one line per row.
+        rows: [[(text, font, color), ...], ...] — one cell tuple per column.
+        row_fill: background for even rows (zebra), or None.
+        """
+        self.band(row_height, DARK_BG)
+        for x, hdr in zip(columns, headers):
+            self.text(x, hdr, FONT_BOLD, 8, TEAL, y=self.y + 2)
+        self.advance(row_height + 2)
+        for idx, cells in enumerate(rows):
+            self.ensure(row_height)
+            if row_fill is not None and idx % 2 == 0:
+                self.band(row_height, row_fill)
+            for x, (s, font, color) in zip(columns, cells):
+                self.text(x, s, font, 8, color, y=self.y + 2)
+            self.advance(row_height)
+
+    def note_box(self, title, body, size=7.5, leading=10):
+        """Light boxed note with a teal accent — disclaimers and the like."""
+        lines = wrap(body, FONT, size, self.width - 20)
+        box_h = len(lines) * leading + 16
+        self.ensure(box_h)
+        c = self.c
+        c.setFillColor(NOTE_BG)
+        c.rect(self.left - 5, self.y - box_h + 8, self.width + 10, box_h, fill=True, stroke=False)
+        c.setFillColor(TEAL)
+        c.rect(self.left - 5, self.y - box_h + 8, 3, box_h, fill=True, stroke=False)
+        self.text(self.left + 6, title, FONT_BOLD, size, DARK_TEXT, y=self.y + 2)
+        self.advance(12)
+        for line in lines:
+            self.text(self.left + 6, line, FONT, size, LIGHT_GRAY)
+            self.advance(leading)
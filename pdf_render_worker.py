@@ -0,0 +1,40 @@
+"""
+Render worker for bulk_export.py: renders buyer PDFs into the pdf_cache.py
+disk cache in a separate interpreter, so a big export's ReportLab work
+doesn't run on the web worker's CPU.
+
+Started as its own script (python pdf_render_worker.py), not through
+multiprocessing: a spawn pool re-imports the parent's __main__ in every
+child, and when that is app.py (python app.py) or export_reports.py each
+child booted the whole Flask app — migrations, background workers and all.
+This module imports only the PDF code.
+
+Protocol: one JSON object on stdin,
+    {"jobs": [{"kind": "summary", "fields": {<_RENDER_FIELDS>}}, ...]}
+and one on stdout, in job order:
+    {"paths": [path | null, ...], "errors": [str | null, ...]}
+"""
+
+import json
+import sys
+from types import SimpleNamespace
+
+import pdf_cache
+from pdf_reports import RENDERERS
+
+
+def render_jobs(jobs):
+    paths, errors = [], []
+    for job in jobs:
+        try:
+            report = SimpleNamespace(**job['fields'])
+            paths.append(pdf_cache.get_or_render(report, job['kind'], RENDERERS[job['kind']]))
+            errors.append(None)
+        except Exception as e:
+            paths.append(None)
+            errors.append(str(e))
+    return {'paths': paths, 'errors': errors}
+
+
+if __name__ == '__main__':
+    json.dump(render_jobs(json.load(sys.stdin)['jobs']), sys.stdout)
@@ -0,0 +1,261 @@
+"""
+Canvas-drawn buyer PDFs: the contractor punchlist (/api/punchlist-pdf) and
+the summary (/api/generate-pdf). Both take an InspectionReport (anything
+with the same attributes works — the benchmark passes a stand-in) and
+return PDF bytes; app.py serves them through the pdf_cache.py disk cache.
+
+Layout, palette and pagination come from pdf_layout.py.
+"""
+
+import io
+import json
+import re
+from datetime import datetime
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import LETTER
+
+from pdf_layout import (
+    PageFlow, wrap, FONT, FONT_BOLD,
+    TEAL, PINK, AMBER, GREEN, WHITE, DARK_TEXT, BODY_TEXT, LIGHT_GRAY,
+    DARK_BG, ROW_ALT, ROW_URGENT, ROW_ATTN, ROW_SATS,
+)
+
+DISCLAIMER_TEXT = (
+    "Important Notice — Cost Estimates Only: All figures in this report are approximations based on "
+    "regional contractor averages and are provided for budgeting guidance only. Actual costs will vary "
+    "based on contractor, scope of work, materials, and site conditions. This report does not constitute "
+    "a warranty, guarantee, or professional cost assessment. Obtain multiple licensed contractor quotes "
+    "before committing to any repair work. Lot7 is not liable for "
+    "discrepancies between estimated and actual repair costs."
+)
+
+def _header_date(report):
+    """The date printed in the header: the report's own (inspectionDate, set
+    when it was uploaded and analyzed), not today's — so a cached PDF stays
+    right for as long as the report doesn't change. Accepts the ISO string
+    pdf_render_worker.py gets over JSON."""
+    when = getattr(report, 'inspectionDate', None) or getattr(report, 'createdAt', None)
+    if isinstance(when, str):
+        when = datetime.fromisoformat(when)
+    return (when or datetime.utcnow()).strftime("%B %d, %Y")
+
+
+PUNCHLIST_COLUMNS = [60, 230, 340, 430, 510]
+PUNCHLIST_HEADERS = ["Issue", "Trade Required", "Est. Cost", "Timeline", "Priority"]
+
+
+def _summary_paragraphs(summary):
+    """Split the AI summary into paragraphs — on newlines if it has them,
+    otherwise into groups of ~3 sentences."""
+    paragraphs = [p.strip() for p in summary.split('\n') if p.strip()]
+    if len(paragraphs) > 1:
+        return paragraphs
+    sentences = re.split(r'(?<=[.!?])\s+', summary.strip())
+    return [' '.join(sentences[i:i + 3]) for i in range(0, len(sentences), 3)]
+
+
+def _item_table(flow, title, items, row_fill, timeline_color, priority, priority_color):
+    flow.ensure(60)
+    flow.text(flow.left, title, FONT_BOLD, 13, DARK_TEXT)
+    flow.advance(18)
+    rows = [[
+        (str(item.get("name", ""))[:38], FONT_BOLD, DARK_TEXT),
+        (str(item.get("trade", ""))[:20], FONT, LIGHT_GRAY),
+        (str(item.get("cost", "TBD")), FONT_BOLD, TEAL),
+        (str(item.get("timeline", ""))[:18], FONT, timeline_color),
+        (priority, FONT_BOLD, priority_color),
+    ] for item in items]
+    flow.table(PUNCHLIST_COLUMNS, PUNCHLIST_HEADERS, rows, row_fill=row_fill)
+    flow.advance(10)
+
+
+def _checklist_group(flow, label, items, badge, badge_color, row_color):
+    flow.ensure(28)
+    flow.text(flow.left, label, FONT, 7, LIGHT_GRAY)
+    flow.advance(12)
+    for item in items:
+        flow.ensure(16)
+        flow.band(16, row_color)
+        flow.badge(flow.left, badge, badge_color)
+        lines = wrap(item.get("text", ""), FONT, 8.5, flow.w - 180)
+        flow.text(102, lines[0] if lines else "", FONT, 8.5, DARK_TEXT, y=flow.y + 3)
+        flow.advance(15)
+
+
+def render_punchlist_pdf(report):
+    """Contractor punchlist PDF for a report, as bytes."""
+    analysis = {}
+    if report.analysis_json:
+        try:
+            analysis = json.loads(report.analysis_json)
+        except Exception:
+            pass
+
+    buffer = io.BytesIO()
+    flow = PageFlow(canvas.Canvas(buffer, pagesize=LETTER),
+                    "LOT7 — Punchlist (continued)",
+                    "Generated by LOT7  |  LOT7.ai  |  For contractor use only")
+    flow.header("LOT7", "Contractor Punchlist — AI Generated", _header_date(report))
+
+    # CONDITION BADGE
+    condition = analysis.get("condition", "N/A")
+    cond_color = GREEN if condition == "Well Maintained" else (AMBER if condition == "Needs TLC" else PINK)
+    flow.badge(flow.left, condition, cond_color, width=110, height=22, size=11, dy=-6, radius=6)
+    flow.advance(32)
+
+    # PROPERTY INFO
+    label_x, value_x = 60, 130
+    flow.label_value(label_x, "Property:", value_x, report.address or "Unknown Address")
+    flow.advance(14)
+    flow.label_value(label_x, "Prepared for:", value_x, report.customerName or "N/A")
+    flow.label_value(310, "Phone:", 340, report.customerPhone or "N/A")
+    flow.label_value(430, "Email:", 458, report.customerEmail or "N/A")
+    flow.advance(18)
+
+    # BUDGETS
+    currency = analysis.get("currency", "USD")
+    for label, key in (("Now - 12 months", "budget_now"), ("5-Year outlook", "budget_5yr")):
+        flow.label_value(label_x, f"{label} ({currency}):", value_x + 90, analysis.get(key, "N/A"),
+                         value_color=TEAL, value_size=10)
+        flow.advance(14)
+    flow.advance(6)
+
+    flow.rule()
+    flow.advance(18)
+
+    urgent_items = analysis.get("urgent_items", [])
+    if urgent_items:
+        _item_table(flow, "Urgent - Action Required Now", urgent_items,
+                    ROW_URGENT, AMBER, "High Priority", TEAL)
+
+    maint_items = analysis.get("maintenance_items", [])
+    if maint_items:
+        _item_table(flow, "Maintenance - Plan and Budget", maint_items,
+                    ROW_ALT, LIGHT_GRAY, "PLAN", LIGHT_GRAY)
+
+    # CHECKLIST - grouped: ATTN first, SATS second
+    checklist = analysis.get("checklist", [])
+    if checklist:
+        flow.ensure(60)
+        flow.text(flow.left, "Inspection Checklist", FONT_BOLD, 13, DARK_TEXT)
+        flow.text(flow.right, "SATS = Satisfactory condition     ATTN = Needs attention or follow-up",
+                  FONT, 7, LIGHT_GRAY, align='right', y=flow.y + 2)
+        flow.advance(20)
+
+        attn_items = [i for i in checklist if not i.get("passed", True)]
+        sats_items = [i for i in checklist if i.get("passed", True)]
+        if attn_items:
+            _checklist_group(flow, "▸  ITEMS REQUIRING ATTENTION", attn_items, "ATTN", AMBER, ROW_ATTN)
+            flow.advance(6)
+        if sats_items:
+            _checklist_group(flow, "▸  SATISFACTORY ITEMS", sats_items, "SATS", GREEN, ROW_SATS)
+        flow.advance(14)
+
+    # INSPECTOR NOTES
+    if report.summary:
+        flow.ensure(80)
+        flow.band(22, DARK_BG)
+        flow.text(68, "Inspector Notes", FONT_BOLD, 11, TEAL, y=flow.y + 4)
+        flow.advance(18)
+
+        for para in _summary_paragraphs(report.summary):
+            lines = wrap(para, FONT, 8, flow.w - 145)
+            needed = len(lines) * 11 + 14
+            flow.ensure(needed)
+            flow.c.setStrokeColor(TEAL)
+            flow.c.setLineWidth(1.5)
+            flow.c.line(flow.left, flow.y + 2, flow.left, flow.y - needed + 14)
+            for line in lines:
+                flow.text(72, line, FONT, 8, BODY_TEXT)
+                flow.advance(11)
+            flow.advance(8)
+
+    flow.advance(10)
+    flow.note_box("⚠  Estimates & Disclaimer", DISCLAIMER_TEXT)
+
+    flow.finish()
+    return buffer.getvalue()
+
+
+def render_summary_pdf(report):
+    """Buyer summary PDF for a report, as bytes."""
+    buffer = io.BytesIO()
+    flow = PageFlow(canvas.Canvas(buffer, pagesize=LETTER),
+                    "LOT7 — Inspection Summary (continued)",
+                    "Generated by LOT7  |  LOT7")
+    flow.header("LOT7", "AI-Powered Inspection Summary", _header_date(report),
+                height=60, subtitle_color=LIGHT_GRAY, date_color=WHITE)
+    flow.advance(2)
+
+    # Property info
+    flow.label_value(60, "Property:", 120, report.address or 'N/A', size=10)
+    flow.advance(16)
+    flow.label_value(60, "Prepared for:", 130, report.customerName or 'N/A', size=10)
+    flow.advance(24)
+
+    flow.rule(width=1)
+    flow.advance(24)
+
+    # Condition
+    flow.text(flow.w / 2, "Overall Condition: Good", FONT_BOLD, 18, TEAL, align='center')
+    flow.advance(16)
+    flow.text(flow.w / 2, "3 Items Need Attention  |  8 Functioning Well", FONT, 10, LIGHT_GRAY, align='center')
+    flow.advance(30)
+
+    # Budget
+    flow.text(flow.left, "Budget for Repairs", FONT_BOLD, 14, DARK_TEXT)
+    flow.advance(18)
+    for label, amount, note in (("Now - 12 Months:", "$800 - 1,200", "(Preventive maintenance)"),
+                                ("5 Year Outlook:", "$5,000 - 8,000", "(Long-term replacements)")):
+        flow.text(70, label, FONT, 10, LIGHT_GRAY)
+        flow.text(170, amount, FONT_BOLD, 10, TEAL)
+        flow.text(260, note, FONT, 10, LIGHT_GRAY)
+        flow.advance(16)
+    flow.advance(14)
+
+    # Issues
+    flow.text(flow.left, "What Needs Attention", FONT_BOLD, 14, DARK_TEXT)
+    flow.advance(20)
+    issues = [
+        ("Electrical", "$50 - 300", "Handle now or cosmetic"),
+        ("Plumbing", "$500 - 800", "Handle in 12 months"),
+        ("HVAC", "Future", "Monitor, plan 5-10 years"),
+    ]
+    for name, cost, timeline in issues:
+        flow.text(70, name, FONT_BOLD, 10, DARK_TEXT)
+        flow.text(170, cost, FONT_BOLD, 10, TEAL)
+        flow.text(280, timeline, FONT, 10, LIGHT_GRAY)
+        flow.advance(16)
+    flow.advance(14)
+
+    # Checklist
+    flow.text(flow.left, "Inspection Checklist", FONT_BOLD, 14, DARK_TEXT)
+    flow.advance(20)
+    checks = [
+        (True, "No structural damage found"),
+        (True, "Passes all Illinois code requirements"),
+        (True, "No water intrusion detected"),
+        (False, "Sewer line has scaling (preventive care)"),
+        (True, "HVAC functioning properly"),
+    ]
+    for passed, text in checks:
+        flow.text(70, "SATS" if passed else "ATTN", FONT_BOLD, 9, TEAL if passed else AMBER)
+        flow.text(110, text, FONT, 10, DARK_TEXT)
+        flow.advance(16)
+    flow.advance(14)
+
+    # AI Summary
+    if report.summary:
+        flow.ensure(40)
+        flow.text(flow.left, "AI Analysis Summary", FONT_BOLD, 14, DARK_TEXT)
+        flow.advance(16)
+        flow.paragraph(report.summary, size=9, leading=12, color=LIGHT_GRAY)
+
+    flow.finish()
+    return buffer.getvalue()
+
+
+# Every cached PDF kind — pre-rendered together after analysis (app.py) and
+# bundled by the bulk export (bulk_export.py)
+RENDERERS = {'punchlist': render_punchlist_pdf, 'summary': render_summary_pdf}
@@ -0,0 +1,420 @@
+"""
+Realtor issues reports as background jobs with a result cache.
+
+/api/realtor-report used to fetch the listing's report and run both model
+passes (generate_realtor_issues_report -> price_findings) inside the
+request, and keep nothing: every re-open or re-share of a listing paid for
+the whole pipeline again, and long reports ran into the gunicorn request
+timeout. Now each request is a RealtorReport row:
+
+- A finished run for the same URL newer than RECHECK_HOURS is returned as
+  is — no fetch, no model call.
+- A run for the URL already in flight is joined rather than duplicated.
+- Otherwise a job starts in a background thread and the client polls
+  /api/realtor-report/<id>. The job fetches the report text first; if an
+  earlier finished run saw exactly the same text (same content hash), its
+  result is copied over and the model passes are skipped. Only new or
+  changed reports are analyzed.
+- rerun=True skips both caches and always analyzes afresh.
+- Bulk mode (request_bulk): up to BULK_MAX_URLS listings per request. Each
+  URL is answered the same way as above; the ones that need a job run on
+  one pool of BULK_FETCH_WORKERS threads sharing a keep-alive HTTP session
+  and one pricing memo, so a finding that shows up in several listings is
+  priced once. batch_status() ranks the finished listings by urgent items,
+  then estimated cost.
+
+Every analysis, single or bulk, takes one of REALTOR_AI_CONCURRENCY slots
+for its model passes. The slots are RealtorAiSlot rows leased with a
+conditional UPDATE, so the budget is shared by every gunicorn worker: at
+most REALTOR_AI_CONCURRENCY analyses run at once across the deployment
+(each pricing up to utils.PRICING_MAX_WORKERS chunks in parallel), however
+many workers or bulk requests there are. Analyses beyond that wait for a
+slot rather than firing hundreds of model calls at once.
+
+A run is shared between users (cached and in-flight runs answer everyone
+asking for the URL), so each user it is handed to gets a
+RealtorReportAccess row; can_view() is what the polling endpoint checks.
+
+Failed runs (fetch errors, unparseable model output) are stored as status
+'error' and never served as a cached result.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+import extracted_findings
+from cost_lookup import parse_cost_range
+from extracted_findings import normalize_url, url_hash
+from models import db, RealtorAiSlot, RealtorBatch, RealtorReport, RealtorReportAccess
+
+# A finished run younger than this is served without re-fetching the report
+RECHECK_HOURS = 24
+# An unfinished run not updated for this long died with its process
+STALE_MINUTES = 15
+RUNNING = ('fetching', 'analyzing')
+MIN_REPORT_CHARS = 200
+# Model passes running at once across all processes, single and bulk combined
+REALTOR_AI_CONCURRENCY = int(os.getenv('REALTOR_AI_CONCURRENCY', 4))
+AI_SLOT_POLL_SECONDS = 2
+BULK_MAX_URLS = 300
+BULK_FETCH_WORKERS = 8     # also the HTTP connection pool size
+BULK_HEARTBEAT_SECONDS = 60
+
+def _ensure_slots():
+    have = {n for (n,) in db.session.query(RealtorAiSlot.slot)}
+    for n in range(REALTOR_AI_CONCURRENCY):
+        if n not in have:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(RealtorAiSlot(slot=n))
+            except IntegrityError:
+                pass  # created by another worker
+    db.session.commit()
+
+
+def _free(now):
+    return or_(RealtorAiSlot.holder.is_(None), RealtorAiSlot.leaseUntil < now)
+
+
+@contextmanager
+def _ai_slot():
+    """Hold one of the REALTOR_AI_CONCURRENCY deployment-wide slots for the
+    duration of a model pass, waiting for one if all are taken. The lease
+    runs STALE_MINUTES — as long as the run itself counts as alive — so a
+    slot held by a dead process comes free with its run. Needs an app
+    context."""
+    _ensure_slots()
+    token = str(uuid.uuid4())
+    while True:
+        now = datetime.utcnow()
+        free = [n for (n,) in db.session.query(RealtorAiSlot.slot)
+                .filter(RealtorAiSlot.slot < REALTOR_AI_CONCURRENCY, _free(now))]
+        db.session.commit()
+        taken = None
+        for n in free:
+            claimed = db.session.execute(
+                update(RealtorAiSlot).where(RealtorAiSlot.slot == n, _free(now))
+                .values(holder=token, leaseUntil=now + timedelta(minutes=STALE_MINUTES))).rowcount
+            db.session.commit()
+            if claimed == 1:
+                taken = n
+                break
+        if taken is not None:
+            break
+        time.sleep(AI_SLOT_POLL_SECONDS)
+    try:
+        yield
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.execute(update(RealtorAiSlot).where(RealtorAiSlot.slot == taken, RealtorAiSlot.holder == token)
+                           .values(holder=None, leaseUntil=None))
+        db.session.commit()
+
+
+def grant(run_id, user_id):
+    """Let user_id poll this run (see can_view). Commits."""
+    if not user_id:
+        return
+    if not db.session.get(RealtorReportAccess, (run_id, user_id)):
+        try:
+            with db.session.begin_nested():
+                db.session.add(RealtorReportAccess(runId=run_id, userId=user_id))
+        except IntegrityError:
+            pass
+    db.session.commit()
+
+
+def can_view(run, user_id):
+    """Whether the run was handed to this user (requested or reused)."""
+    return bool(user_id) and (run.requestedBy == user_id
+                              or db.session.get(RealtorReportAccess, (run.id, user_id)) is not None)
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def summary_fields(result):
+    """Listing facts from a generate_realtor_issues_report result: counts and
+    the low/high sum of the priced items (TBD items count as 0)."""
+    items = (result.get('urgent_items') or []) + (result.get('attention_items') or [])
+    low = high = 0
+    for item in items:
+        parsed = parse_cost_range(item.get('cost') or '')
+        if parsed:
+            low += parsed[0]
+            high += parsed[1]
+    return {
+        'address': (result.get('address') or '')[:255] or None,
+        'currency': (result.get('currency') or 'USD')[:3],
+        'urgentCount': len(result.get('urgent_items') or []),
+        'attentionCount': len(result.get('attention_items') or []),
+        'costLow': int(low),
+        'costHigh': int(high),
+    }
+
+
+def _is_stale(run):
+    return run.status in RUNNING and run.updatedAt < datetime.utcnow() - timedelta(minutes=STALE_MINUTES)
+
+
+def latest_run(url):
+    """Newest run for this URL that is either finished or still alive, or None."""
+    runs = (RealtorReport.query.filter(RealtorReport.urlHash == url_hash(url),
+                                       RealtorReport.status.in_(('done',) + RUNNING))
+            .order_by(RealtorReport.createdAt.desc()).limit(5).all())
+    return next((r for r in runs if not _is_stale(r)), None)
+
+
+def request_report(url, user_id=None, rerun=False, start=True):
+    """
+    The run answering a request for this URL: a fresh cached result, the job
+    already in flight, or a new job (started in a background thread unless
+    start=False). Returns (run, created).
+    """
+    if not rerun:
+        run = latest_run(url)
+        if run and (run.status in RUNNING
+                    or run.completedAt >= datetime.utcnow() - timedelta(hours=RECHECK_HOURS)):
+            grant(run.id, user_id)
+            return run, False
+    run = RealtorReport(reportUrl=normalize_url(url), urlHash=url_hash(url), status='fetching', requestedBy=user_id)
+    db.session.add(run)
+    db.session.commit()
+    grant(run.id, user_id)
+    if start:
+        threading.Thread(target=_run_in_context, args=(current_app._get_current_object(), run.id, rerun),
+                         daemon=True).start()
+    return run, True
+
+
+def _set(run_id, **values):
+    db.session.query(RealtorReport).filter_by(id=run_id).update(
+        dict(values, updatedAt=datetime.utcnow()), synchronize_session=False)
+    db.session.commit()
+
+
+def _finish(run_id, result, cached_from=None):
+    _set(run_id, status='done', result=json.dumps(result), cachedFromId=cached_from,
+         completedAt=datetime.utcnow(), error=None, **summary_fields(result))
+
+
+def _fail(run_id, error):
+    _set(run_id, status='error', error=error, completedAt=datetime.utcnow())
+
+
+def run_job(run_id, rerun=False, fetch=None, analyze=None):
+    """
+    Fetch, look up by content hash, analyze if needed, store. Needs an app
+    context. fetch/analyze default to fetch_report_text_from_url and
+    extracted_findings.realtor_analysis (generate_realtor_issues_report,
+    reusing any issues the buyer pipeline already extracted unless rerun).
+    Returns the final status.
+    """
+    from utils import fetch_report_text_from_url
+
+    app = current_app._get_current_object()
+    fetch = fetch or (lambda u: fetch_report_text_from_url(u, include_anchors=True, summary_only=True))
+    analyze = analyze or (lambda text, u: extracted_findings.realtor_analysis(app, text, u, reuse=not rerun))
+    run = db.session.get(RealtorReport, run_id)
+    url, u_hash = run.reportUrl, run.urlHash
+
+    try:
+        text = fetch(url)
+    except Exception as e:
+        _fail(run_id, f'Could not read report from that link: {e}')
+        return 'error'
+    if len(text.strip()) < MIN_REPORT_CHARS:
+        _fail(run_id, 'That link did not return readable report text. Make sure it is a public report link.')
+        return 'error'
+
+    c_hash = content_hash(text)
+    _set(run_id, contentHash=c_hash, status='analyzing')
+    if not rerun:
+        same = (db.session.query(RealtorReport.id)
+                .filter(RealtorReport.urlHash == u_hash, RealtorReport.contentHash == c_hash,
+                        RealtorReport.status == 'done', RealtorReport.id != run_id)
+                .order_by(RealtorReport.completedAt.desc()).first())
+        if same:
+            earlier = db.session.get(RealtorReport, same.id)
+            _finish(run_id, json.loads(earlier.result), cached_from=earlier.cachedFromId or earlier.id)
+            print(f"[REALTOR {run_id}] Report text unchanged since run {same.id} — reused its result")
+            return 'done'
+
+    try:
+        with _ai_slot():
+            result = analyze(text, url)
+    except Exception as e:
+        _fail(run_id, f'Analysis failed: {e}')
+        return 'error'
+    if result.get('_parse_error'):
+        _fail(run_id, f"Analysis failed: {result['_parse_error']}")
+        return 'error'
+    _finish(run_id, result)
+    return 'done'
+
+
+def _run_in_context(app, run_id, rerun=False, fetch=None, analyze=None):
+    with app.app_context():
+        try:
+            return run_job(run_id, rerun, fetch, analyze)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[REALTOR {run_id}] Job error: {e}")
+            _fail(run_id, str(e))
+            return 'error'
+
+
+def request_bulk(urls, user_id=None):
+    """
+    A RealtorBatch for a list of report URLs (duplicates after normalize_url
+    count once). Each URL is answered like request_report — a fresh or
+    in-flight run is reused — and the new runs are handed to one background
+    batch thread. Raises ValueError for an empty list or more than
+    BULK_MAX_URLS links.
+    """
+    unique = list(dict.fromkeys(normalize_url(u) for u in urls if isinstance(u, str) and u.strip()))
+    if not unique:
+        raise ValueError('report_urls must be a non-empty list of report links')
+    if len(unique) > BULK_MAX_URLS:
+        raise ValueError(f'At most {BULK_MAX_URLS} report links per request')
+
+    run_ids, new_ids = [], []
+    for url in unique:
+        run, created = request_report(url, user_id=user_id, start=False)
+        run_ids.append(run.id)
+        if created:
+            new_ids.append(run.id)
+    batch = RealtorBatch(requestedBy=user_id, runIds=json.dumps(run_ids))
+    db.session.add(batch)
+    db.session.commit()
+    print(f"[REALTOR batch {batch.id}] {len(unique)} listing(s), {len(new_ids)} to analyze")
+    if new_ids:
+        threading.Thread(target=_run_batch, args=(current_app._get_current_object(), batch.id, new_ids),
+                         daemon=True).start()
+    return batch
+
+
+def _bulk_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=BULK_FETCH_WORKERS, pool_maxsize=BULK_FETCH_WORKERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _heartbeat(app, run_ids):
+    """Keep a long batch's queued runs from looking abandoned (STALE_MINUTES)."""
+    with app.app_context():
+        (db.session.query(RealtorReport)
+         .filter(RealtorReport.id.in_(run_ids), RealtorReport.status.in_(RUNNING))
+         .update({'updatedAt': datetime.utcnow()}, synchronize_session=False))
+        db.session.commit()
+
+
+def _run_batch(app, batch_id, run_ids, fetch=None, analyze=None):
+    """
+    Run a batch's new jobs BULK_FETCH_WORKERS at a time over one keep-alive
+    session, sharing one pricing memo; the model passes still wait for a
+    deployment-wide _ai_slot. fetch/analyze override the utils.py pipeline
+    as in run_job (analyze then gets the memo as a third argument).
+    """
+    from utils import fetch_report_text_from_url
+
+    session = _bulk_session()
+    memo = {}
+    fetch = fetch or (lambda u: fetch_report_text_from_url(u, include_anchors=True, summary_only=True,
+                                                           session=session))
+    analyze = analyze or (lambda text, u, memo: extracted_findings.realtor_analysis(app, text, u,
+                                                                                    pricing_memo=memo))
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=BULK_FETCH_WORKERS) as pool:
+        pending = {pool.submit(_run_in_context, app, run_id, False, fetch,
+                               lambda text, u: analyze(text, u, memo)) for run_id in run_ids}
+        while pending:
+            _, pending = wait(pending, timeout=BULK_HEARTBEAT_SECONDS)
+            if pending:
+                _heartbeat(app, run_ids)
+    session.close()
+    print(f"[REALTOR batch {batch_id}] {len(run_ids)} listing(s) finished in {time.monotonic() - t0:.0f}s, "
+          f"{len(memo)} distinct finding(s) priced")
+
+
+def batch_status(batch, since=None):
+    """
+    Progress of a batch: every listing's summary — finished ones first,
+    ranked by urgent items then estimated cost (costLow + costHigh), then
+    the ones still running, then failures — per-currency totals, and the
+    full report result for each listing finished after `since` (the
+    previous response's as_of), so a polling page gets each listing's
+    report once, as it completes.
+    """
+    as_of = datetime.utcnow()
+    ids = json.loads(batch.runIds)
+    runs = {r.id: r for r in RealtorReport.query.filter(RealtorReport.id.in_(ids)).all()}
+    listings = [to_dict(runs[i], include_result=False) for i in ids if i in runs]
+
+    done = sorted((l for l in listings if l['status'] == 'done'),
+                  key=lambda l: (l['urgent_count'], l['cost_low'] + l['cost_high']), reverse=True)
+    running = [l for l in listings if l['status'] in RUNNING]
+    failed = [l for l in listings if l['status'] == 'error']
+    totals = {}
+    for rank, l in enumerate(done, 1):
+        l['rank'] = rank
+        t = totals.setdefault(l['currency'], {'listings': 0, 'urgent': 0, 'attention': 0,
+                                              'cost_low': 0, 'cost_high': 0})
+        t['listings'] += 1
+        t['urgent'] += l['urgent_count']
+        t['attention'] += l['attention_count']
+        t['cost_low'] += l['cost_low']
+        t['cost_high'] += l['cost_high']
+
+    results = {l['job_id']: json.loads(runs[l['job_id']].result) for l in done
+               if since is None or runs[l['job_id']].completedAt > since}
+    return {
+        'batch_id': batch.id,
+        'created_at': batch.createdAt.isoformat(),
+        'as_of': as_of.isoformat(),
+        'complete': not running,
+        'counts': {'total': len(listings), 'done': len(done), 'running': len(running), 'error': len(failed)},
+        'totals': totals,
+        'listings': done + running + failed,
+        'results': results,
+    }
+
+
+def to_dict(run, include_result=True):
+    """API shape of a run; result (the report JSON) only once done."""
+    status, error = run.status, run.error
+    if _is_stale(run):
+        status, error = 'error', 'The analysis was interrupted — please re-run it.'
+    data = {
+        'job_id': run.id,
+        'status': status,
+        'report_url': run.reportUrl,
+        'created_at': run.createdAt.isoformat() if run.createdAt else None,
+        'completed_at': run.completedAt.isoformat() if run.completedAt else None,
+        'cached': bool(run.cachedFromId),
+        'error': error,
+    }
+    if status == 'done':
+        data.update(address=run.address, currency=run.currency, urgent_count=run.urgentCount,
+                    attention_count=run.attentionCount, cost_low=run.costLow, cost_high=run.costHigh)
+        if include_result:
+            data['result'] = json.loads(run.result)
+    return data
@@ -0,0 +1,30 @@
+"""
+Build the admin full-text search index (report_search.py) for reports that
+existed before it, in batches. New and edited reports are indexed
+automatically — this is only needed once after deploying search, or with
+--all after changing what gets indexed.
+
+Usage:
+    python rebuild_search_index.py            # reports with no search document yet
+    python rebuild_search_index.py --all      # re-index everything
+    python rebuild_search_index.py --batch=2000
+"""
+
+import sys
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import app
+import report_search
+
+
+def main():
+    batch = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--batch=')), 500)
+    with app.app_context():
+        total = report_search.rebuild(batch_size=batch, only_missing='--all' not in sys.argv)
+    print(f"Done — indexed {total} report(s).")
+
+
+if __name__ == '__main__':
+    main()
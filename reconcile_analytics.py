@@ -0,0 +1,31 @@
+"""
+Recompute the admin analytics rollups (AnalyticsRollup, see
+analytics_rollup.py) from the Question / Lead / InspectionReport tables and
+replace whatever drifted — e.g. rows changed by bulk updates that bypass
+the incremental mapper events. Safe to run any time; schedule it nightly.
+
+Usage:
+    python reconcile_analytics.py                  # every day of history
+    python reconcile_analytics.py --days=7         # only the last 7 days
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import app
+import analytics_rollup
+
+
+def main():
+    days = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--days=')), None)
+    since = (datetime.utcnow() - timedelta(days=days)).date() if days else None
+    with app.app_context():
+        drift = analytics_rollup.reconcile(since=since)
+    print(f"Done — {drift} rollup counter(s) corrected.")
+
+
+if __name__ == '__main__':
+    main()
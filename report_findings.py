@@ -0,0 +1,192 @@
+"""
+The Finding table: every item in a report's analysis_json as a row with
+numeric costs, so cross-report analytics are plain indexed SQL instead of
+loading and re-parsing every report's JSON blob.
+
+analysis_json stays the source of truth. sync_report() replaces a report's
+rows wholesale (delete + bulk insert) whenever its analysis is written —
+run_analysis_background calls it as soon as the analysis is committed —
+and backfill() does the same for existing reports in keyset batches
+(python backfill_findings.py).
+
+The same pass fills InspectionReport's list-view summary columns
+(condition, budgets, item counts, currency, location) — see
+summary_columns().
+"""
+
+import json
+import re
+
+from sqlalchemy import func, or_
+
+from models import db, InspectionReport, Finding
+
+TIERS = (('urgent', 'urgent_items'), ('maintenance', 'maintenance_items'), ('category', 'category_items'))
+
+_AMOUNT = r'\d[\d,]*(?:\.\d+)?'
+# The leading amount and, if it is a range, its upper end: '$2,000–4,000',
+# '$1,500 - $3,000', '$500 to $900'. Anything after that ('over 5 years',
+# '(2 units)') is not a cost.
+_RANGE_RE = re.compile(rf'({_AMOUNT})(?:\s*(?:-|–|—|to)\s*[^\d\s]{{0,3}}\s*({_AMOUNT}))?')
+
+
+def _amount(text):
+    return int(float(text.replace(',', '')))
+
+
+def parse_cost_bounds(cost):
+    """'$1,500 - $3,000' -> (1500, 3000); '$400' -> (400, 400);
+    '$2,000–4,000 over 5 years' -> (2000, 4000); 'TBD', 'Future', '' ->
+    (None, None). Only the leading amount or range is read — taking the
+    last number in the string turned trailing text like 'over 5 years' into
+    the high end. Unpriced stays NULL instead of 0 so it doesn't drag
+    averages down."""
+    m = _RANGE_RE.search(str(cost or ''))
+    if not m:
+        return None, None
+    try:
+        low = _amount(m.group(1))
+        high = _amount(m.group(2)) if m.group(2) else low
+    except ValueError:
+        return None, None
+    return low, max(low, high)
+
+
+def _location(analysis):
+    location = (analysis.get('location') or None)
+    if location and location.lower() == 'unknown':
+        return None
+    return location[:255] if location else None
+
+
+def finding_rows(report_id, analysis):
+    """Finding column dicts for one parsed analysis_json."""
+    currency = (analysis.get('currency') or 'USD')[:3].upper()
+    location = _location(analysis)
+    rows = []
+    for tier, bucket in TIERS:
+        for position, item in enumerate(analysis.get(bucket) or []):
+            if not isinstance(item, dict) or not item.get('name'):
+                continue
+            low, high = parse_cost_bounds(item.get('cost'))
+            rows.append({
+                'reportId': report_id,
+                'tier': tier,
+                'position': position,
+                'name': str(item['name'])[:255],
+                'section': str(item.get('category') or item.get('section') or '')[:100] or None,
+                'categoryKey': item.get('category_key') or None,
+                'trade': str(item.get('trade') or '')[:255] or None,
+                'costLow': low,
+                'costHigh': high,
+                'currency': currency,
+                'location': location,
+                'diyEligible': bool(item.get('diy_eligible')),
+            })
+    return rows
+
+
+def _budget(value):
+    """'~$1,500' -> 1500; a legacy '$500 - $2,000' range -> its midpoint."""
+    low, high = parse_cost_bounds(value)
+    return None if low is None else (low + high) // 2
+
+
+def summary_columns(analysis):
+    """InspectionReport summary column values for one parsed analysis_json.
+    Counts are always set (0 for a missing tier) — a NULL urgentCount is
+    how backfill() spots reports that were never summarized."""
+    counts = {tier: sum(1 for item in (analysis.get(bucket) or [])
+                        if isinstance(item, dict) and item.get('name'))
+              for tier, bucket in TIERS}
+    return {
+        'condition': str(analysis['condition'])[:100] if analysis.get('condition') else None,
+        'budgetNow': _budget(analysis.get('budget_now')),
+        'budget5yr': _budget(analysis.get('budget_5yr')),
+        'urgentCount': counts['urgent'],
+        'maintenanceCount': counts['maintenance'],
+        'categoryCount': counts['category'],
+        'currency': (analysis.get('currency') or 'USD')[:3].upper(),
+        'location': _location(analysis),
+    }
+
+
+def sync_report(report_id, analysis_json):
+    """Replace a report's Finding rows and summary columns from its
+    analysis_json (None or unparseable -> no rows, zero counts). Adds to the
+    session; the caller commits. Returns the Finding row count."""
+    try:
+        analysis = json.loads(analysis_json) if analysis_json else {}
+    except Exception:
+        analysis = {}
+    if not isinstance(analysis, dict):
+        analysis = {}
+    db.session.execute(Finding.__table__.delete().where(Finding.__table__.c.reportId == report_id))
+    rows = finding_rows(report_id, analysis)
+    if rows:
+        db.session.execute(Finding.__table__.insert(), rows)
+    # Core UPDATE: no ORM events, and updatedAt is pinned — these columns
+    # are derived from analysis_json, so a backfill isn't a report edit
+    reports = InspectionReport.__table__
+    db.session.execute(reports.update().where(reports.c.id == report_id)
+                       .values(updatedAt=reports.c.updatedAt, **summary_columns(analysis)))
+    return len(rows)
+
+
+def backfill(batch_size=200, only_missing=True):
+    """Populate Finding and the summary columns for existing analyzed
+    reports, one commit per batch of reports. only_missing skips reports
+    that already have both. Needs an app context. Returns (reports,
+    findings) written."""
+    reports = findings = 0
+    last_id = ''
+    while True:
+        q = db.session.query(InspectionReport.id, InspectionReport.analysis_json).filter(
+            InspectionReport.id > last_id, InspectionReport.analysis_json.isnot(None))
+        if only_missing:
+            q = q.filter(or_(~InspectionReport.id.in_(db.session.query(Finding.reportId)),
+                             InspectionReport.urgentCount.is_(None)))
+        batch = q.order_by(InspectionReport.id.asc()).limit(batch_size).all()
+        if not batch:
+            break
+        for report_id, analysis_json in batch:
+            findings += sync_report(report_id, analysis_json)
+        db.session.commit()
+        reports += len(batch)
+        last_id = batch[-1][0]
+        print(f"  {reports} report(s), {findings} finding(s)...")
+    return reports, findings
+
+
+def _filtered(q, tier=None, section=None, location=None, currency=None):
+    if tier:
+        q = q.filter(Finding.tier == tier)
+    if section:
+        q = q.filter(Finding.section == section)
+    if location:
+        q = q.filter(Finding.location.ilike(f'{location}%'))
+    if currency:
+        q = q.filter(Finding.currency == currency)
+    return q
+
+
+def top_findings(tier=None, section=None, location=None, limit=20):
+    """Most frequent findings by (case-insensitive) name."""
+    name = func.lower(Finding.name)
+    q = _filtered(db.session.query(name, func.count(Finding.id), func.count(func.distinct(Finding.reportId))),
+                  tier, section, location)
+    rows = q.group_by(name).order_by(func.count(Finding.id).desc()).limit(limit).all()
+    return [{'name': n, 'count': c, 'reports': r} for n, c, r in rows]
+
+
+def cost_by_category(tier=None, section=None, location=None, currency=None, limit=50):
+    """Average priced low/high per category_key (unpriced findings excluded)."""
+    q = _filtered(db.session.query(
+        Finding.categoryKey, Finding.currency, func.count(Finding.id),
+        func.avg(Finding.costLow), func.avg(Finding.costHigh),
+    ), tier, section, location, currency).filter(Finding.categoryKey.isnot(None), Finding.costLow.isnot(None))
+    rows = (q.group_by(Finding.categoryKey, Finding.currency)
+            .order_by(func.count(Finding.id).desc()).limit(limit).all())
+    return [{'category_key': k, 'currency': cur, 'count': c,
+             'avg_low': round(float(lo)), 'avg_high': round(float(hi))}
+            for k, cur, c, lo, hi in rows]
@@ -0,0 +1,274 @@
+"""
+Full-text search over inspection reports for the admin panel.
+
+Indexed per report: address, customer name/email, summary, the finding
+names inside analysis_json, and the extracted report text — weighted in
+that order of importance. Two backends behind one API:
+
+- SQLite: an FTS5 virtual table (ReportSearchFts, porter stemming) whose
+  rowid is ReportSearch.id; ranked with bm25 column weights, snippets from
+  FTS5's snippet().
+- Postgres: a weighted tsvector in ReportSearch.document with a GIN index;
+  ranked with ts_rank_cd, snippets from ts_headline.
+
+The index is maintained incrementally by SQLAlchemy mapper events on
+InspectionReport — inside the same flush, so it commits or rolls back with
+the report row. Updates that don't touch an indexed column (is_paid,
+alertsEnabled, ...) skip re-indexing. Existing reports are indexed in
+batches with `python rebuild_search_index.py`.
+
+Both backends page the ranked match list first and only compute snippets
+for the rows on the page, so a common term on a million reports stays in
+milliseconds.
+"""
+
+import html
+import json
+import re
+
+from sqlalchemy import event, select, text, inspect as sa_inspect
+
+from models import db, InspectionReport, ReportSearch
+
+# Column weights: address, customer, summary, findings, body
+_FTS_RANK = 'bm25(10.0, 8.0, 3.0, 5.0, 1.0)'
+_BODY_LIMIT = 200000      # chars of extracted text indexed (tsvector max is 1MB)
+_HEADLINE_BODY = 20000    # chars of extracted text ts_headline scans for a snippet
+_MAX_TERMS = 8
+_HL_START, _HL_STOP = '\x02', '\x03'
+
+INDEXED_ATTRS = ('address', 'customerName', 'customerEmail', 'summary', 'analysis_json', 'extractedText')
+
+_enabled = False
+_dialect = None
+
+
+def finding_names(analysis_json):
+    """Finding names from every item bucket of an analysis_json blob."""
+    try:
+        analysis = json.loads(analysis_json) if analysis_json else {}
+    except Exception:
+        return ''
+    names = []
+    for bucket in ('urgent_items', 'maintenance_items', 'category_items'):
+        for item in analysis.get(bucket) or []:
+            if isinstance(item, dict) and item.get('name'):
+                names.append(str(item['name']))
+    return ' | '.join(names)
+
+
+def _document(values):
+    email = values.get('customerEmail') or ''
+    if _dialect == 'postgresql':
+        # Postgres's parser keeps an email as one lexeme; add the parts so
+        # "gmail" or "smith" alone finds it (FTS5 splits on @ and . itself)
+        email = f"{email} {re.sub(r'[@.]', ' ', email)}"
+    return {
+        'address': values.get('address') or '',
+        'customer': ' '.join(filter(None, [values.get('customerName'), email])),
+        'summary': values.get('summary') or '',
+        'findings': finding_names(values.get('analysis_json')),
+        'body': (values.get('extractedText') or '')[:_BODY_LIMIT],
+    }
+
+
+def setup(engine):
+    """Create the backend-specific index structures (idempotent) and turn
+    on incremental indexing. Called once from app.py at startup."""
+    global _enabled, _dialect
+    _dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if _dialect == 'sqlite':
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS \"ReportSearchFts\" USING fts5("
+                "address, customer, summary, findings, body, tokenize='porter unicode61')"
+            ))
+            conn.execute(text(
+                "INSERT INTO \"ReportSearchFts\"(\"ReportSearchFts\", rank) VALUES ('rank', :rank)"
+            ), {'rank': _FTS_RANK})
+        elif _dialect == 'postgresql':
+            conn.execute(text(
+                'CREATE INDEX IF NOT EXISTS "ix_ReportSearch_document" ON "ReportSearch" USING gin (document)'
+            ))
+        else:
+            print(f"Report search: no full-text backend for {_dialect}, search disabled")
+            return
+        conn.commit()
+    _enabled = True
+
+
+def index_report(connection, values):
+    """Insert or refresh one report's search document. values: the report's
+    id + INDEXED_ATTRS, as a dict. Runs on the caller's connection."""
+    doc = _document(values)
+    report_id = values['id']
+    row = connection.execute(
+        text('SELECT id FROM "ReportSearch" WHERE "reportId" = :rid'), {'rid': report_id}
+    ).first()
+    if row:
+        doc_id = row[0]
+        connection.execute(text('UPDATE "ReportSearch" SET findings = :findings WHERE id = :id'),
+                           {'findings': doc['findings'], 'id': doc_id})
+    else:
+        doc_id = connection.execute(
+            ReportSearch.__table__.insert().values(reportId=report_id, findings=doc['findings'])
+        ).inserted_primary_key[0]
+
+    if _dialect == 'sqlite':
+        connection.execute(text('DELETE FROM "ReportSearchFts" WHERE rowid = :id'), {'id': doc_id})
+        connection.execute(text(
+            'INSERT INTO "ReportSearchFts"(rowid, address, customer, summary, findings, body) '
+            'VALUES (:id, :address, :customer, :summary, :findings, :body)'
+        ), {'id': doc_id, **doc})
+    else:
+        connection.execute(text(
+            'UPDATE "ReportSearch" SET document = '
+            "setweight(to_tsvector('english', :address), 'A') || "
+            "setweight(to_tsvector('english', :customer), 'A') || "
+            "setweight(to_tsvector('english', :findings), 'B') || "
+            "setweight(to_tsvector('english', :summary), 'C') || "
+            "setweight(to_tsvector('english', :body), 'D') "
+            'WHERE id = :id'
+        ), {'id': doc_id, **doc})
+
+
+def remove_report(connection, report_id):
+    row = connection.execute(
+        text('SELECT id FROM "ReportSearch" WHERE "reportId" = :rid'), {'rid': report_id}
+    ).first()
+    if not row:
+        return
+    if _dialect == 'sqlite':
+        connection.execute(text('DELETE FROM "ReportSearchFts" WHERE rowid = :id'), {'id': row[0]})
+    connection.execute(text('DELETE FROM "ReportSearch" WHERE id = :id'), {'id': row[0]})
+
+
+def _values(connection, target):
+    # Deferred columns (extractedText, summary, analysis_json) that this
+    # flush didn't load are read on the flush's own connection rather than
+    # lazy-loaded through the session mid-flush
+    state = sa_inspect(target)
+    values = {a: state.dict[a] for a in INDEXED_ATTRS if a in state.dict}
+    missing = [a for a in INDEXED_ATTRS if a not in values]
+    if missing:
+        table = InspectionReport.__table__
+        row = connection.execute(
+            select(*[table.c[a] for a in missing]).where(table.c.id == target.id)
+        ).first()
+        values.update(dict(zip(missing, row)) if row else dict.fromkeys(missing))
+    values['id'] = target.id
+    return values
+
+
+@event.listens_for(InspectionReport, 'after_insert')
+def _after_insert(mapper, connection, target):
+    if _enabled:
+        index_report(connection, _values(connection, target))
+
+
+@event.listens_for(InspectionReport, 'after_update')
+def _after_update(mapper, connection, target):
+    if not _enabled:
+        return
+    state = sa_inspect(target)
+    if any(state.attrs[a].history.has_changes() for a in INDEXED_ATTRS):
+        index_report(connection, _values(connection, target))
+
+
+@event.listens_for(InspectionReport, 'before_delete')
+def _before_delete(mapper, connection, target):
+    if _enabled:
+        remove_report(connection, target.id)
+
+
+def rebuild(batch_size=500, only_missing=True):
+    """Index existing reports in keyset batches, one commit per batch.
+    only_missing skips reports that already have a document. Needs an app
+    context. Returns how many were indexed."""
+    cols = [getattr(InspectionReport, a) for a in ('id',) + INDEXED_ATTRS]
+    last_id = ''
+    total = 0
+    while True:
+        q = db.session.query(*cols).filter(InspectionReport.id > last_id)
+        if only_missing:
+            q = q.filter(~InspectionReport.id.in_(db.session.query(ReportSearch.reportId)))
+        rows = q.order_by(InspectionReport.id.asc()).limit(batch_size).all()
+        if not rows:
+            break
+        conn = db.session.connection()
+        for r in rows:
+            index_report(conn, dict(r._mapping))
+        db.session.commit()
+        total += len(rows)
+        last_id = rows[-1].id
+        print(f"  indexed {total} report(s)...")
+    return total
+
+
+def _terms(query):
+    return re.findall(r'\w+', (query or '').lower())[:_MAX_TERMS]
+
+
+def _snippet_html(raw):
+    """Escape snippet text, then turn the highlight sentinels into <mark>."""
+    return html.escape(raw or '').replace(_HL_START, '<mark>').replace(_HL_STOP, '</mark>')
+
+
+def search(query, page=1, per_page=25):
+    """
+    Ranked report matches for an admin search box query — every term must
+    match, each as a prefix ("smi" finds "Smith").
+    Returns (hits, has_more); hits are [{"report_id", "rank", "snippet"}],
+    best first, snippet is HTML-safe with <mark> highlights.
+    """
+    terms = _terms(query)
+    if not terms or not _enabled:
+        return [], False
+    offset = (max(page, 1) - 1) * per_page
+    params = {'limit': per_page + 1, 'offset': offset}
+
+    if _dialect == 'sqlite':
+        params['q'] = ' '.join(f'"{t}"*' for t in terms)
+        rows = db.session.execute(text(
+            'SELECT s."reportId", f.rank, f.snip FROM ('
+            '  SELECT rowid AS docid, rank, '
+            f"    snippet(\"ReportSearchFts\", -1, '{_HL_START}', '{_HL_STOP}', '…', 16) AS snip"
+            '  FROM "ReportSearchFts" WHERE "ReportSearchFts" MATCH :q'
+            '  ORDER BY rank LIMIT :limit OFFSET :offset'
+            ') f JOIN "ReportSearch" s ON s.id = f.docid ORDER BY f.rank'
+        ), params).all()
+    else:
+        params['q'] = ' & '.join(f'{t}:*' for t in terms)
+        ranked = db.session.execute(text(
+            'SELECT s."reportId", s.findings, ts_rank_cd(s.document, to_tsquery(\'english\', :q)) AS rank'
+            ' FROM "ReportSearch" s WHERE s.document @@ to_tsquery(\'english\', :q)'
+            ' ORDER BY rank DESC LIMIT :limit OFFSET :offset'
+        ), params).all()
+        rows = []
+        if ranked:
+            # Headline source text is put together here rather than in SQL:
+            # the report columns are compressed at rest (compressed_text.py)
+            # and only decode through the ORM
+            page = ranked[:per_page]
+            reports = {r.id: r for r in db.session.query(
+                InspectionReport.id, InspectionReport.address, InspectionReport.customerName,
+                InspectionReport.customerEmail, InspectionReport.summary, InspectionReport.extractedText,
+            ).filter(InspectionReport.id.in_([p[0] for p in page])).all()}
+            docs = []
+            for rid, findings, _ in page:
+                r = reports.get(rid)
+                parts = [r.address, r.customerName, r.customerEmail, findings, r.summary,
+                         (r.extractedText or '')[:_HEADLINE_BODY]] if r else [findings]
+                docs.append(' … '.join(p for p in parts if p))
+            snippets = db.session.execute(text(
+                "SELECT ts_headline('english', d, to_tsquery('english', :q), "
+                f"'StartSel={_HL_START},StopSel={_HL_STOP},MaxFragments=2,MaxWords=20,MinWords=6') "
+                'FROM unnest(CAST(:docs AS text[])) WITH ORDINALITY AS t(d, n) ORDER BY n'
+            ), {'q': params['q'], 'docs': docs}).scalars().all()
+            rows = [(rid, rank, snip) for (rid, _, rank), snip in zip(page, snippets)]
+            rows += ranked[per_page:]  # the look-ahead row, only counted
+
+    has_more = len(rows) > per_page
+    hits = [{'report_id': rid, 'rank': float(rank), 'snippet': _snippet_html(snip)}
+            for rid, rank, snip in rows[:per_page]]
+    return hits, has_more
@@ -1,82 +1,283 @@
 """
 Daily dispatcher for CareEvent reminders — the home-assistant trigger engine.
 Meant to run on a schedule (Render Cron Job), once per day. Zero AI calls in
-this script: just a plain query on dueDate/sent, an email send, and a
-reschedule if the event is recurring. All AI reasoning already happened
+this script: just a plain query on nextDueDate/sent, an email send, and a
+reschedule if the event is recurring (nextDueDate moves forward on the
+same row; the send is logged in CareEventSend). All AI reasoning already happened
 when the CareEvent row was created (see generate_care_events() in utils.py).
 
+The sendable due events' (recipient, id) are read in keyset pages of
+DISPATCH_BATCH, sorted by recipient — never the whole backlog in memory —
+and worked through in batches of ~DISPATCH_BATCH events, each loaded as
+plain column rows with the report address joined in (no per-event lazy
+loads). Each recipient gets ONE digest email per run
+covering every home and appliance due for them, and each batch is sent by
+DISPATCH_WORKERS threads, each over a single authenticated SMTP connection
+instead of a connect/STARTTLS/login per email.
+
+Every batch is its own transaction pair: its events are first claimed
+(dispatchKey = this run's id, committed), then sent, then marked sent /
+rescheduled (committed). A crash therefore never re-sends earlier batches.
+Events that were mid-send when it happened are left claimed-but-unsent;
+each run first puts back any claim older than CARE_CLAIM_TIMEOUT_MINUTES
+(far longer than a run takes), so they are retried by the next run rather
+than stuck — at the cost of a possible duplicate for the few that did go
+out. --release-stale puts back every claim at once.
+
 Usage:
     python send_care_reminders.py                    # sends for real, as of today
     python send_care_reminders.py --dry-run           # logs what would be sent, no email/db writes
     python send_care_reminders.py --as-of=2027-04-01  # pretend "today" is this date — for
                                                         # testing recurring/future events without
                                                         # waiting real months
+    python send_care_reminders.py --release-stale     # un-claim every event left in flight, now
 """
 
+import os
+import smtplib
 import sys
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta, datetime
 
 from dotenv import load_dotenv
 load_dotenv()
 
+from sqlalchemy import and_, case, func, or_
+
 from app import app, db
-from models import CareEvent
-from utils import send_care_event_email
+from models import CareEvent, CareEventSend, InspectionReport, User
+from utils import build_care_digest_email, open_smtp_connection
 
+DISPATCH_BATCH = int(os.getenv('CARE_DISPATCH_BATCH', 500))      # events per batch / commit
+DISPATCH_WORKERS = int(os.getenv('CARE_DISPATCH_WORKERS', 4))    # parallel SMTP connections
+# A claim this old belongs to a run that died; the next run releases it
+CLAIM_TIMEOUT_MINUTES = int(os.getenv('CARE_CLAIM_TIMEOUT_MINUTES', 120))
+
+
+def _recipient():
+    """The account email, else the email typed on the report."""
+    return func.coalesce(func.nullif(User.email, ''), func.nullif(InspectionReport.customerEmail, ''))
 
-def main(dry_run=False, as_of=None):
-    with app.app_context():
-        today = as_of or date.today()
-        due = CareEvent.query.filter(CareEvent.dueDate <= today, CareEvent.sent == False).all()
-        print(f"{len(due)} care event(s) due as of {today.isoformat()}{' [DRY RUN]' if dry_run else ''}")
 
-        for event in due:
-            report = event.report
-            recipient = None
-            if report:
-                if report.user_id and report.user:
-                    recipient = report.user.email
-                recipient = recipient or report.customerEmail
+def _due(today):
+    return (db.session.query()
+            .select_from(CareEvent)
+            .join(InspectionReport, InspectionReport.id == CareEvent.reportId)
+            .outerjoin(User, User.id == InspectionReport.user_id)
+            # `sent == False` (not IS) so the partial index's predicate matches
+            .filter(CareEvent.nextDueDate <= today, CareEvent.sent == False))  # noqa: E712
 
-            if report and not report.alertsEnabled:
-                print(f"  Skipping {event.appliance} (report {event.reportId}): alerts muted for this home")
-                continue
 
-            if not recipient:
-                print(f"  Skipping {event.appliance} (report {event.reportId}): no recipient email on file")
-                continue
+def _due_queue(today, page_size=DISPATCH_BATCH):
+    """(recipient, event id) for every sendable due event, grouped by
+    recipient — read in keyset pages on (recipient, id), so a large backlog
+    is never held in memory at once."""
+    recipient = _recipient()
+    after = None
+    while True:
+        q = (_due(today)
+             .add_columns(recipient, CareEvent.id)
+             .filter(CareEvent.dispatchKey.is_(None), InspectionReport.alertsEnabled.is_(True),
+                     recipient.isnot(None)))
+        if after:
+            q = q.filter(or_(recipient > after[0], and_(recipient == after[0], CareEvent.id > after[1])))
+        page = q.order_by(recipient, CareEvent.id).limit(page_size).all()
+        yield from page
+        if len(page) < page_size:
+            return
+        after = tuple(page[-1])
 
-            if dry_run:
-                print(f"  Would send to {recipient}: [{event.appliance}] {event.message[:80]}...")
-                continue
 
+def _batches(queue, size):
+    """Split the queue into batches of about size events, cut between
+    recipients so each gets one digest — only a recipient with a huge
+    backlog is split (hard cut at 2 x size)."""
+    batch = []
+    previous = None
+    for recipient, event_id in queue:
+        if len(batch) >= size and recipient != previous:
+            yield batch
+            batch = []
+        batch.append((recipient, event_id))
+        previous = recipient
+        if len(batch) >= 2 * size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _load(batch):
+    """The columns a send needs for one batch (report address joined in)."""
+    recipients = dict((event_id, recipient) for recipient, event_id in batch)
+    rows = (db.session.query(CareEvent.id, CareEvent.appliance, CareEvent.message, CareEvent.nextDueDate,
+                             CareEvent.recurringIntervalDays, InspectionReport.address)
+            .join(InspectionReport, InspectionReport.id == CareEvent.reportId)
+            .filter(CareEvent.id.in_(list(recipients)))
+            .all())
+    by_id = {r.id: r for r in rows}
+    return [(recipients[i], by_id[i]) for _, i in batch if i in by_id]
+
+
+def _send_chunk(groups):
+    """Send one digest per (recipient, events) over a single SMTP connection,
+    reconnecting once if the server drops it. Returns {recipient: error or None}."""
+    server = None
+    results = {}
+    for recipient, events in groups:
+        msg = build_care_digest_email(recipient, [(e.address, e.appliance, e.message) for e in events])
+        for attempt in (1, 2):
             try:
-                send_care_event_email(recipient, event.appliance, event.message)
-                event.sent = True
-                event.sentAt = datetime.utcnow()
-
-                if event.recurringIntervalDays:
-                    next_event = CareEvent(
-                        reportId=event.reportId,
-                        appliance=event.appliance,
-                        eventType=event.eventType,
-                        dueDate=today + timedelta(days=event.recurringIntervalDays),
-                        recurringIntervalDays=event.recurringIntervalDays,
-                        message=event.message,
-                        sent=False,
-                    )
-                    db.session.add(next_event)
-                    print(f"  Sent + rescheduled {event.appliance} for {next_event.dueDate.isoformat()}")
-                else:
-                    print(f"  Sent {event.appliance} (one-time)")
+                if server is None:
+                    server = open_smtp_connection()
+                server.send_message(msg)
+                results[recipient] = None
+                break
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                # the server said no to this message; the connection is fine
+                results[recipient] = e
+                break
             except Exception as e:
-                print(f"  Failed to send {event.appliance}: {e}")
+                try:
+                    server and server.close()
+                except Exception:
+                    pass
+                server = None
+                if attempt == 2 or not isinstance(e, OSError):
+                    results[recipient] = e
+                    break
+    if server is not None:
+        try:
+            server.quit()
+        except Exception:
+            pass
+    return results
+
+
+def _dispatch(batch, run_key, today, pool):
+    """Claim, send and record one batch. Returns (digests, events sent, rescheduled)."""
+    ids = [event_id for _, event_id in batch]
+    claimed = (CareEvent.query
+               .filter(CareEvent.id.in_(ids), CareEvent.sent == False, CareEvent.dispatchKey.is_(None),  # noqa: E712
+                       CareEvent.nextDueDate <= today)
+               .update({CareEvent.dispatchKey: run_key, CareEvent.claimedAt: datetime.utcnow()},
+                       synchronize_session=False))
+    db.session.commit()
+    if claimed != len(ids):
+        # another dispatcher got some first (claimed, or sent and rescheduled)
+        mine = {i for (i,) in db.session.query(CareEvent.id).filter(CareEvent.id.in_(ids),
+                                                                      CareEvent.dispatchKey == run_key)}
+        batch = [(r, i) for r, i in batch if i in mine]
+
+    groups = OrderedDict()
+    for recipient, row in _load(batch):
+        groups.setdefault(recipient, []).append(row)
+    items = list(groups.items())
+    results = {}
+    for chunk_results in pool.map(_send_chunk, [items[i::DISPATCH_WORKERS] for i in range(DISPATCH_WORKERS)]):
+        results.update(chunk_results)
+
+    now = datetime.utcnow()
+    one_time, recurring, failed_ids, log = [], {}, [], []
+    for recipient, events in items:
+        error = results.get(recipient)
+        if error is not None:
+            print(f"  Failed to send {len(events)} reminder(s) to {recipient}: {error}")
+            failed_ids += [e.id for e in events]
+            continue
+        for e in events:
+            log.append({'careEventId': e.id, 'dueDate': e.nextDueDate, 'sentAt': now})
+            if e.recurringIntervalDays:
+                recurring.setdefault(e.recurringIntervalDays, []).append(e.id)
+            else:
+                one_time.append(e.id)
+
+    if one_time:
+        CareEvent.query.filter(CareEvent.id.in_(one_time)).update(
+            {CareEvent.sent: True, CareEvent.sentAt: now}, synchronize_session=False)
+    # Recurring: same row, next due date, claim released for that next run —
+    # one UPDATE per distinct interval
+    for interval, ids in recurring.items():
+        CareEvent.query.filter(CareEvent.id.in_(ids)).update(
+            {CareEvent.nextDueDate: today + timedelta(days=interval), CareEvent.sentAt: now,
+             CareEvent.dispatchKey: None, CareEvent.claimedAt: None}, synchronize_session=False)
+    if failed_ids:
+        # back in the queue for the next run
+        CareEvent.query.filter(CareEvent.id.in_(failed_ids)).update(
+            {CareEvent.dispatchKey: None, CareEvent.claimedAt: None}, synchronize_session=False)
+    if log:
+        db.session.execute(CareEventSend.__table__.insert(), log)
+    db.session.commit()
+    return (sum(1 for err in results.values() if err is None), len(log),
+            sum(len(ids) for ids in recurring.values()))
+
+
+def _release_claims(older_than=None):
+    """Put claimed-but-unsent events back in the queue — those claimed
+    before older_than, or all of them. Returns how many."""
+    q = CareEvent.query.filter(CareEvent.sent == False, CareEvent.dispatchKey.isnot(None))  # noqa: E712
+    if older_than:
+        q = q.filter(or_(CareEvent.claimedAt < older_than, CareEvent.claimedAt.is_(None)))
+    n = q.update({CareEvent.dispatchKey: None, CareEvent.claimedAt: None}, synchronize_session=False)
+    db.session.commit()
+    return n
+
+
+def release_stale():
+    with app.app_context():
+        n = _release_claims()
+        print(f"Released {n} care event(s) left in flight by an earlier run")
+
+
+def main(dry_run=False, as_of=None):
+    with app.app_context():
+        today = as_of or date.today()
+        if not dry_run:
+            released = _release_claims(datetime.utcnow() - timedelta(minutes=CLAIM_TIMEOUT_MINUTES))
+            if released:
+                print(f"Released {released} care event(s) claimed over {CLAIM_TIMEOUT_MINUTES} min ago "
+                      f"by a run that didn't finish")
+        recipient = _recipient()
+        total, muted, no_recipient, stale = _due(today).add_columns(
+            func.count(CareEvent.id),
+            func.sum(case((InspectionReport.alertsEnabled.is_(False), 1), else_=0)),
+            func.sum(case((and_(InspectionReport.alertsEnabled.is_(True), recipient.is_(None)), 1), else_=0)),
+            func.sum(case((CareEvent.dispatchKey.isnot(None), 1), else_=0)),
+        ).one()
+        print(f"{total} care event(s) due as of {today.isoformat()}{' [DRY RUN]' if dry_run else ''}")
+        if muted:
+            print(f"  Skipping {muted}: alerts muted for those homes")
+        if no_recipient:
+            print(f"  Skipping {no_recipient}: no recipient email on file")
+        if stale:
+            print(f"  Skipping {stale}: claimed by another run still in progress "
+                  f"(or one that died under {CLAIM_TIMEOUT_MINUTES} min ago)")
+
+        run_key = f"{today.isoformat()}:{uuid.uuid4().hex}"
+        digests = sent = rescheduled = 0
+        queue = _due_queue(today)
+        with ThreadPoolExecutor(max_workers=DISPATCH_WORKERS) as pool:
+            for batch in _batches(queue, DISPATCH_BATCH):
+                if dry_run:
+                    for recipient, row in _load(batch):
+                        print(f"  Would send to {recipient}: [{row.appliance}] {row.message[:80]}...")
+                    continue
+                n_digests, n_sent, n_next = _dispatch(batch, run_key, today, pool)
+                digests += n_digests
+                sent += n_sent
+                rescheduled += n_next
+                print(f"  Sent {n_digests} digest(s) covering {n_sent} event(s), {n_next} rescheduled")
 
         if not dry_run:
-            db.session.commit()
+            print(f"Done — {digests} digest(s), {sent} event(s) sent, {rescheduled} rescheduled")
 
 
 if __name__ == '__main__':
+    if '--release-stale' in sys.argv:
+        release_stale()
+        sys.exit(0)
     as_of_arg = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--as-of=')), None)
     as_of_date = datetime.strptime(as_of_arg, '%Y-%m-%d').date() if as_of_arg else None
     main(dry_run='--dry-run' in sys.argv, as_of=as_of_date)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the blog render cache (blog_cache.py) and the routes
+serving it: /blog, /blog/<slug> and /sitemap.xml. Posts and templates are
+written to a scratch directory, so the real blog/ is never read.
+
+Usage:
+    python test_blog_cache.py [test_name ...]
+"""
+
+import functools
+import gzip
+import os
+import tempfile
+
+from test_support import app, banner, check, isolated, run_tests
+import blog_cache
+
+POST = """---
+title: Radon Basics
+date: 2026-01-15
+---
+# Radon Basics
+
+Radon is a gas. Test for it.
+"""
+
+
+def scratch_blog(fn):
+    """Point blog_cache at a fresh directory with two templates and one
+    post, rechecking on every request; put everything back afterwards."""
+    @functools.wraps(fn)
+    def wrapper():
+        saved = {k: getattr(blog_cache, k)
+                 for k in ('BLOG_DIR', 'INDEX_TEMPLATE', 'POST_TEMPLATE', 'BLOG_RECHECK_SECONDS')}
+        saved_state = dict(blog_cache._state)
+        with tempfile.TemporaryDirectory() as root:
+            blog_cache.BLOG_DIR = os.path.join(root, 'blog')
+            blog_cache.INDEX_TEMPLATE = os.path.join(root, 'index.html')
+            blog_cache.POST_TEMPLATE = os.path.join(root, 'post.html')
+            blog_cache.BLOG_RECHECK_SECONDS = 0
+            blog_cache._state.update({'signature': None, 'checked': 0.0, 'pages': {}})
+            os.makedirs(blog_cache.BLOG_DIR)
+            _write(blog_cache.INDEX_TEMPLATE, '<main>{{POSTS}}</main>')
+            _write(blog_cache.POST_TEMPLATE, '<h1>{{TITLE}}</h1><time>{{DATE}}</time>{{CONTENT}}')
+            _write(os.path.join(blog_cache.BLOG_DIR, 'radon-basics.md'), POST)
+            try:
+                return fn()
+            finally:
+                for k, v in saved.items():
+                    setattr(blog_cache, k, v)
+                blog_cache._state.clear()
+                blog_cache._state.update(saved_state)
+    return wrapper
+
+
+def _write(path, text, mtime=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def _get(client, path, **headers):
+    return client.get(path, headers={'Accept-Encoding': 'identity', **headers})
+
+
+@isolated
+@scratch_blog
+def test_blog_invalidation():
+    banner("Blog cache invalidation (name, mtime and size)")
+    client = app.test_client()
+    post_path = os.path.join(blog_cache.BLOG_DIR, 'radon-basics.md')
+    r = _get(client, '/blog/radon-basics')
+    check(r.status_code == 200 and b'Radon is a gas.' in r.data, f"first render: {r.status_code} {r.data[:200]}")
+    mtime, size = os.stat(post_path).st_mtime_ns, os.stat(post_path).st_size
+
+    # Same name, mtime and size: served from the cache, the file isn't re-read
+    same_size = POST.replace('Test for it.', 'Fix it soon.')
+    _write(post_path, same_size, mtime=mtime)
+    check(os.stat(post_path).st_size == size, "test setup: edit changed the size")
+    r = _get(client, '/blog/radon-basics')
+    check(b'Test for it.' in r.data, "an unchanged signature re-rendered the post")
+
+    # Same size, new mtime: rebuilt
+    _write(post_path, same_size, mtime=mtime + 10 ** 9)
+    r = _get(client, '/blog/radon-basics')
+    check(b'Fix it soon.' in r.data, "a new mtime didn't rebuild the post")
+
+    # Same mtime, new size: rebuilt
+    _write(post_path, POST.replace('Test for it.', 'Test for it every two years.'), mtime=mtime + 10 ** 9)
+    r = _get(client, '/blog/radon-basics')
+    check(b'every two years' in r.data, "a new size didn't rebuild the post")
+
+    # A new post shows up in the index and sitemap; a template edit
+    # re-renders every post
+    _write(os.path.join(blog_cache.BLOG_DIR, 'gfci-outlets.md'), '---\ntitle: GFCI Outlets\n---\nTrip them monthly.')
+    check(b'/blog/gfci-outlets' in _get(client, '/blog').data, "new post missing from the index")
+    check(b'/blog/gfci-outlets' in _get(client, '/sitemap.xml').data, "new post missing from the sitemap")
+    _write(blog_cache.POST_TEMPLATE, '<article><h1>{{TITLE}}</h1>{{CONTENT}}</article>')
+    r = _get(client, '/blog/gfci-outlets')
+    check(r.data.startswith(b'<article>'), f"template edit not picked up: {r.data[:100]}")
+
+    # A removed post is gone
+    os.remove(post_path)
+    r = _get(client, '/blog/radon-basics')
+    check(r.status_code == 404, f"removed post: expected 404, got {r.status_code}")
+
+
+@isolated
+@scratch_blog
+def test_blog_conditional():
+    banner("Blog conditional requests (ETag / Last-Modified -> 304)")
+    client = app.test_client()
+    for path in ('/blog', '/blog/radon-basics', '/sitemap.xml'):
+        r = _get(client, path)
+        check(r.status_code == 200, f"{path}: expected 200, got {r.status_code}")
+        etag, last_modified = r.headers.get('ETag'), r.headers.get('Last-Modified')
+        check(etag and last_modified, f"{path}: validators missing: {dict(r.headers)}")
+        r = _get(client, path, **{'If-None-Match': etag})
+        check(r.status_code == 304 and not r.data, f"{path} If-None-Match: expected 304, got {r.status_code}")
+        r = _get(client, path, **{'If-Modified-Since': last_modified})
+        check(r.status_code == 304, f"{path} If-Modified-Since: expected 304, got {r.status_code}")
+        r = _get(client, path, **{'If-None-Match': '"stale"'})
+        check(r.status_code == 200, f"{path} stale ETag: expected 200, got {r.status_code}")
+
+
+@isolated
+@scratch_blog
+def test_blog_gzip():
+    banner("Blog gzip vs identity bodies")
+    client = app.test_client()
+    for path in ('/blog', '/blog/radon-basics', '/sitemap.xml'):
+        plain = _get(client, path)
+        zipped = _get(client, path, **{'Accept-Encoding': 'gzip'})
+        check('Content-Encoding' not in plain.headers, f"{path}: identity response was encoded")
+        check(zipped.headers.get('Content-Encoding') == 'gzip', f"{path}: gzip not used: {dict(zipped.headers)}")
+        check(gzip.decompress(zipped.data) == plain.data, f"{path}: gzip body differs from the identity body")
+        check(plain.headers['Vary'] == zipped.headers['Vary'] == 'Accept-Encoding', f"{path}: Vary missing")
+        check(plain.headers['ETag'] != zipped.headers['ETag'], f"{path}: both encodings share an ETag")
+        r = _get(client, path, **{'Accept-Encoding': 'gzip', 'If-None-Match': zipped.headers['ETag']})
+        check(r.status_code == 304, f"{path}: gzip ETag revalidation: expected 304, got {r.status_code}")
+
+
+@isolated
+@scratch_blog
+def test_blog_unknown_slug():
+    banner("Blog unknown slug (404)")
+    client = app.test_client()
+    for path in ('/blog/no-such-post', '/blog/..%2Fradon-basics', '/blog/radon-basics.md'):
+        r = _get(client, path)
+        check(r.status_code == 404, f"{path}: expected 404, got {r.status_code}")
+    r = _get(client, '/blog/RADON-BASICS')
+    check(r.status_code == 200, f"slugs are lowercased: expected 200, got {r.status_code}")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 BLOG CACHE TESTS", [
+        test_blog_invalidation,
+        test_blog_conditional,
+        test_blog_gzip,
+        test_blog_unknown_slug,
+    ])
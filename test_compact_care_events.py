@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for care-event compaction (compact_care_events.py): sent
+rows of a recurring chain fold into the live row's send log, unsent rows
+and other chains are left alone, and a dry run deletes nothing.
+
+Usage:
+    python test_compact_care_events.py [test_name ...]
+"""
+
+from datetime import date, timedelta
+
+from test_support import app, banner, check, isolated, make_care_event, make_report, run_tests
+from models import CareEvent, CareEventSend
+import compact_care_events
+
+
+@isolated
+def test_compaction():
+    banner("Care event compaction (compact_care_events.compact)")
+    report_id = make_report(address='Compaction Rd')
+    with app.app_context():
+        d = date(2024, 1, 1)
+        # Furnace chain: three sent rows and the live unsent one
+        sent_ids = [make_care_event(report_id, d + timedelta(days=365 * i), sent=True) for i in range(3)]
+        live = make_care_event(report_id, d + timedelta(days=365 * 3))
+        # Same appliance, different message: its own chain, one row, untouched
+        other = make_care_event(report_id, d, message='Replace the furnace filter')
+        # Two unsent rows in one chain: neither is deleted
+        unsent = [make_care_event(report_id, d + timedelta(days=i), appliance='Roof', message='Check the roof')
+                  for i in (0, 1)]
+        # Every row sent: the newest is kept
+        all_sent = [make_care_event(report_id, d + timedelta(days=30 * i), sent=True, appliance='AC',
+                                    interval=30, message='Clean the AC') for i in range(3)]
+
+        chains, removed = compact_care_events.compact(batch_size=1, dry_run=True)
+        check((chains, removed) == (2, 5), f"dry run: {(chains, removed)}")
+        check(CareEvent.query.count() == 10, "a dry run deleted rows")
+
+        chains, removed = compact_care_events.compact(batch_size=1)
+        check((chains, removed) == (2, 5), f"compact: {(chains, removed)}")
+        remaining = {e.id for e in CareEvent.query.filter_by(reportId=report_id)}
+        check(remaining == {live, other, *unsent, all_sent[-1]}, f"kept rows: {remaining}")
+        check(not remaining & set(sent_ids), "sent furnace rows survived")
+        log = CareEventSend.query.filter_by(careEventId=live).order_by(CareEventSend.dueDate).all()
+        check([s.dueDate for s in log] == [d + timedelta(days=365 * i) for i in range(3)],
+              f"furnace send log: {[s.dueDate for s in log]}")
+        check(CareEventSend.query.filter_by(careEventId=all_sent[-1]).count() == 2, "AC send log")
+
+        check(compact_care_events.compact() == (0, 0), "a second run should find nothing to fold")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 CARE EVENT COMPACTION TESTS", [
+        test_compaction,
+    ])
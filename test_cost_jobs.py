@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for async cost-job callbacks (cost_jobs.py): which callback
+URLs the server may POST to, and that a delivery connects to the addresses
+the check vetted rather than resolving the name again. DNS is faked by
+swapping socket.getaddrinfo, so nothing is looked up for real.
+
+Usage:
+    python test_cost_jobs.py [test_name ...]
+"""
+
+import contextlib
+import socket
+import ssl
+import threading
+
+from test_support import banner, check, isolated, run_tests
+import cost_jobs
+
+_real_getaddrinfo = socket.getaddrinfo
+
+
+@contextlib.contextmanager
+def fake_dns(records):
+    """Resolve the hostnames in records ({name: [ip, ...]}) to those
+    addresses; anything else (IP literals) resolves as usual."""
+    lookups = []
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host in records:
+            lookups.append(host)
+            if not records[host]:
+                raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+            family = lambda ip: socket.AF_INET6 if ':' in ip else socket.AF_INET  # noqa: E731
+            return [(family(ip), socket.SOCK_STREAM, socket.IPPROTO_TCP, '', (ip, port)) for ip in records[host]]
+        return _real_getaddrinfo(host, port, *args, **kwargs)
+
+    socket.getaddrinfo = getaddrinfo
+    try:
+        yield lookups
+    finally:
+        socket.getaddrinfo = _real_getaddrinfo
+
+
+@isolated
+def test_callback_url_check():
+    banner("Callback URL check (https + public addresses only)")
+    records = {
+        'partner.example.com': ['93.184.216.34'],
+        'private.example.com': ['10.0.0.5'],
+        'metadata.example.com': ['169.254.169.254'],
+        'mapped.example.com': ['::ffff:127.0.0.1'],
+        'mixed.example.com': ['93.184.216.34', '192.168.1.10'],
+        'gone.example.com': [],
+    }
+    cases = {
+        'https://partner.example.com/hook': None,
+        'http://partner.example.com/hook': 'callback_url must be an https URL',
+        'https://private.example.com/hook': 'callback_url must resolve to a public address',
+        'https://metadata.example.com/latest': 'callback_url must resolve to a public address',
+        'https://mapped.example.com/hook': 'callback_url must resolve to a public address',
+        'https://mixed.example.com/hook': 'callback_url must resolve to a public address',
+        'https://127.0.0.1/hook': 'callback_url must resolve to a public address',
+        'https://gone.example.com/hook': 'callback_url host does not resolve',
+        'not a url': 'callback_url must be an https URL',
+        None: 'callback_url must be an https URL',
+    }
+    with fake_dns(records):
+        for url, want in cases.items():
+            got = cost_jobs.check_callback_url(url)
+            check(got == want, f"check_callback_url({url!r}) = {got!r}, expected {want!r}")
+        addresses, _ = cost_jobs._public_addresses('https://partner.example.com/hook')
+        check(addresses == ['93.184.216.34'], f"vetted addresses: {addresses}")
+
+
+@isolated
+def test_callback_pinned_connect():
+    banner("Callback delivery connects to the vetted address, not a fresh lookup")
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    listener.settimeout(5)
+    accepted = []
+
+    def accept_once():
+        try:
+            conn, _ = listener.accept()
+            accepted.append(conn)
+            conn.close()  # no TLS — the client's handshake just fails
+        except OSError:
+            pass
+
+    t = threading.Thread(target=accept_once)
+    t.start()
+    port = listener.getsockname()[1]
+    # The name itself doesn't resolve: the connection can only reach the
+    # listener through the address handed in
+    with fake_dns({'callback.example.com': []}) as lookups:
+        conn = cost_jobs._PinnedHTTPSConnection('callback.example.com', port, ['127.0.0.1'], timeout=5)
+        try:
+            conn.connect()
+            check(False, "handshake against a plain TCP listener should fail")
+        except (ssl.SSLError, OSError):
+            pass
+        finally:
+            conn.close()
+    t.join(5)
+    listener.close()
+    check(len(accepted) == 1, "the pinned connection never reached the vetted address")
+    check(lookups == [], f"the hostname was resolved again: {lookups}")
+
+
+@isolated
+def test_callback_rebind_refused():
+    banner("Callback not sent when the host now resolves to a private address")
+    with fake_dns({'rebind.example.com': ['127.0.0.1']}) as lookups:
+        sent = cost_jobs._post_callback('https://rebind.example.com/hook', {'job_id': 'j1'}, attempts=1)
+    check(sent is False, "callback to a private address reported as delivered")
+    check(lookups == ['rebind.example.com'], f"expected one check before the attempt: {lookups}")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 COST JOB TESTS", [
+        test_callback_url_check,
+        test_callback_pinned_connect,
+        test_callback_rebind_refused,
+    ])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the local cost matcher (cost_matcher.py): the
+repair/replace scope gate and the 3x cap on locally priced ranges.
+
+Usage:
+    python test_cost_matcher.py [test_name ...]
+"""
+
+from test_support import banner, check, isolated, run_tests
+import cost_matcher
+from cost_lookup import parse_cost_range
+
+
+@isolated
+def test_matcher_scope():
+    banner("Cost matcher repair/replace scope")
+    cases = {
+        'Shingles damaged at ridge, recommend repair': 'repair',
+        'Minor caulk needed around tub': 'repair',
+        'Full roof replacement recommended': 'replace',
+        'Water heater past its useful life': 'replace',
+        'Repair or replace as needed': 'both',
+        'Furnace filter is dirty': None,
+        '': None,
+    }
+    for text, want in cases.items():
+        got = cost_matcher.scope(text)
+        check(got == want, f"scope({text!r}) = {got!r}, expected {want!r}")
+
+    # A repair never matches a replace-only category, and the other way round
+    matcher = cost_matcher.get_matcher()
+    scopes = dict(zip(matcher.keys, matcher.scopes))
+    for m, text in zip(matcher.match([{'finding': f} for f in cases if f]), [f for f in cases if f]):
+        finding_scope = cost_matcher.scope(text)
+        key = m['category_key']
+        if key and finding_scope in ('repair', 'replace'):
+            opposite = 'replace' if finding_scope == 'repair' else 'repair'
+            check(scopes[key] != opposite, f"{text!r} matched {key} ({scopes[key]})")
+
+
+@isolated
+def test_matcher_range_cap():
+    banner("Cost matcher local pricing (3x range cap)")
+    table = cost_matcher.COST_TABLE
+    items = [{'id': key, 'name': entry['display'][:60], 'finding': entry['display'], 'section': None,
+              'category_hint': None} for key, entry in table.items()]
+    priced, remaining = cost_matcher.price_locally(items, 'USD')
+    check(len(priced) + len(remaining) == len(items), "every item is either priced or left for the AI")
+    check(priced, "no category priced its own display text locally")
+    capped = 0
+    for item_id, p in priced.items():
+        low, high = parse_cost_range(p['cost'])
+        check(high <= low * cost_matcher.MAX_RANGE_RATIO, f"{item_id}: {p['cost']} is wider than 3x")
+        check(p['cost_source'] == 'lookup_table' and p['confidence'] == 'matched', f"{item_id}: {p}")
+        if 'larger scope' in p['cost_note']:
+            capped += 1
+            check(high == low * cost_matcher.MAX_RANGE_RATIO, f"{item_id}: capped but {p['cost']}")
+    wide = [k for k in priced if table[k]['usd_high'] > table[k]['usd_low'] * cost_matcher.MAX_RANGE_RATIO]
+    check(capped == len(wide), f"{len(wide)} wide categories priced, {capped} noted as capped")
+    check(cost_matcher.price_locally([], 'USD') == ({}, []), "empty batch")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 COST MATCHER TESTS", [
+        test_matcher_scope,
+        test_matcher_range_cap,
+    ])
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for pre-warmed cost estimates (cost_prewarm.py): the
+/v1/cost-estimate/ingest endpoint, and the drainer's retry schedule — a
+failed chunk backs off instead of retrying at once, rows that gave up are
+queued again by the next ingest, and nothing starts a worker thread unless
+app.start_workers does. Pricing is faked by swapping utils.price_findings.
+
+Usage:
+    python test_cost_prewarm.py [test_name ...]
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from test_support import app, banner, check, isolated, partner_headers, run_tests
+from models import db, CostEstimate
+from partner_api import create_partner
+import cost_prewarm
+import utils
+
+
+@isolated
+def test_cost_ingest():
+    banner("Cost ingest (/v1/cost-estimate/ingest)")
+    client = app.test_client()
+    with app.app_context():
+        _, raw_key = create_partner('Ingest test')
+    headers = partner_headers(raw_key)
+
+    r = client.post('/v1/cost-estimate/ingest', json={}, headers=headers)
+    check(r.status_code == 400, f"no items: expected 400, got {r.status_code}")
+    r = client.post('/v1/cost-estimate/ingest', json={'items': [{'item_id': '1'}]}, headers=headers)
+    check(r.status_code == 202 and r.get_json() == {'queued': 0, 'already_known': 0},
+          f"items without a finding: {r.status_code} {r.get_json()}")
+
+    items = [{'item_id': 'a', 'finding': 'Water heater TPR valve discharge pipe missing', 'section': 'Plumbing'},
+             {'item_id': 'b', 'finding': 'GFCI protection missing at kitchen counter', 'section': 'Electrical'},
+             {'item_id': 'c', 'finding': 'GFCI protection missing at kitchen counter', 'section': 'Electrical'}]
+    r = client.post('/v1/cost-estimate/ingest', json={'items': items, 'report_id': 'ig-1'}, headers=headers)
+    body = r.get_json()
+    check(r.status_code == 202, f"expected 202, got {r.status_code}")
+    check(body == {'queued': 2, 'already_known': 1}, f"first push (one duplicate finding): {body}")
+
+    r = client.post('/v1/cost-estimate/ingest', json={'items': items, 'report_id': 'ig-1'}, headers=headers)
+    body = r.get_json()
+    check(body == {'queued': 0, 'already_known': 3}, f"second push of the same items: {body}")
+
+
+def _failing_pricer(findings, currency='USD'):
+    raise RuntimeError('pricing API down')
+
+
+def _working_pricer(findings, currency='USD'):
+    return {f['id']: {'cost': '$100 - $200', 'trade': 'Plumber', 'cost_note': '', 'confidence': 'estimated'}
+            for f in findings}
+
+
+@isolated
+def test_prewarm_backoff():
+    banner("Pre-warm retries (backoff, give up, re-queue on ingest)")
+    items = [{'id': 'a', 'finding': 'Water heater TPR valve discharge pipe missing', 'section': 'Plumbing'},
+             {'id': 'b', 'finding': 'Drain line leaking under kitchen sink', 'section': 'Plumbing'}]
+    real_pricer, real_pause = utils.price_findings, cost_prewarm.PREWARM_PAUSE_SECONDS
+    cost_prewarm.PREWARM_PAUSE_SECONDS = 0
+    threads = threading.active_count()
+    try:
+        with app.app_context():
+            check(cost_prewarm.enqueue(items, 'USD') == 2, "two new findings should be queued")
+            cost_prewarm.wake_worker()
+            check(threading.active_count() == threads, "wake_worker started a thread")
+
+            # A failed chunk goes back to pending, but not before its backoff
+            utils.price_findings = _failing_pricer
+            check(cost_prewarm.drain_pending() == 2, "the first drain should claim both rows")
+            rows = CostEstimate.query.all()
+            check({r.status for r in rows} == {'pending'} and {r.attempts for r in rows} == {1},
+                  f"after one failure: {[(r.status, r.attempts) for r in rows]}")
+            earliest = datetime.utcnow() + timedelta(seconds=cost_prewarm.PREWARM_BACKOFF_SECONDS * 0.7)
+            check(all(r.nextAttemptAt > earliest for r in rows), "a failed row is due again too soon")
+            check(cost_prewarm.drain_pending() == 0, "rows still backing off were claimed again")
+            wait = cost_prewarm._seconds_until_next_retry()
+            check(1 <= wait <= cost_prewarm.PREWARM_BACKOFF_SECONDS * 1.2, f"worker would sleep {wait}s")
+
+            # The last attempt fails for good
+            CostEstimate.query.update({'attempts': cost_prewarm.PREWARM_MAX_ATTEMPTS - 1,
+                                       'nextAttemptAt': datetime.utcnow() - timedelta(seconds=1)})
+            db.session.commit()
+            cost_prewarm.drain_pending()
+            check({r.status for r in CostEstimate.query.all()} == {'failed'}, "rows should have given up")
+            check(cost_prewarm.drain_pending() == 0, "failed rows were claimed")
+
+            # The next ingest of the same findings queues them again, due now
+            check(cost_prewarm.enqueue(items, 'USD') == 2, "failed findings should be re-queued")
+            rows = CostEstimate.query.all()
+            check({(r.status, r.attempts) for r in rows} == {('pending', 0)},
+                  f"re-queued rows: {[(r.status, r.attempts) for r in rows]}")
+            utils.price_findings = _working_pricer
+            check(cost_prewarm.drain_pending() == 2, "re-queued rows should be due at once")
+            rows = CostEstimate.query.all()
+            check({(r.status, r.low, r.high) for r in rows} == {('done', 100, 200)},
+                  f"priced rows: {[(r.status, r.low, r.high) for r in rows]}")
+            check(cost_prewarm.enqueue(items, 'USD') == 0, "fresh prices were re-queued")
+    finally:
+        utils.price_findings = real_pricer
+        cost_prewarm.PREWARM_PAUSE_SECONDS = real_pause
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 COST PRE-WARM TESTS", [
+        test_cost_ingest,
+        test_prewarm_backoff,
+    ])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the outbound email queue (email_queue.py): the admin
+stats endpoint, and enqueue — idempotent, re-queueing only a failed
+message, and never starting a sender thread itself (only
+app.start_workers does).
+
+Usage:
+    python test_email_queue.py [test_name ...]
+"""
+
+import threading
+from email.message import EmailMessage
+
+from test_support import ADMIN_EMAIL, app, banner, check, isolated, login, make_user, run_tests
+from models import db, OutboundEmail
+import email_queue
+
+
+@isolated
+def test_email_queue_stats():
+    banner("Email queue stats (/api/admin/email-queue)")
+    make_user(ADMIN_EMAIL)
+    make_user('queue-buyer@example.com')
+
+    r = login('queue-buyer@example.com').get('/api/admin/email-queue')
+    check(r.status_code == 403, f"non-admin: expected 403, got {r.status_code}")
+    admin = login(ADMIN_EMAIL)
+    r = admin.get('/api/admin/email-queue?window=abc')
+    check(r.status_code == 400, f"bad window: expected 400, got {r.status_code}")
+    r = admin.get('/api/admin/email-queue?window=30')
+    body = r.get_json()
+    check(r.status_code == 200, f"admin: expected 200, got {r.status_code}")
+    check(set(body['by_status']) == {'pending', 'sending', 'sent', 'failed'}, f"by_status: {body['by_status']}")
+    check(body['depth'] == body['by_status']['pending'] + body['by_status']['sending'], f"depth: {body}")
+    check(body['window_minutes'] == 30, f"window_minutes: {body['window_minutes']}")
+
+
+@isolated
+def test_enqueue():
+    banner("Email enqueue (idempotent, re-queues failed, starts no thread)")
+    msg = EmailMessage()
+    msg['From'], msg['To'], msg['Subject'] = 'care@lot7.ai', 'owner@example.com', 'Furnace service due'
+    msg.set_content('Time to service the furnace.')
+    threads = threading.active_count()
+    with app.app_context():
+        first = email_queue.enqueue(msg, 'care_reminder', 'care:1')
+        check(email_queue.enqueue(msg, 'care_reminder', 'care:1') == first, "same key queued twice")
+        check(OutboundEmail.query.count() == 1, "duplicate row for one idempotency key")
+        check(db.session.get(OutboundEmail, first).status == 'pending', "new message not pending")
+        check(threading.active_count() == threads, "enqueue started a sender thread")
+
+        # Sent: left alone. Failed for good: queued again from scratch
+        OutboundEmail.query.filter_by(id=first).update({'status': 'sent'})
+        db.session.commit()
+        email_queue.enqueue(msg, 'care_reminder', 'care:1')
+        db.session.expire_all()
+        check(db.session.get(OutboundEmail, first).status == 'sent', "a sent message was re-queued")
+        OutboundEmail.query.filter_by(id=first).update(
+            {'status': 'failed', 'attempts': email_queue.EMAIL_MAX_ATTEMPTS})
+        db.session.commit()
+        email_queue.enqueue(msg, 'care_reminder', 'care:1')
+        db.session.expire_all()
+        row = db.session.get(OutboundEmail, first)
+        check((row.status, row.attempts) == ('pending', 0),
+              f"failed message after re-enqueue: {row.status}, {row.attempts}")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 EMAIL QUEUE TESTS", [
+        test_email_queue_stats,
+        test_enqueue,
+    ])
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for background bulk exports (export_jobs.py and the
+/api/export routes): who may start one, building the zip off the request,
+polling and downloading it, and the resume sweep that rebuilds abandoned
+jobs and expires old zips. Builds run with include_pdfs off, so no PDF is
+rendered.
+
+Usage:
+    python test_export_jobs.py [test_name ...]
+"""
+
+import io
+import json
+import os
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+from test_support import ADMIN_EMAIL, app, banner, check, isolated, login, make_report, make_user, run_tests
+from models import db, ExportJob
+import export_jobs
+
+
+def _wait_done(client, job_id):
+    for _ in range(100):
+        body = client.get(f'/api/export/jobs/{job_id}').get_json()
+        if body['status'] != 'processing':
+            return body
+        time.sleep(0.1)
+    check(False, f"export {job_id} never finished")
+
+
+@isolated
+def test_export_job_flow():
+    banner("Bulk export job (/api/export/reports -> poll -> download)")
+    realtor_id = make_user('export-realtor@example.com', role='realtor')
+    make_user('other-realtor@example.com', role='realtor')
+    make_user('export-buyer@example.com')
+    make_user(ADMIN_EMAIL)
+    mine = {make_report(realtor_id, address=f'{i} Export Way') for i in range(3)}
+    make_report(make_user('someone-else@example.com'), address='Not mine')
+
+    r = login('export-buyer@example.com').post('/api/export/reports', json={})
+    check(r.status_code == 403, f"buyer: expected 403, got {r.status_code}")
+    admin = login(ADMIN_EMAIL)
+    r = admin.post('/api/export/reports', json={})
+    check(r.status_code == 400, f"admin without a selection: expected 400, got {r.status_code}")
+    r = admin.post('/api/export/reports', json={'start': '2026-13-01'})
+    check(r.status_code == 400, f"bad date: expected 400, got {r.status_code}")
+
+    client = login('export-realtor@example.com')
+    r = client.post('/api/export/reports', json={'pdfs': False})
+    check(r.status_code == 202, f"expected 202, got {r.status_code} {r.get_json()}")
+    job_id = r.get_json()['job_id']
+    body = _wait_done(client, job_id)
+    check(body['status'] == 'done' and body['size_bytes'] > 0, f"finished job: {body}")
+
+    r = client.get(body['download_url'])
+    check(r.status_code == 200 and r.mimetype == 'application/zip', f"download: {r.status_code} {r.mimetype}")
+    zf = zipfile.ZipFile(io.BytesIO(r.data))
+    check(zf.namelist() == ['analyses.ndjson'], f"zip entries: {zf.namelist()}")
+    ids = {json.loads(line)['id'] for line in zf.read('analyses.ndjson').decode().splitlines()}
+    check(ids == mine, f"a realtor's export holds exactly their reports: {ids}")
+
+    other = login('other-realtor@example.com')
+    check(other.get(f'/api/export/jobs/{job_id}').status_code == 404, "another user can poll the export")
+    check(other.get(body['download_url']).status_code == 404, "another user can download the export")
+
+
+@isolated
+def test_export_resume_and_expiry():
+    banner("Export resume sweep (rebuild abandoned jobs, expire old zips)")
+    user_id = make_user('export-owner@example.com', role='realtor')
+    make_report(user_id)
+    client = login('export-owner@example.com')
+    old_id = client.post('/api/export/reports', json={'pdfs': False}).get_json()['job_id']
+    old = _wait_done(client, old_id)
+    with app.app_context():
+        # Done a day ago; a queued job nobody claimed; a build whose
+        # process died
+        job = db.session.get(ExportJob, old_id)
+        old_path = job.path
+        job.completedAt = datetime.utcnow() - timedelta(hours=export_jobs.EXPORT_KEEP_HOURS + 1)
+        queued = export_jobs.create(user_id, None, None, user_id, False)
+        queued.createdAt = datetime.utcnow() - timedelta(seconds=export_jobs.QUEUED_GRACE_SECONDS + 5)
+        dead = export_jobs.create(user_id, None, None, user_id, False)
+        dead.status, dead.claimToken = 'building', 'dead-process'
+        db.session.commit()
+        ExportJob.query.filter_by(id=dead.id).update(
+            {'updatedAt': datetime.utcnow() - timedelta(minutes=export_jobs.STALE_MINUTES + 1)})
+        db.session.commit()
+        queued_id, dead_id = queued.id, dead.id
+
+    export_jobs.resume(app)
+    r = client.get(old['download_url'])
+    check(r.status_code == 410, f"expired export: expected 410, got {r.status_code}")
+    check(not os.path.exists(old_path), "expired zip left on disk")
+    for job_id in (queued_id, dead_id):
+        body = client.get(f'/api/export/jobs/{job_id}').get_json()
+        check(body['status'] == 'done', f"resumed job {job_id}: {body}")
+    with app.app_context():
+        check(export_jobs._claim(dead_id) is None, "a finished job could be claimed again")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 EXPORT JOB TESTS", [
+        test_export_job_flow,
+        test_export_resume_and_expiry,
+    ])
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for /api/my-reports paging: the keyset cursor walks every
+report once, ties and NULL createdAt rows included, and rejects a cursor
+it didn't issue.
+
+Usage:
+    python test_my_reports.py [test_name ...]
+"""
+
+from datetime import datetime, timedelta
+
+from test_support import banner, check, isolated, login, make_report, make_user, run_tests
+
+
+@isolated
+def test_my_reports_cursor():
+    banner("My reports paging (/api/my-reports cursor)")
+    user_id = make_user('pager@example.com')
+    base = datetime(2025, 1, 1)
+    expected = []
+    # Ties on createdAt and NULL createdAt rows (pre-migration data) must
+    # page through without gaps or repeats
+    for i, created in enumerate([base, base, base + timedelta(days=1), 'null', 'null', base - timedelta(days=3)]):
+        expected.append(make_report(user_id, address=f'{i} Pager Ave', created=created))
+    make_report(make_user('someone-else@example.com'), address='Not mine')
+    client = login('pager@example.com')
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        r = client.get('/api/my-reports?limit=2' + (f'&cursor={cursor}' if cursor else ''))
+        check(r.status_code == 200, f"page {pages}: {r.status_code} {r.get_json()}")
+        body = r.get_json()
+        check(body['total'] == len(expected), f"total: {body['total']}")
+        seen += [row['id'] for row in body['reports']]
+        pages += 1
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+        check(pages < 10, "cursor never ran out")
+    check(len(seen) == len(set(seen)), f"a report came back twice: {seen}")
+    check(set(seen) == set(expected), f"missing reports: {set(expected) - set(seen)}")
+    check(set(seen[-2:]) == set(expected[3:5]), "NULL createdAt rows should come last")
+
+    r = client.get('/api/my-reports?cursor=not-a-cursor')
+    check(r.status_code == 400, f"bad cursor: expected 400, got {r.status_code}")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 MY REPORTS TESTS", [
+        test_my_reports_cursor,
+    ])
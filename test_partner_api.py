@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for partner API keys and rate limits (partner_api.py):
+401 without a valid key, 429 + Retry-After once a bucket is empty, and the
+request token given back when the item bucket refuses a batch.
+
+Usage:
+    python test_partner_api.py [test_name ...]
+"""
+
+from test_support import app, banner, check, isolated, partner_headers, run_tests
+from partner_api import create_partner
+
+
+@isolated
+def test_partner_auth():
+    banner("Partner API auth (401 without a valid key)")
+    client = app.test_client()
+    r = client.get('/v1/cost-estimate/jobs/nope')
+    check(r.status_code == 401, f"no key: expected 401, got {r.status_code}")
+    r = client.get('/v1/cost-estimate/jobs/nope', headers=partner_headers('lot7_not_a_real_key'))
+    check(r.status_code == 401, f"bad key: expected 401, got {r.status_code}")
+
+    with app.app_context():
+        _, raw_key = create_partner('Auth test')
+    r = client.get('/v1/cost-estimate/jobs/nope', headers=partner_headers(raw_key))
+    check(r.status_code == 404, f"valid key, unknown job: expected 404, got {r.status_code}")
+
+
+@isolated
+def test_partner_rate_limit():
+    banner("Partner API rate limit (429 + Retry-After, refund on an item 429)")
+    client = app.test_client()
+    with app.app_context():
+        _, raw_key = create_partner('Rate test', requests_per_minute=1)
+    headers = partner_headers(raw_key)
+    r = client.get('/v1/cost-estimate/jobs/nope', headers=headers)
+    check(r.status_code == 404, f"first request: expected 404, got {r.status_code}")
+    r = client.get('/v1/cost-estimate/jobs/nope', headers=headers)
+    check(r.status_code == 429, f"second request: expected 429, got {r.status_code}")
+    check(int(r.headers.get('Retry-After', 0)) >= 1, f"Retry-After missing: {dict(r.headers)}")
+    check(r.get_json()['retry_after'] >= 1, "retry_after missing from the body")
+
+    # An item-bucket 429 gives the request token back: with two requests a
+    # minute, the request after it still gets through
+    with app.app_context():
+        _, raw_key = create_partner('Refund test', requests_per_minute=2, items_per_minute=2)
+    headers = partner_headers(raw_key)
+    items = [{'item_id': str(i), 'finding': f'Loose handrail at stair {i}'} for i in range(2)]
+    r = client.post('/v1/cost-estimate/ingest', json={'items': items}, headers=headers)
+    check(r.status_code == 202, f"2 items against a 2-item bucket: expected 202, got {r.status_code}")
+    r = client.post('/v1/cost-estimate/ingest', json={'items': items[:1]}, headers=headers)
+    check(r.status_code == 429, f"item bucket empty: expected 429, got {r.status_code}")
+    r = client.get('/v1/cost-estimate/jobs/nope', headers=headers)
+    check(r.status_code == 404, f"after an item 429: expected the refunded request to pass, got {r.status_code}")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 PARTNER API TESTS", [
+        test_partner_auth,
+        test_partner_rate_limit,
+    ])
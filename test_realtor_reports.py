@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for realtor reports (realtor_reports.py and the
+/api/realtor-report routes): a run can only be polled by the users it was
+handed to, and bulk mode ranks a portfolio and pages new results. Runs are seeded as already finished, so no report is fetched
+and no model is called.
+
+Usage:
+    python test_realtor_reports.py [test_name ...]
+"""
+
+from datetime import datetime
+
+from test_support import app, banner, check, isolated, login, make_user, run_tests
+from models import db, RealtorReport
+from extracted_findings import normalize_url, url_hash
+import realtor_reports
+
+
+def _done_run(url, user_id, urgent, cost_low, cost_high):
+    """A finished run for url, so request_bulk reuses it and starts nothing."""
+    with app.app_context():
+        run = RealtorReport(reportUrl=normalize_url(url), urlHash=url_hash(url), status='done',
+                            requestedBy=user_id, result='{"urgent_items": [], "attention_items": []}',
+                            completedAt=datetime.utcnow(), address=url, currency='USD',
+                            urgentCount=urgent, attentionCount=0, costLow=cost_low, costHigh=cost_high)
+        db.session.add(run)
+        db.session.commit()
+        return run.id
+
+
+@isolated
+def test_realtor_run_access():
+    banner("Realtor run access (only users the run was handed to)")
+    owner_id = make_user('run-owner@example.com', role='realtor')
+    make_user('second-realtor@example.com', role='realtor')
+    make_user('third-realtor@example.com', role='realtor')
+    make_user('run-buyer@example.com')
+    url = 'https://example.com/listing/1'
+    run_id = _done_run(url, owner_id, 1, 400, 800)
+
+    r = login('run-owner@example.com').get(f'/api/realtor-report/{run_id}')
+    check(r.status_code == 200, f"own run: expected 200, got {r.status_code}")
+    r = login('run-buyer@example.com').get(f'/api/realtor-report/{run_id}')
+    check(r.status_code == 403, f"buyer: expected 403, got {r.status_code}")
+    second = login('second-realtor@example.com')
+    r = second.get(f'/api/realtor-report/{run_id}')
+    check(r.status_code == 404, f"a run not handed over: expected 404, got {r.status_code}")
+
+    # Asking for the same listing hands the cached run over
+    r = second.post('/api/realtor-report', json={'report_url': url})
+    check(r.status_code == 200 and r.get_json()['job_id'] == run_id,
+          f"same URL: expected the cached run, got {r.status_code} {r.get_json()}")
+    r = second.get(f'/api/realtor-report/{run_id}')
+    check(r.status_code == 200, f"after asking for it: expected 200, got {r.status_code}")
+    r = login('third-realtor@example.com').get(f'/api/realtor-report/{run_id}')
+    check(r.status_code == 404, f"a third realtor: expected 404, got {r.status_code}")
+
+
+@isolated
+def test_bulk_realtor():
+    banner("Bulk realtor reports (/api/realtor-report/bulk)")
+    realtor_id = make_user('bulk-realtor@example.com', role='realtor')
+    make_user('other-realtor@example.com', role='realtor')
+    make_user('bulk-buyer@example.com')
+    client = login('bulk-realtor@example.com')
+
+    r = login('bulk-buyer@example.com').post('/api/realtor-report/bulk', json={'report_urls': []})
+    check(r.status_code == 403, f"buyer: expected 403, got {r.status_code}")
+    r = client.post('/api/realtor-report/bulk', json={'report_urls': 'https://example.com/a'})
+    check(r.status_code == 400, f"non-list: expected 400, got {r.status_code}")
+    r = client.post('/api/realtor-report/bulk', json={'report_urls': []})
+    check(r.status_code == 400, f"empty list: expected 400, got {r.status_code}")
+    too_many = [f'https://example.com/r/{i}' for i in range(realtor_reports.BULK_MAX_URLS + 1)]
+    r = client.post('/api/realtor-report/bulk', json={'report_urls': too_many})
+    check(r.status_code == 400, f"{len(too_many)} links: expected 400, got {r.status_code}")
+
+    urls = ['https://example.com/bulk/1', 'https://example.com/bulk/2', 'https://example.com/bulk/3']
+    ids = [_done_run(urls[0], realtor_id, 0, 500, 900),
+           _done_run(urls[1], realtor_id, 2, 100, 200),
+           _done_run(urls[2], realtor_id, 0, 3000, 6000)]
+    r = client.post('/api/realtor-report/bulk', json={'report_urls': urls + [urls[0]]})
+    check(r.status_code == 202, f"expected 202, got {r.status_code} {r.get_json()}")
+    body = r.get_json()
+    check(body['counts'] == {'total': 3, 'done': 3, 'running': 0, 'error': 0}, f"counts: {body['counts']}")
+    check(body['complete'] is True, "all runs were reused, so the batch should be complete")
+    ranked = [l['job_id'] for l in body['listings']]
+    check(ranked == [ids[1], ids[2], ids[0]], f"rank (urgent, then cost): {ranked}")
+    check(body['totals']['USD']['cost_low'] == 3600, f"totals: {body['totals']}")
+
+    r = client.get(f"/api/realtor-report/bulk/{body['batch_id']}?since={body['as_of']}")
+    check(r.status_code == 200 and r.get_json()['results'] == {},
+          f"poll since as_of: expected no new results, got {r.get_json()}")
+    r = login('other-realtor@example.com').get(f"/api/realtor-report/bulk/{body['batch_id']}")
+    check(r.status_code == 404, f"another realtor's batch: expected 404, got {r.status_code}")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 REALTOR REPORT TESTS", [
+        test_realtor_run_access,
+        test_bulk_realtor,
+    ])
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Behavior tests for the care-reminder dispatcher (send_care_reminders.py):
+the keyset-paged due queue, digest batches that never split a recipient
+below the hard cut, and releasing timed-out claims.
+
+Usage:
+    python test_send_care_reminders.py [test_name ...]
+"""
+
+from datetime import date, datetime, timedelta
+
+from test_support import app, banner, check, isolated, make_care_event, make_report, run_tests
+from models import db, CareEvent
+import send_care_reminders
+
+
+@isolated
+def test_dispatcher_queue():
+    banner("Reminder dispatcher queue (send_care_reminders)")
+    today = date(2030, 6, 1)
+    due = today - timedelta(days=1)
+    expected = {}
+    for n, count in (('a', 3), ('b', 1), ('c', 4)):
+        report_id = make_report(email=f'{n}-owner@example.com', address=f'{n} Dispatch Ln')
+        expected[f'{n}-owner@example.com'] = [make_care_event(report_id, due, appliance=f'Thing {i}')
+                                              for i in range(count)]
+    make_care_event(make_report(email='muted@example.com', alerts=False), due)
+    make_care_event(make_report(email='future@example.com'), today + timedelta(days=5))
+    with app.app_context():
+        # Keyset pages smaller than the queue still yield every row once,
+        # in (recipient, id) order
+        queue = list(send_care_reminders._due_queue(today, page_size=2))
+        want = sorted((r, i) for r, ids in expected.items() for i in ids)
+        check([tuple(q) for q in queue] == want, f"queue: {queue}")
+
+        # Batches are cut between recipients only (c's 4 events stay under
+        # the 2 x size hard cut)
+        batches = list(send_care_reminders._batches(iter(want), 3))
+        for batch in batches:
+            for recipient in {r for r, _ in batch}:
+                check(sum(r == recipient for b in batches for r, _ in b) == sum(r == recipient for r, _ in batch),
+                      f"{recipient} split across batches: {batches}")
+        check(sum(len(b) for b in batches) == len(want), "batches lost events")
+        # ...unless one recipient alone reaches 2 x size
+        big = [('x@example.com', str(i)) for i in range(5)]
+        check([len(b) for b in send_care_reminders._batches(iter(big), 2)] == [4, 1], "hard cut at 2 x size")
+
+        # Claims: a fresh one is left alone, a stale one released
+        ids = expected['a-owner@example.com']
+        now = datetime.utcnow()
+        CareEvent.query.filter_by(id=ids[0]).update({'dispatchKey': 'old-run', 'claimedAt': now - timedelta(hours=5)})
+        CareEvent.query.filter_by(id=ids[1]).update({'dispatchKey': 'live-run', 'claimedAt': now})
+        db.session.commit()
+        check(len(list(send_care_reminders._due_queue(today))) == len(want) - 2, "claimed rows still queued")
+        cutoff = now - timedelta(minutes=send_care_reminders.CLAIM_TIMEOUT_MINUTES)
+        check(send_care_reminders._release_claims(older_than=cutoff) == 1, "expected one stale claim released")
+        check(db.session.get(CareEvent, ids[1]).dispatchKey == 'live-run', "a live claim was released")
+        check(send_care_reminders._release_claims() == 1, "--release-stale should free the rest")
+
+
+if __name__ == "__main__":
+    run_tests("LOT7 CARE REMINDER TESTS", [
+        test_dispatcher_queue,
+    ])
@@ -0,0 +1,142 @@
+"""
+Shared setup for the in-process behavior tests (test_<module>.py).
+
+Unlike test_backend.py those don't need a running server: they drive the
+app with Flask's test client against a throwaway SQLite database, with
+background workers off and no AI or cost-API key, so nothing leaves the
+machine. Importing this module sets that up — it must be imported before
+anything imports app.
+
+Every test is wrapped in @isolated, which empties every table first, so a
+test never sees another's rows and any one of them can run alone:
+
+    python test_partner_api.py                      # the whole file
+    python test_partner_api.py test_partner_auth    # just one test
+"""
+
+import atexit
+import functools
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+# Before the app is imported: app.py reads these at import time, and
+# load_dotenv() never overrides a variable that is already set
+TMP_DIR = tempfile.mkdtemp(prefix='lot7_test_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TMP_DIR, 'test.db')}"
+os.environ['PDF_CACHE_DIR'] = os.path.join(TMP_DIR, 'pdf_cache')
+os.environ['EXPORT_DIR'] = os.path.join(TMP_DIR, 'exports')
+os.environ['BACKGROUND_WORKERS'] = '0'
+os.environ['ANTHROPIC_API_KEY'] = ''
+os.environ['IG_COST_API_KEY'] = ''
+# Registered before app.py registers its own exit hooks, so it runs after
+# them (atexit is last-in, first-out) and they still find the database
+atexit.register(shutil.rmtree, TMP_DIR, ignore_errors=True)
+
+import app as app_module  # noqa: E402
+from app import app, bcrypt  # noqa: E402
+from models import db, User, InspectionReport, CareEvent  # noqa: E402
+
+ADMIN_EMAIL = sorted(app_module.ADMIN_EMAILS)[0]
+
+
+def banner(name):
+    print("\n" + "=" * 60)
+    print(f"Testing: {name}")
+    print("=" * 60)
+
+
+def check(condition, message):
+    """Raise with message unless condition holds — the test runner reports
+    it as the test's failure."""
+    if not condition:
+        raise AssertionError(message)
+
+
+def reset_db():
+    """Empty every table, children first."""
+    with app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+
+
+def isolated(fn):
+    """Run the test against an empty database."""
+    @functools.wraps(fn)
+    def wrapper():
+        reset_db()
+        return fn()
+    return wrapper
+
+
+def make_user(email, role='buyer'):
+    with app.app_context():
+        user = User(email=email, role=role, password_hash=bcrypt.generate_password_hash('pw').decode('utf-8'))
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def login(email):
+    client = app.test_client()
+    r = client.post('/api/auth/login', json={'email': email, 'password': 'pw'})
+    check(r.status_code == 200, f"login as {email}: {r.status_code} {r.get_data(as_text=True)[:200]}")
+    return client
+
+
+def make_report(user_id=None, address='1 Test St', created=None, alerts=True, email=None):
+    """created: a datetime, 'null' for a NULL createdAt (pre-migration
+    rows), or None for the column default."""
+    with app.app_context():
+        report = InspectionReport(address=address, user_id=user_id, customerEmail=email, alertsEnabled=alerts)
+        db.session.add(report)
+        db.session.commit()
+        if created is not None:
+            # createdAt has a Python-side default, so it's overwritten after
+            # the insert
+            InspectionReport.query.filter_by(id=report.id).update(
+                {'createdAt': None if created == 'null' else created}, synchronize_session=False)
+            db.session.commit()
+        return report.id
+
+
+def make_care_event(report_id, due, message='Service the furnace', sent=False, interval=365,
+                    appliance='Furnace', dispatch_key=None, claimed_at=None):
+    with app.app_context():
+        event = CareEvent(reportId=report_id, appliance=appliance, eventType='age_based', dueDate=due,
+                          recurringIntervalDays=interval, message=message, sent=sent,
+                          sentAt=datetime.combine(due, datetime.min.time()) if sent else None,
+                          dispatchKey=dispatch_key, claimedAt=claimed_at)
+        db.session.add(event)
+        db.session.commit()
+        return event.id
+
+
+def partner_headers(raw_key):
+    return {'Authorization': f'Bearer {raw_key}'}
+
+
+def run_tests(title, tests):
+    """Run tests (or only those named on the command line), print a
+    SUCCESS/ERROR line for each and exit 1 if any failed."""
+    selected = [t for t in tests if t.__name__ in sys.argv[1:]] or tests
+    print("\n" + "=" * 60)
+    print(title)
+    print("=" * 60)
+    failed = []
+    for test in selected:
+        try:
+            test()
+            print("SUCCESS")
+        except Exception as e:
+            print(f"ERROR: {type(e).__name__}: {e}")
+            failed.append(test.__name__)
+
+    print("\n" + "=" * 60)
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"All {len(selected)} test(s) passed")
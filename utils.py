@@ -1,6 +1,7 @@
 import os
 import json
 import base64
+from html import escape
 from anthropic import Anthropic
 import smtplib
 from email.mime.text import MIMEText
@@ -20,7 +21,7 @@ def extract_text_from_pdf(pdf_path):
         raise Exception(f"Error extracting PDF text: {str(e)}")
 
 
-def fetch_report_text_from_url(url, timeout=20, include_anchors=False, summary_only=False):
+def fetch_report_text_from_url(url, timeout=20, include_anchors=False, summary_only=False, session=None):
     """Fetch a hosted inspection report web page and return its visible text.
 
     Format-agnostic — works for any platform that serves the report as an HTML
@@ -45,23 +46,53 @@ def fetch_report_text_from_url(url, timeout=20, include_anchors=False, summary_o
     printed warning) if no summary block is found, so callers never
     silently get an empty report. Inspectagram-specific; other platforms
     fall back to the full page.
+
+    session: optional requests.Session to fetch through, so a caller pulling
+    many reports off the same host (realtor bulk mode) reuses a bounded set
+    of keep-alive connections instead of a new TCP + TLS handshake per
+    report. Without one it's a plain one-shot urllib request, as before.
     """
-    import re
+    return report_text_from_html(fetch_report_html(url, timeout=timeout, session=session),
+                                 include_anchors=include_anchors, summary_only=summary_only)
+
+
+def fetch_report_html(url, timeout=20, session=None):
+    """The raw HTML of a hosted report page — fetch_report_text_from_url's
+    network half. A caller that needs more than one text view of the same
+    page (the buyer upload keeps the full text and fingerprints the Summary
+    section, see extracted_findings.py) fetches once and calls
+    report_text_from_html for each view."""
     import urllib.request
-    from html.parser import HTMLParser
     from urllib.parse import urlparse
 
     parsed = urlparse(url)
     if parsed.scheme not in ('http', 'https'):
         raise ValueError("Link must start with http:// or https://")
 
-    req = urllib.request.Request(url, headers={
+    headers = {
         'User-Agent': 'Mozilla/5.0 (compatible; Lot7Bot/1.0)',
         'Accept': 'text/html,application/xhtml+xml',
-    })
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        charset = resp.headers.get_content_charset() or 'utf-8'
-        html = resp.read().decode(charset, errors='replace')
+    }
+    if session is not None:
+        resp = session.get(url, headers=headers, timeout=timeout)
+        resp.raise_for_status()
+        # requests assumes ISO-8859-1 when text/html names no charset; the
+        # urllib path below (and these report pages) mean utf-8
+        has_charset = 'charset=' in resp.headers.get('Content-Type', '').lower()
+        html = resp.content.decode(resp.encoding if has_charset else 'utf-8', errors='replace')
+    else:
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            charset = resp.headers.get_content_charset() or 'utf-8'
+            html = resp.read().decode(charset, errors='replace')
+    return html
+
+
+def report_text_from_html(html, include_anchors=False, summary_only=False):
+    """Visible text of a report page's HTML — fetch_report_text_from_url's
+    parsing half; see there for include_anchors and summary_only."""
+    import re
+    from html.parser import HTMLParser
 
     if summary_only:
         start = html.find('class="page full summary"')
@@ -165,7 +196,18 @@ RULES:
     return message.content[0].text
 
 
-def generate_structured_analysis(extracted_text):
+KNOWN_ISSUES_NOTE = """
+
+═══════════════════════════════════════════════════════
+ALREADY EXTRACTED
+═══════════════════════════════════════════════════════
+
+This report's IMMEDIATE and ATTENTION findings were already extracted from its Summary section by an earlier read; they are listed below. Return "urgent_items": [] and "maintenance_items": [] — do NOT repeat them, and do NOT put them in category_items either. Fill every other field exactly as instructed above.
+
+"""
+
+
+def generate_structured_analysis(extracted_text, pass1_findings=None, known_issues=None, on_pass1=None):
     """
     Two-pass analysis:
     Pass 1 — Pure extraction. Reads the full report, finds the inspector's severity
@@ -174,6 +216,16 @@ def generate_structured_analysis(extracted_text):
     Pass 2 — Enrichment. Receives Pass 1's classified findings and adds cost
               estimates, timelines, DIY flags, and budget totals. Cannot reclassify
               severity because it never sees the raw report text.
+
+    When an earlier run already read this report (extracted_findings.py),
+    Pass 1 is skipped or narrowed:
+    pass1_findings — a complete Pass 1 result; go straight to Pass 2.
+    known_issues — {"urgent_items": [...], "maintenance_items": [...]} in
+              Pass 1's shape, e.g. from the realtor pipeline. Pass 1 still
+              reads the report but leaves those two lists alone and only
+              writes out the rest (category items, checklist, location, ...).
+    on_pass1 — called with a copy of a freshly extracted Pass 1 result, so the
+              caller can store it for the next run.
     """
     from cost_lookup import COST_TABLE
 
@@ -319,44 +371,56 @@ PLACEMENT RULES:
 - category_items: all remaining documented observations not already in urgent or maintenance. Every finding must appear somewhere.
 - checklist: 6-10 items covering major systems. passed:true = good/satisfactory. notable:true = not inspected or limited scope. Do not repeat items already above."""
 
-    pass1_findings = None
-    last_err = None
-    for max_tok in [20000, 20000]:  # high ceiling: big reports succeed on 1st try; 2nd attempt is a transient-error retry, not token escalation
-        try:
-            print(f"Pass 1 (extraction) attempt with max_tokens={max_tok}...")
-            msg = client.messages.create(
-                model="claude-sonnet-4-6",
-                max_tokens=max_tok,
-                temperature=0,
-                system=pass1_system,
-                messages=[{"role": "user", "content": extracted_text}]
-            )
-            raw = clean_raw(msg.content[0].text)
-            pass1_findings = attempt_parse(raw)
-            print(f"Pass 1 succeeded. Severity system found: {pass1_findings.get('severity_system_found')}. Description: {pass1_findings.get('severity_system_description')}")
-            print(f"  Urgent: {len(pass1_findings.get('urgent_items', []))}  Maintenance: {len(pass1_findings.get('maintenance_items', []))}  Category: {len(pass1_findings.get('category_items', []))}")
-            break
-        except Exception as e:
-            last_err = e
-            retry_msg = 'Retrying with more tokens...' if max_tok < 12000 else 'All retries exhausted.'
-            print(f"Pass 1 failed at max_tokens={max_tok}: {last_err}. {retry_msg}")
-
     if pass1_findings is None:
-        print("Pass 1 failed entirely — using minimal fallback.")
-        fallback = {
-            "condition": "Needs Attention",
-            "currency": "USD",
-            "location": "Unknown",
-            "address": "Address not found",
-            "urgent_items": [],
-            "maintenance_items": [],
-            "category_items": [],
-            "checklist": [],
-            "budget_now": "~$1,500",
-            "budget_5yr": "~$1,500",
-            "_parse_error": str(last_err)
-        }
-        return json.dumps(fallback)
+        system = pass1_system
+        if known_issues:
+            system += KNOWN_ISSUES_NOTE + json.dumps(known_issues)
+        last_err = None
+        for max_tok in [20000, 20000]:  # high ceiling: big reports succeed on 1st try; 2nd attempt is a transient-error retry, not token escalation
+            try:
+                print(f"Pass 1 (extraction) attempt with max_tokens={max_tok}...")
+                msg = client.messages.create(
+                    model="claude-sonnet-4-6",
+                    max_tokens=max_tok,
+                    temperature=0,
+                    system=system,
+                    messages=[{"role": "user", "content": extracted_text}]
+                )
+                raw = clean_raw(msg.content[0].text)
+                pass1_findings = attempt_parse(raw)
+                print(f"Pass 1 succeeded. Severity system found: {pass1_findings.get('severity_system_found')}. Description: {pass1_findings.get('severity_system_description')}")
+                if known_issues:
+                    pass1_findings["urgent_items"] = known_issues.get("urgent_items", [])
+                    pass1_findings["maintenance_items"] = known_issues.get("maintenance_items", [])
+                print(f"  Urgent: {len(pass1_findings.get('urgent_items', []))}  Maintenance: {len(pass1_findings.get('maintenance_items', []))}  Category: {len(pass1_findings.get('category_items', []))}")
+                break
+            except Exception as e:
+                last_err = e
+                retry_msg = 'Retrying with more tokens...' if max_tok < 12000 else 'All retries exhausted.'
+                print(f"Pass 1 failed at max_tokens={max_tok}: {last_err}. {retry_msg}")
+
+        if pass1_findings is None:
+            print("Pass 1 failed entirely — using minimal fallback.")
+            fallback = {
+                "condition": "Needs Attention",
+                "currency": "USD",
+                "location": "Unknown",
+                "address": "Address not found",
+                "urgent_items": [],
+                "maintenance_items": [],
+                "category_items": [],
+                "checklist": [],
+                "budget_now": "~$1,500",
+                "budget_5yr": "~$1,500",
+                "_parse_error": str(last_err)
+            }
+            return json.dumps(fallback)
+
+        if on_pass1:
+            try:
+                on_pass1(json.loads(json.dumps(pass1_findings)))
+            except Exception as e:
+                print(f"Storing Pass 1 findings failed (non-fatal): {e}")
 
     # -------------------------------------------------------------------------
     # PASS 2 — ENRICHMENT
@@ -698,6 +762,53 @@ Return ONLY a valid JSON object. No markdown, no backticks:
     return priced_by_id
 
 
+# AI pricing is split into chunks of this many items, priced concurrently.
+# One 120-item call either truncates its JSON at max_tokens (and loses every
+# item on the second failure) or waits on one very long generation; 25 items
+# comfortably fits the 8000-token ceiling and keeps each call short.
+PRICING_CHUNK_SIZE = 25
+PRICING_MAX_WORKERS = 4
+
+
+def price_findings(items, currency="USD", chunk_size=PRICING_CHUNK_SIZE):
+    """
+    Front door to the cost engine. Findings that land clearly on one
+    COST_TABLE category (see cost_matcher.py — BM25 match, section/trade
+    compatibility, confidence gating) are priced locally in microseconds;
+    only the ambiguous remainder goes through price_findings_with_ai, in
+    fixed-size chunks priced concurrently and merged back by id. A chunk
+    that fails just leaves its items out of the result — the other chunks'
+    prices still come back. Same input/return shape as
+    price_findings_with_ai, so callers can swap one for the other.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from cost_matcher import price_locally
+
+    if not items:
+        return {}
+
+    priced_by_id, remaining = price_locally(items, currency=currency)
+    print(f"Cost fast path: {len(priced_by_id)}/{len(items)} item(s) priced from the table, "
+          f"{len(remaining)} sent to AI pricing.")
+    if not remaining:
+        return priced_by_id
+
+    chunks = [remaining[i:i + chunk_size] for i in range(0, len(remaining), chunk_size)]
+    if len(chunks) == 1:
+        priced_by_id.update(price_findings_with_ai(remaining, currency=currency))
+        return priced_by_id
+
+    print(f"Pricing {len(remaining)} item(s) in {len(chunks)} chunk(s) of up to {chunk_size}...")
+    with ThreadPoolExecutor(max_workers=min(PRICING_MAX_WORKERS, len(chunks))) as pool:
+        futures = [pool.submit(price_findings_with_ai, chunk, currency) for chunk in chunks]
+        for future in as_completed(futures):
+            try:
+                priced_by_id.update(future.result())
+            except Exception as e:
+                print(f"Cost pricing chunk failed: {e}")
+    return priced_by_id
+
+
 def extract_appliance_profile(report_text):
     """
     Text-only extraction of appliance/system ages — the data foundation for
@@ -938,90 +1049,26 @@ def extract_appliance_profile_from_json(report_json):
     return results
 
 
-def generate_care_events(appliance_profile, current_date=None):
+def generate_care_events(appliance_profile, current_date=None, location=None):
     """
     Turns a home's appliance profile (output of extract_appliance_profile)
-    into scheduled CareEvent rows — the one AI call in the whole home-
-    assistant pipeline. Everything downstream (the daily dispatcher) is a
-    plain DB query with zero AI cost, per the trigger-engine design.
-
-    Only appliances with status == "captured" (a real known year) are
-    considered — no reminder gets scheduled off a guess. Claude applies its
-    own knowledge of typical appliance lifespans/service intervals rather
-    than a hardcoded lifespan table, and decides per-appliance whether the
-    age actually warrants a nudge (a 6-year-old dishwasher doesn't need one
-    just because we know its age).
-
-    appliance_profile: [{"appliance": str, "manufactured_year": int, "status": str}]
-    current_date: datetime.date, defaults to today (injectable for testing)
-
-    Returns: [{"appliance": str, "event_type": "age_based"|"seasonal"|"time_based"|"weather_triggered",
-               "due_in_days": int, "recurring_interval_days": int|None, "message": str}]
-    due_in_days is relative to current_date — the caller computes the actual
-    due_date (kept in Python, not trusted to the model's date arithmetic).
-    """
-    import datetime as dt
-
-    today = current_date or dt.date.today()
-    captured = [a for a in appliance_profile if a.get("status") == "captured" and a.get("manufactured_year")]
-    if not captured:
-        return []
-
-    client = create_ai_client()
-
-    def clean_raw(raw):
-        raw = raw.replace("\x00", "").strip()
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[1]
-        if raw.endswith("```"):
-            raw = raw.rsplit("```", 1)[0]
-        return raw.strip()
-
-    ages = [
-        {"appliance": a["appliance"], "manufactured_year": a["manufactured_year"],
-         "age_years": today.year - a["manufactured_year"]}
-        for a in captured
-    ]
-
-    system_prompt = f"""You are a home-maintenance advisor deciding which appliances/systems in a home are due for a maintenance nudge, based on their age.
-
-TODAY'S DATE: {today.isoformat()}
-
-For each appliance below, decide if its age actually warrants a reminder — use your own knowledge of typical appliance/system lifespans and service intervals. Do NOT create an event for every appliance just because we know its age; skip ones that are still young/low-risk for their type (e.g. a 5-year-old dishwasher usually doesn't need a proactive nudge).
+    into scheduled CareEvent rows. Deterministic: a lifespan / service-
+    interval table plus climate-aware seasonal windows (care_rules.py), with
+    template messages — no AI call, so every analysis gets the same
+    schedule for the same appliances in microseconds.
 
-For appliances that DO warrant one:
-- event_type: "age_based" (the age itself triggers it, e.g. "this furnace is old enough to need annual service") or "seasonal" (age plus time of year, e.g. AC tune-up makes most sense in spring)
-- due_in_days: how many days from today this nudge should fire (0 = now, ~90 = a few months out for a seasonal one timed to the right season)
-- recurring_interval_days: if this is an ongoing yearly/seasonal check, the interval to repeat it (e.g. 365); null for a one-time nudge (e.g. "this is old, consider replacement soon")
-- message: the actual nudge text a homeowner would receive by email. Plain, warm, specific to the appliance and its age — not generic. Mention the age. One or two sentences. Do not mention cost estimates (a separate system handles pricing).
+    location: the report's "City, ST" (or full address) for the climate
+    zone; unknown falls back to mid-latitude windows.
 
-Return ONLY valid JSON, no markdown, no backticks:
-
-{{
-  "events": [
-    {{"appliance": "AC Unit", "event_type": "seasonal", "due_in_days": 60, "recurring_interval_days": 365, "message": "..."}}
-  ]
-}}
-
-Appliances with no age-based need for a nudge right now should simply be omitted from "events" — do not include a null/skip entry for them."""
-
-    try:
-        msg = client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=2000,
-            temperature=0,
-            system=system_prompt,
-            messages=[{"role": "user", "content": json.dumps({"appliances": ages})}]
-        )
-        raw = clean_raw(msg.content[0].text)
-        parsed = json.loads(raw)
-        return parsed.get("events", [])
-    except Exception as e:
-        print(f"generate_care_events failed: {e}")
-        return []
+    Returns the same shape the AI version it replaced did (kept as the
+    reference in benchmarks/bench_care_rules.py):
+    [{"appliance", "event_type", "due_in_days", "recurring_interval_days", "message"}]
+    """
+    from care_rules import care_events
+    return care_events(appliance_profile, current_date, location)
 
 
-def generate_realtor_issues_report(report_text, report_url=None):
+def generate_realtor_issues_report(report_text, report_url=None, pricing_memo=None, issues=None, on_pass1=None):
     """
     Two-pass, issues-only pipeline for the realtor tier — cheaper than the
     full buyer pipeline (generate_structured_analysis), but still two calls:
@@ -1044,6 +1091,19 @@ def generate_realtor_issues_report(report_text, report_url=None):
 
     report_text must have been fetched with include_anchors=True for deep
     links to populate; otherwise anchor/deep_link will be null.
+
+    pricing_memo: optional dict shared across calls (realtor bulk mode runs
+    many reports against one). Pass 2 prices only the findings not already
+    in it — keyed by cost_prewarm.finding_hash, so the same finding text in
+    the same section and currency is priced once per batch — and adds what
+    it prices. Safe to share between threads; a finding two reports price
+    at the same moment is just priced twice.
+
+    issues: a Pass 1 result ({"currency", "address", "urgent_items",
+    "attention_items"}) another run already extracted from this report
+    (extracted_findings.py) — Pass 1 is skipped and only pricing runs.
+    on_pass1: called with a copy of a freshly extracted Pass 1 result, so
+    the caller can store it for the next run.
     """
     from cost_lookup import COST_TABLE
 
@@ -1098,35 +1158,41 @@ Return ONLY a valid JSON object. No markdown, no backticks:
   ]
 }}"""
 
-    result = None
-    last_err = None
-    for max_tok in [12000, 12000]:  # ceiling doesn't affect cost (billed on actual tokens used, not the cap) —
-                                     # 4000 was wrong: a report with more issues than our test case truncates
-                                     # mid-JSON, fails to parse, and retries at the SAME cap, doubling cost/time
-                                     # for nothing. High ceiling here mirrors the buyer pipeline's Pass 1/2 fix.
-        try:
-            print(f"Realtor issues-only pass attempt with max_tokens={max_tok}...")
-            msg = client.messages.create(
-                model="claude-sonnet-4-6",
-                max_tokens=max_tok,
-                temperature=0,
-                system=system_prompt,
-                messages=[{"role": "user", "content": report_text}]
-            )
-            raw = clean_raw(msg.content[0].text)
-            result = attempt_parse(raw)
-            print(f"Realtor issues-only pass succeeded. Urgent: {len(result.get('urgent_items', []))}  Attention: {len(result.get('attention_items', []))}")
-            print(f"  Tokens — input: {msg.usage.input_tokens}  output: {msg.usage.output_tokens}")
-            break
-        except Exception as e:
-            last_err = e
-            print(f"Realtor issues-only pass failed at max_tokens={max_tok}: {last_err}.")
-
+    result = json.loads(json.dumps(issues)) if issues is not None else None
     if result is None:
-        return json.dumps({
-            "currency": "USD", "address": "Address not found",
-            "urgent_items": [], "attention_items": [], "_parse_error": str(last_err)
-        })
+        last_err = None
+        for max_tok in [12000, 12000]:  # ceiling doesn't affect cost (billed on actual tokens used, not the cap) —
+                                         # 4000 was wrong: a report with more issues than our test case truncates
+                                         # mid-JSON, fails to parse, and retries at the SAME cap, doubling cost/time
+                                         # for nothing. High ceiling here mirrors the buyer pipeline's Pass 1/2 fix.
+            try:
+                print(f"Realtor issues-only pass attempt with max_tokens={max_tok}...")
+                msg = client.messages.create(
+                    model="claude-sonnet-4-6",
+                    max_tokens=max_tok,
+                    temperature=0,
+                    system=system_prompt,
+                    messages=[{"role": "user", "content": report_text}]
+                )
+                raw = clean_raw(msg.content[0].text)
+                result = attempt_parse(raw)
+                print(f"Realtor issues-only pass succeeded. Urgent: {len(result.get('urgent_items', []))}  Attention: {len(result.get('attention_items', []))}")
+                print(f"  Tokens — input: {msg.usage.input_tokens}  output: {msg.usage.output_tokens}")
+                break
+            except Exception as e:
+                last_err = e
+                print(f"Realtor issues-only pass failed at max_tokens={max_tok}: {last_err}.")
+
+        if result is None:
+            return json.dumps({
+                "currency": "USD", "address": "Address not found",
+                "urgent_items": [], "attention_items": [], "_parse_error": str(last_err)
+            })
+        if on_pass1:
+            try:
+                on_pass1(json.loads(json.dumps(result)))
+            except Exception as e:
+                print(f"Storing realtor Pass 1 findings failed (non-fatal): {e}")
 
     currency = result.get("currency", "USD")
     urgent = result.get("urgent_items", [])
@@ -1146,13 +1212,24 @@ Return ONLY a valid JSON object. No markdown, no backticks:
 
     # PASS 2 — judgment-based pricing, shared with the IG cost-estimate API
     # and the buyer dashboard so every surface prices off the same reasoning.
-    # See price_findings_with_ai for why this isn't a blind table lookup.
-    priced_by_id = price_findings_with_ai(
-        [{"id": i["_id"], "name": i.get("name"), "finding": i.get("finding"),
-          "section": i.get("section"), "category_hint": i.get("category_key")}
-         for i in urgent + attention],
-        currency=currency
-    )
+    # See price_findings_with_ai for why this isn't a blind table lookup;
+    # price_findings only skips the AI for confidently-matched items.
+    pricing_input = [{"id": i["_id"], "name": i.get("name"), "finding": i.get("finding"),
+                      "section": i.get("section"), "category_hint": i.get("category_key")}
+                     for i in urgent + attention]
+    if pricing_memo is None:
+        priced_by_id = price_findings(pricing_input, currency=currency)
+    else:
+        from cost_prewarm import finding_hash
+        memo_keys = {e["id"]: finding_hash(e["finding"], e["section"], currency) for e in pricing_input}
+        priced_by_id = {e["id"]: pricing_memo[memo_keys[e["id"]]] for e in pricing_input
+                        if memo_keys[e["id"]] in pricing_memo}
+        unpriced = [e for e in pricing_input if e["id"] not in priced_by_id]
+        print(f"Pricing memo: {len(priced_by_id)}/{len(pricing_input)} item(s) already priced in this batch.")
+        fresh = price_findings(unpriced, currency=currency) if unpriced else {}
+        for item_id, p in fresh.items():
+            pricing_memo[memo_keys[item_id]] = p
+        priced_by_id.update(fresh)
 
     def apply_price(item):
         p = priced_by_id.get(item["_id"])
@@ -1216,20 +1293,19 @@ Do NOT include issues unrelated to {issue_type}."""
     return message.content[0].text
 
 
-def send_contractor_email(contractor_email, contractor_name, customer_name, customer_email, customer_phone, property_address, issue_type, punchlist):
-    """Send punchlist email to contractor with customer quote request"""
+def send_contractor_email(contractor_email, contractor_name, customer_name, customer_email, customer_phone, property_address, issue_type, punchlist, idempotency_key=None):
+    """
+    Queue the punchlist email to a contractor with the customer's quote
+    request (email_queue.py) and return its OutboundEmail id — the request
+    doesn't wait on SMTP; a background sender delivers it, with retries.
+    idempotency_key defaults to the email's content, so the same request
+    submitted twice sends once; pass e.g. the Lead id to key on that instead.
+    """
+    import email_queue
+
     try:
-        # Get email config from environment
-        mail_server = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
-        mail_port = int(os.getenv('MAIL_PORT', 587))
-        mail_username = os.getenv('MAIL_USERNAME')
-        mail_password = os.getenv('MAIL_PASSWORD')
-        mail_from = os.getenv('MAIL_DEFAULT_SENDER', mail_username)
-        
-        # Validate email config
-        if not mail_username or not mail_password:
-            raise ValueError("Email credentials not configured. Set MAIL_USERNAME and MAIL_PASSWORD in environment.")
-        
+        mail_from = os.getenv('MAIL_DEFAULT_SENDER', os.getenv('MAIL_USERNAME'))
+
         # Create message
         msg = MIMEMultipart('alternative')
         msg['From'] = mail_from
@@ -1304,56 +1380,55 @@ https://lot7.ai
         msg.attach(part1)
         msg.attach(part2)
         
-        # Connect to SMTP server and send
-        print(f"Connecting to {mail_server}:{mail_port}...")
-        server = smtplib.SMTP(mail_server, mail_port)
-        server.starttls()
-        print(f"Logging in as {mail_username}...")
-        server.login(mail_username, mail_password)
-        print(f"Sending email to {contractor_email}...")
-        server.send_message(msg)
-        server.quit()
-        
-        print(f"Email successfully sent to {contractor_email}")
-        return True
+        key = idempotency_key or email_queue.content_key(
+            'contractor_lead', contractor_email, customer_email, property_address, issue_type, punchlist)
+        email_id = email_queue.enqueue(msg, 'contractor_lead', key)
+        print(f"Email to {contractor_email} queued ({email_id})")
+        return email_id
 
     except Exception as e:
-        print(f"Error sending email: {str(e)}")
+        print(f"Error queuing email: {str(e)}")
         raise
 
 
-def send_care_event_email(recipient_email, appliance, message):
+def open_smtp_connection():
     """
-    Send a single home-maintenance nudge (a CareEvent's message). Called only
-    by the daily dispatcher (send_care_reminders.py) — never does its own AI
-    call, just sends text a prior AI pass already composed.
+    Connect to MAIL_SERVER, STARTTLS and log in — the expensive part of every
+    send (several round trips plus a TLS handshake). Returns the connected
+    server; the caller sends as many messages as it likes and quit()s it.
+    MAIL_USE_TLS=false skips STARTTLS (local SMTP stubs only).
     """
-    try:
-        mail_server = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
-        mail_port = int(os.getenv('MAIL_PORT', 587))
-        mail_username = os.getenv('MAIL_USERNAME')
-        mail_password = os.getenv('MAIL_PASSWORD')
-        mail_from = os.getenv('MAIL_DEFAULT_SENDER', mail_username)
+    mail_server = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+    mail_port = int(os.getenv('MAIL_PORT', 587))
+    mail_username = os.getenv('MAIL_USERNAME')
+    mail_password = os.getenv('MAIL_PASSWORD')
 
-        if not mail_username or not mail_password:
-            raise ValueError("Email credentials not configured. Set MAIL_USERNAME and MAIL_PASSWORD in environment.")
+    if not mail_username or not mail_password:
+        raise ValueError("Email credentials not configured. Set MAIL_USERNAME and MAIL_PASSWORD in environment.")
 
-        msg = MIMEMultipart('alternative')
-        msg['From'] = mail_from
-        msg['To'] = recipient_email
-        msg['Subject'] = f'Home reminder: {appliance}'
+    server = smtplib.SMTP(mail_server, mail_port, timeout=60)
+    if os.getenv('MAIL_USE_TLS', 'true').lower() != 'false':
+        server.starttls()
+    server.login(mail_username, mail_password)
+    return server
 
-        text = f"""{message}
+
+def _care_email(recipient_email, subject, text_body, html_body):
+    msg = MIMEMultipart('alternative')
+    msg['From'] = os.getenv('MAIL_DEFAULT_SENDER', os.getenv('MAIL_USERNAME'))
+    msg['To'] = recipient_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(f"""{text_body}
 
 --
 Lot7 AI Home Assistant
 https://lot7.ai
-"""
-        html = f"""
+""", 'plain'))
+    msg.attach(MIMEText(f"""
 <html>
 <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
     <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-        <p>{message}</p>
+        {html_body}
         <p style="margin-top: 40px; color: #6b7280; font-size: 12px;">
             <strong>Lot7 AI Home Assistant</strong><br>
             https://lot7.ai
@@ -1361,23 +1436,59 @@ https://lot7.ai
     </div>
 </body>
 </html>
-"""
-        part1 = MIMEText(text, 'plain')
-        part2 = MIMEText(html, 'html')
-        msg.attach(part1)
-        msg.attach(part2)
+""", 'html'))
+    return msg
 
-        server = smtplib.SMTP(mail_server, mail_port)
-        server.starttls()
-        server.login(mail_username, mail_password)
-        server.send_message(msg)
-        server.quit()
 
-        print(f"Care event email sent to {recipient_email}: {appliance}")
-        return True
+def build_care_event_email(recipient_email, appliance, message):
+    """The single-reminder email (a CareEvent's message), ready to send."""
+    return _care_email(recipient_email, f'Home reminder: {appliance}', message, f"<p>{message}</p>")
+
+
+def build_care_digest_email(recipient_email, events):
+    """
+    One email for everything due for a recipient today. events is a list of
+    (address, appliance, message); a single event gets the plain one-reminder
+    email, several are grouped under each home's address (realtors and
+    multi-home buyers get one email, not one per appliance).
+    """
+    if len(events) == 1:
+        return build_care_event_email(recipient_email, events[0][1], events[0][2])
+    by_home = {}
+    for address, appliance, message in events:
+        by_home.setdefault(address or 'Your home', []).append((appliance, message))
+    text_parts, html_parts = [], []
+    for address, items in by_home.items():
+        text_parts.append(address + '\n' + '\n'.join(f"- {a}: {m}" for a, m in items))
+        html_parts.append(f'<h3 style="color: #1f2937;">{escape(address)}</h3><ul>'
+                          + ''.join(f"<li><strong>{escape(a)}</strong>: {escape(m)}</li>" for a, m in items)
+                          + '</ul>')
+    subject = f'Home reminders: {len(events)} items' + (f' for {next(iter(by_home))}' if len(by_home) == 1 else '')
+    return _care_email(recipient_email, subject, '\n\n'.join(text_parts), '\n'.join(html_parts))
+
+
+def send_care_event_email(recipient_email, appliance, message, idempotency_key=None):
+    """
+    Queue a single home-maintenance nudge (a CareEvent's message) on the
+    outbound email queue (email_queue.py) and return its OutboundEmail id.
+    The daily dispatcher (send_care_reminders.py) doesn't use this — it
+    sends digests over its own reused connections — but one-off callers
+    can. idempotency_key defaults to recipient + text + today's date, so the
+    same nudge queued twice in a day goes out once.
+    """
+    import datetime as dt
+    import email_queue
+
+    try:
+        key = idempotency_key or email_queue.content_key(
+            'care_event', recipient_email, appliance, message, dt.date.today().isoformat())
+        email_id = email_queue.enqueue(build_care_event_email(recipient_email, appliance, message),
+                                       'care_event', key)
+        print(f"Care event email queued for {recipient_email}: {appliance}")
+        return email_id
 
     except Exception as e:
-        print(f"Error sending care event email: {str(e)}")
+        print(f"Error queuing care event email: {str(e)}")
         raise
 
 
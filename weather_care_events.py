@@ -0,0 +1,263 @@
+"""
+Weather-triggered care events: read a regional weather feed, match its
+alerts (hard freeze, heat wave, heavy rain) against every home with alerts
+on and a relevant appliance, and bulk-insert a one-time CareEvent
+(eventType 'weather_triggered') per hit for the daily dispatcher
+(send_care_reminders.py) to send. Meant to run on a schedule just before
+the dispatcher.
+
+Feed: a JSON file path or http(s) URL (--feed= or WEATHER_FEED), either a
+list of alerts or {"alerts": [...]}:
+
+    {"region": "IL", "type": "hard_freeze", "start": "2026-12-03", "end": "2026-12-05",
+     "headline": "Lows near 5°F Wednesday and Thursday nights"}
+
+region is a two-letter state / province code (care_rules.region_code),
+type a WEATHER_RULES key; end and headline are optional. Alerts of an
+unknown type, or already over, are skipped.
+
+The scan never walks home rows in Python: one query pulls (id, region,
+applianceFlags) for the alert-enabled homes in the feed's regions into
+NumPy arrays, grouped by region with one argsort, and each alert x rule is
+a vectorized AND of the region's slice against the rule's appliance bits.
+Only the matches become rows, inserted with executemany in chunks, one
+transaction per run. Each event records its alert type
+(CareEvent.alertType), and a home that already has a weather event for the
+same alert type, appliance and start date doesn't get a second one — so
+re-running on an updated feed only adds what's new, while two alerts that
+start the same day and hit the same appliance (a freeze and heavy rain both
+reach the sump pump) each send their own advice.
+
+Homes need InspectionReport.region / applianceFlags, set when the appliance
+profile is extracted; reports analyzed before that: --backfill once.
+
+Usage:
+    python weather_care_events.py --feed=weather.json
+    python weather_care_events.py --feed=https://feeds.example.com/alerts.json --dry-run
+    python weather_care_events.py --feed=weather.json --as-of=2026-12-02
+    python weather_care_events.py --backfill          # region/applianceFlags for older reports
+"""
+
+import json
+import os
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+import requests
+from sqlalchemy import bindparam, select
+
+from app import app
+from models import db, CareEvent, InspectionReport
+from care_rules import APPLIANCE_BITS, appliance_flags, region_code
+
+# Alerts are sent this many days before they start (sooner if already inside)
+WEATHER_LEAD_DAYS = int(os.getenv('WEATHER_LEAD_DAYS', 2))
+INSERT_CHUNK = 5000
+
+_HEATING = APPLIANCE_BITS['furnace'] | APPLIANCE_BITS['boiler'] | APPLIANCE_BITS['heat pump']
+
+# type -> (fallback headline, [(appliance bits, CareEvent.appliance, advice)])
+# A home gets one event per rule whose bits it has any of.
+WEATHER_RULES = {
+    'hard_freeze': ('A hard freeze is forecast for your area', [
+        (_HEATING, 'Heating system',
+         "Make sure the heat is working before it arrives and keep the thermostat at 55°F or higher, even "
+         "if you're away — a heating failure during a freeze is how pipes burst."),
+        (APPLIANCE_BITS['tankless water heater'], 'Tankless water heater',
+         "If it's on an exterior wall or in an unheated space, keep it powered (its freeze protection runs "
+         "on electricity) or drain it as the manual describes."),
+        (APPLIANCE_BITS['sump pump'], 'Sump pump',
+         "Check that the discharge line outside is clear — a frozen line backs water up into the pit."),
+    ]),
+    'heat_wave': ('A heat wave is forecast for your area', [
+        (APPLIANCE_BITS['air conditioner'] | APPLIANCE_BITS['heat pump'], 'Air conditioner',
+         "Swap the air filter and clear leaves and debris from around the outdoor unit now — a clogged "
+         "filter is the most common reason an AC quits on the hottest day."),
+    ]),
+    'heavy_rain': ('Heavy rain is forecast for your area', [
+        (APPLIANCE_BITS['sump pump'], 'Sump pump',
+         "Test it now (pour a bucket of water into the pit and watch it switch on) and make sure the "
+         "discharge line is clear and pointed away from the house."),
+    ]),
+}
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def load_feed(source):
+    """Alerts from a file path or URL, normalized: region upper-cased, dates
+    parsed. Malformed entries are dropped with a note."""
+    if source.startswith(('http://', 'https://')):
+        resp = requests.get(source, timeout=30)
+        resp.raise_for_status()
+        data = resp.json()
+    else:
+        with open(source, encoding='utf-8') as f:
+            data = json.load(f)
+    alerts = []
+    for a in (data.get('alerts', []) if isinstance(data, dict) else data):
+        try:
+            start = _as_date(a['start'])
+            alerts.append({'region': str(a['region']).strip().upper(), 'type': a['type'], 'start': start,
+                           'end': _as_date(a['end']) if a.get('end') else start,
+                           'headline': (a.get('headline') or '').strip()})
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"  Skipping malformed alert {a!r}: {e}")
+    return alerts
+
+
+def load_homes(regions):
+    """(ids, region codes, region names, flags) for alert-enabled homes with
+    at least one known appliance in `regions` — ids as a Python list, the rest
+    NumPy arrays."""
+    # Core select, not ORM rows — this can be a million of them. `== True`
+    # (not IS) so the partial index's predicate matches and it's index-only
+    rows = db.session.execute(
+        select(InspectionReport.id, InspectionReport.region, InspectionReport.applianceFlags)
+        .where(InspectionReport.region.in_(sorted(regions)), InspectionReport.alertsEnabled == True,  # noqa: E712
+               InspectionReport.applianceFlags > 0)).all()
+    if not rows:
+        return [], np.zeros(0, dtype=np.intp), np.array([], dtype=str), np.zeros(0, dtype=np.int64)
+    ids, home_regions, flags = zip(*rows)
+    names, codes = np.unique(np.array(home_regions), return_inverse=True)
+    return list(ids), codes, names, np.array(flags, dtype=np.int64)
+
+
+def scan(alerts, codes, names, flags):
+    """[(alert, appliance, advice, home indexes)] — every home each alert's
+    rules hit, as index arrays into load_homes' output."""
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+    slot = {name: i for i, name in enumerate(names.tolist())}
+    hits = []
+    for alert in alerts:
+        i = slot.get(alert['region'])
+        if i is None:
+            continue
+        homes = order[bounds[i]:bounds[i + 1]]
+        home_flags = flags[homes]
+        for bits, appliance, advice in WEATHER_RULES[alert['type']][1]:
+            matched = homes[(home_flags & bits) != 0]
+            if len(matched):
+                hits.append((alert, appliance, advice, matched))
+    return hits
+
+
+def _message(alert, advice, today):
+    headline = alert['headline'] or WEATHER_RULES[alert['type']][0]
+    start = alert['start']
+    when = 'starting today' if start <= today else f"starting {start.strftime('%a, %b')} {start.day}"
+    return f"Weather alert: {headline.rstrip('.')} ({when}). {advice}"
+
+
+def _alert_type_of(message):
+    """Alert type of a weather event stored before alertType was — read back
+    from the rule advice its message ends with."""
+    for alert_type, (_, rules) in WEATHER_RULES.items():
+        if any(message.endswith(advice) for _, _, advice in rules):
+            return alert_type
+    return None
+
+
+def run(source, today, dry_run=False):
+    """Returns (alerts used, events created)."""
+    alerts = [a for a in load_feed(source) if a['type'] in WEATHER_RULES and a['end'] >= today]
+    # only alerts inside the lead window; later ones get picked up on a later run
+    alerts = [a for a in alerts if a['start'] - timedelta(days=WEATHER_LEAD_DAYS) <= today]
+    if not alerts:
+        return 0, 0
+    ids, codes, names, flags = load_homes({a['region'] for a in alerts})
+    hits = scan(alerts, codes, names, flags)
+
+    existing = {(r.reportId, r.alertType or _alert_type_of(r.message), r.appliance, r.dueDate)
+                for r in db.session.execute(
+                    select(CareEvent.reportId, CareEvent.alertType, CareEvent.appliance, CareEvent.dueDate,
+                           CareEvent.message)
+                    .where(CareEvent.eventType == 'weather_triggered',
+                           CareEvent.dueDate.in_(sorted({a['start'] for a in alerts}))))}
+    now = datetime.utcnow()
+    rows = []
+    for alert, appliance, advice, matched in hits:
+        message = _message(alert, advice, today)
+        before = len(rows)
+        for i in matched.tolist():
+            key = (ids[i], alert['type'], appliance, alert['start'])
+            if key in existing:
+                continue
+            existing.add(key)
+            rows.append({'id': str(uuid.uuid4()), 'reportId': ids[i], 'appliance': appliance,
+                         'eventType': 'weather_triggered', 'alertType': alert['type'],
+                         'dueDate': alert['start'], 'nextDueDate': today,
+                         'recurringIntervalDays': None, 'message': message, 'sent': False, 'createdAt': now})
+        print(f"  {alert['region']} {alert['type']} from {alert['start'].isoformat()}, {appliance}: "
+              f"{len(matched)} home(s), {len(rows) - before} new")
+
+    if dry_run:
+        return len(alerts), len(rows)
+    for i in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(CareEvent.__table__.insert(), rows[i:i + INSERT_CHUNK])
+    db.session.commit()
+    return len(alerts), len(rows)
+
+
+def backfill(batch_size=1000):
+    """region / applianceFlags for reports that have an appliance profile but
+    predate the columns. Keyset batches, one commit each; updatedAt is left
+    alone (it keys the PDF cache). Returns reports updated."""
+    reports = InspectionReport.__table__
+    stmt = (reports.update().where(reports.c.id == bindparam('_id'))
+            .values(region=bindparam('_region'), applianceFlags=bindparam('_flags'),
+                    updatedAt=reports.c.updatedAt))
+    last = ''
+    done = 0
+    while True:
+        rows = (db.session.query(InspectionReport.id, InspectionReport.location, InspectionReport.address,
+                                 InspectionReport.appliance_profile_json)
+                .filter(InspectionReport.id > last, InspectionReport.applianceFlags.is_(None),
+                        InspectionReport.appliance_profile_json.isnot(None))
+                .order_by(InspectionReport.id).limit(batch_size).all())
+        if not rows:
+            return done
+        last = rows[-1].id
+        params = []
+        for r in rows:
+            try:
+                profile = json.loads(r.appliance_profile_json)
+            except ValueError:
+                profile = []
+            params.append({'_id': r.id, '_region': region_code(r.location or r.address),
+                           '_flags': appliance_flags(profile)})
+        db.session.execute(stmt, params)
+        db.session.commit()
+        done += len(rows)
+        print(f"  through report {last}: {done} updated")
+
+
+def main():
+    if '--backfill' in sys.argv:
+        batch = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--batch=')), 1000)
+        with app.app_context():
+            print(f"Done — weather-scan keys set on {backfill(batch)} report(s).")
+        return
+    source = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--feed=')), os.getenv('WEATHER_FEED'))
+    if not source:
+        print(__doc__)
+        sys.exit(1)
+    as_of = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--as-of=')), None)
+    today = _as_date(as_of) if as_of else date.today()
+    dry_run = '--dry-run' in sys.argv
+    with app.app_context():
+        n_alerts, n_events = run(source, today, dry_run)
+    print(f"Done — {n_alerts} active alert(s), {n_events} weather event(s) "
+          f"{'would be ' if dry_run else ''}created as of {today.isoformat()}.")
+
+
+if __name__ == '__main__':
+    main()